@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Oturum ajanının boştaki işlemci ve bellek kullanımı ölçümü.
+
+Kurulumun ürettiği ajanı geçici bir önbellek ve ev dizini ile --kuru kipinde
+(arka plan ayarlarına dokunmadan) başlatır. Açılıştaki ilk uygulamadan sonra
+--sure saniye boyunca /proc üzerinden işlemci süresini, RSS'i ve uyanma
+(gönüllü bağlam değişimi) sayısını örnekler. Son olarak önbelleğe yeni bir resim
+koyup ajanın bunu fark edip uygulama süresini ölçer.
+
+Örnek:  python3 etap_ajan_olcumu.py --sure 60
+"""
+
+import argparse
+import datetime
+import os
+import select
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from etap_arkaplan_kurulum import NFSInstaller
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+
+def process_sample(pid):
+    """(işlemci süresi sn, RSS kB, en yüksek RSS kB, gönüllü bağlam değişimi)"""
+    with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / CLK_TCK
+    status = {}
+    with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            status[key] = value.split()[0] if value.split() else "0"
+    return cpu, int(status["VmRSS"]), int(status["VmHWM"]), int(status["voluntary_ctxt_switches"])
+
+
+def wait_for_line(proc, prefix, timeout):
+    """Ajanın çıktısında `prefix` ile başlayan satırı bekler; geçen süreyi (sn) veya None döner."""
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        ready, _, _ = select.select([proc.stdout], [], [], timeout)
+        if not ready:
+            break
+        line = proc.stdout.readline()
+        if not line:
+            break
+        if line.startswith(prefix):
+            return time.monotonic() - start
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Oturum ajanının boştaki işlemci, bellek ve uyanma sayısını ölçer."
+    )
+    parser.add_argument("--sure", type=float, default=60,
+                        help="Boşta ölçüm süresi, saniye (varsayılan: 60)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="etap-ajan-olcumu-")
+    # Önbellek ajanın kendi resim dizinidir (HOME/.cache/etap-arka-plan): root olmadan
+    # çalıştırıldığında da resim bu kullanıcının dosyası olarak seçilir
+    cache_dir = os.path.join(workdir, ".cache", "etap-arka-plan")
+    os.makedirs(cache_dir)
+    week = "%02d" % datetime.date.today().isocalendar()[1]
+    data = b"\xff\xd8" + os.urandom(200000) + b"\xff\xd9"
+    # Ajan yalnızca anahtarı içeriğiyle tutan resmi seçer: boyut-mtime anahtarında boyut
+    image = os.path.join(cache_dir, f"week{week}-{len(data)}-1.jpg")
+    with open(image, "wb") as f:
+        f.write(data)
+
+    agent_path = os.path.join(workdir, "etap-arka-plan-ajani")
+    with open(agent_path, "w", encoding="utf-8") as f:
+        f.write(NFSInstaller([]).render_agent())
+
+    env = dict(os.environ, HOME=workdir)
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, "-u", agent_path, "--onbellek-dizini", cache_dir, "--kuru"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        env=env
+    )
+    try:
+        if wait_for_line(proc, "Uygulanacak:", 30) is None:
+            print("HATA: ajan ilk resmi uygulamadı (gi/Gio kurulu mu?)")
+            print(proc.stdout.read() if proc.poll() is not None else "")
+            return 1
+        first_apply = time.monotonic() - start
+        time.sleep(1)
+
+        cpu0, _, _, wakeups0 = process_sample(proc.pid)
+        time.sleep(args.sure)
+        cpu1, rss, hwm, wakeups1 = process_sample(proc.pid)
+
+        # Önbelleğe yeni sürüm gelince (zamanlayıcıdaki gibi geçici ad + rename) fark edilme süresi
+        tmp = os.path.join(cache_dir, f".week{week}.tmp")
+        shutil.copyfile(image, tmp)
+        os.replace(tmp, os.path.join(cache_dir, f"week{week}-{len(data)}-2.jpg"))
+        reaction = wait_for_line(proc, "Uygulanacak:", 10)
+
+        print(f"İlk uygulama (başlatmadan):  {first_apply * 1000:8.0f} ms")
+        print(f"Boşta işlemci ({args.sure:.0f} sn):      {(cpu1 - cpu0) * 1000:8.0f} ms "
+              f"(%{(cpu1 - cpu0) / args.sure * 100:.3f})")
+        print(f"Boşta uyanma:                {wakeups1 - wakeups0:8d} "
+              f"({(wakeups1 - wakeups0) / args.sure * 60:.1f}/dk)")
+        print(f"RSS / en yüksek RSS:         {rss / 1024:8.1f} / {hwm / 1024:.1f} MB")
+        if reaction is None:
+            print("Yeni resme tepki:            alınamadı")
+        else:
+            print(f"Yeni resme tepki:            {reaction * 1000:8.0f} ms")
+    finally:
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
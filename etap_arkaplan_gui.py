@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kurulum pencerelerinin (NFS, Windows CIFS, HTTP) ortak GTK parçaları: açıklama,
+Kur / Uygula ve İptal düğmeleri, kurulumu arka planda çalıştıran iş parçacığı ve
+satırları kare başına bir kez yazan, boyu sınırlı log alanı. Her pencere yalnızca
+kendi form alanlarını ve on_apply_clicked'i tanımlar.
+"""
+
+import collections
+import threading
+
+import gi
+gi.require_version("Gtk", "3.0")
+from gi.repository import GLib, Gtk
+
+# Log alanında tutulacak en fazla satır; daha eskileri silinir
+LOG_MAX_LINES = 2000
+
+
+class InstallerWindow(Gtk.Window):
+    def __init__(self, title, width, height):
+        super().__init__(title=title)
+        self.set_border_width(10)
+        self.set_default_size(width, height)
+
+        # Form alanları alt sınıflarda bu ızgaraya eklenir
+        self.grid = Gtk.Grid(column_spacing=10, row_spacing=8)
+        self.add(self.grid)
+
+        # Kurulum iş parçacığından gelen satırlar burada birikir ve kare başına
+        # bir kez arayüze aktarılır
+        self.log_queue = collections.deque(maxlen=LOG_MAX_LINES)
+        self.log_lock = threading.Lock()
+        self.log_flush_pending = False
+        self.cancel_event = threading.Event()
+
+    def attach_install_controls(self, row, info_text):
+        """Form alanlarının altına açıklamayı, düğmeleri ve log alanını `row` satırından başlayarak ekler."""
+        grid = self.grid
+
+        # Açıklama
+        info = Gtk.Label(label=info_text, xalign=0)
+        info.set_line_wrap(True)
+        grid.attach(info, 0, row, 2, 1)
+        row += 1
+
+        # Kur / Uygula ve İptal butonları
+        self.btn_apply = Gtk.Button(label="Kur / Uygula")
+        self.btn_apply.connect("clicked", self.on_apply_clicked)
+        grid.attach(self.btn_apply, 0, row, 1, 1)
+
+        self.btn_cancel = Gtk.Button(label="İptal")
+        self.btn_cancel.set_sensitive(False)
+        self.btn_cancel.connect("clicked", self.on_cancel_clicked)
+        grid.attach(self.btn_cancel, 1, row, 1, 1)
+        row += 1
+
+        # Çıktı alanı
+        self.textview = Gtk.TextView()
+        self.textview.set_editable(False)
+        self.textview.set_wrap_mode(Gtk.WrapMode.WORD)
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
+        scrolled.add(self.textview)
+        grid.attach(scrolled, 0, row, 2, 1)
+
+        # Kaydırma için tek bir kalıcı işaret; her satırda yenisi oluşturulmaz
+        buf = self.textview.get_buffer()
+        self.log_end_mark = buf.create_mark("log-end", buf.get_end_iter(), False)
+
+    def log(self, message: str):
+        """Log satırını kuyruğa ekle; herhangi bir iş parçacığından çağrılabilir."""
+        with self.log_lock:
+            self.log_queue.append(message)
+            if self.log_flush_pending:
+                return
+            self.log_flush_pending = True
+        GLib.idle_add(self.schedule_log_flush)
+
+    def schedule_log_flush(self):
+        """Biriken satırları bir sonraki karede tek seferde yazdırmak için planla."""
+        self.textview.add_tick_callback(self.flush_log)
+        return False
+
+    def flush_log(self, widget, frame_clock):
+        """Kuyruktaki satırları log alanına yaz, eski satırları buda ve aşağı kaydır."""
+        with self.log_lock:
+            lines = list(self.log_queue)
+            self.log_queue.clear()
+            self.log_flush_pending = False
+
+        if lines:
+            buf = self.textview.get_buffer()
+            buf.insert(buf.get_end_iter(), "\n".join(lines) + "\n")
+
+            excess = buf.get_line_count() - LOG_MAX_LINES
+            if excess > 0:
+                buf.delete(buf.get_start_iter(), buf.get_iter_at_line(excess))
+
+            buf.move_mark(self.log_end_mark, buf.get_end_iter())
+            self.textview.scroll_mark_onscreen(self.log_end_mark)
+        return GLib.SOURCE_REMOVE
+
+    def clear_log(self):
+        """Log alanını ve henüz yazılmamış satırları temizle."""
+        with self.log_lock:
+            self.log_queue.clear()
+        self.textview.get_buffer().set_text("")
+
+    def on_apply_clicked(self, button):
+        """Form alanlarını doğrular, kurulum nesnesini oluşturur ve start_install'a verir."""
+        raise NotImplementedError
+
+    def on_cancel_clicked(self, button):
+        self.cancel_event.set()
+        self.btn_cancel.set_sensitive(False)
+        self.log(">>> İptal ediliyor...")
+
+    def start_install(self, installer):
+        """Düğmeleri kilitler ve kurulumu arka plan iş parçacığında başlatır."""
+        self.btn_apply.set_sensitive(False)
+        self.btn_cancel.set_sensitive(True)
+        self.cancel_event.clear()
+
+        # Kurulum adımları arayüzü kilitlememesi için arka planda çalışır
+        worker = threading.Thread(target=self.run_install, args=(installer,), daemon=True)
+        worker.start()
+
+    def run_install(self, installer):
+        """Kurulumu arka plan iş parçacığında çalıştırır, bitince düğmeleri geri açar."""
+        try:
+            installer.install()
+        finally:
+            GLib.idle_add(self.on_install_finished, installer)
+
+    def on_install_finished(self, installer):
+        self.btn_apply.set_sensitive(True)
+        self.btn_cancel.set_sensitive(False)
+        return False
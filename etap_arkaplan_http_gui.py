@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import gi
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk
+
+from etap_arkaplan_gui import InstallerWindow
+from etap_arkaplan_kurulum import HTTP_TIMEOUT, HTTPInstaller, http_mirrors
+
+
+class EtapArkaPlanHTTPGUI(InstallerWindow):
+    def __init__(self):
+        super().__init__("ETAP Haftalık Arka Plan (HTTP) Kurulumu", 650, 420)
+        grid = self.grid
+
+        row = 0
+
+        # Sunucu IP; farklı portu veya yolu olan ayna tam adresle (http://IP:8080/yol) yazılabilir
+        grid.attach(Gtk.Label(label="Sunucu IP (aynalar virgülle):", xalign=0), 0, row, 1, 1)
+        self.entry_ip = Gtk.Entry()
+        self.entry_ip.set_text("192.168.122.40")
+        grid.attach(self.entry_ip, 1, row, 1, 1)
+        row += 1
+
+        # Sunucuda resimlerin sunulduğu yol
+        grid.attach(Gtk.Label(label="Sunucudaki Yol (URL):", xalign=0), 0, row, 1, 1)
+        self.entry_path = Gtk.Entry()
+        # Örn: http://192.168.122.40/arka-plan/week07.jpg için /arka-plan
+        self.entry_path.set_text("/arka-plan")
+        grid.attach(self.entry_path, 1, row, 1, 1)
+        row += 1
+
+        # Önceden indirilecek hafta sayısı (bu haftaya ek olarak)
+        grid.attach(Gtk.Label(label="Önceden İndirilecek Hafta Sayısı:", xalign=0), 0, row, 1, 1)
+        self.entry_prefetch = Gtk.Entry()
+        self.entry_prefetch.set_text("2")
+        grid.attach(self.entry_prefetch, 1, row, 1, 1)
+        row += 1
+
+        # Sunucu okumalarının tahtalara yayılacağı süre (saniye)
+        grid.attach(Gtk.Label(label="Sunucu Erişim Penceresi (sn):", xalign=0), 0, row, 1, 1)
+        self.entry_window = Gtk.Entry()
+        self.entry_window.set_text("1800")
+        grid.attach(self.entry_window, 1, row, 1, 1)
+        row += 1
+
+        # Tahtaların her HTTP isteği için bekleyeceği en uzun süre
+        grid.attach(Gtk.Label(label="İstek Zaman Aşımı (sn):", xalign=0), 0, row, 1, 1)
+        self.entry_timeout = Gtk.Entry()
+        self.entry_timeout.set_text(str(HTTP_TIMEOUT))
+        grid.attach(self.entry_timeout, 1, row, 1, 1)
+        row += 1
+
+        # Ön kontrolden sonra isteğe bağlı deneme indirmesi ve koşullu istek (304) testi
+        self.chk_download_test = Gtk.CheckButton(
+            label="Ön kontrolden sonra haftanın resmini indirip koşullu isteği (304) dene"
+        )
+        self.chk_download_test.set_active(False)
+        grid.attach(self.chk_download_test, 0, row, 2, 1)
+        row += 1
+
+        # Eş dağıtımı: resim önce aynı ağdaki tahtalardan istenir
+        self.chk_peer = Gtk.CheckButton(
+            label="Resmi önce aynı ağdaki tahtalardan al, önbelleği onlara sun (eş dağıtımı)"
+        )
+        self.chk_peer.set_active(False)
+        grid.attach(self.chk_peer, 0, row, 2, 1)
+        row += 1
+
+        # Çoklu yayın: resim sunucudan tek gönderimde tüm tahtalara gelir
+        self.chk_multicast = Gtk.CheckButton(
+            label="Sunucunun çoklu yayınla gönderdiği resmi önbelleğe al (çoklu yayın alıcısı)"
+        )
+        self.chk_multicast.set_active(False)
+        grid.attach(self.chk_multicast, 0, row, 2, 1)
+        row += 1
+
+        # Dconf kilidi
+        self.chk_lock = Gtk.CheckButton(
+            label="Kullanıcıların arka planı değiştirmesini engelle (dconf kilidi uygula)"
+        )
+        self.chk_lock.set_active(True)
+        grid.attach(self.chk_lock, 0, row, 2, 1)
+        row += 1
+
+        # Sistem düzeyinde arka plan: oturum açılışında hiçbir iş yapılmaz
+        self.chk_system = Gtk.CheckButton(
+            label="Arka planı sistem genelinde uygula, oturum açılışında ajan çalıştırma (dconf kilidi gerekir)"
+        )
+        self.chk_system.set_active(False)
+        grid.attach(self.chk_system, 0, row, 2, 1)
+        row += 1
+
+        self.attach_install_controls(row, (
+            "Bu araç, statik bir HTTP sunucusu üzerinden haftalık arka plan sistemini kurar:\n"
+            "- Süre sınırlı ön kontroller (TCP, manifest.json ve haftanın resmi)\n"
+            "- Mount birimi ve paylaşım parolası yok; önceki NFS/CIFS birimleri kaldırılır\n"
+            "- Manifest ve resim tek bağlantıdan, değişmeyen hafta için yalnızca 304\n"
+            "- Oturum boyunca çalışan haftalık arka plan ajanı\n"
+            "- Makine genelinde paylaşılan önbellek (/var/cache/etap-arka-plan)\n"
+            "- İsteğe bağlı eş dağıtımı (resim aynı ağdaki tahtalardan alınır)\n"
+            "- İsteğe bağlı çoklu yayın alıcısı (resim tek gönderimle tüm tahtalara ulaşır)\n"
+            "- Önümüzdeki haftaları gece önbelleğe indiren systemd zamanlayıcısı\n"
+            "- Tüm kullanıcılar için autostart kaydı veya sistem genelinde uygulama (root zamanlayıcısı)\n"
+            "- İsteğe bağlı dconf kilidi\n\n"
+            "Lütfen root yetkisiyle çalıştırın:  sudo python3 etap_arkaplan_http_gui.py"
+        ))
+
+    def on_apply_clicked(self, button):
+        # Log alanını temizle
+        self.clear_log()
+
+        ip = self.entry_ip.get_text().strip()
+        path = self.entry_path.get_text().strip()
+        lock_enabled = self.chk_lock.get_active()
+        prefetch_text = self.entry_prefetch.get_text().strip() or "0"
+        window_text = self.entry_window.get_text().strip() or "0"
+        timeout_text = self.entry_timeout.get_text().strip()
+        mount_test_enabled = self.chk_download_test.get_active()
+        peer_enabled = self.chk_peer.get_active()
+        multicast_enabled = self.chk_multicast.get_active()
+        system_wallpaper = self.chk_system.get_active()
+
+        if not ip:
+            self.log("Sunucu IP boş olamaz.")
+            return
+
+        if system_wallpaper and not lock_enabled:
+            self.log("Sistem genelinde arka plan dconf kilidi gerektirir.")
+            return
+
+        if not prefetch_text.isdigit():
+            self.log("Önceden indirilecek hafta sayısı 0 veya pozitif bir tam sayı olmalıdır.")
+            return
+        prefetch_weeks = int(prefetch_text)
+
+        if not window_text.isdigit():
+            self.log("Sunucu erişim penceresi 0 veya pozitif bir tam sayı (saniye) olmalıdır.")
+            return
+        fetch_window = int(window_text)
+
+        if not timeout_text.isdigit() or int(timeout_text) == 0:
+            self.log("İstek zaman aşımı pozitif bir tam sayı (saniye) olmalıdır.")
+            return
+        http_timeout = int(timeout_text)
+
+        installer = HTTPInstaller(
+            http_mirrors(ip, path),
+            lock_enabled=lock_enabled,
+            prefetch_weeks=prefetch_weeks,
+            fetch_window=fetch_window,
+            mount_test_enabled=mount_test_enabled,
+            http_timeout=http_timeout,
+            peer_enabled=peer_enabled,
+            multicast_enabled=multicast_enabled,
+            system_wallpaper=system_wallpaper,
+            log=self.log,
+            cancel_event=self.cancel_event
+        )
+
+        self.start_install(installer)
+
+
+def main():
+    win = EtapArkaPlanHTTPGUI()
+    win.connect("destroy", Gtk.main_quit)
+    win.show_all()
+    Gtk.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3052 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ETAP haftalık arka plan kurulumu: GTK gerektirmeyen kitaplık ve komut satırı aracı.
+
+NFS ve Windows (CIFS) grafik arayüzleri bu modülün üzerine kurulu ince ön
+yüzlerdir. Betikle toplu kurulum için arayüz açmadan doğrudan çalıştırılabilir;
+GObject introspection hiç yüklenmez.
+
+Örnekler:
+    sudo python3 etap_arkaplan_kurulum.py nfs --sunucu 192.168.122.40 --export /srv/paylasim/arka-plan
+    sudo ETAP_CIFS_PAROLA=... python3 etap_arkaplan_kurulum.py cifs --sunucu 192.168.1.10 \\
+        --paylasim paylasim --alt-klasor arka-plan --kullanici etapshare
+    sudo python3 etap_arkaplan_kurulum.py http --sunucu 192.168.1.10 --yol /arka-plan
+    sudo python3 etap_arkaplan_kurulum.py --yapilandirma okul.ini nfs
+    python3 etap_arkaplan_kurulum.py --yapilandirma okul.ini nfs --plan
+
+Yapılandırma dosyası, seçeneklerin uzun adlarını (baştaki -- olmadan) anahtar
+olarak kullanan bir [kurulum] bölümü içerir; komut satırı dosyadaki değerleri ezer.
+
+Kurulum yalnızca diskteki hâlinden farklı olan dosyaları yazar ve yalnızca bu
+değişikliklerin gerektirdiği yeniden yüklemeleri yapar; --plan ile bu farklar
+uygulanmadan gösterilir. systemd ile süreç başlatmadan D-Bus üzerinden konuşulur;
+--systemd-arayuzu systemctl ile eski yol seçilebilir.
+
+Kurulum, zamanlayıcı ve oturum ajanı her aşamanın süresini önbellek dizinindeki
+.olaylar.<uid>.jsonl dosyalarına JSON satırı olarak yazar (--journald ile
+journald'ye de); etap_telemetri_raporu.py bunları filo genelinde özetler.
+
+--es-dagitimi ile tahtalar haftanın resmini sunucudan önce aynı ağdaki
+tahtalardan ister (UDP yayını + HTTP, manifest özetiyle doğrulanır); sunucuya
+okul başına çoğunlukla bir tahta gider. --coklu-yayin ile tahtalara bir alıcı
+hizmeti kurulur; etap_coklu_yayin.py haftanın resmini okul ağına tek gönderimde
+yayınlar. Alıcı yalnızca manifestte bulunan veya sunucudan gelen resmi kabul eder
+ve ayrıcalıksız bir kullanıcıyla önbellekte bekletir; tahta resmi manifest
+özetiyle doğrulayarak sunucuya gitmeden buradan alır.
+
+http alt komutu mount kullanmaz: resimler düz bir statik HTTP sunucusundan
+okunur (etap_http_sunucu.py yerel bir denektir). Manifest ve resim tek kalıcı
+bağlantıdan, If-None-Match / If-Modified-Since ile koşullu istenir; değişmeyen
+hafta tahtaya yalnızca bir 304 yanıtına mal olur.
+
+--sistem-arka-plani ile oturumlar arka plan için hiçbir iş yapmaz: autostart
+kaydı kurulmaz, root zamanlayıcısı günün resmini sistem dizinine kopyalayıp
+picture-uri'yi kilitli sistem dconf veritabanına yazar (dconf update yalnızca
+resim değiştiğinde çalışır). etap_oturum_yuku_olcumu.py iki kipi karşılaştırır.
+
+Yeni tahtaların toplu hazırlığında etap_paket_olustur.py aynı seçeneklerle
+kurulumun tüm dosyalarını ve dönemin resimlerini tek bir sürümlü pakete koyar;
+paketin kurulumu yerel kopyalama ve tek bir daemon-reload'dur.
+
+Hangi gün hangi resmin gösterileceği paylaşımdaki takvim.json'dan okunur
+(etap_takvim_derle.py; tatil, sınav haftası, günlük dönüşüm, okula veya tahtaya
+özel resim). Zamanlayıcı takvimi önbelleğe kopyalar, oturum ajanı günün resmini
+yerel kopyadan çözer; takvim yoksa ISO haftasının weekNN.jpg resmi gösterilir.
+
+Tahtaya kurulan Python programları (oturum ajanı, eş dağıtımı, çoklu yayın alıcısı
+ve önbellek kitaplığına gömülen yardımcılar) etap_programlar/ altında ayrı
+modüllerdir; kurulum onları başlarındaki ayarları doldurarak yazar.
+"""
+
+import argparse
+import concurrent.futures
+import configparser
+import contextlib
+import difflib
+import http.client
+import json
+import os
+import random
+import re
+import select
+import shlex
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import urllib.parse
+
+# Ön kontrollerde denetim başına süre sınırı ve zaman aşımlı deneme mount'u (saniye)
+PREFLIGHT_TIMEOUT = 3.0
+MOUNT_TEST_TIMEOUT = 20
+
+NFS_PORT = 2049
+NFS_PROGRAM = 100003
+
+SMB_PORT = 445
+# NEGOTIATE isteğinde önerilen SMB2/3 lehçeleri
+SMB_DIALECTS = {0x0202: "2.0.2", 0x0210: "2.1", 0x0300: "3.0", 0x0302: "3.0.2"}
+
+# HTTP arka ucunda istek başına varsayılan zaman aşımı (sn)
+HTTP_TIMEOUT = 10
+
+# Kurulumun yazdığı dosyalar
+SYSTEMD_DIR = "/etc/systemd/system"
+CACHE_DIR = "/var/cache/etap-arka-plan"
+# Derlenmiş takvim (etap_takvim_derle.py): paylaşımda ve önbellekte aynı adla
+SCHEDULE_NAME = "takvim.json"
+# Önbellekteki resim dosyası <ad>-<anahtar>.jpg: ad haftanın, günün veya takvimdeki resmin adı
+# (etap_manifest_olustur.IMAGE_NAME), anahtar manifest özetinin ilk 16 hanesi veya boyut-mtime.
+# Kitaplıkta ve ajanda aynı ifade kullanıldığından POSIX ERE sözdizimindedir.
+IMAGE_NAME_PATTERN = "week[0-9]{2}|[0-9]{4}-[0-9]{2}-[0-9]{2}|[a-z][a-z0-9_]*"
+CACHE_KEY_PATTERN = "[0-9a-f]{16}|[0-9]+-[0-9]+"
+LIB_PATH = "/usr/local/lib/etap-arka-plan/onbellek.sh"
+AGENT_PATH = "/usr/local/bin/etap-arka-plan-ajani"
+# Ajandan önceki oturum betiği; kurulumda bulunursa silinir
+SCRIPT_PATH = "/usr/local/bin/etap-haftalik-arka-plan.sh"
+PREFETCH_PATH = "/usr/local/bin/etap-arka-plan-onbellek.sh"
+PREFETCH_SERVICE_PATH = "/etc/systemd/system/etap-arka-plan-onbellek.service"
+PREFETCH_TIMER_PATH = "/etc/systemd/system/etap-arka-plan-onbellek.timer"
+PEER_PATH = "/usr/local/bin/etap-arka-plan-es"
+PEER_SERVICE_PATH = "/etc/systemd/system/etap-arka-plan-es.service"
+MULTICAST_RECEIVER_PATH = "/usr/local/bin/etap-arka-plan-alici"
+MULTICAST_SERVICE_PATH = "/etc/systemd/system/etap-arka-plan-alici.service"
+AUTOSTART_PATH = "/etc/xdg/autostart/etap-haftalik-arka-plan.desktop"
+DCONF_BACKGROUND_PATH = "/etc/dconf/db/local.d/00-background"
+DCONF_LOCK_PATH = "/etc/dconf/db/local.d/locks/background"
+# Sistem düzeyinde arka plan: günün resmini root tarafında uygulayan betik, servisi ve
+# zamanlayıcısı, resmin sistem kopyası ve picture-uri'nin yazıldığı sistem dconf dosyası
+SYSTEM_WALLPAPER_PATH = "/usr/local/bin/etap-arka-plan-sistem"
+SYSTEM_WALLPAPER_SERVICE_PATH = "/etc/systemd/system/etap-arka-plan-sistem.service"
+SYSTEM_WALLPAPER_TIMER_PATH = "/etc/systemd/system/etap-arka-plan-sistem.timer"
+SYSTEM_BACKGROUND_DIR = "/usr/local/share/backgrounds/etap-arka-plan"
+DCONF_PICTURE_PATH = "/etc/dconf/db/local.d/01-etap-arka-plan-resim"
+BOOT_HISTORY_PATH = "/var/lib/etap-arka-plan/acilis-olcumleri.tsv"
+
+# Oturum açılışında önbellekte olmayan resim için sunucu erişim penceresi ve
+# arka plandaki indirmenin süre sınırı (saniye)
+LOGIN_FETCH_WINDOW = 60
+LOGIN_REFRESH_TIMEOUT = 300
+
+# Mount seçeneği ölçümü: profil başına süre sınırı (sn), sıcak üstveri tur sayısı,
+# profil başına okunacak en fazla veri ve mevcut profilin bırakılması için gereken
+# en az iyileşme oranı
+TUNE_TIMEOUT = 60
+TUNE_ROUNDS = 5
+TUNE_READ_BYTES = 64 * 1024 * 1024
+TUNE_MARGIN = 0.05
+
+# systemd işlerinin (birim başlatma/durdurma) tamamlanması için beklenecek en uzun süre (sn)
+JOB_TIMEOUT = 90
+
+# Aşama süresi olayları: önbellek dizininde kullanıcı başına JSON satırları (.olaylar.<uid>.jsonl),
+# dosya başına tutulan en fazla satır ve journald'nin yerel protokol soketi
+EVENTS_MAX_LINES = 2000
+JOURNAL_SOCKET = "/run/systemd/journal/socket"
+
+# Eş dağıtımı: sorgu (UDP yayını) ve indirme (HTTP) portu, yayın adresi, yanıt bekleme
+# süresi (sn) ve bir tahtanın aynı anda gönderdiği en fazla resim
+PEER_PORT = 47115
+PEER_BROADCAST = "255.255.255.255"
+PEER_QUERY_TIMEOUT = 0.3
+PEER_MAX_UPLOADS = 4
+
+# Çoklu yayın: grup adresi ve portu, paket başlığı (sihirli sözcük, sürüm, tür, ad, SHA-256,
+# boyut, blok sırası/tur, blok sayısı) ve sürümü, başlıktaki resim adının en fazla uzunluğu,
+# blok boyutu (başlıkla birlikte tek Ethernet çerçevesine sığar), kabul edilen en büyük resim,
+# NAK başına en fazla eksik aralığı, aynı anda toplanan en fazla aktarım ve bunların belleği
+MULTICAST_GROUP = "239.255.47.116"
+MULTICAST_PORT = 47116
+MULTICAST_NAME_SIZE = 16
+MULTICAST_HEADER = f"!4sBB{MULTICAST_NAME_SIZE}s32sIII"
+MULTICAST_VERSION = 2
+MULTICAST_MAGIC = b"ETMC"
+MULTICAST_BLOCK_SIZE = 1400
+MULTICAST_MAX_SIZE = 64 * 1024 * 1024
+MULTICAST_NAK_RANGES = 150
+MULTICAST_MAX_SESSIONS = 4
+MULTICAST_MEMORY_LIMIT = 128 * 1024 * 1024
+# Alıcının önbellekte beklettiği resimler: .coklu-yayin.<ad>-<özet>.jpg. Alıcı ayrıcalıksız
+# çalıştığından bu dosyalara güvenilmez; kitaplık manifest özetiyle doğruladığını kopyalar.
+MULTICAST_RECEIVED_PREFIX = ".coklu-yayin."
+
+# Tahtaya kurulan Python programlarının kaynakları: etap_programlar/<ad>.py. Filo dağıtımı bu
+# modülü tek dosya olarak gönderdiğinden kaynakları buraya gömer (etap_filo_dagitimi).
+PROGRAMS = ("manifest_kaydi", "es_istemci", "parcali_kopya", "http_al", "takvim_ara",
+            "ajan", "es_sunucu", "coklu_yayin_alici")
+PROGRAM_SOURCES = {}
+
+
+class InstallCancelled(Exception):
+    """Kurulum, kullanıcı İptal düğmesine bastığı için durduruldu."""
+
+def run_checks(checks, timeout):
+    """
+    Ön kontrolleri eş zamanlı çalıştırır; her biri `timeout` saniye içinde bitmelidir.
+
+    checks: (ad, işlev) çiftleri. İşlev (durum, ayrıntı) döner; durum True (geçti),
+    False (kaldı) veya None (atlandı) olabilir.
+    Dönüş: denetim sırasıyla (ad, durum, ayrıntı, süre_ms) listesi. Süresinde
+    bitmeyen denetimler beklenmez, "zaman aşımı" ile kalmış sayılır.
+    """
+    def timed(func):
+        start = time.monotonic()
+        try:
+            ok, detail = func()
+        except (OSError, ValueError, struct.error, http.client.HTTPException) as e:
+            ok, detail = False, str(e) or e.__class__.__name__
+        return ok, detail, (time.monotonic() - start) * 1000
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(checks))
+    started = time.monotonic()
+    futures = [executor.submit(timed, func) for _, func in checks]
+    concurrent.futures.wait(futures, timeout=timeout)
+    executor.shutdown(wait=False)
+
+    results = []
+    for (name, _), future in zip(checks, futures):
+        if future.done():
+            results.append((name, *future.result()))
+        else:
+            elapsed = (time.monotonic() - started) * 1000
+            results.append((name, False, "zaman aşımı", elapsed))
+    return results
+
+
+def measure_share(directory):
+    """
+    Bağlı paylaşımda gerçek weekNN.jpg dosyalarıyla üstveri gecikmesini ve sıralı okuma
+    hızını ölçer. Dönüş: (True, (soğuk_ms, sıcak_ms, bayt/sn, ortalama_bayt)) veya
+    resim yoksa (False, ayrıntı).
+    """
+    start = time.monotonic()
+    names = sorted(n for n in os.listdir(directory) if re.match(r"week\d{2}\.jpg$", n))
+    sizes = [os.stat(os.path.join(directory, name)).st_size for name in names]
+    cold_ms = (time.monotonic() - start) * 1000
+    if not names:
+        return False, "paylaşımda weekNN.jpg yok"
+
+    # Oturum ajanı ve zamanlayıcının tekrarlanan erişimleri: öznitelik önbelleğinin etkisi
+    warm = []
+    for _ in range(TUNE_ROUNDS):
+        start = time.monotonic()
+        os.listdir(directory)
+        for name in names:
+            os.stat(os.path.join(directory, name))
+        warm.append((time.monotonic() - start) * 1000)
+
+    total = 0
+    start = time.monotonic()
+    for name in names:
+        with open(os.path.join(directory, name), "rb", buffering=0) as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                total += len(chunk)
+        if total >= TUNE_READ_BYTES:
+            break
+    elapsed = max(time.monotonic() - start, 1e-6)
+    return True, (cold_ms, statistics.median(warm), total / elapsed, sum(sizes) / len(sizes))
+
+
+def tcp_probe(host, port, timeout):
+    """TCP bağlantısı kurulabiliyor mu?"""
+    with socket.create_connection((host, port), timeout=timeout):
+        pass
+    return True, f"{port}/tcp açık"
+
+
+def recv_exact(sock, size):
+    """Soketten tam olarak `size` bayt oku."""
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("bağlantı erken kapandı")
+        data += chunk
+    return data
+
+
+def nfs_rpc_null(host, timeout):
+    """
+    NFS programına (100003, sürüm 3) ONC RPC NULL çağrısı gönderir.
+    Mount yapmadan nfsd'nin gerçekten yanıt verdiğini doğrular.
+    """
+    xid = random.getrandbits(32)
+    # xid, CALL, RPC sürümü 2, program, sürüm, yordam 0 (NULL), AUTH_NULL kimlik + doğrulayıcı
+    call = struct.pack(">10I", xid, 0, 2, NFS_PROGRAM, 3, 0, 0, 0, 0, 0)
+    with socket.create_connection((host, NFS_PORT), timeout=timeout) as sock:
+        sock.settimeout(timeout)
+        sock.sendall(struct.pack(">I", 0x80000000 | len(call)) + call)
+        length = struct.unpack(">I", recv_exact(sock, 4))[0] & 0x7FFFFFFF
+        reply = recv_exact(sock, length)
+
+    reply_xid, msg_type, reply_stat = struct.unpack(">3I", reply[:12])
+    if reply_xid != xid or msg_type != 1:
+        return False, "geçersiz RPC yanıtı"
+    if reply_stat != 0:
+        return False, "RPC çağrısı reddedildi"
+
+    verifier_len = struct.unpack(">I", reply[16:20])[0]
+    offset = 20 + ((verifier_len + 3) & ~3)
+    accept_stat = struct.unpack(">I", reply[offset:offset + 4])[0]
+    if accept_stat == 0:
+        return True, "NFSv3 NULL yanıtı alındı"
+    if accept_stat == 2:
+        low, high = struct.unpack(">2I", reply[offset + 4:offset + 12])
+        return True, f"NFSv3 yok, sunucunun desteklediği sürümler: {low}-{high}"
+    return False, f"RPC kabul durumu {accept_stat}"
+
+
+def nfs_export_exists(host, export_path, timeout):
+    """showmount ile export listesinde yolun (veya üst dizininin) bulunup bulunmadığına bakar."""
+    try:
+        result = subprocess.run(
+            ["showmount", "-e", "--no-headers", host],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=timeout
+        )
+    except FileNotFoundError:
+        return None, "showmount kurulu değil"
+    except subprocess.TimeoutExpired:
+        return False, "zaman aşımı"
+
+    if result.returncode != 0:
+        # Yalnızca NFSv4 sunan sunucularda mountd çalışmayabilir
+        return None, result.stderr.strip() or "export listesi alınamadı"
+
+    for line in result.stdout.splitlines():
+        export = line.split()[0] if line.split() else ""
+        if export and (export_path == export or export_path.startswith(export.rstrip("/") + "/")):
+            return True, f"export: {export}"
+    return False, f"{export_path} export listesinde yok"
+
+
+def smb_negotiate(host, timeout):
+    """
+    SMB2 NEGOTIATE isteği gönderir ve sunucunun seçtiği lehçeyi döndürür.
+    Kimlik doğrulama yapılmaz; yalnızca SMB hizmetinin yanıt verdiği doğrulanır.
+    """
+    dialects = sorted(SMB_DIALECTS)
+    header = b"\xfeSMB" + struct.pack(
+        "<HHIHHIIQIIQ16s",
+        64,     # StructureSize
+        0,      # CreditCharge
+        0,      # Status
+        0,      # Command: NEGOTIATE
+        1,      # CreditRequest
+        0,      # Flags
+        0,      # NextCommand
+        0,      # MessageId
+        0,      # Reserved
+        0,      # TreeId
+        0,      # SessionId
+        b"\0" * 16
+    )
+    body = struct.pack("<HHHHI16sQ", 36, len(dialects), 1, 0, 0, os.urandom(16), 0)
+    body += struct.pack(f"<{len(dialects)}H", *dialects)
+    packet = header + body
+
+    with socket.create_connection((host, SMB_PORT), timeout=timeout) as sock:
+        sock.settimeout(timeout)
+        sock.sendall(struct.pack(">I", len(packet)) + packet)
+        length = struct.unpack(">I", recv_exact(sock, 4))[0] & 0xFFFFFF
+        reply = recv_exact(sock, length)
+
+    if reply[:4] == b"\xffSMB":
+        return False, "sunucu yalnızca SMB1 konuşuyor"
+    if reply[:4] != b"\xfeSMB":
+        return False, "geçersiz SMB yanıtı"
+    status = struct.unpack("<I", reply[8:12])[0]
+    if status != 0:
+        return False, f"NEGOTIATE durumu 0x{status:08x}"
+    dialect = struct.unpack("<H", reply[68:70])[0]
+    return True, f"SMB {SMB_DIALECTS.get(dialect, hex(dialect))}"
+
+
+def smbclient_check(what, username, password, command, timeout):
+    """
+    smbclient ile paylaşımda tek bir komut çalıştırır (mount gerekmez).
+    Parola komut satırında görünmemesi için PASSWD ortam değişkeniyle verilir.
+    """
+    # //IP/Share/Subdir -> servis //IP/Share, alt klasör Subdir
+    parts = what.lstrip("/").split("/", 2)
+    service = f"//{parts[0]}/{parts[1]}"
+    subdir = parts[2] if len(parts) > 2 else ""
+
+    env = dict(os.environ, PASSWD=password)
+    cmd = ["smbclient", service, "-U", username, "-c", command.format(subdir=subdir or ".")]
+    try:
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout,
+            env=env
+        )
+    except FileNotFoundError:
+        return None, "smbclient kurulu değil"
+    except subprocess.TimeoutExpired:
+        return False, "zaman aşımı"
+
+    errors = [line for line in result.stdout.splitlines() if "NT_STATUS_" in line]
+    if result.returncode != 0 or errors:
+        return False, (errors[-1] if errors else result.stdout.strip()).strip()
+    return True, "erişilebilir"
+
+
+def http_connection(url, timeout):
+    """Temel adresin (http://host[:port]/yol) sunucusuna, henüz bağlanmamış bir HTTP(S) bağlantısı."""
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme == "https":
+        return http.client.HTTPSConnection(parts.hostname, parts.port, timeout=timeout)
+    return http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+
+
+def http_head(url, name, timeout):
+    """
+    Temel adresteki `name` dosyası için HEAD isteği gönderir (mount gerekmez).
+    Dosya varsa boyutunu ve sunucunun koşullu istek / Range desteğini ayrıntıda bildirir.
+    """
+    conn = http_connection(url, timeout)
+    try:
+        conn.request("HEAD", urllib.parse.urlsplit(url).path.rstrip("/") + "/" + name)
+        response = conn.getresponse()
+        response.read()
+    finally:
+        conn.close()
+
+    if response.status == 404:
+        return False, f"{name} yok (404)"
+    if response.status != 200:
+        return False, f"HTTP {response.status} {response.reason}"
+    features = [header for header in ("ETag", "Last-Modified") if response.getheader(header)]
+    if response.getheader("Accept-Ranges", "") == "bytes":
+        features.append("Range")
+    return True, f"{response.getheader('Content-Length', '?')} bayt; {', '.join(features) or 'doğrulayıcı yok'}"
+
+
+# D-Bus tür kodlarının hizalaması (little-endian tel biçimi)
+DBUS_ALIGN = {"y": 1, "b": 4, "n": 2, "q": 2, "i": 4, "u": 4, "x": 8, "t": 8, "d": 8,
+              "s": 4, "o": 4, "g": 1, "a": 4, "(": 8, "{": 8, "v": 1, "h": 4}
+DBUS_FIXED = {"y": "B", "b": "I", "n": "h", "q": "H", "i": "i", "u": "I", "x": "q", "t": "Q",
+              "d": "d", "h": "I"}
+
+
+class DBusError(Exception):
+    """D-Bus hata yanıtı; name: org.freedesktop.systemd1.NoSuchUnit gibi hata adı."""
+
+    def __init__(self, name, message=""):
+        super().__init__(f"{name}: {message}" if message else name)
+        self.name = name
+
+
+def dbus_split_signature(signature):
+    """"sa(ss)b" -> ["s", "a(ss)", "b"]"""
+    types = []
+    i = 0
+    while i < len(signature):
+        start = i
+        while signature[i] == "a":
+            i += 1
+        if signature[i] in "({":
+            depth = 0
+            while True:
+                depth += signature[i] in "({"
+                depth -= signature[i] in ")}"
+                i += 1
+                if depth == 0:
+                    break
+        else:
+            i += 1
+        types.append(signature[start:i])
+    return types
+
+
+def dbus_marshal(buf, signature, value):
+    """Tek bir tam türü `buf` (bytearray) sonuna hizalayarak yazar."""
+    code = signature[0]
+    buf.extend(b"\0" * (-len(buf) % DBUS_ALIGN[code]))
+    if code in DBUS_FIXED:
+        buf.extend(struct.pack("<" + DBUS_FIXED[code], value))
+    elif code in "so":
+        data = value.encode("utf-8")
+        buf.extend(struct.pack("<I", len(data)) + data + b"\0")
+    elif code == "g":
+        data = value.encode("ascii")
+        buf.extend(bytes([len(data)]) + data + b"\0")
+    elif code == "v":
+        inner, item = value
+        dbus_marshal(buf, "g", inner)
+        dbus_marshal(buf, inner, item)
+    elif code == "a":
+        length_at = len(buf)
+        buf.extend(b"\0\0\0\0")
+        element = signature[1:]
+        buf.extend(b"\0" * (-len(buf) % DBUS_ALIGN[element[0]]))
+        start = len(buf)
+        for item in (value.items() if element[0] == "{" else value):
+            dbus_marshal(buf, element, item)
+        struct.pack_into("<I", buf, length_at, len(buf) - start)
+    else:
+        for inner, item in zip(dbus_split_signature(signature[1:-1]), value):
+            dbus_marshal(buf, inner, item)
+
+
+def dbus_unmarshal(data, offset, signature):
+    """Tek bir tam türü `offset` konumundan okur; (değer, yeni konum) döner."""
+    code = signature[0]
+    offset += -offset % DBUS_ALIGN[code]
+    if code in DBUS_FIXED:
+        fmt = "<" + DBUS_FIXED[code]
+        value = struct.unpack_from(fmt, data, offset)[0]
+        return (bool(value) if code == "b" else value), offset + struct.calcsize(fmt)
+    if code in "so":
+        length = struct.unpack_from("<I", data, offset)[0]
+        return data[offset + 4:offset + 4 + length].decode("utf-8"), offset + 5 + length
+    if code == "g":
+        length = data[offset]
+        return data[offset + 1:offset + 1 + length].decode("ascii"), offset + 2 + length
+    if code == "v":
+        inner, offset = dbus_unmarshal(data, offset, "g")
+        return dbus_unmarshal(data, offset, inner)
+    if code == "a":
+        length = struct.unpack_from("<I", data, offset)[0]
+        element = signature[1:]
+        offset += 4
+        offset += -offset % DBUS_ALIGN[element[0]]
+        end = offset + length
+        items = []
+        while offset < end:
+            item, offset = dbus_unmarshal(data, offset, element)
+            items.append(item)
+        return (dict(items) if element[0] == "{" else items), offset
+    items = []
+    for inner in dbus_split_signature(signature[1:-1]):
+        item, offset = dbus_unmarshal(data, offset, inner)
+        items.append(item)
+    return tuple(items), offset
+
+
+def dbus_message(serial, path, interface, member, destination, signature="", args=()):
+    """Yöntem çağrısı iletisinin (tür 1) little-endian tel biçimi."""
+    body = bytearray()
+    for inner, value in zip(dbus_split_signature(signature), args):
+        dbus_marshal(body, inner, value)
+    fields = [(1, ("o", path)), (2, ("s", interface)), (3, ("s", member)), (6, ("s", destination))]
+    if signature:
+        fields.append((8, ("g", signature)))
+    message = bytearray(struct.pack("<cBBBII", b"l", 1, 0, 1, len(body), serial))
+    dbus_marshal(message, "a(yv)", fields)
+    message.extend(b"\0" * (-len(message) % 8))
+    return bytes(message + body)
+
+
+class SystemdBus:
+    """
+    systemd ile süreç başlatmadan konuşan küçük D-Bus istemcisi.
+
+    Belgelenmiş sistem veriyoluna (dbus-daemon, /run/dbus/system_bus_socket) bağlanır,
+    Hello ile benzersiz adını alır ve çağrıları org.freedesktop.systemd1 adına yollar.
+    systemd'nin yalnızca systemctl için ayırdığı /run/systemd/private kullanılmaz.
+    Yalnızca bu kurulumun kullandığı yönetici çağrıları ve iş (job) tamamlanma
+    sinyalleri desteklenir.
+    """
+
+    SOCKET_PATH = "/run/dbus/system_bus_socket"
+    BUS_NAME = "org.freedesktop.DBus"
+    BUS_PATH = "/org/freedesktop/DBus"
+    DESTINATION = "org.freedesktop.systemd1"
+    MANAGER_PATH = "/org/freedesktop/systemd1"
+    MANAGER_INTERFACE = "org.freedesktop.systemd1.Manager"
+
+    def __init__(self, timeout=PREFLIGHT_TIMEOUT):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.serial = 0
+        self.signals = []
+        try:
+            self.sock.connect(self.SOCKET_PATH)
+            uid = str(os.getuid()).encode("ascii").hex()
+            self.sock.sendall(b"\0AUTH EXTERNAL " + uid.encode("ascii") + b"\r\n")
+            reply = b""
+            while not reply.endswith(b"\r\n"):
+                chunk = self.sock.recv(256)
+                if not chunk:
+                    raise ConnectionError("bağlantı erken kapandı")
+                reply += chunk
+            if not reply.startswith(b"OK "):
+                raise DBusError("org.freedesktop.DBus.Error.AuthFailed", reply.decode("ascii", "replace").strip())
+            self.sock.sendall(b"BEGIN\r\n")
+            self.unique_name = self.call("Hello", path=self.BUS_PATH, interface=self.BUS_NAME,
+                                         destination=self.BUS_NAME)[0]
+        except BaseException:
+            self.sock.close()
+            raise
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, path, interface, member, signature="", args=(), destination=DESTINATION):
+        """Yöntem çağrısı gönderir ve seri numarasını döner."""
+        self.serial += 1
+        self.sock.sendall(dbus_message(self.serial, path, interface, member, destination, signature, args))
+        return self.serial
+
+    def receive(self):
+        """Bir ileti okur; (tür, başlık alanları, gövde değerleri) döner."""
+        fixed = recv_exact(self.sock, 16)
+        if fixed[:1] != b"l":
+            raise DBusError("org.freedesktop.DBus.Error.InvalidArgs", "big-endian ileti desteklenmiyor")
+        msg_type, body_length, fields_length = fixed[1], *struct.unpack_from("<I4xI", fixed, 4)
+        header_length = 16 + fields_length + (-(16 + fields_length) % 8)
+        data = fixed + recv_exact(self.sock, header_length - 16 + body_length)
+        fields = dict(dbus_unmarshal(data, 12, "a(yv)")[0])
+        body = []
+        offset = header_length
+        for inner in dbus_split_signature(fields.get(8, "")):
+            value, offset = dbus_unmarshal(data, offset, inner)
+            body.append(value)
+        return msg_type, fields, body
+
+    def call(self, member, signature="", *args, path=MANAGER_PATH, interface=MANAGER_INTERFACE,
+             destination=DESTINATION):
+        """Yöntemi çağırır ve yanıt gövdesini döner; hata yanıtında DBusError yükseltir."""
+        serial = self.send(path, interface, member, signature, args, destination)
+        while True:
+            msg_type, fields, body = self.receive()
+            if msg_type == 4:
+                self.signals.append((fields.get(3), body))
+            elif fields.get(5) == serial:
+                if msg_type == 3:
+                    raise DBusError(fields.get(4, ""), body[0] if body else "")
+                return body
+
+    def unit_state(self, unit):
+        """(UnitFileState, ActiveState); birim bilinmiyorsa boş değerler."""
+        try:
+            file_state = self.call("GetUnitFileState", "s", unit)[0]
+        except DBusError:
+            file_state = ""
+        unit_path = self.call("LoadUnit", "s", unit)[0]
+        active_state = self.call("Get", "ss", "org.freedesktop.systemd1.Unit", "ActiveState",
+                                 path=unit_path, interface="org.freedesktop.DBus.Properties")[0]
+        return file_state, active_state
+
+    def subscribe(self):
+        """
+        JobRemoved sinyallerini ister: veriyolu sinyali yalnızca eşleşme kuralı olanlara
+        iletir, systemd de yalnızca Subscribe çağıranlar için sinyal yayınlar.
+        """
+        self.call("AddMatch", "s", f"type='signal',sender='{self.DESTINATION}',"
+                  f"interface='{self.MANAGER_INTERFACE}',member='JobRemoved'",
+                  path=self.BUS_PATH, interface=self.BUS_NAME, destination=self.BUS_NAME)
+        self.call("Subscribe")
+
+    def wait_jobs(self, jobs, timeout, cancel_event=None):
+        """
+        JobRemoved sinyalleriyle işlerin bitmesini bekler.
+        jobs: {iş yolu: birim}. Dönüş: {birim: sonuç}; süresinde bitmeyenler "zaman aşımı".
+        """
+        pending = dict(jobs)
+        results = {}
+        deadline = time.monotonic() + timeout
+        while pending:
+            while self.signals:
+                member, body = self.signals.pop(0)
+                if member == "JobRemoved" and body[1] in pending:
+                    results[pending.pop(body[1])] = body[3]
+            if not pending:
+                break
+            if cancel_event is not None and cancel_event.is_set():
+                raise InstallCancelled()
+            if time.monotonic() > deadline:
+                break
+            # Soket iptal ve süre denetimi için kısa aralıklarla beklenir; ileti yarıda kesilmez
+            if not select.select([self.sock], [], [], 0.2)[0]:
+                continue
+            msg_type, fields, body = self.receive()
+            if msg_type == 4:
+                self.signals.append((fields.get(3), body))
+        for unit in pending.values():
+            results[unit] = "zaman aşımı"
+        return results
+
+
+def journal_send(event):
+    """
+    Olayı journald'ye yerel protokolle (ALAN=değer satırları) gönderir; alanlar ETAP_
+    önekiyle yazılır (journalctl ETAP_ASAMA=kopyalama ile süzülebilir). Hata olursa geçer.
+    """
+    lines = [f"MESSAGE={event['asama']}: {event['sure_ms']} ms ({event['sonuc']})",
+             "SYSLOG_IDENTIFIER=etap-arka-plan"]
+    lines += [f"ETAP_{key.upper()}={str(value).replace(chr(10), ' ')}"
+              for key, value in event.items() if key != "zaman"]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(("\n".join(lines) + "\n").encode("utf-8"), JOURNAL_SOCKET)
+    except OSError:
+        pass
+
+
+def systemd_unit_name(path, suffix):
+    """
+    `systemd-escape --path --suffix=<suffix>` karşılığı:
+    /mnt/arka_plan -> mnt-arka_plan.mount
+    """
+    escaped = []
+    for i, ch in enumerate(os.path.normpath(path).strip("/")):
+        if ch == "/":
+            escaped.append("-")
+        elif (ch.isascii() and (ch.isalnum() or ch == "_")) or (ch == "." and i > 0):
+            escaped.append(ch)
+        else:
+            escaped.append("".join(f"\\x{b:02x}" for b in ch.encode("utf-8")))
+    return "".join(escaped) + "." + suffix
+
+
+def program_source(name, **settings):
+    """
+    etap_programlar/<name>.py kaynağı; her ayar için modülün en üst düzeydeki tek
+    `AYAR = ...` satırı verilen değerle değiştirilir. Ayar modülde yoksa ValueError.
+    """
+    source = PROGRAM_SOURCES.get(name)
+    if source is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "etap_programlar", name + ".py")
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+    for key, value in settings.items():
+        source, count = re.subn(rf"^{key} = .*$", lambda _: f"{key} = {value!r}", source, flags=re.M)
+        if count != 1:
+            raise ValueError(f"etap_programlar/{name}.py: {key} ayarı {count} kez bulundu")
+    return source
+
+
+def nfs_mirrors(servers, export_path):
+    """
+    Virgülle ayrılmış sunucu listesinden NFS "What" değerleri (IP:/export/yolu) üretir.
+    Kendi export yolu olan ayna "IP:/yol" olarak yazılabilir.
+    """
+    mirrors = []
+    for item in servers.split(","):
+        item = item.strip()
+        if item:
+            mirrors.append(item if ":/" in item else f"{item}:{export_path}")
+    return mirrors
+
+
+def cifs_mirrors(servers, share, subdir):
+    """
+    Virgülle ayrılmış sunucu listesinden CIFS "What" değerleri (//IP/Share/Subdir) üretir.
+    Farklı paylaşımı olan ayna "//IP/Share/Subdir" olarak yazılabilir.
+    """
+    subdir = subdir.strip().strip("/")
+    mirrors = []
+    for item in servers.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if item.startswith("//"):
+            mirrors.append(item.rstrip("/"))
+        elif subdir:
+            mirrors.append(f"//{item}/{share}/{subdir}")
+        else:
+            mirrors.append(f"//{item}/{share}")
+    return mirrors
+
+
+def http_mirrors(servers, path):
+    """
+    Virgülle ayrılmış sunucu listesinden HTTP temel adresleri (http://IP/yol) üretir.
+    Farklı portu veya yolu olan ayna tam adresle ("http://IP:8080/yol") yazılabilir.
+    """
+    path = path.strip().strip("/")
+    mirrors = []
+    for item in servers.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if "://" in item:
+            mirrors.append(item.rstrip("/"))
+        elif path:
+            mirrors.append(f"http://{item}/{path}")
+        else:
+            mirrors.append(f"http://{item}")
+    return mirrors
+
+
+class Installer:
+    """
+    Haftalık arka plan kurulum adımları. Protokole özgü kısımlar (ön kontrol,
+    deneme mount'u, mount seçenekleri) NFSInstaller, CIFSInstaller ve mount
+    kullanmayan HTTPInstaller'dadır.
+
+    log: satır başına çağrılan işlev (varsayılan: print). GUI kendi
+    iş parçacığı güvenli log işlevini verir.
+    cancel_event: ayarlandığında çalışan komut öldürülür ve kurulum durur.
+    """
+
+    PROTOCOL = ""
+    SERVER_LABEL = ""
+    FS_TYPE = ""
+    MOUNT_DESCRIPTION = ""
+    AUTOSTART_NAME = ""
+    AUTOSTART_COMMENT = ""
+    # Ölçümle karşılaştırılan mount seçeneği profilleri (ad -> seçenekler); ilki varsayılandır
+    MOUNT_PROFILES = {}
+    # Ölçüm mount'unun sistemdeki gerçek mount ile önbellek/bağlantı paylaşmaması için
+    TUNE_OPTIONS = ""
+
+    def __init__(self, mirrors, mount_point="/mnt/arka_plan", lock_enabled=True,
+                 prefetch_weeks=2, fetch_window=1800, automount_enabled=True,
+                 idle_timeout=120, mount_test_enabled=False, mount_profile=None,
+                 tune_enabled=False, systemd_backend="dbus", school="", journald_enabled=False,
+                 peer_enabled=False, peer_broadcast=PEER_BROADCAST, multicast_enabled=False,
+                 http_timeout=HTTP_TIMEOUT, system_wallpaper=False, log=None, cancel_event=None):
+        self.mirrors = mirrors
+        self.mount_point = mount_point
+        self.lock_enabled = lock_enabled
+        self.prefetch_weeks = prefetch_weeks
+        self.fetch_window = fetch_window
+        self.automount_enabled = automount_enabled
+        self.idle_timeout = idle_timeout
+        self.mount_test_enabled = mount_test_enabled
+        self.mount_profile = mount_profile or next(iter(self.MOUNT_PROFILES))
+        self.tune_enabled = tune_enabled
+        self.systemd_backend = systemd_backend
+        self.school = school
+        self.journald_enabled = journald_enabled
+        self.peer_enabled = peer_enabled
+        self.peer_broadcast = peer_broadcast
+        self.multicast_enabled = multicast_enabled
+        self.http_timeout = http_timeout
+        self.system_wallpaper = system_wallpaper
+        self.events = []
+        self.log = log or print
+        self.cancel_event = cancel_event or threading.Event()
+
+    # --- Komut çalıştırma
+
+    def run_process(self, cmd, timeout=None):
+        """
+        Komutu iptal edilebilir şekilde çalıştırır ve CompletedProcess döner.
+        İptal düğmesine basılırsa süreç öldürülür ve InstallCancelled yükseltilir;
+        `timeout` saniye aşılırsa süreç öldürülür ve subprocess.TimeoutExpired yükseltilir.
+        """
+        if self.cancel_event.is_set():
+            raise InstallCancelled()
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        while True:
+            try:
+                stdout, stderr = proc.communicate(timeout=0.2)
+                break
+            except subprocess.TimeoutExpired:
+                cancelled = self.cancel_event.is_set()
+                if cancelled or (deadline is not None and time.monotonic() > deadline):
+                    proc.kill()
+                    try:
+                        proc.communicate(timeout=2)
+                    except subprocess.TimeoutExpired:
+                        # Çekirdekte takılı kalmış bir mount öldürülemeyebilir; beklemeden bırak
+                        pass
+                    if cancelled:
+                        raise InstallCancelled()
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+    def run_cmd(self, cmd, check=True):
+        """Komut çalıştır, stdout/stderr'i logla."""
+        self.log(f"$ {' '.join(cmd)}")
+        try:
+            result = self.run_process(cmd)
+            if check:
+                result.check_returncode()
+            if result.stdout.strip():
+                self.log(result.stdout.strip())
+            if result.stderr.strip():
+                self.log(result.stderr.strip())
+            return result.returncode
+        except subprocess.CalledProcessError as e:
+            if e.stdout.strip():
+                self.log(e.stdout.strip())
+            if e.stderr.strip():
+                self.log(f"HATA: {e.stderr.strip()}")
+            if check:
+                raise
+            return e.returncode
+
+    def log_preflight(self, results):
+        """Ön kontrol sonuçlarını denetim başına süreyle birlikte tablo olarak logla."""
+        labels = {True: "TAMAM", False: "HATA", None: "ATLANDI"}
+        self.log(f"  {'Denetim':<36}  {'Sonuç':<7}  {'Süre':>8}  Ayrıntı")
+        for name, ok, detail, elapsed_ms in results:
+            self.log(f"  {name:<36}  {labels[ok]:<7}  {elapsed_ms:>6.0f}ms  {detail}")
+            # Denetim adı "<sunucu> <denetim>" biçimindedir
+            server, _, check = name.partition(" ")
+            self.record_event("on-kontrol", elapsed_ms, labels[ok].lower(), sunucu=server, denetim=check)
+
+    # --- Telemetri
+
+    @staticmethod
+    def mirror_host(what):
+        """Ayna tanımındaki sunucu adı: "host:/yol" (NFS), "//host/paylaşım" (CIFS) veya "http://host/yol"."""
+        if "://" in what:
+            return urllib.parse.urlsplit(what).hostname or what
+        return what.lstrip("/").split("/", 1)[0].split(":", 1)[0]
+
+    def record_event(self, stage, elapsed_ms, result="tamam", **fields):
+        """
+        Bir aşamanın süresini olay olarak biriktirir (kurulum sonunda write_events() ile
+        önbellek dizinine yazılır); journald seçiliyse hemen günlüğe de gönderir.
+        """
+        event = {
+            "zaman": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "makine": socket.gethostname(),
+            "okul": self.school,
+            "kaynak": "kurulum",
+            "asama": stage,
+            "sure_ms": round(elapsed_ms),
+            "sonuc": result,
+        }
+        event.update((key, value) for key, value in fields.items() if value is not None)
+        self.events.append(event)
+        if self.journald_enabled:
+            journal_send(event)
+
+    @contextlib.contextmanager
+    def timed_stage(self, stage, **fields):
+        """`with` bloğunun süresini olay olarak kaydeder; blok dönen sözlüğe alan ekleyebilir."""
+        start = time.monotonic()
+        result = "hata"
+        try:
+            yield fields
+            result = fields.pop("sonuc", "tamam")
+        finally:
+            self.record_event(stage, (time.monotonic() - start) * 1000, result, **fields)
+
+    def write_events(self):
+        """Biriken olayları root'un olay dosyasına ekler; dosyanın son EVENTS_MAX_LINES satırı tutulur."""
+        if not self.events:
+            return
+        path = os.path.join(CACHE_DIR, f".olaylar.{os.getuid()}.jsonl")
+        try:
+            self.prepare_cache_dir()
+            lines = []
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    lines = f.readlines()
+            lines += [json.dumps(event, ensure_ascii=False) + "\n" for event in self.events]
+            fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=".olaylar.")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.writelines(lines[-EVENTS_MAX_LINES:])
+                os.fchmod(f.fileno(), 0o644)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.log(f"UYARI: aşama süreleri {path} dosyasına yazılamadı: {e}")
+        self.events = []
+
+    # --- Protokole özgü adımlar
+
+    def preflight(self) -> list:
+        """Tüm aynaları yoklar; zorunlu denetimleri geçen aynaların listesini döner."""
+        raise NotImplementedError
+
+    def test_path(self, what: str) -> bool:
+        """Tek bir aynayı zaman aşımlı bir deneme mount'u ile test eder."""
+        raise NotImplementedError
+
+    def mount_options(self, profile=None) -> str:
+        """mount biriminin Options= değeri (verilmezse seçili profille)."""
+        raise NotImplementedError
+
+    def tune_mount(self, what):
+        """
+        Aynayı her profille sırayla geçici bir dizine bağlar, measure_share() ile ölçer,
+        karşılaştırmayı tablo olarak loglar ve en hızlı profili seçili profil yapar.
+        Sunucunun kendi önbelleği ilk okumada ısınır; bu yüzden ilk profil bir kez
+        ölçülmeden okunur. Hiçbir profil ölçülemezse seçili profil değişmez.
+        """
+        self.log(f"Mount seçenekleri ölçülüyor: {what} ({len(self.MOUNT_PROFILES)} profil)")
+        tune_dir = f"/tmp/etap_arkaplan_{self.FS_TYPE}_ayar"
+        os.makedirs(tune_dir, exist_ok=True)
+
+        profiles = list(self.MOUNT_PROFILES)
+        results = []
+        for index, name in enumerate([profiles[0]] + profiles):
+            subprocess.run(["umount", "-l", tune_dir],
+                           stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL)
+            options = ",".join(o for o in (self.mount_options(name), self.TUNE_OPTIONS) if o)
+            cmd = ["mount", "-t", self.FS_TYPE, what, tune_dir, "-o", options]
+            if index:
+                self.log(self.redact(f"$ {' '.join(cmd)}"))
+            try:
+                result = self.run_process(cmd, timeout=MOUNT_TEST_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                results.append((name, None, f"mount {MOUNT_TEST_TIMEOUT} sn içinde tamamlanmadı"))
+                continue
+            if result.returncode != 0:
+                error = (result.stderr.strip() or result.stdout.strip()).splitlines()
+                results.append((name, None, error[-1] if error else f"mount {result.returncode} ile çıktı"))
+                continue
+            _, ok, detail, _ = run_checks([(name, lambda: measure_share(tune_dir))], TUNE_TIMEOUT)[0]
+            if index:
+                results.append((name, detail if ok else None, "" if ok else detail))
+        subprocess.run(["umount", "-l", tune_dir],
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+
+        # Tahmini süre: bir resmin üstveri (soğuk) ve aktarım süresi
+        scores = {}
+        self.log(f"  {'Profil':<16}  {'Soğuk üstveri':>13}  {'Sıcak üstveri':>13}  {'Okuma':>13}  "
+                 f"{'Resim başına':>12}  Seçenekler")
+        for name, metrics, error in results:
+            if metrics is None:
+                self.log(f"  {name:<16}  ÖLÇÜLEMEDİ: {error}")
+                self.record_event("mount-olcumu", 0, "hata", sunucu=self.mirror_host(what), profil=name)
+                continue
+            cold_ms, warm_ms, bps, avg_size = metrics
+            scores[name] = cold_ms + avg_size / bps * 1000
+            self.record_event("mount-olcumu", scores[name], sunucu=self.mirror_host(what), profil=name,
+                              ustveri_ms=round(cold_ms), okuma_bps=round(bps))
+            self.log(f"  {name:<16}  {cold_ms:>11.1f}ms  {warm_ms:>11.1f}ms  "
+                     f"{bps / 1048576:>7.1f} MB/sn  {scores[name]:>10.0f}ms  "
+                     f"{self.redact(self.mount_options(name) + ',')[:-1]}")
+        if not scores:
+            self.log(f"UYARI: Hiçbir profil ölçülemedi; '{self.mount_profile}' profili kullanılacak.")
+            return
+
+        best = min(scores, key=scores.get)
+        current = scores.get(self.mount_profile)
+        if current is not None and scores[best] > current * (1 - TUNE_MARGIN):
+            best = self.mount_profile
+        self.log(f"Seçilen mount profili: {best}. Sonraki kurulumlarda korumak için "
+                 f"--mount-profili {best} kullanın.")
+        self.mount_profile = best
+
+    # --- Üretilen dosyalar
+
+    def render_mount_unit(self, what, mount_point):
+        """Bir aynanın systemd mount birimi."""
+        content = textwrap.dedent(f"""
+            [Unit]
+            Description={self.MOUNT_DESCRIPTION}
+            After=network-online.target
+
+            [Mount]
+            What={what}
+            Where={mount_point}
+            Type={self.FS_TYPE}
+            Options={self.mount_options()}
+        """).strip() + "\n"
+
+        # Automount kullanılırken mount birimi açılışta kendi başına başlatılmaz
+        if not self.automount_enabled:
+            content += textwrap.dedent("""
+                [Install]
+                WantedBy=multi-user.target
+            """).rstrip() + "\n"
+        return content
+
+    def render_automount_unit(self, mount_point):
+        """Bir aynanın ilk erişimde bağlayan, boşta kalınca ayıran automount birimi."""
+        return textwrap.dedent(f"""
+            [Unit]
+            Description={self.MOUNT_DESCRIPTION} (Otomatik Bağlama)
+            After=network-online.target
+
+            [Automount]
+            Where={mount_point}
+            TimeoutIdleSec={self.idle_timeout}
+
+            [Install]
+            WantedBy=multi-user.target
+        """).strip() + "\n"
+
+    def render_lib(self, remote_dirs, cache_dir=CACHE_DIR):
+        """Oturum ajanı ile önbellek zamanlayıcısının ortak kitaplığı (yük testi başka önbellek verir)."""
+        remote_dirs_sh = " ".join(shlex.quote(d) for d in remote_dirs)
+        remote_servers_sh = " ".join(shlex.quote(self.mirror_host(what)) for what in self.mirrors)
+        school_json = shlex.quote(json.dumps(self.school, ensure_ascii=False))
+        lib = textwrap.dedent(f"""
+            #!/bin/bash
+            # ETAP haftalık arka plan: oturum ajanı ve önbellek zamanlayıcısının ortak işlevleri
+
+            # Aynaların yerel bağlama noktaları veya HTTP temel adresleri (ilk sıradaki birincil sunucudur)
+            REMOTE_DIRS=({remote_dirs_sh})
+            CACHE_DIR="{cache_dir}"
+
+            # Resimlerin indirildiği dizin: ortak önbelleğe (1777, yapışkan) yalnızca root (zamanlayıcı)
+            # yazar, herkes okur. Oturumlar eksik resmi kendi önbellek dizinlerine alır: yapışkan dizinde
+            # başka kullanıcının aynı adlı dosyası güncellenemez, önceden açılan bir ad da herkesi engellerdi.
+            # CACHE_OWNER, CACHE_DIR'deki resimlerine güvenilen kullanıcıdır: root veya (ölçümlerde olduğu
+            # gibi önbellek oturumun kendi diziniyse) bu kullanıcı.
+            if [ "$(id -u)" -eq 0 ]; then
+                IMAGE_DIR="$CACHE_DIR"
+            else
+                IMAGE_DIR="${{XDG_CACHE_HOME:-$HOME/.cache}}/etap-arka-plan"
+                mkdir -p "$IMAGE_DIR" 2>/dev/null
+            fi
+            CACHE_OWNER=0
+            [ "$IMAGE_DIR" = "$CACHE_DIR" ] && CACHE_OWNER=$(id -u)
+
+            # Sunucu okumalarının filoya yayılacağı pencereler (sn) ve yeniden deneme ayarları
+            FETCH_WINDOW={self.fetch_window}
+            FETCH_RETRIES=4
+            FETCH_BACKOFF=5
+
+            # Sunucudan kopyalamanın parça boyutu (bayt): kesilen kopyalama son tamamlanan
+            # parçadan sürdürülür
+            FETCH_CHUNK=262144
+            FETCH_RESUME=1
+
+            # Ayna sıralamasının geçerlilik süresi, yoklama süre sınırı (sn) ve hız ölçümü
+            # olmayan aynalar için tahmini resim boyutu (bayt)
+            MIRROR_RANK_TTL=21600
+            MIRROR_PROBE_TIMEOUT=5
+            IMAGE_SIZE_HINT=2000000
+
+            # Kullanıcıya özel durum dosyaları (yapışkan dizinde başkasının dosyası güncellenemez)
+            MIRROR_RANK_FILE="$CACHE_DIR/.ayna-sirasi.$(id -u)"
+            MIRROR_SPEED_FILE="$CACHE_DIR/.ayna-hizi.$(id -u)"
+            LOGIN_METRICS_FILE="$CACHE_DIR/.oturum-olcumleri.$(id -u)"
+
+            # Derlenmiş takvim: zamanlayıcı paylaşımdan kopyalar, gün resmi buradan çözülür
+            SCHEDULE_NAME="{SCHEDULE_NAME}"
+            SCHEDULE_FILE="$CACHE_DIR/$SCHEDULE_NAME"
+
+            # Önbellekteki resim adları: <ad>-<anahtar>.jpg (anahtar özetin ilk 16 hanesi veya boyut-mtime)
+            IMAGE_NAME_RE='{IMAGE_NAME_PATTERN}'
+            CACHE_KEY_RE='{CACHE_KEY_PATTERN}'
+
+            # Aşama süresi olayları: kullanıcı başına JSON satırları (etap_telemetri_raporu.py okur)
+            # ve isteğe bağlı journald alanları. Aynaların sunucu adları REMOTE_DIRS ile aynı sıradadır.
+            REMOTE_SERVERS=({remote_servers_sh})
+            EVENTS_FILE="$CACHE_DIR/.olaylar.$(id -u).jsonl"
+            EVENTS_MAX_LINES={EVENTS_MAX_LINES}
+            EVENTS_JOURNALD={1 if self.journald_enabled else 0}
+            EVENT_SCHOOL={school_json}
+            # Olayı yazan: oturum ajanı EVENT_SOURCE=ajan, sistem düzeyinde arka plan betiği EVENT_SOURCE=sistem verir
+            EVENT_SOURCE="${{EVENT_SOURCE:-zamanlayici}}"
+
+            # Eş dağıtımı: resim sunucudan önce aynı ağdaki tahtalardan istenir (etap-arka-plan-es)
+            PEER_ENABLED={1 if self.peer_enabled else 0}
+            PEER_PORT={PEER_PORT}
+            PEER_BROADCAST={shlex.quote(self.peer_broadcast)}
+            PEER_QUERY_TIMEOUT={PEER_QUERY_TIMEOUT}
+
+            # Çoklu yayın: alıcının (etap-arka-plan-alici) önbellekte beklettiği resimler sunucudan önce denenir
+            MULTICAST_ENABLED={1 if self.multicast_enabled else 0}
+            MULTICAST_RECEIVED_PREFIX={shlex.quote(MULTICAST_RECEIVED_PREFIX)}
+
+            # HTTP aynaları (http:// veya https:// ile başlayan REMOTE_DIRS): istek başına zaman aşımı (sn)
+            # ve koşullu isteklerin doğrulayıcılarıyla manifest gövdesinin tutulduğu kullanıcıya özel dosya
+            # (çoklu yayın alıcısı root'unkini okur)
+            HTTP_TIMEOUT={self.http_timeout:g}
+            HTTP_STATE_FILE="$IMAGE_DIR/.http-durumu.$(id -u).json"
+
+            # Bir aşamanın süresini olay dosyasına (ve seçiliyse journald'ye) ekler.
+            # Kullanım: olay_yaz <aşama> <süre_ms> <sonuç> [alan=değer ...]
+            # Değerler sayı veya tırnak ve ters bölü içermeyen metin olmalıdır.
+            olay_yaz() {{
+                local stage="$1" elapsed="$2" result="$3" field key value extra="" journal=""
+                shift 3
+                for field in "$@"; do
+                    key="${{field%%=*}}"
+                    value="${{field#*=}}"
+                    if [[ "$value" =~ ^(0|[1-9][0-9]*)$ ]]; then
+                        extra+=", \\"$key\\": $value"
+                    else
+                        extra+=", \\"$key\\": \\"$value\\""
+                    fi
+                    journal+="ETAP_${{key^^}}=$value"$'\\n'
+                done
+                printf '{{"zaman": "%(%Y-%m-%dT%H:%M:%S%z)T", "makine": "%s", "okul": %s, "kaynak": "%s", "asama": "%s", "sure_ms": %d, "sonuc": "%s"%s}}\\n' \\
+                    -1 "$HOSTNAME" "$EVENT_SCHOOL" "$EVENT_SOURCE" "$stage" "$elapsed" "$result" "$extra" \\
+                    >> "$EVENTS_FILE" 2>/dev/null
+                if [ "$EVENTS_JOURNALD" = 1 ]; then
+                    printf 'MESSAGE=%s: %s ms (%s)\\nSYSLOG_IDENTIFIER=etap-arka-plan\\nETAP_KAYNAK=%s\\nETAP_ASAMA=%s\\nETAP_SURE_MS=%s\\nETAP_SONUC=%s\\n%s' \\
+                        "$stage" "$elapsed" "$result" "$EVENT_SOURCE" "$stage" "$elapsed" "$result" "$journal" | \\
+                        logger --journald 2>/dev/null
+                fi
+            }}
+
+            # Ayna dizininin sunucu adını yazdırır
+            sunucu_adi() {{
+                local i
+                for i in "${{!REMOTE_DIRS[@]}}"; do
+                    if [ "${{REMOTE_DIRS[$i]}}" = "$1" ]; then
+                        echo "${{REMOTE_SERVERS[$i]:-$1}}"
+                        return
+                    fi
+                done
+                echo "$1"
+            }}
+
+            # Bu makinenin verilen pencere içindeki sabit gecikmesini yazdırır (0..pencere-1 sn).
+            # /etc/machine-id'den türetildiği için her tahta her seferinde aynı dilimi kullanır,
+            # filonun sunucu okumaları da pencereye eşit olarak dağılır.
+            makine_gecikmesi() {{
+                local window="$1" mid
+                [ "$window" -gt 0 ] 2>/dev/null || {{ echo 0; return; }}
+                mid=$(cat /etc/machine-id 2>/dev/null)
+                [ -n "$mid" ] || mid=$(hostname | md5sum)
+                echo $(( 0x${{mid:0:8}} % window ))
+            }}
+
+            # Aynanın son ölçülen aktarım hızını (bayt/sn) kaydeder; son 50 ölçüm tutulur
+            hizi_kaydet() {{
+                local dir="$1" bytes="$2" elapsed_ms="$3"
+                echo "$dir $(( bytes * 1000 / (elapsed_ms + 1) ))" >> "$MIRROR_SPEED_FILE"
+                tail -n 50 "$MIRROR_SPEED_FILE" > "$MIRROR_SPEED_FILE.$$" 2>/dev/null && \\
+                    mv -f "$MIRROR_SPEED_FILE.$$" "$MIRROR_SPEED_FILE"
+            }}
+
+            # Aynanın yanıt verip vermediği: HTTP aynasında manifest.json için tek bir HEAD isteği;
+            # bağlama noktasında "$dir/." automount'u tetikler, bağlanamamış boş bir dizin ayna sayılmaz
+            ayna_yanit_veriyor() {{
+                case "$1" in
+                    http://*|https://*)
+                        timeout -s KILL "$MIRROR_PROBE_TIMEOUT" python3 -c "$HTTP_PY" yokla "$1" "$HTTP_TIMEOUT" >/dev/null 2>&1
+                        ;;
+                    *)
+                        timeout -s KILL "$MIRROR_PROBE_TIMEOUT" stat -c %i "$1/." >/dev/null 2>&1 && mountpoint -q "$1"
+                        ;;
+                esac
+            }}
+
+            # Tek bir aynayı yoklar ve "<tahmini_ms> <dizin>" yazdırır. Tahmini süre, metadata
+            # gidiş-dönüş süresine son ölçülen hızla bir resmin aktarım süresi eklenerek bulunur.
+            aynayi_yokla() {{
+                local dir="$1" start rtt bps
+                start=$(date +%s%N)
+                if ! ayna_yanit_veriyor "$dir"; then
+                    olay_yaz ayna-yoklama $(( ($(date +%s%N) - start) / 1000000 )) hata sunucu="$(sunucu_adi "$dir")"
+                    return 1
+                fi
+                rtt=$(( ($(date +%s%N) - start) / 1000000 ))
+                olay_yaz ayna-yoklama "$rtt" tamam sunucu="$(sunucu_adi "$dir")"
+
+                bps=$(awk -v d="$dir" '$1 == d {{ bps = $2 }} END {{ print bps + 0 }}' \\
+                    "$MIRROR_SPEED_FILE" 2>/dev/null)
+                if [ "${{bps:-0}}" -gt 0 ]; then
+                    echo "$(( rtt + IMAGE_SIZE_HINT * 1000 / bps )) $dir"
+                else
+                    echo "$rtt $dir"
+                fi
+            }}
+
+            # Aynaları eş zamanlı yoklar ve tahmini indirme süresine göre sıralı yazdırır.
+            # Sıra MIRROR_RANK_TTL boyunca saklanır; yanıt vermeyen aynalar sona eklenir.
+            aynalari_sirala() {{
+                local tmp dir i=0
+
+                if [ "${{#REMOTE_DIRS[@]}}" -le 1 ]; then
+                    printf '%s\\n' "${{REMOTE_DIRS[@]}}"
+                    return
+                fi
+                if [ -n "$(find "$MIRROR_RANK_FILE" -newermt "$MIRROR_RANK_TTL seconds ago" 2>/dev/null)" ]; then
+                    cat "$MIRROR_RANK_FILE"
+                    return
+                fi
+
+                tmp=$(mktemp -d) || {{ printf '%s\\n' "${{REMOTE_DIRS[@]}}"; return; }}
+                for dir in "${{REMOTE_DIRS[@]}}"; do
+                    aynayi_yokla "$dir" > "$tmp/$i" &
+                    i=$(( i + 1 ))
+                done
+                wait
+
+                if cat "$tmp"/* 2>/dev/null | grep -q .; then
+                    # En az bir ayna yanıt verdiyse sırayı sakla
+                    {{ sort -n "$tmp"/* | cut -d' ' -f2-; printf '%s\\n' "${{REMOTE_DIRS[@]}}"; }} | \\
+                        awk 'NF && !seen[$0]++' > "$MIRROR_RANK_FILE.$$" && \\
+                        mv -f "$MIRROR_RANK_FILE.$$" "$MIRROR_RANK_FILE"
+                    cat "$MIRROR_RANK_FILE"
+                else
+                    printf '%s\\n' "${{REMOTE_DIRS[@]}}"
+                fi
+                rm -rf "$tmp"
+            }}
+
+            # Tahtanın ekran çözünürlüğünü (GENxYÜK) DRM'den okur; bağlı ekranların en büyüğü alınır.
+            # Oturum gerektirmediği için root olarak çalışan zamanlayıcıda da kullanılabilir.
+            # Bulunamazsa boş yazdırır.
+            ekran_cozunurlugu() {{
+                local conn
+                for conn in /sys/class/drm/card*-*; do
+                    [ "$(cat "$conn/status" 2>/dev/null)" = connected ] && head -n 1 "$conn/modes" 2>/dev/null
+                done | awk -Fx '$1 * $2 > best {{ best = $1 * $2; res = $1 "x" ($2 + 0) }} END {{ print res }}'
+            }}
+
+            # Paylaşımdaki manifest.json'dan bir kaydın "dosya boyut sha256" bilgisini yazdırır
+            # (etap_manifest_olustur.py üretir). Ekran çözünürlüğü verilirse ekranı kaplayan en küçük
+            # varyant (etap_varyant_olustur.py üretir), uygun varyant yoksa ana resim seçilir.
+            # Çıkış: 0 bulundu, 1 okunamadı, 2 kayıt yok, 3 manifest yok.
+            # Kaynak: etap_programlar/manifest_kaydi.py
+            MANIFEST_PY=@MANIFEST_PY@
+
+            # Eşlere UDP yayınıyla "ETAP-ES? <sha256>" sorulur; resmi tutan tahtalar HTTP portlarıyla
+            # yanıtlar. İlk yanıtlayanlardan sırayla indirilir; boyut ve SHA-256 tutmayan indirme
+            # atılır. Başarılıysa eşin adresini yazdırır. Çıkış: 0 alındı, 1 indirilemedi, 2 eş yok.
+            # Kaynak: etap_programlar/es_istemci.py
+            PEER_PY=@PEER_PY@
+
+            # Çoklu yayın alıcısının beklettiği resmi geçici dosyaya kopyalar; yalnızca manifestteki özet
+            # biliniyorsa. Alıcının dosyasına güvenilmez: kopya boyut ve özetle doğrulanır.
+            # Dönüş: 0 alındı (geçici dosyaya, doğrulanmış), diğer durumlarda eşler ve sunucu denenir.
+            coklu_yayindan_al() {{
+                local name="$1" sha="$2" size="$3" tmp="$4" received start
+                [ "$MULTICAST_ENABLED" = 1 ] && [ -n "$sha" ] || return 1
+                received="$CACHE_DIR/$MULTICAST_RECEIVED_PREFIX${{name}}-${{sha:0:16}}.jpg"
+                [ -f "$received" ] && [ "$(stat -c %s "$received" 2>/dev/null)" = "$size" ] || return 1
+                start=$(date +%s%N)
+                if cp "$received" "$tmp" 2>/dev/null && [ "$(sha256sum "$tmp" | cut -d' ' -f1)" = "$sha" ]; then
+                    olay_yaz kopyalama $(( ($(date +%s%N) - start) / 1000000 )) tamam bayt="$size" yontem=coklu-yayin
+                    return 0
+                fi
+                : > "$tmp"
+                olay_yaz dogrulama $(( ($(date +%s%N) - start) / 1000000 )) hata bayt="$size" yontem=coklu-yayin
+                return 1
+            }}
+
+            # Resmi aynı ağdaki tahtalardan almayı dener; yalnızca manifestteki özet biliniyorsa.
+            # Dönüş: 0 alındı (geçici dosyaya, doğrulanmış), diğer durumlarda sunucuya gidilir.
+            eslerden_al() {{
+                local sha="$1" size="$2" tmp="$3" start peer rc
+                [ "$PEER_ENABLED" = 1 ] && [ -n "$sha" ] || return 1
+                start=$(date +%s%N)
+                peer=$(timeout -s KILL "$MIRROR_PROBE_TIMEOUT" python3 -c "$PEER_PY" "$sha" "$size" "$tmp" \\
+                    "$PEER_PORT" "$PEER_BROADCAST" "$PEER_QUERY_TIMEOUT" 2>/dev/null)
+                rc=$?
+                if [ "$rc" -eq 0 ]; then
+                    olay_yaz kopyalama $(( ($(date +%s%N) - start) / 1000000 )) tamam sunucu="$peer" \\
+                        bayt="$size" yontem=es
+                    return 0
+                fi
+                olay_yaz es-sorgusu $(( ($(date +%s%N) - start) / 1000000 )) \\
+                    "$([ "$rc" -eq 2 ] && echo yok || echo hata)"
+                return 1
+            }}
+
+            # Paylaşımdan akan resmi (stdin) kısmi dosyaya parça parça ekler. Her parça diske
+            # yazıldıktan (fsync) sonra sıradaki okunur: kesintide dosya son tamamlanan parçada kalır.
+            # SHA-256 okuma sırasında hesaplanır; sürdürülürken yalnızca yerel diskteki önceki kısım
+            # yeniden özetlenir, sunucudan ikinci kez okunmaz. Bu çalıştırmada alınan baytı yazdırır.
+            # Kullanım: dd ... | python3 -c "$FETCH_PY" <kısmi dosya> <başlangıç> <boyut> <sha256 veya boş> <parça>
+            # Çıkış: 0 tamam, 1 akış erken bitti (kısmi dosya tutulur), 3 özet tutmadı (kısmi dosya silinir).
+            # Kaynak: etap_programlar/parcali_kopya.py
+            FETCH_PY=@FETCH_PY@
+
+            # Resmi paylaşımdan kısmi dosyaya FETCH_CHUNK baytlık parçalarla kopyalar. Önceki bir
+            # kesintiden kalan kısmi dosya son tamamlanan parçadan sürdürülür (FETCH_RESUME=0 ise
+            # baştan alınır). "<başlangıç> <aktarılan bayt>" yazdırır; dönüş FETCH_PY'ninkidir.
+            parcali_kopyala() {{
+                local remote="$1" part="$2" size="$3" sha="$4" have=0 offset received rc
+                if [ "$FETCH_RESUME" = 1 ]; then
+                    have=$(stat -c %s "$part" 2>/dev/null || echo 0)
+                fi
+                offset=$(( have - have % FETCH_CHUNK ))
+                [ "$offset" -lt "$size" ] || offset=0
+                received=$(dd if="$remote" bs="$FETCH_CHUNK" skip="$offset" iflag=skip_bytes status=none 2>/dev/null | \\
+                    python3 -c "$FETCH_PY" "$part" "$offset" "$size" "$sha" "$FETCH_CHUNK")
+                rc=$?
+                echo "$offset ${{received:-0}}"
+                return "$rc"
+            }}
+
+            # HTTP aynasından okuyan istemci: bir çalıştırmadaki tüm istekler tek kalıcı (keep-alive) bağlantıdan
+            # gider. Manifest, takvim ve manifestsiz paylaşımda resmin kendisi If-None-Match / If-Modified-Since
+            # ile koşullu istenir: değişmeyen dosya için sunucu gövdesiz 304 döner. Doğrulayıcılar ve manifest
+            # gövdesi HTTP_STATE_FILE dosyasında tutulur. Resim FETCH_PY gibi parça parça kısmi dosyaya yazılır,
+            # kesilen indirme Range ile son tamamlanan parçadan sürer.
+            # Kullanım: python3 -c "$HTTP_PY" yokla <adres> <zaman aşımı>
+            #             çıkış: 0 sunucu yanıt verdi, 1 vermedi
+            #           python3 -c "$HTTP_PY" dosya <adres> <zaman aşımı> <ad> <çıktı> <yerel kopya> <durum dosyası>
+            #             çıkış: 0 alındı, 1 hata, 2 sunucuda yok, 4 değişmedi (304)
+            #           python3 -c "$HTTP_PY" resim <adres> <zaman aşımı> <ad> <ekran> <önbellek> <resim dizini>
+            #                                 <durum dosyası> <sunucu adı> <parça> <sürdür 0/1> <önce eşler 0/1>
+            #                                 <önce çoklu yayın 0/1>
+            #             "olay ..." (olay_yaz alanları), "hiz <bayt> <ms>", "yol <önbellek yolu> [<kısmi dosya>]"
+            #             veya "es <sha256> <boyut> <önbellek yolu>" satırları yazdırır;
+            #             çıkış: 0 tamam, 1 geçici hata, 2 resim yok, 5 önce yerel kaynaklar (çoklu yayın, eşler) denensin
+            # Kaynak: etap_programlar/http_al.py
+            HTTP_PY=@HTTP_PY@
+
+            # Resmi bir HTTP aynasından alır ve önbellekteki yolunu yazdırır; dönüş kodları sunucudan_al ile
+            # aynıdır. HTTP_PY'nin yazdığı olaylar ve hız ölçümü burada kaydedilir. Resim önbellekte yoksa önce
+            # çoklu yayın alıcısının beklettiği kopya ve (açıksa) eşler denenir; bunlardan alınamazsa HTTP_PY
+            # yerel kaynaklar olmadan yeniden çalıştırılır (manifest bu kez 304 ile gelir).
+            http_den_al() {{
+                local dir="$1" name="$2" peers="$PEER_ENABLED" multicast="$MULTICAST_ENABLED" server rc cached tmp sha size
+                local -a fields
+                server=$(sunucu_adi "$dir")
+                while :; do
+                    rc=1 cached="" tmp=""
+                    while read -r -a fields; do
+                        case "${{fields[0]}}" in
+                            olay) olay_yaz "${{fields[@]:1}}" ;;
+                            hiz) hizi_kaydet "$dir" "${{fields[1]}}" "${{fields[2]}}" ;;
+                            yol) cached="${{fields[1]}}" tmp="${{fields[2]}}" ;;
+                            es) sha="${{fields[1]}}" size="${{fields[2]}}" cached="${{fields[3]}}" ;;
+                            cikis) rc="${{fields[1]}}" ;;
+                        esac
+                    done < <(python3 -c "$HTTP_PY" resim "$dir" "$HTTP_TIMEOUT" "$name" "$(ekran_cozunurlugu)" "$CACHE_DIR" \\
+                                 "$IMAGE_DIR" "$HTTP_STATE_FILE" "$server" "$FETCH_CHUNK" "$FETCH_RESUME" "$peers" "$multicast" \\
+                                 2>/dev/null
+                             echo "cikis $?")
+                    [ "$rc" -eq 5 ] || break
+                    tmp=$(mktemp "$IMAGE_DIR/.${{name}}.XXXXXX") || return 1
+                    {{ coklu_yayindan_al "$name" "$sha" "$size" "$tmp" || eslerden_al "$sha" "$size" "$tmp"; }} && break
+                    rm -f "$tmp"
+                    peers=0 multicast=0
+                done
+                case $rc in
+                    0|5) onbellege_yerlestir "$name" "$cached" "$tmp" ;;
+                    2) return 2 ;;
+                    *) return 1 ;;
+                esac
+            }}
+
+            # Doğrulanmış geçici veya kısmi dosyayı (verildiyse) IMAGE_DIR'deki yerine atomik olarak koyar, bu
+            # resmin oradaki eski sürümlerini ve başka sürümlerden kalan kısmi dosyaları temizler ve
+            # önbellekteki yolu yazdırır.
+            onbellege_yerlestir() {{
+                local name="$1" cached="$2" tmp="$3"
+                if [ -n "$tmp" ]; then
+                    chmod 644 "$tmp"
+                    mv -f "$tmp" "$cached" 2>/dev/null || rm -f "$tmp"
+                    find "$IMAGE_DIR" -maxdepth 1 -name "${{name}}-*.jpg" -user "$(id -u)" \\
+                        ! -name "${{cached##*/}}" -delete 2>/dev/null
+                    rm -f "$IMAGE_DIR/.${{name}}-"*".kismi.$(id -u)"
+                fi
+                guvenilir_dosya "$cached" && echo "$cached"
+            }}
+
+            # Ortak önbellek herkese yazılabilir (1777): orada yalnızca CACHE_OWNER'ın (zamanlayıcı) yazdığı
+            # dosyalara, IMAGE_DIR'de bu kullanıcınınkilere güvenilir
+            guvenilir_dosya() {{
+                local owner
+                owner=$(id -u)
+                [ "${{1%/*}}" = "$CACHE_DIR" ] && owner="$CACHE_OWNER"
+                [ -n "$(find "$1" -maxdepth 0 -type f -user "$owner" 2>/dev/null)" ]
+            }}
+
+            # Önbellekteki resmin (ad verilmezse herhangi bir resmin) kullanılabilecek en yeni sürümünün
+            # yolunu yazdırır; yalnızca yerel diske bakılır. Dosya güvenilir olmalı (ortak önbellekte root'un,
+            # IMAGE_DIR'de bu kullanıcının) ve adındaki anahtar
+            # içeriğiyle tutmalıdır: özet anahtarında SHA-256'nın ilk 16 hanesi, boyut-mtime anahtarında
+            # boyut. Oturum ajanı aynı seçimi kendi içinde yapar (Agent.cached_image).
+            onbellekteki_resim() {{
+                local re="^(${{1:-$IMAGE_NAME_RE}})-($CACHE_KEY_RE)\\.jpg$" mtime size path key
+                while read -r mtime size path; do
+                    [[ "${{path##*/}}" =~ $re ]] || continue
+                    key="${{BASH_REMATCH[2]}}"
+                    if [[ "$key" == *-* ]]; then
+                        [ "${{key%%-*}}" = "$size" ] || continue
+                    else
+                        [ "$(sha256sum < "$path" | cut -c1-16)" = "$key" ] || continue
+                    fi
+                    echo "$path"
+                    return 0
+                done < <({{ find "$CACHE_DIR" -maxdepth 1 -type f -name '[!.]*.jpg' -user "$CACHE_OWNER" \\
+                                -printf '%T@ %s %p\\n'
+                            [ "$IMAGE_DIR" = "$CACHE_DIR" ] ||
+                                find "$IMAGE_DIR" -maxdepth 1 -type f -name '[!.]*.jpg' -user "$(id -u)" \\
+                                    -printf '%T@ %s %p\\n'; }} 2>/dev/null | sort -rn)
+                return 1
+            }}
+
+            # Resmi (weekNN veya takvimdeki ad) verilen aynadan gerekirse önbelleğe alır ve
+            # önbellekteki yolunu yazdırır. HTTP aynaları http_den_al ile okunur.
+            # Paylaşımda manifest varsa yalnızca o küçük dosya okunur ve önbellek anahtarı resmin
+            # SHA-256 özetidir ve ekrana uyan çözünürlük varyantı indirilir; yoksa ana resmin
+            # metadata'sı okunur ve anahtar boyut + değişiklik zamanıdır. Her iki durumda da resim
+            # değişmediyse sunucudan tek bayt bile kopyalanmaz.
+            # Dönüş: 0 başarılı, 1 geçici hata (tekrar denenebilir), 2 resim sunucuda yok.
+            sunucudan_al() {{
+                local dir="$1" name="$2"
+                local remote="$dir/${{name}}.jpg"
+                local entry file size sha="" key cached tmp start elapsed server rc result offset copied
+                case "$dir" in
+                    http://*|https://*)
+                        http_den_al "$dir" "$name"
+                        return
+                        ;;
+                esac
+                server=$(sunucu_adi "$dir")
+
+                start=$(date +%s%N)
+                entry=$(timeout -s KILL "$MIRROR_PROBE_TIMEOUT" \\
+                    python3 -c "$MANIFEST_PY" "$dir/manifest.json" "$name" "$(ekran_cozunurlugu)" 2>/dev/null)
+                rc=$?
+                case $rc in
+                    0)
+                        read -r file size sha <<< "$entry"
+                        remote="$dir/$file"
+                        key="${{sha:0:16}}"
+                        ;;
+                    2)
+                        olay_yaz ustveri $(( ($(date +%s%N) - start) / 1000000 )) yok sunucu="$server" yontem=manifest
+                        return 2
+                        ;;
+                    3)
+                        if ! key=$(LC_ALL=C timeout -s KILL "$MIRROR_PROBE_TIMEOUT" stat -c '%s-%Y' "$remote" 2>&1); then
+                            elapsed=$(( ($(date +%s%N) - start) / 1000000 ))
+                            case "$key" in
+                                *"No such file"*)
+                                    olay_yaz ustveri "$elapsed" yok sunucu="$server" yontem=stat
+                                    return 2
+                                    ;;
+                            esac
+                            olay_yaz ustveri "$elapsed" hata sunucu="$server" yontem=stat
+                            return 1
+                        fi
+                        size="${{key%%-*}}"
+                        ;;
+                    *)
+                        olay_yaz ustveri $(( ($(date +%s%N) - start) / 1000000 )) hata sunucu="$server" yontem=manifest
+                        return 1
+                        ;;
+                esac
+                olay_yaz ustveri $(( ($(date +%s%N) - start) / 1000000 )) tamam sunucu="$server" \\
+                    yontem="$([ "$rc" -eq 0 ] && echo manifest || echo stat)"
+                # Zamanlayıcının ortak önbelleğe aldığı kopya, yoksa kullanıcının kendi kopyası
+                cached="$CACHE_DIR/${{name}}-${{key}}.jpg"
+                guvenilir_dosya "$cached" || cached="$IMAGE_DIR/${{name}}-${{key}}.jpg"
+
+                if ! guvenilir_dosya "$cached"; then
+                    # Çoklu yayından veya eşten gelen resim geçici dosyaya, sunucudan gelen kısmi dosyaya
+                    # yazılır; boyut (ve manifest varsa özet) tutunca atomik olarak yerine konur. Kısmi
+                    # dosyanın adı içerik anahtarını taşır: resim sunucuda değişirse eski parçalar sürdürülmez.
+                    tmp=$(mktemp "$IMAGE_DIR/.${{name}}.XXXXXX") || return 1
+                    if ! coklu_yayindan_al "$name" "$sha" "$size" "$tmp" && ! eslerden_al "$sha" "$size" "$tmp"; then
+                        rm -f "$tmp"
+                        tmp="$IMAGE_DIR/.${{name}}-${{key}}.kismi.$(id -u)"
+                        start=$(date +%s%N)
+                        result=$(parcali_kopyala "$remote" "$tmp" "$size" "$sha")
+                        rc=$?
+                        elapsed=$(( ($(date +%s%N) - start) / 1000000 ))
+                        read -r offset copied <<< "$result"
+                        copied="${{copied:-0}}"
+                        case $rc in
+                            0)
+                                olay_yaz kopyalama "$elapsed" tamam sunucu="$server" bayt="$copied" devam="$offset"
+                                [ "$copied" -gt 0 ] && hizi_kaydet "$dir" "$copied" "$elapsed"
+                                ;;
+                            3)
+                                olay_yaz dogrulama "$elapsed" hata sunucu="$server" bayt="$copied" devam="$offset"
+                                return 1
+                                ;;
+                            *)
+                                olay_yaz kopyalama "$elapsed" hata sunucu="$server" bayt="$copied" devam="$offset"
+                                return 1
+                                ;;
+                        esac
+                    fi
+                fi
+
+                onbellege_yerlestir "$name" "$cached" "$tmp"
+            }}
+
+            # Resmi aynalardan sırayla dener: geçici hatada bir sonraki aynaya geçilir ve
+            # sıralama yenilenmek üzere geçersiz kılınır. Tüm aynalar başarısızsa üstel geri
+            # çekilmeyle en fazla FETCH_RETRIES tur denenir; beklemeye eklenen makineye özgü kayma,
+            # tekrar denemelerin de üst üste binmesini önler. Resim hiçbir aynada yoksa 2 döner.
+            onbellege_al() {{
+                local name="$1" attempt=1 delay="$FETCH_BACKOFF" dir rc transient start
+                start=$(date +%s%N)
+
+                while :; do
+                    transient=0
+                    while read -r dir; do
+                        sunucudan_al "$dir" "$name"
+                        rc=$?
+                        if [ "$rc" -eq 0 ]; then
+                            olay_yaz onbellege-alma $(( ($(date +%s%N) - start) / 1000000 )) tamam \\
+                                resim="$name" deneme="$attempt"
+                            return 0
+                        fi
+                        if [ "$rc" -eq 1 ]; then
+                            transient=1
+                            rm -f "$MIRROR_RANK_FILE"
+                        fi
+                    done < <(aynalari_sirala)
+
+                    if [ "$transient" -eq 0 ]; then
+                        olay_yaz onbellege-alma $(( ($(date +%s%N) - start) / 1000000 )) yok \\
+                            resim="$name" deneme="$attempt"
+                        return 2
+                    fi
+                    if [ "$attempt" -ge "$FETCH_RETRIES" ]; then
+                        olay_yaz onbellege-alma $(( ($(date +%s%N) - start) / 1000000 )) hata \\
+                            resim="$name" deneme="$attempt"
+                        return 1
+                    fi
+                    sleep $(( delay + $(makine_gecikmesi "$delay") ))
+                    delay=$(( delay * 2 ))
+                    attempt=$(( attempt + 1 ))
+                done
+            }}
+
+            # Derlenmiş takvimden bir gün aralığının resim adlarını ilk geçtikleri sırayla, tekrarsız
+            # yazdırır (etap_takvim_derle.resolve ile aynı arama: katman başına tek dizi erişimi).
+            # Takvim yoksa veya gün takvim dışındaysa ISO haftasının resmi (weekNN) yazdırılır.
+            # Kullanım: python3 -c "$SCHEDULE_PY" <takvim> <makine> <okul (JSON)> <ilk gün> <gün sayısı>
+            # Çıkış: 0, takvim var ama okunamadıysa 1 (adlar yine yazdırılır).
+            # Kaynak: etap_programlar/takvim_ara.py
+            SCHEDULE_PY=@SCHEDULE_PY@
+
+            # Takvimi bir aynadan geçici dosyaya alır: bağlama noktasından kopyalanır, HTTP aynasından
+            # koşullu istenir. Dönüş: 0 alındı, 1 hata, 2 aynada takvim yok, 4 değişmedi (HTTP 304).
+            takvimi_indir() {{
+                local dir="$1" tmp="$2" err
+                case "$dir" in
+                    http://*|https://*)
+                        python3 -c "$HTTP_PY" dosya "$dir" "$HTTP_TIMEOUT" "$SCHEDULE_NAME" "$tmp" "$SCHEDULE_FILE" \\
+                            "$HTTP_STATE_FILE" 2>/dev/null
+                        return
+                        ;;
+                esac
+                err=$(LC_ALL=C timeout -s KILL "$MIRROR_PROBE_TIMEOUT" cp "$dir/$SCHEDULE_NAME" "$tmp" 2>&1) && return 0
+                case "$err" in
+                    *"No such file"*)
+                        # Bağlanamamış boş bağlama noktası takvimin kaldırıldığı anlamına gelmez
+                        mountpoint -q "$dir" && return 2
+                        ;;
+                esac
+                return 1
+            }}
+
+            # Paylaşımdaki derlenmiş takvimi önbelleğe kopyalar; değişmediyse yerindekine dokunmaz,
+            # okunamıyorsa almaz. Bağlı bir aynada takvim yoksa yereldeki de silinir (ISO haftasına
+            # dönülür). Dönüş: 0 güncel, 1 hiçbir aynadan alınamadı.
+            takvimi_guncelle() {{
+                local dir tmp start server rc
+                tmp=$(mktemp "$CACHE_DIR/.takvim.XXXXXX") || return 1
+                while read -r dir; do
+                    server=$(sunucu_adi "$dir")
+                    start=$(date +%s%N)
+                    takvimi_indir "$dir" "$tmp"
+                    rc=$?
+                    case $rc in
+                        0)
+                            if ! python3 -c "$SCHEDULE_PY" "$tmp" "$HOSTNAME" "$EVENT_SCHOOL" "$(date +%F)" 1 >/dev/null; then
+                                olay_yaz takvim $(( ($(date +%s%N) - start) / 1000000 )) hata sunucu="$server" ayrinti=bozuk
+                                continue
+                            fi
+                            if ! cmp -s "$tmp" "$SCHEDULE_FILE"; then
+                                chmod 644 "$tmp"
+                                mv -f "$tmp" "$SCHEDULE_FILE"
+                            fi
+                            rm -f "$tmp"
+                            olay_yaz takvim $(( ($(date +%s%N) - start) / 1000000 )) tamam sunucu="$server"
+                            return 0
+                            ;;
+                        2)
+                            rm -f "$tmp" "$SCHEDULE_FILE"
+                            olay_yaz takvim $(( ($(date +%s%N) - start) / 1000000 )) yok sunucu="$server"
+                            return 0
+                            ;;
+                        4)
+                            rm -f "$tmp"
+                            olay_yaz takvim $(( ($(date +%s%N) - start) / 1000000 )) tamam sunucu="$server" http=304
+                            return 0
+                            ;;
+                    esac
+                    olay_yaz takvim $(( ($(date +%s%N) - start) / 1000000 )) hata sunucu="$server"
+                done < <(aynalari_sirala)
+                rm -f "$tmp"
+                return 1
+            }}
+
+            # İki aydan uzun süredir yenilenmeyen resimleri ve bir haftadır sürdürülmeyen kısmi
+            # dosyaları IMAGE_DIR'den siler (çoklu yayın alıcısının beklettiklerini yalnızca root silebilir);
+            # oturumlar ortak önbelleğe eskiden yazdıkları resimleri ve kısmi dosyaları da siler.
+            # Oturum ölçümlerinin son 500, aşama olaylarının son EVENTS_MAX_LINES satırını tutar.
+            onbellegi_temizle() {{
+                find "$IMAGE_DIR" -maxdepth 1 -name '*.jpg' -user "$(id -u)" -mtime +60 \\
+                    -delete 2>/dev/null
+                if [ "$(id -u)" -eq 0 ]; then
+                    find "$CACHE_DIR" -maxdepth 1 -name "$MULTICAST_RECEIVED_PREFIX*" -mtime +60 -delete 2>/dev/null
+                elif [ "$IMAGE_DIR" != "$CACHE_DIR" ]; then
+                    find "$CACHE_DIR" -maxdepth 1 \\( -name '[!.]*.jpg' -o -name '.*.kismi.*' \\) -user "$(id -u)" \\
+                        -delete 2>/dev/null
+                fi
+                find "$IMAGE_DIR" -maxdepth 1 -name '.*.kismi.*' -user "$(id -u)" -mtime +7 \\
+                    -delete 2>/dev/null
+                if [ -f "$LOGIN_METRICS_FILE" ]; then
+                    tail -n 500 "$LOGIN_METRICS_FILE" > "$LOGIN_METRICS_FILE.$$" 2>/dev/null && \\
+                        mv -f "$LOGIN_METRICS_FILE.$$" "$LOGIN_METRICS_FILE"
+                fi
+                if [ -f "$EVENTS_FILE" ]; then
+                    tail -n "$EVENTS_MAX_LINES" "$EVENTS_FILE" > "$EVENTS_FILE.$$" 2>/dev/null && \\
+                        mv -f "$EVENTS_FILE.$$" "$EVENTS_FILE"
+                fi
+            }}
+        """).strip() + "\n"
+        # Gömülü Python yardımcıları dedent sonrası yerleştirilir (kaynakları kendi girintisini taşır)
+        programs = {
+            "MANIFEST_PY": program_source("manifest_kaydi"),
+            "PEER_PY": program_source("es_istemci"),
+            "FETCH_PY": program_source("parcali_kopya"),
+            "HTTP_PY": program_source("http_al", RECEIVED_PREFIX=MULTICAST_RECEIVED_PREFIX),
+            "SCHEDULE_PY": program_source("takvim_ara"),
+        }
+        for variable, source in programs.items():
+            lib = lib.replace(f"@{variable}@", shlex.quote(source))
+        return lib
+
+    def render_agent(self):
+        """Her oturumda çalışan ve oturum boyunca açık kalan arka plan ajanı (Python)."""
+        return program_source(
+            "ajan",
+            CACHE_DIR=CACHE_DIR,
+            LIB_PATH=LIB_PATH,
+            LOGIN_FETCH_WINDOW=LOGIN_FETCH_WINDOW,
+            LOGIN_REFRESH_TIMEOUT=LOGIN_REFRESH_TIMEOUT,
+            EVENT_SCHOOL=self.school,
+            EVENTS_JOURNALD=self.journald_enabled,
+            JOURNAL_SOCKET=JOURNAL_SOCKET,
+            SCHEDULE_NAME=SCHEDULE_NAME,
+            IMAGE_NAME_PATTERN=IMAGE_NAME_PATTERN,
+            CACHE_KEY_PATTERN=CACHE_KEY_PATTERN,
+        )
+
+    def render_prefetch_script(self):
+        """Önbelleği oturum dışında dolduran betik."""
+        script = textwrap.dedent(f"""
+            #!/bin/bash
+            # Derlenmiş takvimi ve bugünden PREFETCH_WEEKS hafta sonrasına kadar gösterilecek
+            # resimleri (takvim yoksa bu haftanın ve sonraki haftaların resimlerini) yerel önbelleğe
+            # indirir. etap-arka-plan-onbellek.timer tarafından gece ve öğle arasında çalıştırılır.
+
+            . "{LIB_PATH}"
+
+            PREFETCH_WEEKS={self.prefetch_weeks}
+
+            # Açılışta kaçırılan çalıştırmalar tüm tahtalarda aynı anda tetiklenir;
+            # sunucuya gitmeden önce makineye özgü dilimi bekle
+            sleep "$(makine_gecikmesi "$FETCH_WINDOW")"
+
+            takvimi_guncelle || echo "Takvim güncellenemedi, önbellekteki kullanılıyor."
+
+            mapfile -t NAMES < <(python3 -c "$SCHEDULE_PY" "$SCHEDULE_FILE" "$HOSTNAME" "$EVENT_SCHOOL" \\
+                "$(date +%F)" $(( PREFETCH_WEEKS * 7 + 1 )))
+            for NAME in "${{NAMES[@]}}"; do
+                if CACHED=$(onbellege_al "$NAME"); then
+                    echo "Önbellekte: $CACHED"
+                else
+                    echo "Sunucuda bulunamadı: ${{REMOTE_DIRS[0]}}/${{NAME}}.jpg"
+                fi
+            done
+
+            onbellegi_temizle
+        """).strip() + "\n"
+        if self.system_wallpaper:
+            script += textwrap.dedent(f"""
+                # Sistem düzeyinde arka plan: yeni gelen resim oturum beklenmeden uygulanır
+                {SYSTEM_WALLPAPER_PATH}
+            """)
+        return script
+
+    def render_prefetch_service(self, mount_unit_names):
+        """Önbellek betiğini çalıştıran systemd servisi."""
+        units = " ".join(["network-online.target", *mount_unit_names])
+        return textwrap.dedent(f"""
+            [Unit]
+            Description=ETAP Haftalık Arka Plan Önbelleğini Doldur
+            Wants={units}
+            After={units}
+
+            [Service]
+            Type=oneshot
+            ExecStart={PREFETCH_PATH}
+            Nice=19
+            IOSchedulingClass=idle
+        """).strip() + "\n"
+
+    def render_prefetch_timer(self):
+        """Önbellek servisini gece ve öğle arasında tetikleyen zamanlayıcı."""
+        return textwrap.dedent("""
+            [Unit]
+            Description=ETAP Haftalık Arka Plan Önbelleği Zamanlayıcısı
+
+            [Timer]
+            # Gece ve öğle arası; tahta kapalıyken kaçırılan çalıştırma açılışta yapılır
+            OnCalendar=*-*-* 03:00:00
+            OnCalendar=*-*-* 12:30:00
+            Persistent=true
+
+            [Install]
+            WantedBy=timers.target
+        """).strip() + "\n"
+
+    def render_peer(self):
+        """Önbellekteki doğrulanmış resimleri aynı ağdaki tahtalara sunan eş dağıtımı hizmeti (Python)."""
+        return program_source("es_sunucu", CACHE_DIR=CACHE_DIR, PEER_PORT=PEER_PORT,
+                              PEER_MAX_UPLOADS=PEER_MAX_UPLOADS)
+
+    def render_peer_service(self):
+        """Eş dağıtımı hizmetinin systemd birimi; önbelleği yalnızca okuyabilen geçici bir kullanıcıyla çalışır."""
+        return textwrap.dedent(f"""
+            [Unit]
+            Description=ETAP Haftalık Arka Plan Eş Dağıtımı
+            Wants=network-online.target
+            After=network-online.target
+
+            [Service]
+            ExecStart={PEER_PATH}
+            DynamicUser=yes
+            ProtectSystem=strict
+            ProtectHome=yes
+            PrivateTmp=yes
+            NoNewPrivileges=yes
+            Nice=10
+            IOSchedulingClass=idle
+            Restart=on-failure
+
+            [Install]
+            WantedBy=multi-user.target
+        """).strip() + "\n"
+
+    def render_multicast_receiver(self):
+        """Yönetici tarafındaki çoklu yayın gönderiminden haftanın resmini önbellekte bekleten hizmet (Python)."""
+        return program_source(
+            "coklu_yayin_alici",
+            CACHE_DIR=CACHE_DIR,
+            MULTICAST_GROUP=MULTICAST_GROUP,
+            MULTICAST_PORT=MULTICAST_PORT,
+            HEADER_FORMAT=MULTICAST_HEADER,
+            VERSION=MULTICAST_VERSION,
+            BLOCK_SIZE=MULTICAST_BLOCK_SIZE,
+            MAX_SIZE=MULTICAST_MAX_SIZE,
+            MAGIC=MULTICAST_MAGIC,
+            IMAGE_NAME_PATTERN=IMAGE_NAME_PATTERN,
+            RECEIVED_PREFIX=MULTICAST_RECEIVED_PREFIX,
+            NAK_RANGES=MULTICAST_NAK_RANGES,
+            MAX_SESSIONS=MULTICAST_MAX_SESSIONS,
+            MEMORY_LIMIT=MULTICAST_MEMORY_LIMIT,
+            SHARES=self.mirror_mount_points(),
+            SERVERS=[self.mirror_host(mirror) for mirror in self.mirrors],
+            EVENT_SCHOOL=self.school,
+        )
+
+    def render_multicast_service(self):
+        """Çoklu yayın alıcısının systemd birimi; geçici bir kullanıcıyla yalnızca önbellek dizinine yazabilir."""
+        return textwrap.dedent(f"""
+            [Unit]
+            Description=ETAP Haftalık Arka Plan Çoklu Yayın Alıcısı
+            Wants=network-online.target
+            After=network-online.target remote-fs.target
+
+            [Service]
+            ExecStart={MULTICAST_RECEIVER_PATH}
+            DynamicUser=yes
+            ProtectSystem=strict
+            ReadWritePaths={CACHE_DIR}
+            ProtectHome=yes
+            PrivateTmp=yes
+            NoNewPrivileges=yes
+            Nice=10
+            Restart=on-failure
+
+            [Install]
+            WantedBy=multi-user.target
+        """).strip() + "\n"
+
+    def render_system_wallpaper(self, lib_path=LIB_PATH, background_dir=SYSTEM_BACKGROUND_DIR,
+                                dconf_file=DCONF_PICTURE_PATH):
+        """Günün resmini oturumlardan bağımsız olarak sistem dconf veritabanına yazan betik (root)."""
+        return textwrap.dedent(f"""
+            #!/bin/bash
+            # Günün resmini (takvim yoksa haftanın resmini) yerel önbellekten sistem dizinine kopyalar
+            # ve picture-uri'yi sistem dconf veritabanına, 00-background'un yanına yazar; dconf update
+            # yalnızca resim değiştiğinde bir kez çalışır. Anahtar kilitli olduğundan tüm kullanıcılar
+            # bu değeri görür; oturum açılışında arka plan için hiçbir iş yapılmaz (autostart yok).
+            # etap-arka-plan-sistem.timer gün değişiminde, önbellek betiği her doldurmadan sonra
+            # çalıştırır. Sunucuya gidilmez: önbellekte olmayan resmi önbellek zamanlayıcısı indirir.
+
+            EVENT_SOURCE=sistem
+            . "{lib_path}"
+
+            SYSTEM_BACKGROUND_DIR="{background_dir}"
+            DCONF_PICTURE_FILE="{dconf_file}"
+
+            start=$(date +%s%N)
+            NAME=$(python3 -c "$SCHEDULE_PY" "$SCHEDULE_FILE" "$HOSTNAME" "$EVENT_SCHOOL" "$(date +%F)" 1)
+
+            # Oturum ajanıyla aynı seçim (onbellekteki_resim): root olarak çalıştığından yalnızca root'a ait
+            # ve adındaki anahtar içeriğiyle tutan resimler; herkesin yazabildiği önbelleğe başka bir
+            # kullanıcının koyduğu dosya sistem dconf'una, dolayısıyla tüm kullanıcılara ulaşamaz
+            IMAGE=$(onbellekteki_resim "$NAME")
+            DETAIL=bu-gun
+            if [ -z "$IMAGE" ]; then
+                # Günün resmi henüz gelmedi: uygulanmış bir resim varsa o kalır, yoksa son geçerli resim
+                if [ -f "$DCONF_PICTURE_FILE" ]; then
+                    olay_yaz sistem-uygulama $(( ($(date +%s%N) - start) / 1000000 )) yok resim="$NAME"
+                    exit 0
+                fi
+                IMAGE=$(onbellekteki_resim)
+                DETAIL=son-gecerli
+                if [ -z "$IMAGE" ]; then
+                    olay_yaz sistem-uygulama $(( ($(date +%s%N) - start) / 1000000 )) yok resim="$NAME"
+                    exit 0
+                fi
+            fi
+
+            # Kullanıcıların yazabildiği önbellekteki dosyaya bağlanmak yerine root'a ait bir kopya;
+            # ad önbellekteki adın "etap-" önekli hâlidir, resim değişince adres de değişir
+            LOCAL="$SYSTEM_BACKGROUND_DIR/etap-${{IMAGE##*/}}"
+            if [ ! -f "$LOCAL" ]; then
+                mkdir -p "$SYSTEM_BACKGROUND_DIR"
+                if ! cp --reflink=auto "$IMAGE" "$LOCAL.$$" || ! chmod 644 "$LOCAL.$$" || \\
+                        ! mv -f "$LOCAL.$$" "$LOCAL"; then
+                    rm -f "$LOCAL.$$"
+                    olay_yaz sistem-uygulama $(( ($(date +%s%N) - start) / 1000000 )) hata resim="$NAME"
+                    exit 1
+                fi
+            fi
+
+            CONTENT="[org/cinnamon/desktop/background]
+            picture-uri='file://$LOCAL'"
+            RESULT=degismedi
+            if [ "$(cat "$DCONF_PICTURE_FILE" 2>/dev/null)" != "$CONTENT" ]; then
+                # Geçici dosya noktayla başlar: eşzamanlı bir dconf update onu okumaz
+                tmp="${{DCONF_PICTURE_FILE%/*}}/.${{DCONF_PICTURE_FILE##*/}}.$$"
+                mkdir -p "${{DCONF_PICTURE_FILE%/*}}"
+                if ! printf '%s\\n' "$CONTENT" > "$tmp" || ! mv -f "$tmp" "$DCONF_PICTURE_FILE" || ! dconf update; then
+                    rm -f "$tmp"
+                    olay_yaz sistem-uygulama $(( ($(date +%s%N) - start) / 1000000 )) hata resim="$NAME" ayrinti=dconf
+                    exit 1
+                fi
+                RESULT=yeni
+            fi
+
+            find "$SYSTEM_BACKGROUND_DIR" -maxdepth 1 -name 'etap-*.jpg' ! -name "${{LOCAL##*/}}" -delete 2>/dev/null
+            olay_yaz sistem-uygulama $(( ($(date +%s%N) - start) / 1000000 )) tamam resim="$NAME" \\
+                ayrinti="$DETAIL" dconf="$RESULT"
+            echo "Uygulandı ($RESULT): $LOCAL"
+        """).strip() + "\n"
+
+    def render_system_wallpaper_service(self):
+        """Sistem düzeyinde arka plan betiğini çalıştıran systemd servisi."""
+        return textwrap.dedent(f"""
+            [Unit]
+            Description=ETAP Haftalık Arka Planı Sistem Genelinde Uygula
+
+            [Service]
+            Type=oneshot
+            ExecStart={SYSTEM_WALLPAPER_PATH}
+            Nice=10
+        """).strip() + "\n"
+
+    def render_system_wallpaper_timer(self):
+        """Sistem düzeyinde arka planı gün değişiminde yenileyen zamanlayıcı."""
+        return textwrap.dedent("""
+            [Unit]
+            Description=ETAP Haftalık Arka Plan Sistem Uygulama Zamanlayıcısı
+
+            [Timer]
+            # Gün değişiminde; tahta kapalıyken kaçırılan çalıştırma açılışta yapılır
+            OnCalendar=*-*-* 00:00:10
+            Persistent=true
+
+            [Install]
+            WantedBy=timers.target
+        """).strip() + "\n"
+
+    def render_autostart(self):
+        """Tüm kullanıcılar için autostart kaydı."""
+        return textwrap.dedent(f"""
+            [Desktop Entry]
+            Type=Application
+            Name={self.AUTOSTART_NAME}
+            Comment={self.AUTOSTART_COMMENT}
+            Exec={AGENT_PATH}
+            OnlyShowIn=X-Cinnamon;
+            X-GNOME-Autostart-enabled=true
+        """).strip() + "\n"
+
+    def render_dconf_background(self):
+        return textwrap.dedent("""
+            [org/cinnamon/desktop/background]
+            picture-options='scaled'
+        """).strip() + "\n"
+
+    def render_dconf_lock(self):
+        return textwrap.dedent("""
+            /org/cinnamon/desktop/background/picture-uri
+            /org/cinnamon/desktop/background/picture-options
+        """).strip() + "\n"
+
+    # --- İstenen durum
+
+    def mount_point_at(self, index):
+        """Sıradaki aynanın yerel bağlama noktası: ilk ayna {mount_point}, sonrakiler {mount_point}_2, _3 ..."""
+        return self.mount_point if index == 0 else f"{self.mount_point}_{index + 1}"
+
+    def mirror_mount_points(self):
+        """Aynaların yerel bağlama noktaları (ayna sırasıyla)."""
+        return [self.mount_point_at(index) for index in range(len(self.mirrors))]
+
+    def remote_dirs(self):
+        """Kitaplığın resimleri okuduğu ayna konumları: mount kullanan kurulumda bağlama noktaları."""
+        return self.mirror_mount_points()
+
+    def boot_units(self):
+        """Açılışta etkin olması gereken mount veya automount birimleri (ayna sırasıyla)."""
+        suffix = "automount" if self.automount_enabled else "mount"
+        return [systemd_unit_name(mount_point, suffix) for mount_point in self.mirror_mount_points()]
+
+    def desired_state(self, existing_only=True):
+        """
+        Kurulumun ürettiği tüm dosyaları bellekte hazırlar.
+        Dönüş: ({yol: (içerik, kip)}, diskte bulunan ve silinmesi gereken yollar).
+        existing_only=False ise silinecek yollar diskte olup olmadıklarına bakılmadan
+        döner (başka tahtalarda kurulacak paket için, etap_paket_olustur.py).
+        """
+        files = {}
+        remove = []
+        for what, mount_point in zip(self.mirrors, self.mirror_mount_points()):
+            files[f"{SYSTEMD_DIR}/{systemd_unit_name(mount_point, 'mount')}"] = (
+                self.render_mount_unit(what, mount_point), 0o644)
+            automount_unit_path = f"{SYSTEMD_DIR}/{systemd_unit_name(mount_point, 'automount')}"
+            if self.automount_enabled:
+                files[automount_unit_path] = (self.render_automount_unit(mount_point), 0o644)
+            else:
+                remove.append(automount_unit_path)
+
+        # Önceki kurulumda olup artık listede olmayan aynalar (HTTP'ye geçildiyse tümü)
+        index = len(self.mirror_mount_points())
+        while os.path.exists(f"{SYSTEMD_DIR}/" + systemd_unit_name(self.mount_point_at(index), "mount")):
+            for suffix in ("automount", "mount"):
+                remove.append(f"{SYSTEMD_DIR}/" + systemd_unit_name(self.mount_point_at(index), suffix))
+            index += 1
+
+        files[LIB_PATH] = (self.render_lib(self.remote_dirs()), 0o644)
+        remove.append(SCRIPT_PATH)
+        files[PREFETCH_PATH] = (self.render_prefetch_script(), 0o755)
+        files[PREFETCH_SERVICE_PATH] = (self.render_prefetch_service(self.boot_units()), 0o644)
+        files[PREFETCH_TIMER_PATH] = (self.render_prefetch_timer(), 0o644)
+        # Sistem düzeyinde arka planda oturumlar hiçbir şey çalıştırmaz: ajan ve autostart kaydı yoktur
+        if self.system_wallpaper:
+            files[SYSTEM_WALLPAPER_PATH] = (self.render_system_wallpaper(), 0o755)
+            files[SYSTEM_WALLPAPER_SERVICE_PATH] = (self.render_system_wallpaper_service(), 0o644)
+            files[SYSTEM_WALLPAPER_TIMER_PATH] = (self.render_system_wallpaper_timer(), 0o644)
+            remove += [AGENT_PATH, AUTOSTART_PATH]
+        else:
+            files[AGENT_PATH] = (self.render_agent(), 0o755)
+            files[AUTOSTART_PATH] = (self.render_autostart(), 0o644)
+            # Betiğin yazdığı dconf dosyası da kaldırılır; oturum ajanı yeniden kullanıcı anahtarına yazar
+            remove += [SYSTEM_WALLPAPER_PATH, SYSTEM_WALLPAPER_SERVICE_PATH, SYSTEM_WALLPAPER_TIMER_PATH,
+                       DCONF_PICTURE_PATH]
+        if self.peer_enabled:
+            files[PEER_PATH] = (self.render_peer(), 0o755)
+            files[PEER_SERVICE_PATH] = (self.render_peer_service(), 0o644)
+        else:
+            remove += [PEER_PATH, PEER_SERVICE_PATH]
+        if self.multicast_enabled:
+            files[MULTICAST_RECEIVER_PATH] = (self.render_multicast_receiver(), 0o755)
+            files[MULTICAST_SERVICE_PATH] = (self.render_multicast_service(), 0o644)
+        else:
+            remove += [MULTICAST_RECEIVER_PATH, MULTICAST_SERVICE_PATH]
+        if self.lock_enabled:
+            files[DCONF_BACKGROUND_PATH] = (self.render_dconf_background(), 0o644)
+            files[DCONF_LOCK_PATH] = (self.render_dconf_lock(), 0o644)
+
+        return files, [path for path in remove if not existing_only or os.path.exists(path)]
+
+    def plan(self):
+        """
+        İstenen durumu diskteki dosyalarla karşılaştırır.
+        Dönüş: yalnızca farklı olan dosyalar için (yol, eski içerik, yeni içerik, kip)
+        listesi; yeni dosyada eski içerik, silinecek dosyada yeni içerik None'dır.
+        """
+        files, remove = self.desired_state()
+        changes = []
+        for path, (content, mode) in files.items():
+            try:
+                with open(path, encoding="utf-8") as f:
+                    current = f.read()
+                current_mode = os.stat(path).st_mode & 0o7777
+            except FileNotFoundError:
+                current, current_mode = None, None
+            if current != content or current_mode != mode:
+                changes.append((path, current, content, mode))
+        for path in remove:
+            with open(path, encoding="utf-8") as f:
+                changes.append((path, f.read(), None, None))
+        return changes
+
+    def systemd_bus(self):
+        """
+        systemd'ye sistem veriyolu üzerinden bağlantı açar. systemctl arayüzü seçildiyse
+        veya veriyoluna bağlanılamıyorsa (dbus-daemon yok) None döner ve systemctl'e geçilir.
+        """
+        if self.systemd_backend != "dbus":
+            return None
+        try:
+            return SystemdBus()
+        except (OSError, DBusError) as e:
+            self.log(f"Sistem D-Bus veriyoluna bağlanılamadı ({e}); systemctl kullanılacak.")
+            self.systemd_backend = "systemctl"
+            return None
+
+    def unit_states(self, units):
+        """
+        Birimlerin {ad: (UnitFileState, ActiveState)} durumunu D-Bus ile, olmazsa
+        tek systemctl çağrısıyla okur.
+        """
+        bus = self.systemd_bus()
+        if bus is not None:
+            with bus:
+                try:
+                    return {unit: bus.unit_state(unit) for unit in units}
+                except (OSError, DBusError) as e:
+                    self.log(f"UYARI: birim durumları D-Bus ile okunamadı ({e}); systemctl kullanılıyor.")
+        try:
+            result = self.run_process(
+                ["systemctl", "show", "--property=Id,UnitFileState,ActiveState", *units]
+            )
+        except OSError:
+            return {}
+        states = {}
+        for block in result.stdout.split("\n\n"):
+            props = dict(line.split("=", 1) for line in block.splitlines() if "=" in line)
+            if "Id" in props:
+                states[props["Id"]] = (props.get("UnitFileState", ""), props.get("ActiveState", ""))
+        return states
+
+    def actions(self, changes):
+        """
+        Değişen dosyaların gerektirdiği systemctl / dconf komutlarını sırasıyla döner.
+        Hiçbir dosya değişmediyse ve birimler zaten etkin ve çalışıyorsa liste boştur.
+        """
+        changed = {path for path, _, _, _ in changes}
+        boot_units = self.boot_units()
+        timer = os.path.basename(PREFETCH_TIMER_PATH)
+        peer = os.path.basename(PEER_SERVICE_PATH)
+        receiver = os.path.basename(MULTICAST_SERVICE_PATH)
+        system_timer = os.path.basename(SYSTEM_WALLPAPER_TIMER_PATH)
+        # Automount'a geçildiğinde eski açılış bağlamaları kapatılır
+        old_boot_units = ([systemd_unit_name(mount_point, "mount") for mount_point in self.mirror_mount_points()]
+                          if self.automount_enabled else [])
+        states = self.unit_states(boot_units + old_boot_units + [timer, peer, receiver, system_timer])
+
+        def running(unit):
+            return states.get(unit) == ("enabled", "active")
+
+        commands = []
+        if any(path.startswith(SYSTEMD_DIR + "/") for path in changed):
+            commands.append(["systemctl", "daemon-reload"])
+        for unit in old_boot_units:
+            if states.get(unit, ("",))[0] == "enabled":
+                commands.append(["systemctl", "disable", "--now", unit])
+        for mount_point, unit in zip(self.mirror_mount_points(), boot_units):
+            if not running(unit):
+                commands.append(["systemctl", "enable", "--now", unit])
+                continue
+            # Çalışan birimler yalnızca dosyaları değiştiyse yeni ayarlarla yeniden başlatılır;
+            # bağlı değilse try-restart hiçbir şey yapmaz
+            for suffix in ("automount", "mount"):
+                name = systemd_unit_name(mount_point, suffix)
+                if f"{SYSTEMD_DIR}/{name}" in changed:
+                    commands.append(["systemctl", "try-restart", name])
+
+        if not running(timer):
+            commands.append(["systemctl", "enable", "--now", timer])
+        elif PREFETCH_TIMER_PATH in changed:
+            commands.append(["systemctl", "restart", timer])
+        if self.peer_enabled:
+            if not running(peer):
+                commands.append(["systemctl", "enable", "--now", peer])
+            elif changed & {PEER_PATH, PEER_SERVICE_PATH}:
+                commands.append(["systemctl", "restart", peer])
+        if self.multicast_enabled:
+            if not running(receiver):
+                commands.append(["systemctl", "enable", "--now", receiver])
+            elif changed & {MULTICAST_RECEIVER_PATH, MULTICAST_SERVICE_PATH}:
+                commands.append(["systemctl", "restart", receiver])
+        if self.system_wallpaper:
+            if not running(system_timer):
+                commands.append(["systemctl", "enable", "--now", system_timer])
+            elif SYSTEM_WALLPAPER_TIMER_PATH in changed:
+                commands.append(["systemctl", "restart", system_timer])
+            # Önbellekteki resim ilk doldurmayı beklemeden hemen uygulanır
+            if changed & {LIB_PATH, SYSTEM_WALLPAPER_PATH, SYSTEM_WALLPAPER_SERVICE_PATH} or not running(system_timer):
+                commands.append(["systemctl", "start", "--no-block", os.path.basename(SYSTEM_WALLPAPER_SERVICE_PATH)])
+        # Önbelleği etkileyen bir değişiklikte ilk doldurmayı beklemeden arka planda başlat
+        if changed & {LIB_PATH, PREFETCH_PATH, PREFETCH_SERVICE_PATH} or not running(timer):
+            commands.append(["systemctl", "start", "--no-block", os.path.basename(PREFETCH_SERVICE_PATH)])
+
+        if changed & {DCONF_BACKGROUND_PATH, DCONF_LOCK_PATH, DCONF_PICTURE_PATH}:
+            commands.append(["dconf", "update"])
+        return commands
+
+    def run_actions(self, commands):
+        """
+        actions() komutlarını uygular ve başarısız olanların sayısını döner.
+
+        D-Bus ile systemctl komutları tek bağlantıda toplanır: birim dosyaları tek
+        DisableUnitFiles ve tek EnableUnitFiles çağrısıyla etkinleştirilir, ardından
+        yalnızca bir kez Reload yapılır; durdurma ve başlatma işleri birlikte kuyruğa
+        alınır ve JobRemoved sinyalleriyle sonuçları beklenir. D-Bus kullanılamıyorsa
+        her komut ayrı bir süreçle çalıştırılır. Her iki yolda da geçen süre loglanır.
+        """
+        if not commands:
+            return 0
+        start = time.monotonic()
+        bus = self.systemd_bus()
+        failed = 0
+        processes = commands
+        if bus is not None:
+            systemctl = [cmd for cmd in commands if cmd[0] == "systemctl"]
+            processes = [cmd for cmd in commands if cmd[0] != "systemctl"]
+            if systemctl:
+                with self.timed_stage("systemd", arayuz="dbus", komut=len(systemctl)) as stage:
+                    with bus:
+                        failed = self.run_bus_actions(bus, systemctl)
+                    stage["sonuc"] = "hata" if failed else "tamam"
+            else:
+                bus.close()
+        for cmd in processes:
+            stage_name = "systemd" if cmd[0] == "systemctl" else cmd[0]
+            with self.timed_stage(stage_name, arayuz="surec", komut=" ".join(cmd[1:2])) as stage:
+                rc = self.run_cmd(cmd, check=False)
+                stage["sonuc"] = "hata" if rc != 0 else "tamam"
+            if rc != 0:
+                failed += 1
+                self.log(f"UYARI: '{' '.join(cmd)}' başarısız oldu. journalctl ile ayrıntı bakılabilir.")
+        backend = f"D-Bus + {len(processes)} süreç" if bus is not None else f"{len(processes)} süreç"
+        self.log(f"{len(commands)} komut {(time.monotonic() - start) * 1000:.0f} ms'de uygulandı ({backend}).")
+        return failed
+
+    def run_bus_actions(self, bus, commands):
+        """systemctl komutlarının D-Bus karşılıklarını toplu olarak uygular; hata sayısını döner."""
+        # systemctl fiili -> Manager yöntemi
+        methods = {"start": "StartUnit", "restart": "RestartUnit", "try-restart": "TryRestartUnit"}
+        reload = False
+        enable, disable, stop, jobs, no_block = [], [], [], [], []
+        for cmd in commands:
+            verb, unit = cmd[1], cmd[-1]
+            if verb == "daemon-reload":
+                reload = True
+            elif verb == "enable":
+                enable.append(unit)
+                if "--now" in cmd:
+                    jobs.append(("StartUnit", unit))
+            elif verb == "disable":
+                disable.append(unit)
+                if "--now" in cmd:
+                    stop.append(unit)
+            elif "--no-block" in cmd:
+                no_block.append((methods[verb], unit))
+            else:
+                jobs.append((methods[verb], unit))
+
+        failed = 0
+        try:
+            if disable:
+                self.log(f"D-Bus: DisableUnitFiles {' '.join(disable)}")
+                for change, link, target in bus.call("DisableUnitFiles", "asb", disable, False)[0]:
+                    self.log(f"  {change}: {link}")
+            if enable:
+                self.log(f"D-Bus: EnableUnitFiles {' '.join(enable)}")
+                for change, link, target in bus.call("EnableUnitFiles", "asbb", enable, False, False)[1]:
+                    self.log(f"  {change}: {link} -> {target}")
+            if reload or enable or disable:
+                self.log("D-Bus: Reload")
+                bus.call("Reload")
+
+            # Önce durdurmalar, sonra başlatmalar; her grubun işleri birlikte beklenir
+            bus.subscribe()
+            for batch in ([("StopUnit", unit) for unit in stop], jobs):
+                queued = {}
+                for method, unit in batch:
+                    self.log(f"D-Bus: {method} {unit}")
+                    try:
+                        queued[bus.call(method, "ss", unit, "replace")[0]] = unit
+                    except DBusError as e:
+                        failed += 1
+                        self.log(f"UYARI: {unit}: {e}")
+                for unit, result in bus.wait_jobs(queued, JOB_TIMEOUT, self.cancel_event).items():
+                    if result != "done":
+                        failed += 1
+                        self.log(f"UYARI: {unit} işi '{result}' ile bitti. journalctl -u {unit} ile ayrıntı bakılabilir.")
+            for method, unit in no_block:
+                self.log(f"D-Bus: {method} {unit} (beklenmeden)")
+                bus.call(method, "ss", unit, "replace")
+        except (OSError, DBusError) as e:
+            self.log(f"HATA: systemd D-Bus çağrısı başarısız: {e}")
+            failed += 1
+        return failed
+
+    def redact(self, text):
+        """Plan çıktısında gösterilmeyecek değerleri gizler."""
+        return text
+
+    def show_plan(self):
+        """Yapılacak dosya değişikliklerini birleşik fark (diff) olarak ve ardından komutları log'a yazar."""
+        changes = self.plan()
+        if not changes:
+            self.log("Tüm dosyalar güncel.")
+        for path, current, content, mode in changes:
+            if content is None:
+                self.log(f"- {path} silinecek")
+                continue
+            if current is None:
+                self.log(f"+ {path} oluşturulacak (kip {mode:04o})")
+            else:
+                self.log(f"~ {path} değişecek (kip {mode:04o})")
+            diff = difflib.unified_diff(
+                self.redact(current or "").splitlines(), self.redact(content).splitlines(),
+                fromfile=path if current is not None else "/dev/null", tofile=path, lineterm=""
+            )
+            for line in diff:
+                self.log(line)
+
+        commands = self.actions(changes)
+        for path, _, content, _ in changes:
+            if content is None and path.startswith(SYSTEMD_DIR + "/"):
+                commands.insert(0, ["systemctl", "disable", "--now", os.path.basename(path)])
+        self.log("Çalıştırılacak komutlar:" if commands else "Çalıştırılacak komut yok.")
+        for cmd in commands:
+            self.log(f"  $ {' '.join(cmd)}")
+        return changes
+
+    def write_file(self, path, content, mode=0o644):
+        """
+        Dosyayı aynı dizinde geçici bir dosyaya yazar ve rename ile yerine koyar;
+        okuyan (systemd, oturum ajanı) hiçbir zaman yarım yazılmış dosya görmez.
+        """
+        self.log(f"{path} yazılıyor...")
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+                f.flush()
+                os.fchmod(f.fileno(), mode)
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    # --- Kurulum
+
+    def prepare_cache_dir(self):
+        """
+        Makine genelinde paylaşılan arka plan önbelleği: her haftalık resim makinede bir
+        kez tutulur; tüm kullanıcılar buradan beslenir. Dizine herkes yazabildiğinden ajan ve
+        kitaplık yalnızca root'un veya kullanıcının kendi dosyalarını, adındaki anahtar
+        içeriğiyle tutuyorsa kullanır (onbellekteki_resim, Agent.cached_image).
+        """
+        if not os.path.isdir(CACHE_DIR) or os.stat(CACHE_DIR).st_mode & 0o7777 != 0o1777:
+            self.log(f"Önbellek dizini hazırlanıyor: {CACHE_DIR}")
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # /tmp gibi: herkes yazabilir, ama kimse başkasının dosyasını silemez
+            os.chmod(CACHE_DIR, 0o1777)
+
+    def report_boot_timing(self):
+        """
+        Bu açılışın systemd-analyze ölçümlerini kaydeder ve önceki açılışlarla
+        birlikte log'a yazar. mount/automount değişikliğinin açılış kritik yoluna
+        etkisi, kurulumdan sonraki ilk açılışın ölçümünde görülür. Mount birimi
+        olmayan kurulumda (HTTP) ölçülecek bir şey yoktur.
+        """
+        mount_points = self.mirror_mount_points()
+        if not mount_points:
+            return
+        mount_units = [systemd_unit_name(mount_point, "mount") for mount_point in mount_points]
+
+        def analyze(*args):
+            try:
+                result = subprocess.run(
+                    ["systemd-analyze", *args],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    timeout=30
+                )
+            except (OSError, subprocess.TimeoutExpired):
+                return ""
+            return result.stdout
+
+        try:
+            with open("/proc/sys/kernel/random/boot_id", encoding="utf-8") as f:
+                boot_id = f.read().strip()
+        except OSError:
+            return
+
+        history = []
+        if os.path.exists(BOOT_HISTORY_PATH):
+            with open(BOOT_HISTORY_PATH, encoding="utf-8") as f:
+                history = [line.rstrip("\n").split("\t") for line in f if line.strip()]
+
+        if not any(entry[0] == boot_id for entry in history):
+            # "Startup finished in ... = 12.345s" satırındaki toplam süre
+            total = "?"
+            for line in analyze("time").splitlines():
+                if "=" in line:
+                    total = line.rsplit("=", 1)[1].strip()
+                    break
+
+            # Birincil aynanın mount biriminin kendi süresi ve aynalardan birinin kritik yolda olup olmadığı
+            mount_time = "-"
+            for line in analyze("blame").splitlines():
+                if mount_units[0] in line.split():
+                    mount_time = line.split()[0]
+                    break
+            chain = analyze("critical-chain", "multi-user.target")
+            on_critical_chain = any(unit.rsplit(".", 1)[0] in chain for unit in mount_units)
+
+            try:
+                enabled = subprocess.run(
+                    ["systemctl", "is-enabled", systemd_unit_name(mount_points[0], "automount")],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    timeout=30
+                ).stdout.strip()
+                mode = "automount" if enabled == "enabled" else "mount"
+            except (OSError, subprocess.TimeoutExpired):
+                mode = "bilinmiyor"
+
+            entry = [boot_id, time.strftime("%Y-%m-%d %H:%M"), mode, total, mount_time,
+                     "evet" if on_critical_chain else "hayır"]
+            history.append(entry)
+            os.makedirs(os.path.dirname(BOOT_HISTORY_PATH), exist_ok=True)
+            with open(BOOT_HISTORY_PATH, "a", encoding="utf-8") as f:
+                f.write("\t".join(entry) + "\n")
+
+        self.log("Açılış ölçümleri (systemd-analyze):")
+        self.log(f"  {'Tarih':<16}  {'Bağlama':<10}  {'Açılış':>10}  {'Mount':>8}  Kritik yolda")
+        for _, date, mode, total, mount_time, critical in history[-5:]:
+            self.log(f"  {date:<16}  {mode:<10}  {total:>10}  {mount_time:>8}  {critical}")
+
+    def install(self) -> bool:
+        """
+        Tüm kurulum adımlarını çalıştırır; başarılıysa True döner. Aşama süreleri,
+        kurulum başarısız olsa da önbellek dizinindeki olay dosyasına yazılır.
+        """
+        self.log(f">>> {self.PROTOCOL} tabanlı haftalık arka plan kurulumu başlatılıyor...")
+        start = time.monotonic()
+        ok = False
+        try:
+            ok = self.install_steps()
+        except InstallCancelled:
+            self.log(">>> Kurulum iptal edildi.")
+        except Exception as e:
+            self.log(f"GENEL HATA: {e}")
+        finally:
+            self.record_event("kurulum", (time.monotonic() - start) * 1000, "tamam" if ok else "hata",
+                              ayna=len(self.mirrors), arayuz=self.systemd_backend)
+            self.write_events()
+        return ok
+
+    def install_steps(self) -> bool:
+        """install() tarafından çağrılan kurulum adımları; başarılıysa True döner."""
+        # 0) Tüm aynaların paralel ön kontrolü ve isteğe bağlı deneme mount'u
+        healthy = self.preflight()
+        if not healthy:
+            self.log(f"HATA: Hiçbir {self.SERVER_LABEL} sunucusu ön kontrolden geçemediği için kurulum durduruldu.")
+            return False
+        for what in self.mirrors:
+            if what not in healthy:
+                self.log(f"UYARI: {what} şu an erişilemiyor; yedek ayna olarak yine de yapılandırılıyor.")
+        if self.mount_test_enabled:
+            for what in healthy:
+                with self.timed_stage("deneme-mount", sunucu=self.mirror_host(what)) as stage:
+                    ok = self.test_path(what)
+                    stage["sonuc"] = "tamam" if ok else "hata"
+                if not ok:
+                    self.log(f"HATA: {self.FS_TYPE.upper()} bağlantı testi başarısız olduğu için kurulum durduruldu.")
+                    return False
+        if self.tune_enabled:
+            self.tune_mount(healthy[0])
+
+        # Değişiklikten önceki açılışın ölçümü ("önce" değeri)
+        self.report_boot_timing()
+
+        # 1) Üretilecek tüm dosyaları bellekte hazırla ve diskle karşılaştır
+        with self.timed_stage("plan") as stage:
+            changes = self.plan()
+            stage["dosya"] = len(changes)
+        if not changes:
+            self.log("Tüm dosyalar güncel; yeniden yazılacak dosya yok.")
+
+        # 2) Aynaların mount dizinleri
+        for mount_point in self.mirror_mount_points():
+            os.makedirs(mount_point, exist_ok=True)
+
+        # 3) Makine genelinde paylaşılan arka plan önbelleği
+        self.prepare_cache_dir()
+
+        # 4) Kullanılmayan birimler durdurulup silinir
+        for path, _, content, _ in changes:
+            if content is None:
+                if path.startswith(SYSTEMD_DIR + "/"):
+                    self.run_actions([["systemctl", "disable", "--now", os.path.basename(path)]])
+                self.log(f"{path} kaldırılıyor...")
+                os.remove(path)
+
+        # 5) Yalnızca değişen dosyalar atomik olarak yazılır: mount/automount birimleri,
+        # önbellek kitaplığı, oturum ajanı, önbellek servisi ve zamanlayıcısı, autostart
+        # kaydı veya sistem düzeyinde arka plan betiği ve zamanlayıcısı, (seçiliyse) eş
+        # dağıtımı ve çoklu yayın hizmetleri ve (kilit seçiliyse) dconf ayarları
+        written = [(path, content, mode) for path, _, content, mode in changes if content is not None]
+        if written:
+            with self.timed_stage("dosya-yazma", dosya=len(written),
+                                  bayt=sum(len(content.encode("utf-8")) for _, content, _ in written)):
+                for path, content, mode in written:
+                    self.write_file(path, content, mode)
+
+        # 6) Yalnızca değişikliklerin gerektirdiği yeniden yükleme ve başlatmalar
+        self.run_actions(self.actions(changes))
+
+        self.log(">>> Kurulum tamamlandı. Herhangi bir kullanıcı ile oturum açıp test edebilirsiniz.")
+        return True
+
+
+class NFSInstaller(Installer):
+    PROTOCOL = "NFS"
+    SERVER_LABEL = "NFS"
+    FS_TYPE = "nfs"
+    MOUNT_DESCRIPTION = "NFS Arka Plan Klasörü"
+    AUTOSTART_NAME = "ETAP Haftalık Arka Plan (NFS)"
+    AUTOSTART_COMMENT = "Her oturum açılışında haftaya göre arka planı NFS üzerinden günceller"
+    # Paylaşım yalnızca okunur; erişim zamanı yazılmaz, resimler haftada bir değiştiği için
+    # öznitelikler uzun süre önbellekte tutulabilir
+    MOUNT_PROFILES = {
+        "varsayilan": "defaults",
+        "nfs42": "nfsvers=4.2,ro,noatime",
+        "nfs42-onbellek": "nfsvers=4.2,ro,noatime,actimeo=600,rsize=1048576",
+        "nfs42-nconnect": "nfsvers=4.2,ro,noatime,actimeo=600,rsize=1048576,nconnect=4",
+        "nfs3-onbellek": "nfsvers=3,ro,noatime,actimeo=600,rsize=1048576",
+    }
+    TUNE_OPTIONS = "nosharecache"
+
+    def mount_options(self, profile=None) -> str:
+        return self.MOUNT_PROFILES[profile or self.mount_profile]
+
+    def preflight(self) -> list:
+        """
+        Mount yapmadan tüm NFS aynalarını eş zamanlı ve süre sınırlı denetimlerle yoklar.
+        Zorunlu denetimlerin hepsini geçen aynaların listesini döner.
+        """
+        self.log(f"NFS ön kontrolü: {len(self.mirrors)} ayna (denetim başına {PREFLIGHT_TIMEOUT:.0f} sn)")
+        checks = []
+        for what in self.mirrors:
+            host, export_path = what.split(":", 1)
+            checks += [
+                (f"{host} TCP {NFS_PORT}",
+                 lambda host=host: tcp_probe(host, NFS_PORT, PREFLIGHT_TIMEOUT)),
+                (f"{host} NFS RPC NULL",
+                 lambda host=host: nfs_rpc_null(host, PREFLIGHT_TIMEOUT)),
+                (f"{host} export listesi",
+                 lambda host=host, export_path=export_path: nfs_export_exists(
+                     host, export_path, PREFLIGHT_TIMEOUT)),
+            ]
+        results = run_checks(checks, PREFLIGHT_TIMEOUT)
+        self.log_preflight(results)
+
+        healthy = []
+        for index, what in enumerate(self.mirrors):
+            if any(ok is False for _, ok, _, _ in results[index * 3:index * 3 + 3]):
+                self.log(f"{what}: ön kontrol BAŞARISIZ! Lütfen IP ve NFS export yolunun doğru olduğundan emin olun.")
+            else:
+                healthy.append(what)
+        if healthy:
+            self.log(f"NFS ön kontrolü BAŞARILI: {len(healthy)}/{len(self.mirrors)} ayna erişilebilir.")
+        return healthy
+
+    def test_path(self, what: str) -> bool:
+        """
+        NFS paylaşım yolunu zaman aşımlı bir deneme mount'u ile test eder ve
+        bu haftanın resminin okunabildiğini doğrular.
+        Başarısız olursa gerçek hatayı log'a yazar ve False döner.
+        """
+        self.log(f"NFS yolu test ediliyor: {what}")
+        test_dir = "/tmp/etap_arkaplan_nfs_test"
+        os.makedirs(test_dir, exist_ok=True)
+
+        # Eski mount'u varsa çöz
+        subprocess.run(["umount", "-l", test_dir],
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+
+        # soft + tek deneme: erişilemeyen sunucuda hard-mount yeniden denemelerine takılmaz
+        cmd = ["mount", "-t", "nfs", "-o", "ro,soft,timeo=50,retrans=1", what, test_dir]
+        self.log(f"$ {' '.join(cmd)}")
+        try:
+            result = self.run_process(cmd, timeout=MOUNT_TEST_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.log(f"NFS testi BAŞARISIZ! mount {MOUNT_TEST_TIMEOUT} sn içinde tamamlanmadı.")
+            return False
+
+        if result.returncode != 0:
+            self.log("NFS testi BAŞARISIZ!")
+            if result.stdout.strip():
+                self.log(result.stdout.strip())
+            if result.stderr.strip():
+                self.log(result.stderr.strip())
+            self.log("Lütfen IP ve NFS export yolunun doğru olduğundan emin olun.")
+            return False
+
+        # Bu haftanın resmi var ve okunabiliyor mu?
+        week_file = f"week{time.strftime('%V')}.jpg"
+        try:
+            with open(os.path.join(test_dir, week_file), "rb") as f:
+                f.read(65536)
+            self.log(f"{week_file} okunabiliyor.")
+        except OSError as e:
+            self.log(f"UYARI: {week_file} okunamadı: {e.strerror}")
+
+        # Başarılıysa tekrar umount et
+        subprocess.run(["umount", "-l", test_dir],
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        self.log("NFS testi BAŞARILI. Sunucuya erişilebiliyor.")
+        return True
+
+
+class CIFSInstaller(Installer):
+    PROTOCOL = "Windows CIFS"
+    SERVER_LABEL = "Windows"
+    FS_TYPE = "cifs"
+    MOUNT_DESCRIPTION = "Windows Server Arka Plan Klasörü"
+    AUTOSTART_NAME = "ETAP Haftalık Arka Plan (Windows CIFS)"
+    AUTOSTART_COMMENT = "Her oturum açılışında haftaya göre Windows Server arka planını uygular"
+    # Temel seçeneklere eklenenler. cache=ro paylaşımın hiç değişmediğini varsayar;
+    # çekirdek desteklemiyorsa ölçümde mount başarısız olur ve profil elenir.
+    MOUNT_PROFILES = {
+        "varsayilan": "",
+        "onbellek": "noatime,actimeo=600",
+        "onbellek-gevsek": "noatime,actimeo=600,cache=loose,rsize=4194304",
+        "salt-okunur": "noatime,actimeo=600,cache=ro,rsize=4194304",
+    }
+    TUNE_OPTIONS = "nosharesock"
+
+    def __init__(self, mirrors, username, password, vers="3.0", **kwargs):
+        super().__init__(mirrors, **kwargs)
+        self.username = username
+        self.password = password
+        self.vers = vers
+
+    def mount_options(self, profile=None) -> str:
+        extra = self.MOUNT_PROFILES[profile or self.mount_profile]
+        options = f"username={self.username},password={self.password},vers={self.vers},iocharset=utf8,ro"
+        return f"{options},{extra}" if extra else options
+
+    def redact(self, text):
+        return text.replace(f"password={self.password},", "password=***,")
+
+    def preflight(self) -> list:
+        """
+        Mount yapmadan tüm Windows paylaşım aynalarını eş zamanlı ve süre sınırlı
+        denetimlerle yoklar. Zorunlu denetimlerin hepsini geçen aynaların listesini
+        döner; bu haftanın resmi yoksa yalnızca uyarır.
+        """
+        self.log(f"CIFS ön kontrolü: {len(self.mirrors)} ayna (denetim başına {PREFLIGHT_TIMEOUT:.0f} sn)")
+        week_file = f"week{time.strftime('%V')}.jpg"
+        checks = []
+        for what in self.mirrors:
+            host = what.lstrip("/").split("/", 1)[0]
+            checks += [
+                (f"{host} TCP {SMB_PORT}",
+                 lambda host=host: tcp_probe(host, SMB_PORT, PREFLIGHT_TIMEOUT)),
+                (f"{host} SMB NEGOTIATE",
+                 lambda host=host: smb_negotiate(host, PREFLIGHT_TIMEOUT)),
+                (f"{host} paylaşım / alt klasör",
+                 lambda what=what: smbclient_check(
+                     what, self.username, self.password, 'cd "{subdir}"', PREFLIGHT_TIMEOUT)),
+                (f"{host} {week_file} okunabilir",
+                 lambda what=what: smbclient_check(
+                     what, self.username, self.password, f'cd "{{subdir}}"; get {week_file} /dev/null',
+                     PREFLIGHT_TIMEOUT)),
+            ]
+        results = run_checks(checks, PREFLIGHT_TIMEOUT)
+        self.log_preflight(results)
+
+        healthy = []
+        for index, what in enumerate(self.mirrors):
+            mirror_results = results[index * 4:index * 4 + 4]
+            if any(ok is False for _, ok, _, _ in mirror_results[:3]):
+                self.log(f"{what}: ön kontrol BAŞARISIZ! Lütfen IP / paylaşım / alt klasör / "
+                         "kullanıcı adı / parolanın doğru olduğundan emin olun.")
+                continue
+            if mirror_results[3][1] is False:
+                self.log(f"UYARI: {what} üzerinde bu haftanın resmi ({week_file}) henüz okunamıyor.")
+            healthy.append(what)
+        if healthy:
+            self.log(f"CIFS ön kontrolü BAŞARILI: {len(healthy)}/{len(self.mirrors)} ayna erişilebilir.")
+        return healthy
+
+    def test_path(self, what: str) -> bool:
+        """
+        CIFS paylaşım yolunu zaman aşımlı bir deneme mount'u ile test eder.
+        Başarısız olursa gerçek hatayı log'a yazar ve False döner.
+        """
+        self.log(f"CIFS (Windows) yolu test ediliyor: {what}")
+        test_dir = "/tmp/etap_arkaplan_cifs_test"
+        os.makedirs(test_dir, exist_ok=True)
+
+        # Eski mount'u varsa çöz
+        subprocess.run(["umount", test_dir],
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+
+        options = self.mount_options()
+        cmd = ["mount", "-t", "cifs", what, test_dir, "-o", options]
+        # Parola log'a yazılmaz
+        self.log(f"$ mount -t cifs {what} {test_dir} -o username={self.username},password=***,vers={self.vers},...")
+        try:
+            result = self.run_process(cmd, timeout=MOUNT_TEST_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.log(f"CIFS testi BAŞARISIZ! mount {MOUNT_TEST_TIMEOUT} sn içinde tamamlanmadı.")
+            return False
+
+        if result.returncode != 0:
+            self.log("CIFS testi BAŞARISIZ!")
+            if result.stdout.strip():
+                self.log(result.stdout.strip())
+            if result.stderr.strip():
+                self.log(result.stderr.strip())
+            self.log("Lütfen IP / paylaşım / alt klasör / kullanıcı adı / parolanın doğru olduğundan emin olun.")
+            return False
+
+        # Başarılıysa tekrar umount et
+        subprocess.run(["umount", test_dir],
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        self.log("CIFS testi BAŞARILI. Windows Server'a erişilebiliyor.")
+        return True
+
+
+class HTTPInstaller(Installer):
+    """
+    Mount kullanmayan kurulum: resimler düz bir statik HTTP sunucusundan (nginx, Apache, IIS
+    veya etap_http_sunucu.py) okunur. mount/automount birimi ve paylaşım parolası yazılmaz;
+    önceki bir NFS/CIFS kurulumunun birimleri kaldırılır. Aynalar temel adreslerdir
+    (http://IP/yol); kitaplık manifest ve resmi tek kalıcı bağlantıdan koşullu isteklerle alır.
+    """
+
+    PROTOCOL = "HTTP"
+    SERVER_LABEL = "HTTP"
+    FS_TYPE = "http"
+    MOUNT_DESCRIPTION = ""
+    AUTOSTART_NAME = "ETAP Haftalık Arka Plan (HTTP)"
+    AUTOSTART_COMMENT = "Her oturum açılışında haftaya göre arka planı HTTP sunucusundan günceller"
+    MOUNT_PROFILES = {"varsayilan": ""}
+
+    def mirror_mount_points(self):
+        return []
+
+    def remote_dirs(self):
+        return self.mirrors
+
+    def mount_options(self, profile=None) -> str:
+        return ""
+
+    def tune_mount(self, what):
+        self.log("HTTP kurulumunda mount seçeneği yok; mount ayarı ölçümü atlanıyor.")
+
+    def preflight(self) -> list:
+        """
+        Tüm HTTP aynalarını eş zamanlı ve süre sınırlı denetimlerle yoklar. Zorunlu denetimlerin
+        (TCP, manifest.json veya haftanın resmi) geçtiği aynaların listesini döner; manifest
+        yoksa yalnızca uyarır (tahtalar resmin kendisini koşullu ister).
+        """
+        self.log(f"HTTP ön kontrolü: {len(self.mirrors)} ayna (denetim başına {PREFLIGHT_TIMEOUT:.0f} sn)")
+        week_file = f"week{time.strftime('%V')}.jpg"
+        checks = []
+        for what in self.mirrors:
+            parts = urllib.parse.urlsplit(what)
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            checks += [
+                (f"{parts.hostname} TCP {port}",
+                 lambda host=parts.hostname, port=port: tcp_probe(host, port, PREFLIGHT_TIMEOUT)),
+                (f"{parts.hostname} manifest.json",
+                 lambda what=what: http_head(what, "manifest.json", PREFLIGHT_TIMEOUT)),
+                (f"{parts.hostname} {week_file}",
+                 lambda what=what: http_head(what, week_file, PREFLIGHT_TIMEOUT)),
+            ]
+        results = run_checks(checks, PREFLIGHT_TIMEOUT)
+        self.log_preflight(results)
+
+        healthy = []
+        for index, what in enumerate(self.mirrors):
+            tcp, manifest, week = (ok for _, ok, _, _ in results[index * 3:index * 3 + 3])
+            if tcp is False or (manifest is False and week is False):
+                self.log(f"{what}: ön kontrol BAŞARISIZ! Lütfen adresin ve yolun doğru olduğundan, "
+                         "sunucunun dizini sunduğundan emin olun.")
+                continue
+            if manifest is False:
+                self.log(f"UYARI: {what} üzerinde manifest.json yok; resimler boyut ve tarihleriyle doğrulanacak.")
+            if week is False:
+                self.log(f"UYARI: {what} üzerinde bu haftanın resmi ({week_file}) henüz okunamıyor.")
+            healthy.append(what)
+        if healthy:
+            self.log(f"HTTP ön kontrolü BAŞARILI: {len(healthy)}/{len(self.mirrors)} ayna erişilebilir.")
+        return healthy
+
+    def test_path(self, what: str) -> bool:
+        """
+        Bu haftanın resmini tek bağlantı üzerinden iki kez ister: ilk istek tüm resmi indirir ve
+        hızı ölçer, ikincisi dönen ETag / Last-Modified ile koşulludur ve 304 beklenir.
+        Resim yoksa veya bağlantı kurulamazsa gerçek hatayı log'a yazar ve False döner.
+        """
+        self.log(f"HTTP yolu test ediliyor: {what}")
+        path = urllib.parse.urlsplit(what).path.rstrip("/") + f"/week{time.strftime('%V')}.jpg"
+        conn = http_connection(what, self.http_timeout)
+        try:
+            start = time.monotonic()
+            conn.request("GET", path)
+            response = conn.getresponse()
+            size = len(response.read())
+            elapsed = max(time.monotonic() - start, 1e-6)
+            if response.status != 200:
+                self.log(f"HTTP testi BAŞARISIZ! {path}: HTTP {response.status} {response.reason}")
+                return False
+            self.log(f"{path}: {size / 1024:.0f} KB, {size / elapsed / 1048576:.1f} MB/sn")
+
+            headers = {}
+            if response.getheader("ETag"):
+                headers["If-None-Match"] = response.getheader("ETag")
+            if response.getheader("Last-Modified"):
+                headers["If-Modified-Since"] = response.getheader("Last-Modified")
+            if not headers:
+                self.log("UYARI: sunucu ETag / Last-Modified göndermiyor; değişmeyen resim her seferinde indirilir.")
+            else:
+                start = time.monotonic()
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status == 304:
+                    self.log(f"Koşullu istek: 304, {(time.monotonic() - start) * 1000:.0f} ms (aynı bağlantı).")
+                else:
+                    self.log(f"UYARI: koşullu istek 304 yerine HTTP {response.status} döndü; "
+                             "değişmeyen resim her seferinde indirilir.")
+        except (OSError, http.client.HTTPException) as e:
+            self.log(f"HTTP testi BAŞARISIZ! {e}")
+            return False
+        finally:
+            conn.close()
+        self.log("HTTP testi BAŞARILI. Sunucuya erişilebiliyor.")
+        return True
+
+
+# Yapılandırma dosyasında evet/hayır olarak okunan seçenekler
+BOOLEAN_OPTIONS = {"automount", "kilit", "deneme_mount", "mount_ayari", "journald", "es_dagitimi", "coklu_yayin",
+                   "sistem_arka_plani"}
+
+
+def non_negative_int(value):
+    """argparse türü: 0 veya pozitif tam sayı."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"0 veya pozitif bir tam sayı olmalı: {value}")
+    return number
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="ETAP haftalık arka plan sistemini grafik arayüz olmadan kurar."
+    )
+    parser.add_argument("--yapilandirma", metavar="DOSYA",
+                        help="Seçenek değerlerini içeren INI dosyası ([kurulum] bölümü)")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--sunucu", default="",
+                        help="Sunucu IP/adı; aynalar virgülle ayrılır")
+    common.add_argument("--mount-noktasi", default="/mnt/arka_plan",
+                        help="Yerel mount noktası (varsayılan: /mnt/arka_plan)")
+    common.add_argument("--onceden-hafta", type=non_negative_int, default=2,
+                        help="Bu haftaya ek olarak önceden indirilecek hafta sayısı (varsayılan: 2)")
+    common.add_argument("--pencere", type=non_negative_int, default=1800,
+                        help="Sunucu erişim penceresi, saniye (varsayılan: 1800)")
+    common.add_argument("--automount", action=argparse.BooleanOptionalAction, default=True,
+                        help="Paylaşımı yalnızca erişildiğinde bağla (varsayılan: açık)")
+    common.add_argument("--bosta-ayirma", type=non_negative_int, default=120,
+                        help="Automount boşta ayırma süresi, saniye (varsayılan: 120)")
+    common.add_argument("--deneme-mount", action=argparse.BooleanOptionalAction, default=False,
+                        help=f"Ön kontrolden sonra deneme mount'u yap (en fazla {MOUNT_TEST_TIMEOUT} sn)")
+    common.add_argument("--mount-ayari", action=argparse.BooleanOptionalAction, default=False,
+                        help="Tüm mount profillerini ölç ve en hızlısını mount birimine yaz")
+    common.add_argument("--systemd-arayuzu", choices=("dbus", "systemctl"), default="dbus",
+                        help="systemd ile D-Bus üzerinden veya systemctl süreçleriyle konuş (varsayılan: dbus)")
+    common.add_argument("--okul", default="",
+                        help="Süre olaylarına yazılacak okul adı (filo raporlarında gruplamak için)")
+    common.add_argument("--journald", action=argparse.BooleanOptionalAction, default=False,
+                        help="Süre olaylarını journald'ye de gönder (journalctl SYSLOG_IDENTIFIER=etap-arka-plan)")
+    common.add_argument("--es-dagitimi", action=argparse.BooleanOptionalAction, default=False,
+                        help="Resmi önce aynı ağdaki tahtalardan iste ve önbelleği onlara sun (varsayılan: kapalı)")
+    common.add_argument("--es-yayin-adresi", default=PEER_BROADCAST,
+                        help=f"Eş sorgularının gönderildiği yayın adresi (varsayılan: {PEER_BROADCAST})")
+    common.add_argument("--coklu-yayin", action=argparse.BooleanOptionalAction, default=False,
+                        help=f"Haftanın resmini {MULTICAST_GROUP}:{MULTICAST_PORT} çoklu yayınından alan hizmeti kur "
+                             "(gönderim: etap_coklu_yayin.py; resim paylaşımın manifestinde olmalıdır)")
+    common.add_argument("--kilit", action=argparse.BooleanOptionalAction, default=True,
+                        help="dconf kilidi uygula (varsayılan: açık)")
+    common.add_argument("--sistem-arka-plani", action=argparse.BooleanOptionalAction, default=False,
+                        help="Günün resmini oturumlarda değil root zamanlayıcısıyla sistem dconf veritabanına yaz; "
+                             "autostart kaydı kurulmaz (dconf kilidi gerektirir, varsayılan: kapalı)")
+    common.add_argument("--plan", action="store_true",
+                        help="Hiçbir şeyi değiştirmeden dosya farklarını ve çalışacak komutları göster")
+
+    subparsers = parser.add_subparsers(dest="tur", metavar="{nfs,cifs,http}")
+    subparsers.required = True
+
+    nfs = subparsers.add_parser("nfs", parents=[common], help="NFS paylaşımı ile kur")
+    nfs.add_argument("--export", default="/srv/paylasim/arka-plan",
+                     help="Sunucudaki NFS yolu (varsayılan: /srv/paylasim/arka-plan)")
+    nfs.add_argument("--mount-profili", choices=list(NFSInstaller.MOUNT_PROFILES),
+                     default=next(iter(NFSInstaller.MOUNT_PROFILES)),
+                     help="mount seçenekleri profili (varsayılan: %(default)s)")
+
+    cifs = subparsers.add_parser("cifs", parents=[common], help="Windows (CIFS) paylaşımı ile kur")
+    cifs.add_argument("--paylasim", default="", help="Paylaşım adı (Share)")
+    cifs.add_argument("--alt-klasor", default="", help="Paylaşımdaki alt klasör")
+    cifs.add_argument("--kullanici", default="", help="CIFS kullanıcı adı")
+    cifs.add_argument("--parola", default=os.environ.get("ETAP_CIFS_PAROLA", ""),
+                      help="CIFS parolası (tercihen ETAP_CIFS_PAROLA ortam değişkeni veya yapılandırma dosyası)")
+    cifs.add_argument("--smb-surumu", default="3.0", help="SMB sürümü, vers= (varsayılan: 3.0)")
+    cifs.add_argument("--mount-profili", choices=list(CIFSInstaller.MOUNT_PROFILES),
+                      default=next(iter(CIFSInstaller.MOUNT_PROFILES)),
+                      help="mount seçenekleri profili (varsayılan: %(default)s)")
+
+    # Mount yapılmaz: mount noktası, automount ve mount profili seçenekleri yok sayılır
+    http = subparsers.add_parser("http", parents=[common], help="Statik HTTP sunucusundan kur (mount yok)")
+    http.add_argument("--yol", default="/arka-plan",
+                      help="Sunucuda resimlerin sunulduğu yol (varsayılan: /arka-plan)")
+    http.add_argument("--zaman-asimi", type=float, default=HTTP_TIMEOUT,
+                      help=f"Tahtaların HTTP isteği başına zaman aşımı, saniye (varsayılan: {HTTP_TIMEOUT})")
+    http.set_defaults(mount_profili=None)
+
+    return parser, (nfs, cifs, http)
+
+
+def load_config(path, subparsers):
+    """INI dosyasındaki [kurulum] değerlerini alt komutların varsayılanı yapar."""
+    config = configparser.ConfigParser()
+    config.BOOLEAN_STATES = dict(configparser.ConfigParser.BOOLEAN_STATES, evet=True, hayır=False)
+    if not config.read(path, encoding="utf-8"):
+        raise SystemExit(f"Yapılandırma dosyası okunamadı: {path}")
+    if not config.has_section("kurulum"):
+        raise SystemExit(f"{path}: [kurulum] bölümü yok")
+
+    values = {}
+    for key in config["kurulum"]:
+        name = key.replace("-", "_")
+        if name in BOOLEAN_OPTIONS:
+            try:
+                values[name] = config["kurulum"].getboolean(key)
+            except ValueError:
+                raise SystemExit(f"{path}: {key} için evet/hayır bekleniyordu")
+        else:
+            values[name] = config["kurulum"][key]
+    for subparser in subparsers:
+        subparser.set_defaults(**values)
+
+
+def installer_from_args(args):
+    """Ayrıştırılmış seçeneklerden kurulum nesnesi üretir; eksik değerde SystemExit."""
+    common = dict(
+        mount_point=args.mount_noktasi,
+        lock_enabled=args.kilit,
+        prefetch_weeks=args.onceden_hafta,
+        fetch_window=args.pencere,
+        automount_enabled=args.automount,
+        idle_timeout=args.bosta_ayirma,
+        mount_test_enabled=args.deneme_mount,
+        mount_profile=args.mount_profili,
+        tune_enabled=args.mount_ayari,
+        systemd_backend=args.systemd_arayuzu,
+        school=args.okul,
+        journald_enabled=args.journald,
+        peer_enabled=args.es_dagitimi,
+        peer_broadcast=args.es_yayin_adresi,
+        multicast_enabled=args.coklu_yayin,
+        system_wallpaper=args.sistem_arka_plani,
+    )
+    # Kilit yoksa kullanıcıların kendi dconf değerleri sistem değerini ezer
+    if args.sistem_arka_plani and not args.kilit:
+        raise SystemExit("Sistem düzeyinde arka plan dconf kilidi gerektirir (--kilit).")
+    if args.tur == "nfs":
+        if not args.sunucu or not args.export or not args.mount_noktasi:
+            raise SystemExit("Sunucu IP, NFS yolu ve mount noktası boş olamaz.")
+        return NFSInstaller(nfs_mirrors(args.sunucu, args.export), **common)
+
+    if args.tur == "http":
+        if not args.sunucu:
+            raise SystemExit("Sunucu adresi boş olamaz.")
+        if args.zaman_asimi <= 0:
+            raise SystemExit("HTTP zaman aşımı pozitif olmalı.")
+        return HTTPInstaller(http_mirrors(args.sunucu, args.yol), http_timeout=args.zaman_asimi, **common)
+
+    if not (args.sunucu and args.paylasim and args.mount_noktasi and args.kullanici and args.parola):
+        raise SystemExit("Sunucu IP, paylaşım adı, mount noktası, kullanıcı adı ve parola boş olamaz.")
+    return CIFSInstaller(
+        cifs_mirrors(args.sunucu, args.paylasim, args.alt_klasor),
+        args.kullanici, args.parola, args.smb_surumu or "3.0", **common
+    )
+
+
+def parse_args(argv=None):
+    """Komut satırını, varsa yapılandırma dosyasının değerleriyle birlikte ayrıştırır."""
+    parser, subparsers = build_parser()
+
+    # Yapılandırma dosyası önce okunur ki komut satırı değerleri onu ezebilsin
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--yapilandirma")
+    known, _ = pre.parse_known_args(argv)
+    if known.yapilandirma:
+        load_config(known.yapilandirma, subparsers)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    installer = installer_from_args(args)
+
+    if args.plan:
+        installer.show_plan()
+        return 0
+
+    if os.geteuid() != 0:
+        raise SystemExit("Kurulum root yetkisi gerektirir (sudo ile çalıştırın).")
+    return 0 if installer.install() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kurulum araçlarının soğuk başlangıç süresi ölçümü.
+
+Komut satırı aracının (etap_arkaplan_kurulum.py) açılışını, grafik arayüzün
+içe aktarma yoluyla (gi + Gtk 3 + GUI modülü) karşılaştırır. Her ölçüm yeni bir
+Python sürecinde yapılır; en küçük ve ortanca süreler raporlanır. Ayrıca
+komut satırı modülünün GObject introspection yüklemediği doğrulanır.
+
+Örnek:  python3 etap_baslangic_olcumu.py --tekrar 20
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# (ad, python -c kodu); GUI'ler yalnızca içe aktarılır, pencere açılmaz
+CASES = [
+    ("CLI: modülü içe aktar", "import etap_arkaplan_kurulum"),
+    ("CLI: --help", "import sys, etap_arkaplan_kurulum as k; sys.argv[1:] = ['--help']; k.main()"),
+    ("GUI: gi + Gtk 3", "import gi; gi.require_version('Gtk', '3.0'); from gi.repository import Gtk"),
+    ("GUI: etap_arkaplan_nfs_gui", "import etap_arkaplan_nfs_gui"),
+    ("GUI: etap_windows_cifs_gui", "import etap_windows_cifs_gui"),
+]
+
+
+def measure(code, runs):
+    """Kodu `runs` kez yeni bir yorumlayıcıda çalıştırır; süreleri (ms) veya hata döner."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            cwd=HERE
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            return None, lines[-1] if lines else f"çıkış kodu {result.returncode}"
+        timings.append(elapsed)
+    return timings, ""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Komut satırı ve grafik arayüz açılış sürelerini karşılaştırır."
+    )
+    parser.add_argument("--tekrar", type=int, default=10,
+                        help="Her durum için ölçüm sayısı (varsayılan: 10)")
+    args = parser.parse_args()
+
+    # Komut satırı modülü gi'yi hiçbir koşulda yüklememeli
+    check = subprocess.run(
+        [sys.executable, "-c", "import sys, etap_arkaplan_kurulum; sys.exit('gi' in sys.modules)"],
+        cwd=HERE
+    )
+    if check.returncode != 0:
+        print("HATA: etap_arkaplan_kurulum içe aktarılırken gi yüklendi.")
+        return 1
+    print("etap_arkaplan_kurulum gi yüklemiyor: TAMAM")
+
+    print(f"{'Durum':<30}  {'En az (ms)':>10}  {'Ortanca (ms)':>12}")
+    for name, code in CASES:
+        timings, error = measure(code, args.tekrar)
+        if timings is None:
+            print(f"{name:<30}  {'-':>10}  {'-':>12}  ({error})")
+            continue
+        print(f"{name:<30}  {min(timings):>10.1f}  {statistics.median(timings):>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
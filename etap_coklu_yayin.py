@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Haftanın (veya takvimdeki herhangi bir) arka plan resmini bir okul ağındaki tüm
+tahtalara tek gönderimde ulaştırır.
+
+Resim MULTICAST_BLOCK_SIZE baytlık bloklar hâlinde UDP çoklu yayınıyla (varsayılan
+239.255.47.116:47116) --hiz ile sınırlı olarak gönderilir; her paket resmin
+adını, boyutunu ve SHA-256 özetini taşır. Her turun sonunda tahtalardaki alıcı
+hizmeti (kurulumda --coklu-yayin) eksik bloklarını NAK ile bildirir; gönderici
+tüm NAK'leri birleştirip yalnızca eksik blokları yeniden yayınlar. NAK gelmeyen
+ilk turda veya --tur sınırında gönderim biter. Alıcılar resmi özetle doğrulayıp
+önbellekte .coklu-yayin.<ad>-<özet>.jpg olarak bekletir; oturum açılışında ve
+zamanlayıcıda resim manifest özetiyle doğrulanıp buradan alınır, sunucudan
+hiçbir şey kopyalanmaz.
+
+Alıcılar yalnızca adı ve özeti paylaşımdaki manifest.json'da bulunan resmi (veya
+kurulumdaki sunucu adresinden gelen gönderimi) kabul eder; bu yüzden resimler
+gönderilmeden önce manifest güncellenmiş olmalıdır (etap_manifest_olustur.py).
+Resimlerin özeti de manifestten alınır (yoksa hesaplanır).
+Tahtaların ekranına göre varyant seçiliyorsa aynı varyant --varyant ile
+gönderilmelidir; önbellek anahtarı tahtaların manifestten seçtiğiyle aynı olur.
+
+Örnekler:
+    python3 etap_coklu_yayin.py /srv/paylasim/arka-plan
+    python3 etap_coklu_yayin.py /srv/paylasim/arka-plan --hafta 07 --varyant 1920x1080 --hiz 50
+    python3 etap_coklu_yayin.py /srv/paylasim/arka-plan --resim 2026-10-29 --resim bayram
+    # Her pazar akşamı gelecek haftanın resmi (cron):
+    0 20 * * 0  python3 /opt/etap/etap_coklu_yayin.py /srv/paylasim/arka-plan --hafta $(date -d +1day +\\%V)
+"""
+
+import argparse
+import datetime
+import os
+import re
+import select
+import socket
+import struct
+import sys
+import time
+
+from etap_arkaplan_kurulum import (
+    IMAGE_NAME_PATTERN, MULTICAST_BLOCK_SIZE, MULTICAST_GROUP, MULTICAST_HEADER, MULTICAST_MAGIC,
+    MULTICAST_NAME_SIZE, MULTICAST_PORT, MULTICAST_VERSION
+)
+from etap_manifest_olustur import file_sha256, load_manifest
+
+HEADER = struct.Struct(MULTICAST_HEADER)
+DATA, END, NAK = 1, 2, 3
+# IPv4 + UDP başlıkları: kablodaki bayt hesabına eklenir
+IP_UDP_OVERHEAD = 28
+# Tur sonu bildiriminin kaç kez gönderileceği (kaybolursa alıcı NAK gönderemez)
+END_REPEATS = 3
+# Alıcıların kabul ettiği resim adları (önbellek dosyalarıyla aynı)
+IMAGE_NAME = re.compile(f"^({IMAGE_NAME_PATTERN})$")
+
+
+def image_entry(directory, name, variant=None):
+    """(ad, yol, sha256) döner; özet manifestte yoksa dosyadan hesaplanır. Resim yoksa None."""
+    entry = load_manifest(directory).get("resimler", {}).get(name)
+    if entry and variant:
+        entry = entry.get("varyantlar", {}).get(variant)
+        if entry is None:
+            raise SystemExit(f"{name} için {variant} varyantı manifestte yok.")
+    if entry:
+        return name, os.path.join(directory, entry["dosya"]), entry["sha256"]
+    path = os.path.join(directory, f"{name}.jpg")
+    if not os.path.exists(path):
+        return None
+    return name, path, file_sha256(path)
+
+
+def send(path, name, sha, group=MULTICAST_GROUP, port=MULTICAST_PORT, rate_mbit=20.0, ttl=1,
+         interface=None, repair_wait=0.5, max_rounds=10, log=print):
+    """
+    Resmi çoklu yayınla gönderir, NAK'lere göre onarım turları yapar.
+    Dönüş: istatistik sözlüğü (paket, bayt, tur, onarılan ve hâlâ eksik blok, NAK sayısı ve baytı,
+    süre, NAK gönderen alıcılar).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    count = -(-len(data) // MULTICAST_BLOCK_SIZE)
+    digest = bytes.fromhex(sha)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+    if interface:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+    sock.bind(("", 0))
+
+    stats = {"paket": 0, "bayt": 0, "tur": 0, "onarilan_blok": 0, "nak": 0, "nak_bayt": 0, "alici": set()}
+    interval = 8 / (rate_mbit * 1000000) if rate_mbit > 0 else 0
+    next_send = time.monotonic()
+
+    def transmit(kind, index, payload=b""):
+        nonlocal next_send
+        packet = HEADER.pack(MULTICAST_MAGIC, MULTICAST_VERSION, kind, name.encode("ascii"), digest, len(data), index, count) + payload
+        delay = next_send - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        sock.sendto(packet, (group, port))
+        next_send = max(next_send, time.monotonic()) + (len(packet) + IP_UDP_OVERHEAD) * interval
+        stats["paket"] += 1
+        stats["bayt"] += len(packet) + IP_UDP_OVERHEAD
+
+    start = time.monotonic()
+    pending = range(count)
+    try:
+        for round_no in range(max_rounds + 1):
+            for index in pending:
+                transmit(DATA, index, data[index * MULTICAST_BLOCK_SIZE:(index + 1) * MULTICAST_BLOCK_SIZE])
+            for _ in range(END_REPEATS):
+                transmit(END, round_no)
+                time.sleep(0.02)
+            stats["tur"] = round_no + 1
+            if round_no > 0:
+                stats["onarilan_blok"] += len(pending)
+
+            # Eksikler birleştirilir: aynı blok kaç alıcıda eksik olursa olsun bir kez yayınlanır
+            missing = set()
+            deadline = time.monotonic() + repair_wait
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([sock], [], [], remaining)[0]:
+                    break
+                packet, addr = sock.recvfrom(65536)
+                if len(packet) < HEADER.size:
+                    continue
+                magic, version, kind, _, nak_digest, _, _, _ = HEADER.unpack_from(packet)
+                if magic != MULTICAST_MAGIC or version != MULTICAST_VERSION or kind != NAK or nak_digest != digest:
+                    continue
+                stats["nak"] += 1
+                stats["nak_bayt"] += len(packet) + IP_UDP_OVERHEAD
+                stats["alici"].add(addr)
+                for offset in range(HEADER.size, len(packet) - 7, 8):
+                    first, length = struct.unpack_from("!II", packet, offset)
+                    missing.update(i for i in range(first, min(first + length, count)))
+            if not missing:
+                break
+            log(f"Tur {round_no + 1}: {len(stats['alici'])} alıcıdan {len(missing)} eksik blok, yeniden gönderiliyor")
+            pending = sorted(missing)
+    finally:
+        sock.close()
+    stats["eksik_blok"] = len(missing)
+    stats["sure_sn"] = time.monotonic() - start
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Arka plan resimlerini çoklu yayınla tüm tahtalara gönderir."
+    )
+    parser.add_argument("dizin", help="Resimlerin bulunduğu (export edilen) dizin")
+    parser.add_argument("--hafta", action="append",
+                        help="Gönderilecek hafta numarası, birden fazla verilebilir "
+                             "(--resim de verilmezse varsayılan: bu hafta)")
+    parser.add_argument("--resim", action="append", metavar="AD",
+                        help="Gönderilecek resmin adı (ör. 2026-10-29 veya takvimdeki bir ad), "
+                             "birden fazla verilebilir")
+    parser.add_argument("--varyant", metavar="GENxYÜK",
+                        help="Ana resim yerine manifestteki bu çözünürlük varyantını gönder")
+    parser.add_argument("--hiz", type=float, default=20.0,
+                        help="Gönderim hızı, Mbit/sn; 0 sınırsız (varsayılan: 20)")
+    parser.add_argument("--ttl", type=int, default=1,
+                        help="Çoklu yayın TTL'i; yönlendiricilerden geçecekse artırın (varsayılan: 1)")
+    parser.add_argument("--arayuz-adresi", help="Gönderimin yapılacağı arayüzün adresi")
+    parser.add_argument("--grup", default=MULTICAST_GROUP, help=f"Grup adresi (varsayılan: {MULTICAST_GROUP})")
+    parser.add_argument("--port", type=int, default=MULTICAST_PORT, help=f"Port (varsayılan: {MULTICAST_PORT})")
+    parser.add_argument("--tur", type=int, default=10, help="En fazla onarım turu (varsayılan: 10)")
+    parser.add_argument("--onarim-suresi", type=float, default=0.5,
+                        help="Tur sonunda NAK'lerin bekleneceği süre, saniye (varsayılan: 0.5)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dizin):
+        raise SystemExit(f"Dizin bulunamadı: {args.dizin}")
+    names = [f"week{int(week):02d}" for week in args.hafta or []] + (args.resim or [])
+    if not names:
+        names = ["week%02d" % datetime.date.today().isocalendar()[1]]
+    for name in names:
+        if not IMAGE_NAME.match(name) or len(name) > MULTICAST_NAME_SIZE:
+            raise SystemExit(f"Geçersiz resim adı: {name} (en fazla {MULTICAST_NAME_SIZE} karakter; "
+                             "weekNN, YYYY-AA-GG veya küçük harf, rakam ve _)")
+
+    failed = 0
+    for name in names:
+        entry = image_entry(args.dizin, name, args.varyant)
+        if entry is None:
+            print(f"Sunucuda bulunamadı: {name}.jpg")
+            failed += 1
+            continue
+        name, path, sha = entry
+        size = os.path.getsize(path)
+        print(f"{name}: {os.path.basename(path)} ({size / 1024:.0f} KB, {sha[:16]}) -> {args.grup}:{args.port}",
+              flush=True)
+        stats = send(path, name, sha, args.grup, args.port, args.hiz, args.ttl, args.arayuz_adresi,
+                     args.onarim_suresi, args.tur)
+        print(f"{name}: {stats['tur']} tur, {stats['onarilan_blok']} blok yeniden gönderildi, "
+              f"{len(stats['alici'])} alıcıdan {stats['nak']} NAK; kabloda {stats['bayt'] / 1048576:.2f} MB "
+              f"({stats['bayt'] / size:.2f} x resim), {stats['sure_sn']:.1f} sn")
+        if stats["eksik_blok"]:
+            print(f"UYARI: {stats['tur']} turdan sonra bazı alıcılarda {stats['eksik_blok']} blok eksik kaldı; "
+                  "bu tahtalar resmi zamanlayıcıyla sunucudan alır.")
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Çoklu yayın gönderiminin loopback üzerinde bir gönderici ve çok alıcıyla ölçümü.
+
+Kurulumun ürettiği alıcı hizmetini (etap-arka-plan-alici) --alici kez, her biri
+kendi geçici önbellek dizini ile 127.0.0.1 arayüzünde başlatır; alıcılar resmi
+geçici paylaşımın manifestinde bulduğu için kabul eder. Alıcılar gelen veri
+bloklarının --kayip oranını rastgele atar; böylece NAK ile onarım turları da
+ölçülür. etap_coklu_yayin.py'nin gönderimi ardından her önbellekte bekletilen
+resmin SHA-256 özetini doğrular ve kablodaki toplam baytı, aynı resmin her tahtaya
+ayrı ayrı aktarılmasıyla karşılaştırır. root gerekmez.
+
+Örnek:  python3 etap_coklu_yayin_olcumu.py --alici 40 --kayip 0.02 --boyut 2000
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from etap_arkaplan_kurulum import (
+    MULTICAST_BLOCK_SIZE, MULTICAST_GROUP, MULTICAST_PORT, MULTICAST_RECEIVED_PREFIX, NFSInstaller
+)
+from etap_coklu_yayin import IP_UDP_OVERHEAD, send
+from etap_manifest_olustur import build_entries, write_manifest
+
+# Alıcıların resmi yazması için gönderim bittikten sonra beklenecek en uzun süre (sn)
+STORE_TIMEOUT = 10
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Çoklu yayın gönderimini loopback üzerinde çok alıcıyla ölçer."
+    )
+    parser.add_argument("--alici", type=int, default=20,
+                        help="Alıcı (tahta) sayısı (varsayılan: 20)")
+    parser.add_argument("--kayip", type=float, default=0.01,
+                        help="Her alıcıda rastgele atılan veri bloğu oranı (varsayılan: 0.01)")
+    parser.add_argument("--boyut", type=int, default=1500,
+                        help="Gönderilen resmin boyutu, KB (varsayılan: 1500)")
+    parser.add_argument("--hiz", type=float, default=100.0,
+                        help="Gönderim hızı, Mbit/sn (varsayılan: 100)")
+    parser.add_argument("--port", type=int, default=MULTICAST_PORT + 1,
+                        help="Ölçümde kullanılan port; kurulu alıcıyla çakışmasın diye "
+                             f"(varsayılan: {MULTICAST_PORT + 1})")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="etap-coklu-yayin-olcumu-")
+    receivers = []
+    try:
+        share = os.path.join(workdir, "paylasim")
+        os.makedirs(share)
+        image = os.path.join(share, "week07.jpg")
+        with open(image, "wb") as f:
+            f.write(b"\xff\xd8" + os.urandom(args.boyut * 1024) + b"\xff\xd9")
+        write_manifest(share, build_entries(share, {})[0])
+        with open(image, "rb") as f:
+            sha = hashlib.sha256(f.read()).hexdigest()
+        size = os.path.getsize(image)
+
+        receiver_path = os.path.join(workdir, "etap-arka-plan-alici")
+        with open(receiver_path, "w", encoding="utf-8") as f:
+            f.write(NFSInstaller([]).render_multicast_receiver())
+
+        caches = []
+        for i in range(args.alici):
+            cache_dir = os.path.join(workdir, "tahta", str(i))
+            os.makedirs(cache_dir)
+            caches.append(cache_dir)
+            receivers.append(subprocess.Popen(
+                [sys.executable, receiver_path, "--onbellek-dizini", cache_dir, "--port", str(args.port),
+                 "--arayuz-adresi", "127.0.0.1", "--paylasim", share, "--kayip", str(args.kayip)],
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True))
+        for receiver in receivers:
+            if not receiver.stdout.readline().startswith("Çoklu yayın alıcısı"):
+                raise SystemExit("HATA: alıcı başlatılamadı.")
+
+        print(f"{args.alici} alıcı, %{args.kayip * 100:g} blok kaybı, {size / 1024:.0f} KB resim, "
+              f"{args.hiz:g} Mbit/sn", flush=True)
+        stats = send(image, "week07", sha, MULTICAST_GROUP, args.port, args.hiz,
+                     interface="127.0.0.1", log=lambda line: print("  " + line, flush=True))
+
+        target = f"{MULTICAST_RECEIVED_PREFIX}week07-{sha[:16]}.jpg"
+        deadline = time.monotonic() + STORE_TIMEOUT
+        while time.monotonic() < deadline:
+            if all(os.path.exists(os.path.join(c, target)) for c in caches):
+                break
+            time.sleep(0.1)
+
+        verified = 0
+        for cache_dir in caches:
+            path = os.path.join(cache_dir, target)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    verified += hashlib.sha256(f.read()).hexdigest() == sha
+
+        blocks = -(-size // MULTICAST_BLOCK_SIZE)
+        unicast = args.alici * (size + blocks * IP_UDP_OVERHEAD)
+        print()
+        print(f"Doğrulanan resim:          {verified}/{args.alici}")
+        print(f"Tur / yeniden gönderilen:  {stats['tur']} / {stats['onarilan_blok']} blok "
+              f"(ilk gönderim {blocks} blok)")
+        print(f"NAK:                       {stats['nak']} ({stats['nak_bayt'] / 1024:.1f} KB)")
+        print(f"Kablodaki bayt:            {(stats['bayt'] + stats['nak_bayt']) / 1048576:.2f} MB "
+              f"(resim {size / 1048576:.2f} MB)")
+        print(f"Tekil aktarım eşdeğeri:    {unicast / 1048576:.2f} MB "
+              f"({unicast / (stats['bayt'] + stats['nak_bayt']):.1f} kat)")
+        print(f"Gönderim süresi:           {stats['sure_sn']:.1f} sn")
+        return 0 if verified == args.alici else 1
+    finally:
+        for receiver in receivers:
+            receiver.terminate()
+            receiver.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ETAP haftalık arka plan kurulumunu bir envanterdeki tüm tahtalara paralel olarak uygular.
+
+Her tahtada etap_arkaplan_kurulum.py'nin çalıştırdığı kurulum çalıştırılır: modül
+kaynağı bağlantının standart girdisinden `python3 -` ile gönderildiği için tahtaya
+önceden bir şey kopyalamak gerekmez. Aynı anda en fazla --paralel tahtayla
+çalışılır, her tahtanın süresi --zaman-asimi ile sınırlıdır; sonunda başarı ve
+hataları süreleriyle birlikte bir özet tablo gösterir.
+
+Envanter bir INI dosyasıdır. Her bölüm bir okul/grup, "tahtalar" o gruptaki
+ana makine adları veya IP'lerdir (virgül veya satır ile ayrılır). "tur" nfs, cifs
+veya http'dir; diğer anahtarlar etap_arkaplan_kurulum.py seçeneklerinin uzun adlarıdır.
+[DEFAULT] bölümündeki değerler tüm gruplara uygulanır; grubun türünde olmayan bir
+seçenek (ör. http grubunda export) DEFAULT'tan geliyorsa o grupta yok sayılır, grubun
+kendisinde yazılmışsa hata verilir.
+
+    [DEFAULT]
+    tur = nfs
+    pencere = 1800
+
+    [ataturk-ilkokulu]
+    sunucu = 10.1.0.5, 10.0.0.2:/srv/merkez/arka-plan
+    export = /srv/paylasim/arka-plan
+    tahtalar = 10.1.0.101, 10.1.0.102
+
+    [cumhuriyet-lisesi]
+    tur = cifs
+    sunucu = 10.2.0.5
+    paylasim = paylasim
+    alt-klasor = arka-plan
+    kullanici = etapshare
+    parola = ...
+    tahtalar =
+        10.2.0.101
+        10.2.0.102
+
+    [fatih-ortaokulu]
+    tur = http
+    sunucu = 10.3.0.5
+    yol = /arka-plan
+    tahtalar = 10.3.0.101, 10.3.0.102
+
+Örnekler:
+    python3 etap_filo_dagitimi.py envanter.ini --paralel 30
+    python3 etap_filo_dagitimi.py envanter.ini --plan
+    python3 etap_filo_dagitimi.py envanter.ini --baglanti docker --python python3
+    python3 etap_filo_dagitimi.py envanter.ini --topla olaylar/ && python3 etap_telemetri_raporu.py olaylar/
+
+Kurulumda her tahtaya grup adı --okul olarak verilir (envanterde "okul" yoksa);
+tahtaların yazdığı süre olayları bu adla gruplanır. --topla kurulum yapmaz,
+tahtalardaki olay dosyalarını DIZIN/<grup>/<tahta>.jsonl olarak indirir.
+
+Yerel deneme için envanterde tahta olarak "localhost" (ssh) veya kapsayıcı adları
+(--baglanti docker/podman) kullanılabilir.
+"""
+
+import argparse
+import concurrent.futures
+import configparser
+import os
+import re
+import shlex
+import subprocess
+import sys
+import textwrap
+import time
+
+import etap_arkaplan_kurulum
+
+# Envanterde seçenek olarak değil, dağıtımın kendisi tarafından kullanılan anahtarlar
+INVENTORY_KEYS = {"tur", "tahtalar", "parola"}
+
+# --topla ile tahtada çalıştırılan betik: kullanıcı başına olay dosyalarını art arda yazar
+COLLECT_SCRIPT = textwrap.dedent(f"""
+    import glob, sys
+    for path in sorted(glob.glob("{etap_arkaplan_kurulum.CACHE_DIR}/.olaylar.*.jsonl")):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            sys.stdout.write(f.read())
+""").lstrip()
+
+
+def subcommand_options():
+    """Kurulum aracının alt komut başına kabul ettiği uzun seçenek adları ("--" olmadan)."""
+    _, subparsers = etap_arkaplan_kurulum.build_parser()
+    return {
+        kind: {option[2:] for action in subparser._actions for option in action.option_strings
+               if option.startswith("--")}
+        for kind, subparser in zip(("nfs", "cifs", "http"), subparsers)
+    }
+
+
+def load_inventory(path):
+    """
+    Envanteri okur ve (grup, tahta, tür, seçenekler) listesini döner.
+    Seçenekler, INI'deki anahtar -> değer sözlüğüdür (parola dahil).
+    """
+    config = configparser.ConfigParser()
+    config.BOOLEAN_STATES = dict(configparser.ConfigParser.BOOLEAN_STATES, evet=True, hayır=False)
+    if not config.read(path, encoding="utf-8"):
+        raise SystemExit(f"Envanter okunamadı: {path}")
+    # Grupta açıkça yazılan anahtarlar: DEFAULT burada sıradan bir bölüm olarak okunur
+    explicit = configparser.ConfigParser(default_section="\0")
+    explicit.read(path, encoding="utf-8")
+    accepted = subcommand_options()
+
+    hosts = []
+    for group in config.sections():
+        section = config[group]
+        kind = section.get("tur", "nfs").strip()
+        if kind not in ("nfs", "cifs", "http"):
+            raise SystemExit(f"{path} [{group}]: tur nfs, cifs veya http olmalı, '{kind}' verildi")
+        options = {}
+        for key in section:
+            name = key.replace("_", "-")
+            if key not in INVENTORY_KEYS and name not in accepted[kind]:
+                if explicit.has_option(group, key):
+                    raise SystemExit(f"{path} [{group}]: {key} seçeneği tur={kind} kurulumunda yok")
+                continue
+            if key.replace("-", "_") in etap_arkaplan_kurulum.BOOLEAN_OPTIONS:
+                try:
+                    options[key] = section.getboolean(key)
+                except ValueError:
+                    raise SystemExit(f"{path} [{group}]: {key} için evet/hayır bekleniyordu")
+            else:
+                options[key] = section[key]
+        for host in re.split(r"[,\s]+", section.get("tahtalar", "")):
+            if host:
+                hosts.append((group, host, kind, options))
+    return hosts
+
+
+def install_args(group, kind, options, plan):
+    """
+    Grup seçeneklerinden kurulum aracının komut satırı argümanlarını üretir (parola hariç).
+    Envanterde okul verilmemişse grup adı okul olarak kullanılır.
+    """
+    args = [kind]
+    if "okul" not in options:
+        args += ["--okul", group]
+    for key, value in options.items():
+        name = key.replace("_", "-")
+        if key in INVENTORY_KEYS:
+            continue
+        if isinstance(value, bool):
+            args.append(f"--{name}" if value else f"--no-{name}")
+        else:
+            args += [f"--{name}", value]
+    if plan:
+        args.append("--plan")
+    return args
+
+
+def remote_command(host, args, connection, user, python):
+    """Tahtada kurulum modülünü standart girdiden çalıştıracak yerel komutu üretir."""
+    remote = [python, "-"] + args
+    if connection == "ssh":
+        return ["ssh", "-o", "BatchMode=yes", "-o", "ConnectTimeout=10",
+                f"{user}@{host}", " ".join(shlex.quote(a) for a in remote)]
+    return [connection, "exec", "-i", host] + remote
+
+
+def deploy_host(host, command, script, timeout):
+    """
+    Tek bir tahtaya kurulumu uygular.
+    Dönüş: (durum, süre_sn, çıktı); durum "BAŞARILI", "HATA" veya "ZAMAN AŞIMI".
+    """
+    start = time.monotonic()
+    try:
+        result = subprocess.run(
+            command,
+            input=script,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout
+        )
+    except subprocess.TimeoutExpired as e:
+        output = e.stdout.decode("utf-8", "replace") if isinstance(e.stdout, bytes) else (e.stdout or "")
+        return "ZAMAN AŞIMI", time.monotonic() - start, output
+    except OSError as e:
+        return "HATA", time.monotonic() - start, str(e)
+    status = "BAŞARILI" if result.returncode == 0 else "HATA"
+    return status, time.monotonic() - start, result.stdout
+
+
+def installer_source():
+    """
+    Tahtaya gönderilen tek dosyalık kurulum: etap_arkaplan_kurulum.py, tahtaya kurulan
+    programların (etap_programlar/) kaynakları PROGRAM_SOURCES'a gömülmüş olarak.
+    """
+    with open(etap_arkaplan_kurulum.__file__, encoding="utf-8") as f:
+        source = f.read()
+    programs = {name: etap_arkaplan_kurulum.program_source(name) for name in etap_arkaplan_kurulum.PROGRAMS}
+    source, count = re.subn(r"^PROGRAM_SOURCES = \{\}$", lambda _: f"PROGRAM_SOURCES = {programs!r}",
+                            source, count=1, flags=re.M)
+    if count != 1:
+        raise SystemExit("etap_arkaplan_kurulum.py içinde PROGRAM_SOURCES bulunamadı.")
+    return source
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Haftalık arka plan kurulumunu envanterdeki tahtalara paralel uygular."
+    )
+    parser.add_argument("envanter", help="Tahta ve sunucu ayarlarını içeren INI dosyası")
+    parser.add_argument("--paralel", type=int, default=20,
+                        help="Aynı anda kurulum yapılan en fazla tahta (varsayılan: 20)")
+    parser.add_argument("--zaman-asimi", type=float, default=600,
+                        help="Tahta başına süre sınırı, saniye (varsayılan: 600)")
+    parser.add_argument("--baglanti", choices=("ssh", "docker", "podman"), default="ssh",
+                        help="Tahtaya bağlanma yolu (varsayılan: ssh)")
+    parser.add_argument("--ssh-kullanici", default="root",
+                        help="ssh kullanıcısı; kurulum root yetkisi gerektirir (varsayılan: root)")
+    parser.add_argument("--python", default="python3",
+                        help="Tahtadaki Python yorumlayıcısı (varsayılan: python3)")
+    parser.add_argument("--grup", action="append",
+                        help="Yalnızca bu gruptaki tahtalar (birden fazla verilebilir)")
+    parser.add_argument("--plan", action="store_true",
+                        help="Hiçbir şeyi değiştirmeden her tahtada yapılacak değişiklikleri göster")
+    parser.add_argument("--log-dizini",
+                        help="Her tahtanın tam çıktısının <tahta>.log olarak yazılacağı dizin")
+    parser.add_argument("--topla", metavar="DIZIN",
+                        help="Kurulum yapmadan tahtalardaki süre olaylarını DIZIN/<grup>/<tahta>.jsonl olarak topla")
+    args = parser.parse_args()
+
+    hosts = load_inventory(args.envanter)
+    if args.grup:
+        hosts = [entry for entry in hosts if entry[0] in args.grup]
+    if not hosts:
+        raise SystemExit("Envanterde kurulum yapılacak tahta yok.")
+    if args.log_dizini:
+        os.makedirs(args.log_dizini, exist_ok=True)
+
+    source = installer_source()
+
+    def run(entry):
+        group, host, kind, options = entry
+        if args.topla:
+            command = remote_command(host, [], args.baglanti, args.ssh_kullanici, args.python)
+            return deploy_host(host, command, COLLECT_SCRIPT, args.zaman_asimi)
+        # Parola komut satırında görünmesin diye betiğin başında ortam değişkenine yazılır
+        script = source
+        if options.get("parola"):
+            script = f"import os; os.environ['ETAP_CIFS_PAROLA'] = {options['parola']!r}\n" + source
+        command = remote_command(host, install_args(group, kind, options, args.plan),
+                                 args.baglanti, args.ssh_kullanici, args.python)
+        return deploy_host(host, command, script, args.zaman_asimi)
+
+    print(f"{len(hosts)} tahta, en fazla {args.paralel} paralel, tahta başına {args.zaman_asimi:.0f} sn")
+    started = time.monotonic()
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.paralel)) as executor:
+        futures = {executor.submit(run, entry): entry for entry in hosts}
+        for future in concurrent.futures.as_completed(futures):
+            group, host, _, _ = futures[future]
+            status, elapsed, output = future.result()
+            if args.topla and status == "BAŞARILI":
+                os.makedirs(os.path.join(args.topla, group), exist_ok=True)
+                with open(os.path.join(args.topla, group, f"{host}.jsonl"), "w", encoding="utf-8") as f:
+                    f.write(output)
+                output = f"{len(output.splitlines())} olay satırı"
+            results.append((group, host, status, elapsed, output))
+            print(f"[{len(results)}/{len(hosts)}] {host}: {status} ({elapsed:.1f} sn)", flush=True)
+            if args.log_dizini:
+                with open(os.path.join(args.log_dizini, f"{host}.log"), "w", encoding="utf-8") as f:
+                    f.write(output)
+            if args.plan:
+                print(output.rstrip())
+    total = time.monotonic() - started
+
+    print()
+    print(f"{'Grup':<24}  {'Tahta':<24}  {'Durum':<11}  {'Süre':>7}  Son satır")
+    for group, host, status, elapsed, output in sorted(results, key=lambda r: (r[2] == "BAŞARILI", r[0], r[1])):
+        lines = [line for line in output.splitlines() if line.strip()]
+        last = lines[-1] if lines else ""
+        print(f"{group:<24}  {host:<24}  {status:<11}  {elapsed:>6.1f}s  {last[:80]}")
+
+    succeeded = sum(1 for r in results if r[2] == "BAŞARILI")
+    elapsed_list = sorted(r[3] for r in results)
+    print()
+    print(f"Başarılı: {succeeded}/{len(results)}, toplam süre {total:.1f} sn, "
+          f"tahta başına ortanca {elapsed_list[len(elapsed_list) // 2]:.1f} sn, "
+          f"en uzun {elapsed_list[-1]:.1f} sn")
+    return 0 if succeeded == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HTTP arka ucunun mount tabanlı okuma yoluyla karşılaştırmalı ölçümü.
+
+Aynı resim, manifest ve takvim iki yoldan sunulur: etap_yuk_testi.py'nin
+paylaşım sunucusu ve PATH yönlendiricileri (bağlı NFS/CIFS paylaşımı yerine) ve
+etap_http_sunucu.py (statik HTTP sunucusu yerine). İki sunucu da her isteğe
+--gecikme-ms ekler ve gövdeleri tüm istemcilerin paylaştığı --bant-genisligi ile
+sınırlar; HTTP sunucusu her yeni TCP bağlantısına da bir gecikme ekler (el
+sıkışma), böylece kalıcı bağlantının etkisi görülür.
+
+--istemci tahta, kurulumun ürettiği kitaplığı zamanlayıcının yaptığı gibi
+(takvimi_guncelle, ardından onbellege_al) aynı anda üç turda çalıştırır:
+
+    ilk           önbellekler boş, resim indirilir
+    degismeyen    hiçbir şey değişmedi (mount: manifest yeniden okunur, HTTP: 304)
+    yeni-resim    paylaşımdaki resim ve manifest değişti
+
+Rapor: her tur ve arka uç için sunucuya giden istek, TCP bağlantısı (HTTP),
+gövde baytı, HTTP durumları ve istemci süresinin dağılımı. root gerekmez.
+
+Örnekler:
+    python3 etap_http_olcumu.py --istemci 20 --gecikme-ms 20
+    python3 etap_http_olcumu.py --istemci 40 --bant-genisligi 50 --manifestsiz
+"""
+
+import argparse
+import datetime
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import etap_arkaplan_kurulum
+from etap_http_sunucu import StaticHandler, StaticServer
+from etap_manifest_olustur import update
+from etap_oturum_olcumleri import percentile
+from etap_takvim_derle import compile_schedule, write_schedule
+from etap_yuk_testi import Share, ShareServer, write_shims
+
+# Zamanlayıcının her çalıştırmada yaptığı sunucu erişimleri
+CLIENT_COMMAND = '. "$1" || exit 1; takvimi_guncelle >/dev/null; onbellege_al "$2" >/dev/null'
+
+ROUNDS = ("ilk", "degismeyen", "yeni-resim")
+
+
+class ThrottledHandler(StaticHandler):
+    """Paylaşım modelinin gecikmesini ve ortak hattını HTTP sunucusuna uygular."""
+
+    def setup(self):
+        # TCP el sıkışması: yeni bağlantı bir gidiş-dönüşe mal olur
+        time.sleep(self.server.share.latency)
+        super().setup()
+
+    def before_response(self):
+        time.sleep(self.server.share.latency)
+
+    def send_body(self, data):
+        self.server.share.transmit(len(data))
+        super().send_body(data)
+
+
+def write_image(path, rng, size_kb):
+    with open(path, "wb") as f:
+        f.write(b"\xff\xd8" + rng.randbytes(size_kb * 1024) + b"\xff\xd9")
+
+
+def run_round(clients, name):
+    """Tüm istemcileri aynı anda çalıştırır; dönüş: [(çıkış kodu, süre ms), ...]."""
+    results = []
+    lock = threading.Lock()
+
+    def run(client):
+        start = time.monotonic()
+        try:
+            code = subprocess.run(["bash", "-c", CLIENT_COMMAND, "_", client["lib"], name], env=client["env"],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                  timeout=etap_arkaplan_kurulum.LOGIN_REFRESH_TIMEOUT).returncode
+        except subprocess.TimeoutExpired:
+            code = -1
+        with lock:
+            results.append((code, (time.monotonic() - start) * 1000))
+
+    threads = [threading.Thread(target=run, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="HTTP arka ucunu mount tabanlı okuma yoluyla aynı sunucu modelinde karşılaştırır."
+    )
+    parser.add_argument("--istemci", type=int, default=20,
+                        help="Aynı anda çalışan tahta sayısı (varsayılan: 20)")
+    parser.add_argument("--gecikme-ms", type=float, default=10.0,
+                        help="Sunucuya her isteğe (ve her yeni HTTP bağlantısına) eklenen gecikme, ms "
+                             "(varsayılan: 10)")
+    parser.add_argument("--bant-genisligi", type=float, default=100.0,
+                        help="Sunucunun tüm istemcilerle paylaşılan çıkış hattı, Mbit/sn; 0 sınırsız (varsayılan: 100)")
+    parser.add_argument("--boyut", type=int, default=1500,
+                        help="Üretilen resmin boyutu, KB (varsayılan: 1500)")
+    parser.add_argument("--manifestsiz", action="store_true",
+                        help="Paylaşıma manifest.json yazma (mount: stat, HTTP: resmin kendisi koşullu istenir)")
+    parser.add_argument("--zaman-asimi", type=float, default=etap_arkaplan_kurulum.HTTP_TIMEOUT,
+                        help=f"HTTP istek zaman aşımı, sn (varsayılan: {etap_arkaplan_kurulum.HTTP_TIMEOUT})")
+    parser.add_argument("--tohum", type=int, default=1,
+                        help="Resim içeriği için tohum (varsayılan: 1)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.tohum)
+    today = datetime.date.today()
+    name = "week%02d" % today.isocalendar()[1]
+    workdir = tempfile.mkdtemp(prefix="etap-http-olcumu-")
+    servers = []
+    try:
+        share_dir = os.path.realpath(os.path.join(workdir, "paylasim"))
+        os.makedirs(share_dir)
+        image = os.path.join(share_dir, f"{name}.jpg")
+        write_image(image, rng, args.boyut)
+        if not args.manifestsiz:
+            update(share_dir)
+        write_schedule(share_dir, compile_schedule(today, today + datetime.timedelta(days=6), None, []))
+
+        # Mount yolu: paylaşım sunucusu ve kitaplığın paylaşım komutlarını ona yönlendiren PATH
+        shim_dir = os.path.join(workdir, "bin")
+        write_shims(shim_dir)
+        mount_share = Share(share_dir, args.gecikme_ms, args.bant_genisligi)
+        mount_server = ShareServer(mount_share)
+        servers.append(mount_server)
+        threading.Thread(target=mount_server.serve_forever, daemon=True).start()
+        mount_env = dict(os.environ,
+                         PATH=shim_dir + os.pathsep + os.environ.get("PATH", ""),
+                         ETAP_YUK_PAYLASIM=share_dir,
+                         ETAP_YUK_PORT=str(mount_server.server_address[1]))
+
+        # HTTP yolu: aynı gecikme ve hat modeliyle statik sunucu
+        http_server = StaticServer(share_dir, handler=ThrottledHandler)
+        http_server.share = Share(share_dir, args.gecikme_ms, args.bant_genisligi)
+        servers.append(http_server)
+        threading.Thread(target=http_server.serve_forever, daemon=True).start()
+        url = "http://127.0.0.1:%d" % http_server.server_address[1]
+
+        backends = {
+            "mount": (etap_arkaplan_kurulum.NFSInstaller([]), [share_dir], mount_env),
+            "http": (etap_arkaplan_kurulum.HTTPInstaller([url], http_timeout=args.zaman_asimi), [url],
+                     dict(os.environ)),
+        }
+        clients = {}
+        for backend, (installer, remote_dirs, env) in backends.items():
+            clients[backend] = []
+            for i in range(args.istemci):
+                # Önbellek aynı zamanda oturumun resim dizinidir (XDG_CACHE_HOME/etap-arka-plan):
+                # root olmadan çalıştırıldığında da istemciler birbirinin önbelleğini paylaşmaz
+                cache_dir = os.path.join(workdir, backend, str(i), "etap-arka-plan")
+                os.makedirs(cache_dir)
+                lib = os.path.join(cache_dir, "ortak.sh")
+                with open(lib, "w", encoding="utf-8") as f:
+                    f.write(installer.render_lib(remote_dirs, cache_dir=cache_dir))
+                clients[backend].append({"lib": lib, "env": dict(env, XDG_CACHE_HOME=os.path.dirname(cache_dir))})
+
+        bandwidth = f"{args.bant_genisligi:g} Mbit/sn" if args.bant_genisligi > 0 else "sınırsız"
+        print(f"{args.istemci} istemci, {os.path.getsize(image) / 1024:.0f} KB resim"
+              f"{' (manifestsiz)' if args.manifestsiz else ''}, gecikme {args.gecikme_ms:g} ms, bant {bandwidth}")
+        print()
+        print(f"{'Tur':<12}  {'Arka uç':<7}  {'İstek':>6}  {'Bağlantı':>8}  {'Gövde MB':>8}  "
+              f"{'p50 ms':>7}  {'p95 ms':>7}  {'Hata':>4}  HTTP durumları")
+
+        failed = 0
+        for round_name in ROUNDS:
+            if round_name == "yeni-resim":
+                # Pazartesi sabahı: aynı haftanın resmi sunucuda değişti (mtime da ilerler)
+                write_image(image, rng, args.boyut)
+                os.utime(image, (time.time() + 60, time.time() + 60))
+                if not args.manifestsiz:
+                    update(share_dir)
+            for backend in backends:
+                mount_share.reset()
+                http_server.reset()
+                results = run_round(clients[backend], name)
+                latencies = sorted(ms for code, ms in results if code == 0)
+                errors = sum(1 for code, _ in results if code != 0)
+                failed += errors
+                if backend == "mount":
+                    requests = mount_share.metas + mount_share.reads
+                    connections = "-"
+                    body = mount_share.bytes_sent
+                    statuses = ""
+                else:
+                    requests = sum(http_server.statuses.values())
+                    connections = str(http_server.connections)
+                    body = http_server.body_bytes
+                    statuses = ", ".join(f"{status}: {count}" for status, count in sorted(http_server.statuses.items()))
+                p50 = f"{percentile(latencies, 0.50):.0f}" if latencies else "-"
+                p95 = f"{percentile(latencies, 0.95):.0f}" if latencies else "-"
+                print(f"{round_name:<12}  {backend:<7}  {requests:>6}  {connections:>8}  {body / 1048576:>8.2f}  "
+                      f"{p50:>7}  {p95:>7}  {errors:>4}  {statuses}", flush=True)
+
+        print()
+        print("mount satırlarındaki istekler çekirdeğin tek NFS/CIFS bağlantısından gider; bu bağlantı için")
+        print("tahtada bir mount birimi (CIFS'te parolasıyla) gerekir. HTTP'de her çalıştırma iki bağlantı")
+        print("kurar: biri takvim için, diğeri aynı bağlantıdan istenen manifest ve resim için.")
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
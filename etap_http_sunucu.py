@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Arka plan dizinini HTTP ile sunan küçük bir statik sunucu (http.server tabanlı).
+
+Kurulumun http arka ucu (etap_arkaplan_kurulum.py http) mount yerine düz bir
+statik sunucudan okur; bu araç nginx/Apache/IIS yerine geçen bir denek ve
+küçük okullar için yeterli bir sunucudur. Tahtaların kullandığı HTTP
+özelliklerini destekler:
+
+    - HTTP/1.1 kalıcı bağlantı: manifest ve resim aynı bağlantıdan istenir
+    - ETag ve Last-Modified; If-None-Match / If-Modified-Since ile 304
+    - Range (tek aralık) ve If-Range: kesilen indirme kaldığı yerden sürer
+
+Yalnızca dizindeki düz dosyalar sunulur; dizin listesi ve nokta ile başlayan
+dosyalar sunulmaz. Yük ölçümleri (etap_http_olcumu.py) StaticHandler'ın
+before_response() ve send_body() kancalarıyla gecikme ve bant genişliği ekler.
+
+Örnekler:
+    python3 etap_http_sunucu.py /srv/paylasim/arka-plan
+    python3 etap_http_sunucu.py /srv/paylasim/arka-plan --port 8080 --adres 0.0.0.0
+"""
+
+import argparse
+import email.utils
+import http.server
+import os
+import re
+import sys
+import threading
+import urllib.parse
+
+# Gövdenin gönderildiği parça boyutu (bayt)
+CHUNK_SIZE = 65536
+
+# Tek aralıklı Range başlığı: "bytes=<ilk>-[<son>]" veya son N bayt "bytes=-<N>"
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class StaticHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "etap-http-sunucu"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def before_response(self):
+        """Her isteğin yanıtından önce çağrılır (ölçümler gecikme ekler)."""
+
+    def send_body(self, data):
+        """Gövdenin bir parçasını gönderir (ölçümler bant genişliğini sınırlar)."""
+        self.wfile.write(data)
+
+    def resolve(self):
+        """İstenen yolun dizindeki düz dosyası; sunulmayacaksa None."""
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        parts = [part for part in path.split("/") if part]
+        if not parts or any(part.startswith(".") for part in parts):
+            return None
+        full = os.path.realpath(os.path.join(self.server.directory, *parts))
+        if not full.startswith(self.server.directory + os.sep) or not os.path.isfile(full):
+            return None
+        return full
+
+    def not_modified(self, etag, mtime):
+        """İstemcinin doğrulayıcıları güncel mi? If-None-Match varsa If-Modified-Since'e bakılmaz."""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def byte_range(self, size, etag, last_modified):
+        """Range isteğinin (ilk, son) baytları; tüm dosya gönderilecekse None, karşılanamazsa False."""
+        match = RANGE.match(self.headers.get("Range", "").strip())
+        if not match or not any(match.groups()):
+            return None
+        # If-Range tutmuyorsa (dosya değişmiş) aralık yok sayılır ve tüm dosya gönderilir
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and if_range.strip() not in (etag, last_modified):
+            return None
+        first, last = match.groups()
+        if first:
+            first, last = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            first, last = max(size - int(last), 0), size - 1
+        if first >= size or first > last:
+            return False
+        return first, last
+
+    def do_HEAD(self):
+        self.respond(head=True)
+
+    def do_GET(self):
+        self.respond(head=False)
+
+    def respond(self, head):
+        self.before_response()
+        path = self.resolve()
+        try:
+            f = open(path, "rb") if path else None
+        except OSError:
+            f = None
+        if f is None:
+            self.send_error(404)
+            self.server.count(404, 0)
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+            last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+
+            if self.not_modified(etag, st.st_mtime):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", last_modified)
+                self.end_headers()
+                self.server.count(304, 0)
+                return
+
+            span = self.byte_range(st.st_size, etag, last_modified)
+            if span is False:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{st.st_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                self.server.count(416, 0)
+                return
+            first, last = span or (0, st.st_size - 1)
+            self.send_response(206 if span else 200)
+            self.send_header("Content-Type", "application/json" if path.endswith(".json") else "image/jpeg")
+            self.send_header("Content-Length", str(last - first + 1))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Accept-Ranges", "bytes")
+            if span:
+                self.send_header("Content-Range", f"bytes {first}-{last}/{st.st_size}")
+            self.end_headers()
+            if head:
+                self.server.count(200, 0)
+                return
+
+            f.seek(first)
+            remaining = last - first + 1
+            sent = 0
+            try:
+                while remaining > 0:
+                    data = f.read(min(CHUNK_SIZE, remaining))
+                    if not data:
+                        break
+                    self.send_body(data)
+                    remaining -= len(data)
+                    sent += len(data)
+            finally:
+                self.server.count(206 if span else 200, sent)
+            if remaining:
+                # Dosya gönderim sırasında kısaldı; bağlantı yeniden kullanılamaz
+                self.close_connection = True
+
+
+class StaticServer(http.server.ThreadingHTTPServer):
+    """Dizini sunan sunucu; yanıt durumlarını, gövde baytlarını ve bağlantıları sayar."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+    def __init__(self, directory, address=("127.0.0.1", 0), handler=StaticHandler, verbose=False):
+        self.directory = os.path.realpath(directory)
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.reset()
+        super().__init__(address, handler)
+
+    def reset(self):
+        with self.lock:
+            self.statuses = {}
+            self.body_bytes = 0
+            self.connections = 0
+
+    def count(self, status, sent):
+        with self.lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.body_bytes += sent
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Arka plan dizinini koşullu istek ve Range destekli HTTP ile sunar."
+    )
+    parser.add_argument("dizin", help="Resimlerin (ve manifest.json / takvim.json) bulunduğu dizin")
+    parser.add_argument("--adres", default="127.0.0.1", help="Dinlenecek adres (varsayılan: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port (varsayılan: 8080)")
+    parser.add_argument("--sessiz", action="store_true", help="İstekleri günlüğe yazma")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dizin):
+        raise SystemExit(f"Dizin bulunamadı: {args.dizin}")
+    server = StaticServer(args.dizin, (args.adres, args.port), verbose=not args.sessiz)
+    print(f"{server.directory} sunuluyor: http://{args.adres}:{server.server_address[1]}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Paylaşımdaki arka plan resimleri için manifest.json üretir.
+
+Tahtalar her resmin boyutunu ve SHA-256 özetini bu tek küçük dosyadan okur;
+önbelleklerindeki kopyanın güncel olup olmadığını resme dokunmadan anlar ve
+yalnızca değişen resmi indirir. Dosya sunucusunda, export edilen dizin üzerinde
+çalıştırılır.
+
+Tanınan dosya adları:
+    weekNN.jpg              ISO haftası (ör. week07.jpg)         -> "week07"
+    YYYY-AA-GG.jpg          belirli bir gün (ör. 2026-10-19.jpg) -> "2026-10-19"
+    <ad>.jpg                takvimde adıyla geçen resim (ör. tatil.jpg, etap_takvim_derle.py)
+                                                                 -> "tatil"
+    <ad>-GENxYÜK.jpg        aynı resmin çözünürlük varyantı (ör. week07-1920x1080.jpg,
+                            etap_varyant_olustur.py üretir)
+
+Üretim artımlıdır: boyutu ve değişiklik zamanı önceki manifestle aynı olan
+dosyaların özeti yeniden hesaplanmaz; hiçbir kayıt değişmediyse manifest yeniden
+yazılmaz. --izle ile dizin inotify ile izlenir ve her değişiklikten --bekleme
+saniye sonra manifest güncellenir. (inotify yalnızca sunucunun kendi dosya
+sistemindeki değişiklikleri görür; Windows sunucularda aracı zamanlanmış görev
+olarak --izle olmadan çalıştırın.)
+
+Örnekler:
+    python3 etap_manifest_olustur.py /srv/paylasim/arka-plan
+    python3 etap_manifest_olustur.py /srv/paylasim/arka-plan --izle
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import re
+import select
+import struct
+import sys
+import tempfile
+import time
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+IMAGE_NAME = re.compile(
+    r"^(?P<key>week\d{2}|\d{4}-\d{2}-\d{2}|[a-z][a-z0-9_]*)(?:-(?P<variant>\d+x\d+))?\.jpe?g$", re.IGNORECASE
+)
+
+# inotify olayları (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def file_sha256(path):
+    """Dosyanın SHA-256 özetini 1 MB'lık parçalarla hesaplar."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def jpeg_dimensions(path):
+    """JPEG'in SOF işaretinden (genişlik, yükseklik) okur; okunamazsa (None, None)."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return None, None
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None, None
+                if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+                    continue
+                length = struct.unpack(">H", f.read(2))[0]
+                # SOF0..SOF15, DHT (C4), JPG (C8) ve DAC (CC) hariç
+                if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+                    height, width = struct.unpack(">xHH", f.read(5))
+                    return width, height
+                f.seek(length - 2, os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None, None
+
+
+def describe(directory, name, previous):
+    """Tek bir dosyanın manifest kaydı; boyut ve zaman değişmediyse önceki kayıt kullanılır."""
+    st = os.stat(os.path.join(directory, name))
+    if previous and previous.get("dosya") == name and previous.get("boyut") == st.st_size \
+            and previous.get("mtime") == st.st_mtime_ns:
+        return {k: v for k, v in previous.items() if k != "varyantlar"}, False
+
+    width, height = jpeg_dimensions(os.path.join(directory, name))
+    entry = {
+        "dosya": name,
+        "boyut": st.st_size,
+        "mtime": st.st_mtime_ns,
+        "sha256": file_sha256(os.path.join(directory, name)),
+    }
+    if width:
+        entry["genislik"] = width
+        entry["yukseklik"] = height
+    return entry, True
+
+
+def load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get("surum") == MANIFEST_VERSION else {}
+
+
+def build_entries(directory, previous):
+    """
+    Dizini tarar ve {anahtar: kayıt} sözlüğü ile özeti yeniden hesaplanan dosya
+    sayısını döner. Ana resmi olmayan varyantlar dikkate alınmaz.
+    """
+    names = {}
+    for name in sorted(os.listdir(directory)):
+        match = IMAGE_NAME.match(name)
+        if match:
+            names.setdefault(match.group("key").lower(), {})[match.group("variant")] = name
+
+    entries = {}
+    hashed = 0
+    for key, files in sorted(names.items()):
+        if None not in files:
+            continue
+        old = previous.get(key, {})
+        entry, rehashed = describe(directory, files[None], old)
+        hashed += rehashed
+        variants = {}
+        for variant, name in sorted((v, n) for v, n in files.items() if v):
+            variants[variant], rehashed = describe(directory, name, old.get("varyantlar", {}).get(variant))
+            hashed += rehashed
+        if variants:
+            entry["varyantlar"] = variants
+        entries[key] = entry
+    return entries, hashed
+
+
+def write_manifest(directory, entries):
+    """Manifesti geçici dosyaya yazıp rename ile yerine koyar; istemciler yarım dosya görmez."""
+    manifest = {
+        "surum": MANIFEST_VERSION,
+        "olusturulma": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "resimler": entries,
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{MANIFEST_NAME}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True, ensure_ascii=False)
+            f.write("\n")
+            os.fchmod(f.fileno(), 0o644)
+        os.replace(tmp_path, os.path.join(directory, MANIFEST_NAME))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def update(directory):
+    """Manifesti gerekiyorsa günceller ve durumu yazdırır."""
+    start = time.monotonic()
+    previous = load_manifest(directory).get("resimler", {})
+    entries, hashed = build_entries(directory, previous)
+    elapsed = (time.monotonic() - start) * 1000
+    if entries == previous:
+        print(f"Manifest güncel: {len(entries)} kayıt ({elapsed:.0f} ms)", flush=True)
+        return
+    write_manifest(directory, entries)
+    print(f"Manifest yazıldı: {len(entries)} kayıt, {hashed} dosyanın özeti hesaplandı "
+          f"({elapsed:.0f} ms)", flush=True)
+
+
+def watch(directory, delay):
+    """Dizini inotify ile izler; resim değişikliklerinden `delay` sn sonra manifesti günceller."""
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    fd = libc.inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 başarısız")
+    mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        raise OSError(ctypes.get_errno(), f"{directory} izlenemiyor")
+
+    print(f"{directory} izleniyor...", flush=True)
+    pending = False
+    while True:
+        # Değişiklik bekleniyorsa kısa süre, yoksa süresiz bekle: yoklama yapılmaz
+        ready, _, _ = select.select([fd], [], [], delay if pending else None)
+        if not ready:
+            pending = False
+            update(directory)
+            continue
+
+        data = os.read(fd, 65536)
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length]
+            offset += INOTIFY_EVENT.size + length
+            # Dosya kopyalanırken art arda gelen olaylar birleşir; son olaydan sonra beklenir
+            if IMAGE_NAME.match(os.fsdecode(name.rstrip(b"\0"))):
+                pending = True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Paylaşımdaki haftalık arka plan resimleri için manifest.json üretir."
+    )
+    parser.add_argument("dizin", help="Resimlerin bulunduğu (export edilen) dizin")
+    parser.add_argument("--izle", action="store_true",
+                        help="Dizini inotify ile izle ve değişikliklerde manifesti güncelle")
+    parser.add_argument("--bekleme", type=float, default=2.0,
+                        help="Son değişiklikten sonra güncellemeden önce beklenecek süre, sn (varsayılan: 2)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dizin):
+        raise SystemExit(f"Dizin bulunamadı: {args.dizin}")
+    update(args.dizin)
+    if args.izle:
+        try:
+            watch(args.dizin, args.bekleme)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Oturum açılışından arka planın uygulanmasına kadar geçen süreleri raporlar.
+
+Oturum ajanı önbellek dizinine kullanıcı başına bir ölçüm dosyası
+(.oturum-olcumleri.<uid>) yazar. Satırlar: tarih, hafta, olay, oturum açılışından
+geçen ms, ajan başlangıcından geçen ms. Olaylar:
+    bu-hafta        günün (takvim yoksa bu haftanın) resmi önbellekten hemen uygulandı
+    son-gecerli     önbellekteki en yeni resim hemen uygulandı, yenileme arka planda
+    yok             önbellek boş, hiçbir resim uygulanamadı
+    yenileme        arka planda gelen yeni resim uygulandı
+    yenileme-yok    günün resmi sunucuda yok
+    yenileme-hata   sunucuya süre sınırı içinde erişilemedi
+    yeni-gun        oturum açıkken gün değişti (veya uykudan uyanıldı)
+
+Örnekler:
+    python3 etap_oturum_olcumleri.py
+    python3 etap_oturum_olcumleri.py toplanan/*/.oturum-olcumleri.*
+"""
+
+import argparse
+import glob
+import math
+import statistics
+import sys
+
+DEFAULT_GLOB = "/var/cache/etap-arka-plan/.oturum-olcumleri.*"
+
+
+def percentile(values, fraction):
+    """Sıralı listede en yakın sıra yöntemiyle yüzdelik değer."""
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Oturum açılışından arka planın uygulanmasına kadar geçen süreleri raporlar."
+    )
+    parser.add_argument("dosyalar", nargs="*",
+                        help=f"Ölçüm dosyaları (varsayılan: {DEFAULT_GLOB})")
+    args = parser.parse_args()
+
+    paths = args.dosyalar or sorted(glob.glob(DEFAULT_GLOB))
+    if not paths:
+        raise SystemExit("Ölçüm dosyası bulunamadı.")
+
+    events = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) != 5:
+                    continue
+                try:
+                    events.setdefault(fields[2], []).append((int(fields[3]), int(fields[4])))
+                except ValueError:
+                    continue
+
+    print(f"{'Olay':<14}  {'Adet':>5}  {'p50 (ms)':>9}  {'p95 (ms)':>9}  {'En çok':>9}  {'Ajanda p50':>11}")
+    for event, samples in sorted(events.items(), key=lambda item: -len(item[1])):
+        session = sorted(s for s, _ in samples)
+        script = sorted(s for _, s in samples)
+        print(f"{event:<14}  {len(samples):>5}  {percentile(session, 0.50):>9}  "
+              f"{percentile(session, 0.95):>9}  {session[-1]:>9}  {statistics.median(script):>11.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Oturum açılışındaki arka plan işinin ölçümü: autostart ajanı ile sistem düzeyi.
+
+autostart kipinde her oturum açılışında oturum ajanı başlar (Python + Gio),
+günün resmini kullanıcının arka plan dizinine bağlar ve Cinnamon anahtarlarını
+yazar; ajan bu işi oturum yöneticisinin diğer autostart uygulamalarıyla aynı anda,
+onlarla işlemci paylaşarak yapar. Araç ajanı her turda yeni bir ev dizini ile
+(kullanıcının ilk oturumu gibi) --kuru kipinde başlatır ve resmi uygulayana kadar
+geçen süreyi, harcadığı işlemci süresini ve RSS'i ölçer.
+
+--sistem-arka-plani kipinde oturum açılışında hiçbir süreç başlamaz; iş günde bir
+kez root tarafında yapılır. Araç kurulumun ürettiği sistem betiğini geçici
+dizinlerle iki kez çalıştırır (ilk uygulama ve değişmeyen gün) ve kaç kez
+dconf update çağrıldığını sayar. dconf update sistem veritabanını değiştireceği
+için PATH'teki bir yönlendiriciyle yalnızca sayılır; root gerekmez.
+
+Örnek:  python3 etap_oturum_yuku_olcumu.py --tekrar 10
+"""
+
+import argparse
+import datetime
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from etap_ajan_olcumu import process_sample, wait_for_line
+from etap_arkaplan_kurulum import NFSInstaller
+
+# dconf yerine geçen yönlendirici: çağrıları sayar, sistem veritabanına dokunmaz
+DCONF_SHIM = '#!/bin/sh\necho "$*" >> "$ETAP_DCONF_KAYDI"\n'
+
+
+def measure_agent(agent_path, cache_dir, workdir, runs):
+    """Ajanın her turda (uygulamaya kadar ms, işlemci ms, RSS kB) ölçümü; başlatılamazsa hata iletisi."""
+    samples = []
+    for i in range(runs):
+        home = os.path.join(workdir, f"ev-{i}")
+        os.makedirs(home)
+        start = time.monotonic()
+        proc = subprocess.Popen(
+            [sys.executable, "-u", agent_path, "--onbellek-dizini", cache_dir, "--kuru"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            env=dict(os.environ, HOME=home, XDG_CACHE_HOME=os.path.dirname(cache_dir))
+        )
+        try:
+            if wait_for_line(proc, "Uygulanacak:", 30) is None:
+                try:
+                    output = proc.communicate(timeout=5)[0].strip()
+                except subprocess.TimeoutExpired:
+                    output = ""
+                return None, output.splitlines()[-1] if output else "ajan resmi uygulamadı (gi/Gio kurulu mu?)"
+            elapsed = time.monotonic() - start
+            cpu, rss, _, _ = process_sample(proc.pid)
+            samples.append((elapsed * 1000, cpu * 1000, rss))
+        finally:
+            proc.terminate()
+            proc.wait()
+    return samples, None
+
+
+def run_system_script(script, env):
+    """Sistem betiğini bir kez çalıştırır; dönüş: (süre ms, çıkış kodu, son satır)."""
+    start = time.monotonic()
+    result = subprocess.run(["bash", script], env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True)
+    lines = result.stdout.strip().splitlines()
+    return (time.monotonic() - start) * 1000, result.returncode, lines[-1] if lines else ""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Oturum açılışındaki arka plan işini autostart ajanı ve sistem düzeyi kiplerinde ölçer."
+    )
+    parser.add_argument("--tekrar", type=int, default=10,
+                        help="Ajanın kaç kez başlatılacağı (varsayılan: 10)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="etap-oturum-yuku-")
+    try:
+        # Önbellek aynı zamanda oturumun resim dizinidir (XDG_CACHE_HOME/etap-arka-plan): root
+        # olmadan çalıştırıldığında da resim bu kullanıcının dosyası olarak seçilir
+        cache_dir = os.path.join(workdir, "etap-arka-plan")
+        os.makedirs(cache_dir)
+        week = "%02d" % datetime.date.today().isocalendar()[1]
+        data = b"\xff\xd8" + os.urandom(1500 * 1024) + b"\xff\xd9"
+        with open(os.path.join(cache_dir, f"week{week}-{len(data)}-1.jpg"), "wb") as f:
+            f.write(data)
+
+        installer = NFSInstaller([], system_wallpaper=True)
+        lib = os.path.join(workdir, "onbellek.sh")
+        agent = os.path.join(workdir, "etap-arka-plan-ajani")
+        script = os.path.join(workdir, "etap-arka-plan-sistem")
+        background_dir = os.path.join(workdir, "backgrounds")
+        dconf_file = os.path.join(workdir, "local.d", "01-etap-arka-plan-resim")
+        with open(lib, "w", encoding="utf-8") as f:
+            f.write(installer.render_lib([], cache_dir=cache_dir))
+        with open(agent, "w", encoding="utf-8") as f:
+            f.write(installer.render_agent())
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(installer.render_system_wallpaper(lib, background_dir, dconf_file))
+
+        shim_dir = os.path.join(workdir, "bin")
+        os.makedirs(shim_dir)
+        with open(os.path.join(shim_dir, "dconf"), "w", encoding="utf-8") as f:
+            f.write(DCONF_SHIM)
+        os.chmod(os.path.join(shim_dir, "dconf"), 0o755)
+        dconf_log = os.path.join(workdir, "dconf-cagrilari")
+        open(dconf_log, "w").close()
+        env = dict(os.environ, PATH=shim_dir + os.pathsep + os.environ.get("PATH", ""),
+                   ETAP_DCONF_KAYDI=dconf_log, XDG_CACHE_HOME=workdir)
+
+        print("Oturum açılışı başına:")
+        print(f"  {'Kip':<18}  {'Süreç':>5}  {'Uygulama ms (ortanca/en çok)':>28}  {'İşlemci ms':>10}  {'RSS MB':>6}")
+        samples, error = measure_agent(agent, cache_dir, workdir, args.tekrar)
+        if samples is None:
+            print(f"  {'autostart (ajan)':<18}  {1:>5}  ölçülemedi: {error}")
+        else:
+            elapsed = [s[0] for s in samples]
+            print(f"  {'autostart (ajan)':<18}  {1:>5}  "
+                  f"{statistics.median(elapsed):>17.0f} / {max(elapsed):>8.0f}  "
+                  f"{statistics.median(s[1] for s in samples):>10.0f}  "
+                  f"{statistics.median(s[2] for s in samples) / 1024:>6.1f}")
+        print(f"  {'sistem düzeyi':<18}  {0:>5}  {0:>17} / {0:>8}  {0:>10}  {0:>6}")
+
+        print()
+        print("Sistem düzeyi, root tarafında (gün değişiminde ve önbellek doldurulduktan sonra):")
+        failed = samples is None
+        for label in ("ilk uygulama", "değişmeyen gün"):
+            before = os.path.getsize(dconf_log)
+            elapsed, code, last = run_system_script(script, env)
+            with open(dconf_log, encoding="utf-8") as f:
+                f.seek(before)
+                updates = sum(1 for line in f if line.strip() == "update")
+            failed = failed or code != 0
+            print(f"  {label:<15}  {elapsed:6.0f} ms  dconf update: {updates}  çıkış: {code}  {last}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Çevrimdışı kurulum paketi: kurulumun tüm dosyaları ve dönemin resimleri tek arşivde.
+
+Yeni tahtalar toplu hazırlanırken her tahtada canlı kurulum (deneme mount'u,
+dosya yazımı, daemon-reload, ilk indirme) hem dakikalar sürer hem de sunucuyu
+yorar. Bu araç etap_arkaplan_kurulum.py'nin aynı seçeneklerle üreteceği tüm
+dosyaları (birimler, kitaplık, ajan, zamanlayıcı, autostart veya sistem düzeyi,
+dconf) ve paylaşımdaki dönemin resimlerini önbellekteki adlarıyla sürümlü bir
+.tar.gz paketine koyar. Paketin kurulumu ağ kullanmaz: dosyalar yerel olarak
+kopyalanır, birimler bağlantılarıyla etkinleştirilir ve tek bir daemon-reload
+yapılır. İmaj hazırlarken kur.sh'ye hedef kök dizini verilir.
+
+Dönemin resimleri paylaşımdaki takvim.json'dan (genel, okul ve tüm makine
+katmanları) --baslangic'tan itibaren --gun gün için çözülür; takvim yoksa ISO
+haftalarının resimleri alınır. Manifest varsa önbellek anahtarı SHA-256 özetidir
+ve --cozunurluk verilirse tahtaların seçeceği varyant konur; manifest yoksa
+anahtar paylaşımdaki boyut + değişiklik zamanıdır. Böylece tahta ilk
+çalıştırmasında resmi önbellekte bulur ve sunucudan yalnızca üstveri okur.
+
+--onceki ile fark paketi üretilir: yalnızca önceki pakette olmayan resimler
+konur, artık dönemde olmayanlar kurulumda önbellekten silinir. Fark paketi
+yalnızca önceki sürümün kurulu olduğu tahtaya kurulur.
+
+Örnekler:
+    python3 etap_paket_olustur.py --kaynak /srv/paylasim/arka-plan -- \\
+        nfs --sunucu 10.1.0.5 --export /srv/paylasim/arka-plan --okul ataturk-ilkokulu
+    python3 etap_paket_olustur.py --kaynak /srv/paylasim/arka-plan --cozunurluk 3840x2160 \\
+        --onceki etap-arka-plan-ataturk-ilkokulu-202609011200.tar.gz -- --yapilandirma okul.ini nfs
+
+Kurulum (tahtada veya imaj kökünde):
+    tar xzf etap-arka-plan-....tar.gz && sudo ./etap-arka-plan-.../kur.sh [/mnt/imaj]
+"""
+
+import argparse
+import datetime
+import hashlib
+import io
+import json
+import os
+import re
+import shlex
+import sys
+import tarfile
+import textwrap
+import time
+
+import etap_arkaplan_kurulum
+from etap_arkaplan_kurulum import CACHE_DIR, SCHEDULE_NAME, SYSTEMD_DIR
+from etap_manifest_olustur import file_sha256, load_manifest
+from etap_programlar.manifest_kaydi import select_variant
+from etap_takvim_derle import resolve
+
+PACKAGE_VERSION = 1
+PACKAGE_NAME = "paket.json"
+# Kurulu paketin kaydı (fark paketleri temel sürümü buradan denetler)
+INSTALLED_PATH = "/var/lib/etap-arka-plan/paket.json"
+# Takvim yoksa pakete konacak gün sayısı (bir dönem)
+TERM_DAYS = 140
+
+
+def term_names(schedule, school, first, days):
+    """Dönemde gösterilecek resim adları (ilk geçtikleri sırayla); tüm makine katmanları dahil."""
+    hosts = [""]
+    if schedule is not None:
+        hosts += [key[len("makine:"):] for key in schedule["katmanlar"] if key.startswith("makine:")]
+    names = []
+    for n in range(days):
+        day = first + datetime.timedelta(days=n)
+        for host in hosts:
+            name = resolve(schedule, day, host, school) if schedule is not None else None
+            name = name or "week%02d" % day.isocalendar()[1]
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def collect_images(source, names, resolution):
+    """
+    Adların paylaşımdaki dosyası ve önbellekteki adı.
+    Dönüş: ({önbellek adı: {"ad", "kaynak", "boyut", "sha256"}}, paylaşımda bulunmayan adlar).
+    """
+    manifest = load_manifest(source).get("resimler")
+    images, missing = {}, []
+    for name in names:
+        if manifest is not None:
+            entry = manifest.get(name)
+            if not entry:
+                missing.append(name)
+                continue
+            entry = select_variant(entry, resolution)
+            path = os.path.join(source, entry["dosya"])
+            if not os.path.isfile(path) or file_sha256(path) != entry["sha256"]:
+                raise SystemExit(f"{path}: manifestteki özetle tutmuyor; önce etap_manifest_olustur.py çalıştırın.")
+            sha, key = entry["sha256"], entry["sha256"][:16]
+        else:
+            path = os.path.join(source, f"{name}.jpg")
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                missing.append(name)
+                continue
+            # Kitaplıktaki `stat -c '%s-%Y'` anahtarı
+            sha, key = file_sha256(path), f"{st.st_size}-{int(st.st_mtime)}"
+        images[f"{name}-{key}.jpg"] = {"ad": name, "kaynak": path, "boyut": os.path.getsize(path), "sha256": sha}
+    return images, missing
+
+
+def unit_links(files):
+    """
+    Kurulumun systemctl enable ile etkinleştireceği birimlerin bağlantıları ({bağlantı: hedef}):
+    [Install] bölümünde WantedBy= olan her birim (actions() ile aynı küme).
+    """
+    links = {}
+    for path, (content, _) in files.items():
+        if not path.startswith(SYSTEMD_DIR + "/"):
+            continue
+        for line in content.splitlines():
+            if line.startswith("WantedBy="):
+                for target in line.split("=", 1)[1].split():
+                    links[f"{SYSTEMD_DIR}/{target}.wants/{os.path.basename(path)}"] = path
+    return links
+
+
+def render_install_script(package, files, links, remove, images, removed_images, mount_points, schedule):
+    """Paketteki kur.sh: ağ kullanmadan dosyaları yerleştirir ve tek bir daemon-reload yapar."""
+    q = shlex.quote
+    base = package["temel"]
+    check_base = ""
+    if base:
+        check_base = textwrap.dedent(f"""
+            # Fark paketi: yalnızca temel sürümün üzerine
+            INSTALLED=$(python3 -c 'import json, sys; print(json.load(open(sys.argv[1]))["paket"])' \\
+                "$ROOT{INSTALLED_PATH}" 2>/dev/null || true)
+            if [ "$INSTALLED" != {q(base)} ]; then
+                echo "Bu fark paketi {base} sürümünün üzerine kurulur (kurulu: ${{INSTALLED:-yok}})."
+                exit 1
+            fi
+        """)
+    lines = []
+    for path in remove:
+        lines.append(f"rm -f \"$ROOT\"{q(path)}")
+        if path.startswith(SYSTEMD_DIR + "/"):
+            lines.append(f"rm -f \"$ROOT\"{q(SYSTEMD_DIR)}/*.wants/{q(os.path.basename(path))}")
+    for name in removed_images:
+        lines.append(f"rm -f \"$ROOT\"{q(CACHE_DIR + '/' + name)}")
+    for path, (_, mode) in files.items():
+        lines.append(f"yerlestir {mode:04o} \"$HERE\"/dosyalar{q(path)} \"$ROOT\"{q(path)}")
+    for link, target in links.items():
+        lines.append(f"mkdir -p \"$ROOT\"{q(os.path.dirname(link))} && ln -sfn {q(target)} \"$ROOT\"{q(link)}")
+    for mount_point in mount_points:
+        lines.append(f"mkdir -p \"$ROOT\"{q(mount_point)}")
+    lines.append(f"install -d -m 1777 \"$ROOT\"{q(CACHE_DIR)}")
+    for name in images + ([SCHEDULE_NAME] if schedule else []):
+        lines.append(f"yerlestir 0644 \"$HERE\"/onbellek/{q(name)} \"$ROOT\"{q(CACHE_DIR + '/' + name)}")
+    expected = " ".join(q(name) for name in package["resimler"])
+    system_step = ""
+    if etap_arkaplan_kurulum.SYSTEM_WALLPAPER_PATH in files:
+        # Önbellekteki resim hemen uygulanır; oturum açılışı ağ beklemez
+        system_step = (f'"${{RUN[@]}}" {etap_arkaplan_kurulum.SYSTEM_WALLPAPER_PATH} '
+                       '|| echo "UYARI: sistem arka planı uygulanamadı."')
+
+    return textwrap.dedent(f"""
+        #!/bin/bash
+        # ETAP haftalık arka plan paketi {package["paket"]} ({package["etiket"]}) kurulumu; ağ kullanılmaz.
+        # Kullanım: sudo ./kur.sh [hedef kök dizini]   (imaj hazırlarken ör. /mnt/imaj; varsayılan /)
+        set -e
+        HERE=$(cd "$(dirname "$0")" && pwd)
+        ROOT="${{1:-/}}"
+        ROOT="${{ROOT%/}}"
+
+        [ "$(id -u)" -eq 0 ] || {{ echo "Kurulum root yetkisi gerektirir."; exit 1; }}
+        (cd "$HERE" && sha256sum --quiet -c SHA256SUMS) || {{ echo "Paket bozuk: özetler tutmuyor."; exit 1; }}
+        {{check_base}}
+        # Dosya önce yanına yazılır, sonra rename ile yerine konur; okuyan yarım dosya görmez
+        yerlestir() {{
+            install -D -m "$1" "$2" "$3.paket.$$"
+            mv -f "$3.paket.$$" "$3"
+        }}
+
+        {{body}}
+
+        # Önceki paketlerden gelip artık dönemde olmayanlar dışındaki resimler yerinde olmalı
+        for name in {expected}; do
+            [ -f "$ROOT{CACHE_DIR}/$name" ] || echo "UYARI: önbellekte yok, tahta sunucudan indirecek: $name"
+        done
+        mkdir -p "$ROOT{os.path.dirname(INSTALLED_PATH)}"
+        install -m 0644 "$HERE/{PACKAGE_NAME}" "$ROOT{INSTALLED_PATH}"
+
+        # İmaj kökünde birimler ilk açılışta bağlantılarından etkinleşir; komutlar chroot içinde çalışır
+        RUN=()
+        [ -z "$ROOT" ] || RUN=(chroot "$ROOT")
+        if [ -z "$ROOT" ] && [ -d /run/systemd/system ]; then
+            systemctl daemon-reload
+        fi
+        if [ -d "$ROOT/etc/dconf/db/local.d" ]; then
+            "${{RUN[@]}}" dconf update || echo "UYARI: dconf update çalıştırılamadı; ilk açılışta yeniden deneyin."
+        fi
+        {system_step}
+        echo "Paket {package["paket"]} kuruldu; birimler bir sonraki açılışta başlar."
+    """).strip().replace("{check_base}", check_base.strip()).replace("{body}", "\n".join(lines)) + "\n"
+
+
+def add_bytes(tar, name, data, mode, mtime):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mode = mode
+    info.mtime = mtime
+    info.uname = info.gname = "root"
+    tar.addfile(info, io.BytesIO(data))
+
+
+def root_file(info):
+    """tar.add süzgeci: diskten eklenen resim, add_bytes'takiler gibi root'a ait ve 0644 olur."""
+    info.mode = 0o644
+    info.uid = info.gid = 0
+    info.uname = info.gname = "root"
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Kurulum dosyalarını ve dönemin resimlerini çevrimdışı kurulabilen tek pakete koyar.",
+        epilog="'--' sonrasındaki seçenekler etap_arkaplan_kurulum.py'ninkilerdir (ör. -- nfs --sunucu ...)."
+    )
+    parser.add_argument("--kaynak", required=True,
+                        help="Resimlerin, manifest.json ve takvim.json'un bulunduğu paylaşım dizini")
+    parser.add_argument("--cikti", default=".", help="Paketin yazılacağı dizin (varsayılan: .)")
+    parser.add_argument("--surum", default=time.strftime("%Y%m%d%H%M"),
+                        help="Paket sürümü (varsayılan: tarih ve saat)")
+    parser.add_argument("--baslangic", type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="Dönemin ilk günü, YYYY-AA-GG (varsayılan: bugün)")
+    parser.add_argument("--gun", type=etap_arkaplan_kurulum.non_negative_int,
+                        help=f"Dönemin gün sayısı (varsayılan: takvimin sonuna kadar, takvim yoksa {TERM_DAYS})")
+    parser.add_argument("--cozunurluk", default="",
+                        help="Tahtaların ekran çözünürlüğü, GENxYÜK; verilirse uygun varyant konur")
+    parser.add_argument("--onceki", metavar="PAKET",
+                        help="Önceki paket; verilirse yalnızca değişen resimleri içeren fark paketi üretilir")
+    parser.add_argument("kurulum", nargs=argparse.REMAINDER,
+                        help="etap_arkaplan_kurulum.py seçenekleri")
+    args = parser.parse_args()
+
+    install_argv = args.kurulum[1:] if args.kurulum[:1] == ["--"] else args.kurulum
+    if not install_argv:
+        parser.error("kurulum seçenekleri gerekli (ör. -- nfs --sunucu ...)")
+    if args.cozunurluk and not re.fullmatch(r"\d+x\d+", args.cozunurluk):
+        parser.error(f"çözünürlük GENxYÜK biçiminde olmalı: {args.cozunurluk}")
+    if not os.path.isdir(args.kaynak):
+        raise SystemExit(f"Dizin bulunamadı: {args.kaynak}")
+    install_args = etap_arkaplan_kurulum.parse_args(install_argv)
+    installer = etap_arkaplan_kurulum.installer_from_args(install_args)
+    installer.log = lambda message: None
+
+    previous = None
+    if args.onceki:
+        try:
+            with tarfile.open(args.onceki) as tar:
+                member = next(m for m in tar.getmembers() if os.path.basename(m.name) == PACKAGE_NAME)
+                previous = json.load(tar.extractfile(member))
+        except (OSError, tarfile.TarError, StopIteration, ValueError) as e:
+            raise SystemExit(f"Önceki paket okunamadı: {args.onceki} ({e})")
+
+    # Dönemin resimleri
+    schedule_path = os.path.join(args.kaynak, SCHEDULE_NAME)
+    schedule = None
+    if os.path.exists(schedule_path):
+        with open(schedule_path, encoding="utf-8") as f:
+            schedule = json.load(f)
+    days = args.gun
+    if days is None:
+        if schedule is not None:
+            end = datetime.date.fromisoformat(schedule["baslangic"]) + datetime.timedelta(days=schedule["gun"])
+            days = max((end - args.baslangic).days, 0)
+        else:
+            days = TERM_DAYS
+    names = term_names(schedule, installer.school, args.baslangic, days)
+    images, missing = collect_images(args.kaynak, names, args.cozunurluk)
+    for name in missing:
+        print(f"UYARI: paylaşımda yok, pakete konmadı: {name}")
+
+    old_images = previous["resimler"] if previous else {}
+    new_images = {name: image for name, image in images.items()
+                  if old_images.get(name, {}).get("sha256") != image["sha256"]}
+    removed_images = sorted(set(old_images) - set(images))
+
+    files, remove = installer.desired_state(existing_only=False)
+    if previous:
+        remove = sorted(set(remove) | (set(previous["dosyalar"]) - set(files)))
+    links = unit_links(files)
+    label = installer.school or install_args.tur
+    delta = f"-fark-{previous['paket']}" if previous else ""
+    top = f"etap-arka-plan-{label}-{args.surum}{delta}"
+    mtime = int(time.time())
+
+    package = {
+        "surum": PACKAGE_VERSION,
+        "paket": args.surum,
+        "temel": previous["paket"] if previous else None,
+        "etiket": label,
+        "olusturma": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "tur": install_args.tur,
+        "aynalar": installer.mirrors,
+        "donem": {"baslangic": args.baslangic.isoformat(), "gun": days},
+        "cozunurluk": args.cozunurluk,
+        "dosyalar": {path: {"kip": f"{mode:04o}", "sha256": hashlib.sha256(content.encode("utf-8")).hexdigest()}
+                     for path, (content, mode) in files.items()},
+        "resimler": {name: {"ad": image["ad"], "boyut": image["boyut"], "sha256": image["sha256"]}
+                     for name, image in images.items()},
+        "eklenen": sorted(new_images),
+        "silinen": sorted(removed_images),
+    }
+    script = render_install_script(package, files, links, remove, sorted(new_images), removed_images,
+                                   installer.mirror_mount_points(), schedule is not None)
+
+    os.makedirs(args.cikti, exist_ok=True)
+    output = os.path.join(args.cikti, top + ".tar.gz")
+    sums = []
+    tmp = output + ".tmp"
+    # CIFS mount birimi parolayı içerir: paket yalnızca sahibince okunabilir
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with os.fdopen(fd, "wb") as raw, tarfile.open(fileobj=raw, mode="w:gz") as tar:
+            for path, (content, mode) in files.items():
+                data = content.encode("utf-8")
+                add_bytes(tar, f"{top}/dosyalar{path}", data, mode, mtime)
+                sums.append(f"{hashlib.sha256(data).hexdigest()}  dosyalar{path}")
+            for name, image in new_images.items():
+                tar.add(image["kaynak"], f"{top}/onbellek/{name}", filter=root_file)
+                sums.append(f"{image['sha256']}  onbellek/{name}")
+            if schedule is not None:
+                with open(schedule_path, "rb") as f:
+                    data = f.read()
+                add_bytes(tar, f"{top}/onbellek/{SCHEDULE_NAME}", data, 0o644, mtime)
+                sums.append(f"{hashlib.sha256(data).hexdigest()}  onbellek/{SCHEDULE_NAME}")
+            add_bytes(tar, f"{top}/{PACKAGE_NAME}",
+                      (json.dumps(package, ensure_ascii=False, indent=1) + "\n").encode("utf-8"), 0o644, mtime)
+            add_bytes(tar, f"{top}/SHA256SUMS", ("\n".join(sums) + "\n").encode("utf-8"), 0o644, mtime)
+            add_bytes(tar, f"{top}/kur.sh", script.encode("utf-8"), 0o755, mtime)
+        os.replace(tmp, output)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    if install_args.tur == "cifs":
+        print("UYARI: paketteki mount birimi paylaşım parolasını içerir; paketi yalnızca kurulum ortamında saklayın.")
+    image_bytes = sum(image["boyut"] for image in new_images.values())
+    print(f"{output}: {len(files)} dosya, {len(new_images)}/{len(images)} resim "
+          f"({image_bytes / 1048576:.1f} MB), {len(removed_images)} silinecek resim, "
+          f"{os.path.getsize(output) / 1048576:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
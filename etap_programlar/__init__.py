@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tahtaya kurulan Python programlarının kaynakları. Her modül tek başına çalışan bir
+programdır: etap_arkaplan_kurulum.py başlarındaki ayarları doldurup dosya olarak kurar
+(ajan, es_sunucu, coklu_yayin_alici) veya önbellek kitaplığına gömer (diğerleri).
+Sınamalar için paket olarak da içe aktarılabilir.
+"""
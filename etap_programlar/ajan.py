@@ -0,0 +1,407 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+ETAP haftalık arka plan oturum ajanı. Oturum boyunca çalışır: günün resmini (takvim
+yoksa haftanın resmini) önbellekten hemen uygular, önbellekte yoksa arka planda süre
+sınırıyla indirtir. Bekleme sırasında yoklama yapmaz; yalnızca önbellek dizinindeki
+değişiklikte (inotify), gün sınırında ve uykudan uyanınca (logind D-Bus sinyali) uyanır.
+
+Kurulum bu dosyayı başındaki ayarları doldurarak /usr/local/bin/etap-arka-plan-ajani
+olarak yazar (Installer.render_agent).
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+import socket
+import stat
+import subprocess
+import sys
+import time
+
+try:
+    import gi
+    gi.require_version("Gio", "2.0")
+    from gi.repository import Gio, GLib
+except (ImportError, ValueError):
+    # Sınamalar gi olmadan da içe aktarabilsin; ajan main() içinde durur
+    Gio = GLib = None
+
+# Kurulumun doldurduğu ayarlar (Installer.render_agent)
+CACHE_DIR = "/var/cache/etap-arka-plan"
+LIB_PATH = "/usr/local/lib/etap-arka-plan/onbellek.sh"
+LOGIN_FETCH_WINDOW = 60
+LOGIN_REFRESH_TIMEOUT = 300
+EVENT_SCHOOL = ""
+EVENTS_JOURNALD = False
+JOURNAL_SOCKET = "/run/systemd/journal/socket"
+SCHEDULE_NAME = "takvim.json"
+IMAGE_NAME_PATTERN = "week[0-9]{2}|[0-9]{4}-[0-9]{2}-[0-9]{2}|[a-z][a-z0-9_]*"
+CACHE_KEY_PATTERN = "[0-9a-f]{16}|[0-9]+-[0-9]+"
+
+SCHEMA = "org.cinnamon.desktop.background"
+LOCAL_DIR = os.path.expanduser("~/.local/share/backgrounds")
+# <ad>-<anahtar>.jpg; anahtar manifest özetinin ilk 16 hanesi veya boyut-mtime
+CACHED_NAME = re.compile(r"^(%s)-(%s)\.jpg$" % (IMAGE_NAME_PATTERN, CACHE_KEY_PATTERN))
+
+
+def current_week():
+    """ISO hafta numarası (01-53), `date +%V` ile aynı."""
+    return "%02d" % datetime.date.today().isocalendar()[1]
+
+
+def seconds_until_tomorrow():
+    """Yarın 00:00'a kadar kalan saniye."""
+    now = datetime.datetime.now()
+    midnight = (now + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return int((midnight - now).total_seconds()) + 1
+
+
+def machine_delay(window):
+    """Kitaplıktaki makine_gecikmesi() ile aynı hesap: 0x<machine-id ilk 8 hane> % pencere."""
+    try:
+        with open("/etc/machine-id", encoding="utf-8") as f:
+            return int(f.read().strip()[:8], 16) % window if window > 0 else 0
+    except (OSError, ValueError):
+        return 0
+
+
+def parent_uptime_ms():
+    """Ajanı başlatan oturum yöneticisinin açılıştan beri başlama anı (ms)."""
+    try:
+        with open("/proc/%d/stat" % os.getppid(), encoding="utf-8") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return int(fields[19]) * 1000 // os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def uptime_ms():
+    with open("/proc/uptime", encoding="utf-8") as f:
+        return int(float(f.read().split()[0]) * 1000)
+
+
+class Agent:
+    def __init__(self, cache_dir, dry_run=False):
+        self.cache_dir = cache_dir
+        # Oturumun indirdiği resimlerin dizini (kitaplıktaki IMAGE_DIR); root için ortak önbellek
+        self.image_dir = cache_dir if os.getuid() == 0 else os.path.join(
+            os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "etap-arka-plan")
+        self.dry_run = dry_run
+        self.metrics_file = os.path.join(cache_dir, ".oturum-olcumleri.%d" % os.getuid())
+        self.events_file = os.path.join(cache_dir, ".olaylar.%d.jsonl" % os.getuid())
+        self.started = time.monotonic()
+        self.session_start_ms = parent_uptime_ms()
+        self.schedule_file = os.path.join(cache_dir, SCHEDULE_NAME)
+        self.schedule = None
+        self.digests = {}
+        self.applied = None
+        self.fetching = None
+        self.fetch_started = None
+        self.day_timer = 0
+        self.monitors = []
+        self.system_bus = None
+
+        self.settings = None
+        source = Gio.SettingsSchemaSource.get_default() if Gio is not None else None
+        if source is not None and source.lookup(SCHEMA, True) is not None:
+            self.settings = Gio.Settings.new(SCHEMA)
+
+    def record(self, event):
+        """Oturum ölçümü: tarih, hafta, olay, oturum açılışından ve ajanın başlangıcından geçen ms."""
+        now = uptime_ms()
+        session_ms = now - self.session_start_ms if self.session_start_ms is not None else 0
+        agent_ms = int((time.monotonic() - self.started) * 1000)
+        line = "\t".join([time.strftime("%Y-%m-%d %H:%M:%S"), current_week(), event,
+                          str(session_ms), str(agent_ms)])
+        try:
+            with open(self.metrics_file, "a", encoding="utf-8") as f:
+                f.write(line + os.linesep)
+        except OSError:
+            pass
+        result = {"yok": "yok", "yenileme-yok": "yok", "yenileme-hata": "hata"}.get(event, "tamam")
+        self.event("oturum", session_ms, result, ayrinti=event, ajan_ms=agent_ms)
+
+    def event(self, stage, elapsed_ms, result="tamam", **fields):
+        """Kurulum ve kitaplıkla aynı biçimde olay satırı (.olaylar.<uid>.jsonl); seçiliyse journald'ye de."""
+        event = {
+            "zaman": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "makine": socket.gethostname(),
+            "okul": EVENT_SCHOOL,
+            "kaynak": "ajan",
+            "asama": stage,
+            "sure_ms": round(elapsed_ms),
+            "sonuc": result,
+        }
+        event.update(fields)
+        try:
+            with open(self.events_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+        if EVENTS_JOURNALD:
+            lines = ["MESSAGE=%s: %s ms (%s)" % (stage, event["sure_ms"], result),
+                     "SYSLOG_IDENTIFIER=etap-arka-plan"]
+            lines += ["ETAP_%s=%s" % (key.upper(), value) for key, value in event.items() if key != "zaman"]
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+                    sock.sendto(("\n".join(lines) + "\n").encode("utf-8"), JOURNAL_SOCKET)
+            except OSError:
+                pass
+
+    def load_schedule(self):
+        """Önbellekteki derlenmiş takvimi okur; yalnızca başta ve dosya değişince çağrılır."""
+        try:
+            with open(self.schedule_file, encoding="utf-8") as f:
+                schedule = json.load(f)
+            schedule["ilk_gun"] = datetime.date.fromisoformat(schedule["baslangic"])
+            schedule["arama"] = [schedule["katmanlar"].get(key) for key in
+                                 ("", "okul:" + EVENT_SCHOOL, "makine:" + socket.gethostname())]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            schedule = None
+        self.schedule = schedule
+
+    def todays_image(self):
+        """
+        Bugünün resim adı. Takvimde (etap_takvim_derle.resolve ile aynı arama) katman başına
+        tek dizi erişimidir; takvim yoksa veya bugün takvim dışındaysa ISO haftasının resmi.
+        """
+        today = datetime.date.today()
+        if self.schedule is not None:
+            i = (today - self.schedule["ilk_gun"]).days
+            try:
+                if 0 <= i < self.schedule["gun"]:
+                    best = None
+                    for layer in self.schedule["arama"]:
+                        if layer and layer["resim"][i] >= 0 and \
+                                (best is None or layer["oncelik"][i] >= best[0]):
+                            best = (layer["oncelik"][i], layer["resim"][i])
+                    if best:
+                        return self.schedule["resimler"][best[1]]
+            except (IndexError, KeyError, TypeError):
+                pass
+        return "week" + current_week()
+
+    def cached_image(self, name=None):
+        """
+        Önbellekteki `name` resminin (verilmezse herhangi bir resmin) kullanılabilecek en yeni
+        sürümü; yalnızca yerel diske bakılır. Ortak önbelleğe herkes yazabildiğinden orada yalnızca
+        root'un, oturumun kendi dizininde bu kullanıcının dosyaları, adındaki anahtar içeriğiyle
+        tutuyorsa seçilir (kitaplıktaki onbellekteki_resim ile aynı kural).
+        """
+        candidates = []
+        # Önbellek oturumun kendi dizini de olabilir (ölçümler): orada bu kullanıcının dosyaları
+        directories = {self.image_dir: os.getuid()}
+        directories.setdefault(self.cache_dir, 0)
+        for directory, owner in directories.items():
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                match = CACHED_NAME.match(entry.name)
+                if not match or (name is not None and match.group(1) != name):
+                    continue
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode) and st.st_uid == owner:
+                    candidates.append((st.st_mtime, entry.path, match.group(2), st))
+        for _, path, key, st in sorted(candidates, key=lambda c: c[0], reverse=True):
+            if self.key_matches(path, key, st):
+                return path
+        return None
+
+    def key_matches(self, path, key, st):
+        """Boyut-mtime anahtarında boyut, özet anahtarında içerik tutuyor mu; özet dosya değişmedikçe yeniden hesaplanmaz."""
+        if "-" in key:
+            return int(key.split("-", 1)[0]) == st.st_size
+        digest_key = (path, st.st_size, st.st_mtime_ns)
+        digest = self.digests.get(digest_key)
+        if digest is None:
+            h = hashlib.sha256()
+            try:
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(65536), b""):
+                        h.update(chunk)
+            except OSError:
+                return False
+            digest = self.digests[digest_key] = h.hexdigest()
+        return digest.startswith(key)
+
+    def apply(self, image):
+        """
+        Resmi kullanıcının arka plan dizinine bağlar ve Cinnamon anahtarlarını tek seferde yazar.
+        Yerel ad önbellekteki adın "etap-" önekli hâlidir: resim değişince adres de değişir.
+        """
+        start = time.monotonic()
+        os.makedirs(LOCAL_DIR, exist_ok=True)
+        local = os.path.join(LOCAL_DIR, "etap-" + os.path.basename(image))
+        if not (os.path.exists(local) and os.path.samefile(image, local)):
+            if os.path.lexists(local):
+                os.remove(local)
+            # Özel kopya yerine hardlink; engellenirse reflink (desteklenmiyorsa yerel kopya)
+            try:
+                os.link(image, local)
+            except OSError:
+                subprocess.run(["cp", "--reflink=auto", image, local], check=False)
+
+        uri = GLib.filename_to_uri(local, None)
+        if self.dry_run:
+            print("Uygulanacak: " + uri, flush=True)
+        elif self.settings is not None:
+            if not self.settings.is_writable("picture-uri"):
+                print("UYARI: picture-uri anahtarı kilitli, arka plan değiştirilemedi.", flush=True)
+            self.settings.delay()
+            self.settings.set_string("picture-uri", uri)
+            self.settings.set_string("picture-options", "scaled")
+            self.settings.apply()
+            Gio.Settings.sync()
+        else:
+            subprocess.run(["dconf", "write", "/org/cinnamon/desktop/background/picture-uri",
+                            "'" + uri + "'"], check=False)
+            subprocess.run(["dconf", "write", "/org/cinnamon/desktop/background/picture-options",
+                            "'scaled'"], check=False)
+
+        # Önceki sürümlerin adları week ile başlar; kullanıcının kendi resimlerine dokunulmaz
+        for name in os.listdir(LOCAL_DIR):
+            if name.startswith(("etap-", "week")) and name.endswith(".jpg") \
+                    and name != os.path.basename(local):
+                try:
+                    os.remove(os.path.join(LOCAL_DIR, name))
+                except OSError:
+                    pass
+        self.applied = image
+        self.event("arka-plan-uygulama", (time.monotonic() - start) * 1000,
+                   resim=os.path.basename(image))
+
+    def refresh(self, event):
+        """
+        Günün resmini önbellekten uygular. Önbellekte yoksa ve henüz hiçbir resim
+        uygulanmadıysa önbellekteki en yeni (son geçerli) resmi uygular ve indirmeyi başlatır.
+        """
+        name = self.todays_image()
+        image = self.cached_image(name)
+        if image is not None:
+            if image != self.applied:
+                self.apply(image)
+                self.record(event)
+            return
+
+        if self.applied is None:
+            fallback = self.cached_image()
+            if fallback is not None:
+                self.apply(fallback)
+                self.record("son-gecerli")
+            else:
+                self.record("yok")
+        self.start_fetch(name)
+
+    def start_fetch(self, name):
+        """Sunucuya tüm tahtalarla aynı anda değil, makineye özgü gecikmeyle gidilir."""
+        if self.fetching == name:
+            return
+        self.fetching = name
+        GLib.timeout_add_seconds(machine_delay(LOGIN_FETCH_WINDOW), self.spawn_fetch, name)
+
+    def spawn_fetch(self, name):
+        # Sonuç (yeni önbellek dosyası) dizin izleyicisi tarafından fark edilir
+        argv = ["timeout", "-s", "KILL", str(LOGIN_REFRESH_TIMEOUT), "bash", "-c",
+                'EVENT_SOURCE=ajan; . "$1" && onbellege_al "$2" >/dev/null && onbellegi_temizle',
+                "_", LIB_PATH, name]
+        try:
+            pid = GLib.spawn_async(argv, flags=GLib.SpawnFlags.SEARCH_PATH |
+                                   GLib.SpawnFlags.DO_NOT_REAP_CHILD)[0]
+        except GLib.Error as e:
+            print("UYARI: önbellek yenilemesi başlatılamadı: " + e.message, flush=True)
+            self.fetching = None
+            return GLib.SOURCE_REMOVE
+        self.fetch_started = time.monotonic()
+        GLib.child_watch_add(GLib.PRIORITY_DEFAULT, pid, self.on_fetch_done, name)
+        return GLib.SOURCE_REMOVE
+
+    def on_fetch_done(self, pid, status, name):
+        self.fetching = None
+        GLib.spawn_close_pid(pid)
+        code = os.waitstatus_to_exitcode(status)
+        self.event("yenileme", (time.monotonic() - self.fetch_started) * 1000,
+                   {0: "tamam", 2: "yok"}.get(code, "hata"), resim=name)
+        if code == 2:
+            print("Bugüne ait arka plan bulunamadı: %s.jpg" % name, flush=True)
+            self.record("yenileme-yok")
+        elif code != 0:
+            # Yeniden deneme zamanlayıcıya bırakılır; gelen resim dizin izleyicisiyle uygulanır
+            self.record("yenileme-hata")
+        else:
+            self.refresh("yenileme")
+
+    def on_cache_changed(self, monitor, changed, other, event_type):
+        for item in (changed, other):
+            name = item.get_basename() if item is not None else ""
+            if name == SCHEDULE_NAME:
+                self.load_schedule()
+                self.refresh("yenileme")
+                return
+            if name.endswith(".jpg") and not name.startswith("."):
+                self.refresh("yenileme")
+                return
+
+    def schedule_day_change(self):
+        if self.day_timer:
+            GLib.source_remove(self.day_timer)
+        self.day_timer = GLib.timeout_add_seconds(seconds_until_tomorrow(), self.on_day_change)
+
+    def on_day_change(self):
+        self.day_timer = 0
+        self.refresh("yeni-gun")
+        self.schedule_day_change()
+        return GLib.SOURCE_REMOVE
+
+    def on_prepare_for_sleep(self, connection, sender, path, interface, signal, parameters):
+        # Uykudayken tekdüze saat ilerlemez: uyanınca gün sınırı yeniden hesaplanır
+        if not parameters.unpack()[0]:
+            self.refresh("yeni-gun")
+            self.schedule_day_change()
+
+    def run(self):
+        # Ortak önbellekteki ve oturumun kendi dizinindeki değişiklikler inotify ile izlenir
+        os.makedirs(self.image_dir, exist_ok=True)
+        for directory in dict.fromkeys((self.cache_dir, self.image_dir)):
+            monitor = Gio.File.new_for_path(directory).monitor_directory(Gio.FileMonitorFlags.WATCH_MOVES, None)
+            monitor.connect("changed", self.on_cache_changed)
+            self.monitors.append(monitor)
+
+        try:
+            self.system_bus = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+            self.system_bus.signal_subscribe(
+                "org.freedesktop.login1", "org.freedesktop.login1.Manager", "PrepareForSleep",
+                "/org/freedesktop/login1", None, Gio.DBusSignalFlags.NONE, self.on_prepare_for_sleep)
+        except GLib.Error:
+            self.system_bus = None
+
+        self.load_schedule()
+        self.refresh("bu-hafta")
+        self.schedule_day_change()
+        GLib.MainLoop().run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETAP haftalık arka plan oturum ajanı")
+    parser.add_argument("--onbellek-dizini", default=CACHE_DIR,
+                        help="Önbellek dizini (varsayılan: " + CACHE_DIR + ")")
+    parser.add_argument("--kuru", action="store_true",
+                        help="Arka planı değiştirme, yalnızca uygulanacak resmi yazdır (ölçüm için)")
+    args = parser.parse_args()
+    if Gio is None:
+        raise SystemExit("Ajan için python3-gi (Gio) gerekli.")
+    Agent(args.onbellek_dizini, args.kuru).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
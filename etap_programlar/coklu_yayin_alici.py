@@ -0,0 +1,277 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+ETAP haftalık arka plan çoklu yayın alıcısı. etap_coklu_yayin.py'nin gönderdiği
+resmi bloklar hâlinde toplar; her turun sonunda eksik blokları göndericiye NAK
+ile bildirir. Yalnızca yapılandırılmış sunucudan gelen veya adı ve özeti
+paylaşımdaki (HTTP kurulumunda root'un önbellekteki) manifestte bulunan aktarım
+kabul edilir. Resim tamamlanınca SHA-256 ile doğrulanır ve önbellekte
+.coklu-yayin.<ad>-<özet>.jpg olarak bekletilir; önbellek kitaplığı bunu manifest
+özetiyle yeniden doğrulayıp kendi önbellek dosyasına kopyalar. Ayrıcalıksız
+(DynamicUser) çalışır: başkalarının önbellek dosyalarına dokunamaz.
+
+Kurulum bu dosyayı başındaki ayarları doldurarak /usr/local/bin/etap-arka-plan-alici
+olarak yazar (Installer.render_multicast_receiver).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import struct
+import sys
+import threading
+import time
+
+# Kurulumun doldurduğu ayarlar (Installer.render_multicast_receiver): paket biçimi ve sınırlar
+# etap_arkaplan_kurulum'daki MULTICAST_* sabitleridir
+CACHE_DIR = "/var/cache/etap-arka-plan"
+MULTICAST_GROUP = "239.255.47.116"
+MULTICAST_PORT = 47116
+HEADER_FORMAT = "!4sBB16s32sIII"
+VERSION = 2
+BLOCK_SIZE = 1400
+MAX_SIZE = 64 * 1024 * 1024
+MAGIC = b"ETMC"
+IMAGE_NAME_PATTERN = "week[0-9]{2}|[0-9]{4}-[0-9]{2}-[0-9]{2}|[a-z][a-z0-9_]*"
+RECEIVED_PREFIX = ".coklu-yayin."
+NAK_RANGES = 150
+MAX_SESSIONS = 4
+MEMORY_LIMIT = 128 * 1024 * 1024
+# Aynaların bağlama noktaları ve sunucuları (--paylasim ve --sunucu varsayılanları)
+SHARES = []
+SERVERS = []
+EVENT_SCHOOL = ""
+
+HEADER = struct.Struct(HEADER_FORMAT)
+NAME = re.compile(r"^(%s)$" % IMAGE_NAME_PATTERN)
+DATA, END, NAK = 1, 2, 3
+# Tamamlanmayan aktarımların unutulma süresi (sn)
+SESSION_TTL = 600
+# Bilinmeyen bir aktarım manifestlerin en fazla bu aralıkla (sn) yeniden okunmasına yol açar;
+# takılan bir bağlama alıcıyı en fazla RELOAD_WAIT saniye bekletir
+RELOAD_INTERVAL = 10
+RELOAD_WAIT = 5
+
+class Session:
+    def __init__(self, name, sha, size, count):
+        self.name = name
+        self.sha = sha
+        self.data = bytearray(size)
+        self.count = count
+        self.missing = set(range(count))
+        self.started = time.monotonic()
+
+    def ranges(self):
+        """Eksik bloklar (başlangıç, adet) aralıkları olarak; en fazla NAK_RANGES aralık."""
+        result = []
+        for index in sorted(self.missing):
+            if result and result[-1][0] + result[-1][1] == index:
+                result[-1][1] += 1
+            elif len(result) == NAK_RANGES:
+                break
+            else:
+                result.append([index, 1])
+        return result
+
+
+class Trust:
+    """Kabul edilecek aktarımlar: sunucu adreslerinden gelenler ve manifestlerdeki (ad, özet, boyut)."""
+
+    def __init__(self, shares, state_file, servers):
+        self.shares = shares
+        self.state_file = state_file
+        self.servers = servers
+        self.addresses = set()
+        self.known = {}
+        self.loaded = None
+        self.loader = None
+
+    def read(self):
+        addresses = set()
+        for host in self.servers:
+            try:
+                addresses.update(info[4][0] for info in socket.getaddrinfo(host, None, socket.AF_INET))
+            except OSError:
+                pass
+        texts = []
+        for share in self.shares:
+            try:
+                with open(os.path.join(share, "manifest.json"), encoding="utf-8") as f:
+                    texts.append(f.read())
+            except (OSError, ValueError):
+                pass
+        # HTTP kurulumunda manifest gövdesi root'un durum dosyasındadır; başkasınınkine güvenilmez
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                if os.fstat(f.fileno()).st_uid == 0:
+                    for key, saved in json.load(f).items():
+                        if key.endswith("/manifest.json") and "govde" in saved:
+                            texts.append(saved["govde"])
+        except (OSError, ValueError, AttributeError, TypeError):
+            pass
+        known = {}
+        for text in texts:
+            try:
+                for name, entry in json.loads(text)["resimler"].items():
+                    for item in [entry, *entry.get("varyantlar", {}).values()]:
+                        known[(name, item["sha256"])] = int(item["boyut"])
+            except (ValueError, KeyError, AttributeError, TypeError):
+                continue
+        self.addresses, self.known = addresses, known
+
+    def reload(self):
+        """Manifestleri arka planda yeniden okur; en fazla RELOAD_WAIT saniye bekler."""
+        if self.loader is not None and self.loader.is_alive():
+            return
+        self.loaded = time.monotonic()
+        self.loader = threading.Thread(target=self.read, daemon=True)
+        self.loader.start()
+        self.loader.join(RELOAD_WAIT)
+
+    def accepts(self, name, sha, size, sender):
+        if sender in self.addresses or self.known.get((name, sha)) == size:
+            return True
+        if self.loaded is None or time.monotonic() - self.loaded >= RELOAD_INTERVAL:
+            self.reload()
+            return sender in self.addresses or self.known.get((name, sha)) == size
+        return False
+
+
+def received_path(cache_dir, name, sha):
+    return os.path.join(cache_dir, "%s%s-%s.jpg" % (RECEIVED_PREFIX, name, sha[:16]))
+
+
+def have(cache_dir, name, sha):
+    """Resim alıcıda bekliyor veya zamanlayıcı (root) onu zaten önbelleğe almış."""
+    if os.path.exists(received_path(cache_dir, name, sha)):
+        return True
+    try:
+        return os.stat(os.path.join(cache_dir, "%s-%s.jpg" % (name, sha[:16]))).st_uid == 0
+    except OSError:
+        return False
+
+
+def store(cache_dir, session):
+    """Doğrulanan resmi geçici dosyadan rename ile bekletilen yerine koyar, alıcının bu resim için
+    beklettiği eski sürümleri siler; önbelleğin asıl dosyalarına dokunmaz."""
+    if hashlib.sha256(session.data).hexdigest() != session.sha:
+        return False
+    target = received_path(cache_dir, session.name, session.sha)
+    tmp = os.path.join(cache_dir, "%s%s.%d.tmp" % (RECEIVED_PREFIX, session.name, os.getpid()))
+    with open(tmp, "wb") as f:
+        f.write(session.data)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, target)
+    prefix = "%s%s-" % (RECEIVED_PREFIX, session.name)
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith(prefix) and name.endswith(".jpg") and path != target:
+            try:
+                if os.stat(path).st_uid == os.getuid():
+                    os.remove(path)
+            except OSError:
+                pass
+    return True
+
+
+def record(cache_dir, elapsed_ms, result, session):
+    event = {
+        "zaman": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "makine": socket.gethostname(),
+        "okul": EVENT_SCHOOL,
+        "kaynak": "coklu-yayin",
+        "asama": "coklu-yayin-alma",
+        "sure_ms": round(elapsed_ms),
+        "sonuc": result,
+        "hafta": session.name,
+        "bayt": len(session.data),
+    }
+    try:
+        with open(os.path.join(cache_dir, ".olaylar.%d.jsonl" % os.getuid()), "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+    except OSError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Çoklu yayınla gönderilen arka plan resimlerini önbellekte bekletir.")
+    parser.add_argument("--onbellek-dizini", default=CACHE_DIR)
+    parser.add_argument("--grup", default=MULTICAST_GROUP)
+    parser.add_argument("--port", type=int, default=MULTICAST_PORT)
+    parser.add_argument("--arayuz-adresi", default="0.0.0.0",
+                        help="Gruba katılınacak arayüzün adresi (varsayılan: sistem seçer)")
+    parser.add_argument("--paylasim", action="append",
+                        help="Manifesti okunacak paylaşım dizini, birden fazla verilebilir "
+                             "(varsayılan: aynaların bağlama noktaları)")
+    parser.add_argument("--sunucu", action="append",
+                        help="Her aktarımı kabul edilen gönderici, birden fazla verilebilir "
+                             "(varsayılan: aynaların sunucuları)")
+    parser.add_argument("--kayip", type=float, default=0.0,
+                        help="Yalnızca ölçüm için: gelen veri bloklarının atılacak oranı")
+    args = parser.parse_args()
+
+    trust = Trust(SHARES if args.paylasim is None else args.paylasim,
+                  os.path.join(args.onbellek_dizini, ".http-durumu.0.json"),
+                  SERVERS if args.sunucu is None else args.sunucu)
+    trust.reload()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    sock.bind(("", args.port))
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                    socket.inet_aton(args.grup) + socket.inet_aton(args.arayuz_adresi))
+    print("Çoklu yayın alıcısı: %s:%d" % (args.grup, args.port), flush=True)
+
+    sessions = {}
+    while True:
+        packet, sender = sock.recvfrom(65536)
+        if len(packet) < HEADER.size:
+            continue
+        magic, version, kind, name, digest, size, index, count = HEADER.unpack_from(packet)
+        if magic != MAGIC or version != VERSION or kind not in (DATA, END):
+            continue
+        name, sha = name.rstrip(b"\0").decode("ascii", "replace"), digest.hex()
+        # Blok sayısı boyutla tutarlı değilse, ad geçersizse veya resim çok büyükse paket yok sayılır
+        if not NAME.match(name) or size > MAX_SIZE or count != -(-size // BLOCK_SIZE):
+            continue
+        if have(args.onbellek_dizini, name, sha):
+            continue
+
+        now = time.monotonic()
+        for key in [k for k, s in sessions.items() if now - s.started > SESSION_TTL]:
+            del sessions[key]
+        session = sessions.get(sha)
+        if session is None:
+            # Bellek ayrılmadan önce: aktarım sınırları ve göndericinin ya da manifestin onayı
+            if (len(sessions) >= MAX_SESSIONS
+                    or sum(len(s.data) for s in sessions.values()) + size > MEMORY_LIMIT
+                    or not trust.accepts(name, sha, size, sender[0])):
+                continue
+            session = sessions[sha] = Session(name, sha, size, count)
+
+        if kind == DATA:
+            if index in session.missing and random.random() >= args.kayip:
+                block = packet[HEADER.size:HEADER.size + BLOCK_SIZE]
+                session.data[index * BLOCK_SIZE:index * BLOCK_SIZE + len(block)] = block
+                session.missing.discard(index)
+        elif session.missing:
+            # Tur sonu: eksikler bildirilir (gönderici tüm NAK'leri birleştirip tek onarım turu yapar)
+            payload = b"".join(struct.pack("!II", start, length) for start, length in session.ranges())
+            sock.sendto(HEADER.pack(MAGIC, VERSION, NAK, name.encode("ascii"), digest, size, 0, count)
+                        + payload, sender)
+
+        if not session.missing:
+            del sessions[sha]
+            ok = store(args.onbellek_dizini, session)
+            record(args.onbellek_dizini, (time.monotonic() - session.started) * 1000,
+                   "tamam" if ok else "hata", session)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
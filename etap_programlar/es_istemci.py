@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+"""
+Resmi aynı ağdaki tahtalardan (eş dağıtımı, etap-arka-plan-es) ister. Eşlere UDP
+yayınıyla "ETAP-ES? <sha256>" sorulur; resmi tutan tahtalar HTTP portlarıyla yanıtlar.
+İlk yanıtlayanlardan sırayla indirilir; boyut ve SHA-256 tutmayan indirme atılır.
+Başarılıysa eşin adresini yazdırır.
+
+Önbellek kitaplığına PEER_PY olarak gömülür.
+Kullanım: python3 -c "$PEER_PY" <sha256> <boyut> <çıktı> <port> <yayın adresi> <bekleme sn>
+Çıkış: 0 alındı, 1 indirilemedi, 2 eş yok.
+"""
+
+import hashlib
+import http.client
+import socket
+import sys
+import time
+
+# Yanıtı beklenen en fazla eş
+MAX_PEERS = 3
+
+
+def query(sha, port, broadcast, wait):
+    """Resmi tutan eşlerin (adres, HTTP portu) listesi, yanıt sırasıyla."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    sock.sendto(("ETAP-ES? " + sha).encode("ascii"), (broadcast, port))
+    peers = []
+    deadline = time.monotonic() + wait
+    while len(peers) < MAX_PEERS and time.monotonic() < deadline:
+        sock.settimeout(max(0.01, deadline - time.monotonic()))
+        try:
+            data, addr = sock.recvfrom(512)
+            tag, answer, http_port = data.decode("ascii").split()
+            if tag == "ETAP-ES!" and answer == sha:
+                peers.append((addr[0], int(http_port)))
+        except socket.timeout:
+            break
+        except (UnicodeDecodeError, ValueError):
+            continue
+    sock.close()
+    return peers
+
+
+def download(peers, sha, size, out):
+    """Resmi eşlerden sırayla `out`'a indirir; boyutu ve özeti tutan ilk eşin adresi veya None."""
+    for host, http_port in peers:
+        try:
+            conn = http.client.HTTPConnection(host, http_port, timeout=10)
+            conn.request("GET", "/" + sha)
+            response = conn.getresponse()
+            if response.status != 200:
+                continue
+            digest = hashlib.sha256()
+            received = 0
+            with open(out, "wb") as f:
+                while True:
+                    chunk = response.read(65536)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+                    received += len(chunk)
+            if received == size and digest.hexdigest() == sha:
+                return host
+        except (OSError, http.client.HTTPException):
+            continue
+    return None
+
+
+def main(argv=None):
+    sha, size, out, port, broadcast, wait = (sys.argv[1:] if argv is None else argv)[:6]
+    peers = query(sha, int(port), broadcast, float(wait))
+    if not peers:
+        return 2
+    host = download(peers, sha, int(size), out)
+    if host is None:
+        return 1
+    print(host)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+ETAP haftalık arka plan eş dağıtımı. Aynı ağdaki tahtaların "ETAP-ES? <sha256>"
+yayınlarına, önbellekte o özetli resim varsa HTTP portuyla yanıt verir ve resmi
+GET /<sha256> ile sunar. Yalnızca manifest özetiyle adlandırılmış (indirilirken
+doğrulanmış) resimler sunulur; alan tahta da indirdiğini özetle doğrular.
+
+Kurulum bu dosyayı başındaki ayarları doldurarak /usr/local/bin/etap-arka-plan-es
+olarak yazar (Installer.render_peer).
+"""
+
+import argparse
+import hashlib
+import http.server
+import os
+import re
+import socket
+import sys
+import threading
+
+# Kurulumun doldurduğu ayarlar (Installer.render_peer)
+CACHE_DIR = "/var/cache/etap-arka-plan"
+PEER_PORT = 47115
+PEER_MAX_UPLOADS = 4
+
+# Manifestli indirmede önbellek anahtarı özetin ilk 16 hanesidir
+CACHED_NAME = re.compile(r"^[0-9a-z_-]+-([0-9a-f]{16})\.jpg$")
+
+
+class Cache:
+    def __init__(self, directory):
+        self.directory = directory
+        self.digests = {}
+        self.lock = threading.Lock()
+
+    def find(self, sha):
+        """Özeti `sha` olan önbellek dosyasının yolu veya None; özet dosya değişmedikçe yeniden hesaplanmaz."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return None
+        for name in names:
+            match = CACHED_NAME.match(name)
+            if not match or not sha.startswith(match.group(1)):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+                key = (name, st.st_size, st.st_mtime_ns)
+                with self.lock:
+                    digest = self.digests.get(key)
+                if digest is None:
+                    h = hashlib.sha256()
+                    with open(path, "rb") as f:
+                        for chunk in iter(lambda: f.read(65536), b""):
+                            h.update(chunk)
+                    digest = h.hexdigest()
+                    with self.lock:
+                        self.digests[key] = digest
+            except OSError:
+                continue
+            if digest == sha:
+                return path
+        return None
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.server.cache.find(self.path.lstrip("/"))
+        if path is None:
+            self.send_error(404)
+            return
+        # Aynı anda en fazla PEER_MAX_UPLOADS gönderim; fazlası başka eşe veya sunucuya gider
+        if not self.server.uploads.acquire(blocking=False):
+            self.send_error(503)
+            return
+        try:
+            with open(path, "rb") as f:
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+                self.end_headers()
+                for chunk in iter(lambda: f.read(65536), b""):
+                    self.wfile.write(chunk)
+        except OSError:
+            pass
+        finally:
+            self.server.uploads.release()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def answer_queries(server, sock):
+    """Yayınla gelen sorulara, resim varsa ve gönderim sınırı dolmamışsa HTTP portuyla yanıt verir."""
+    reply = "ETAP-ES! %s " + str(server.server_address[1])
+    while True:
+        data, addr = sock.recvfrom(512)
+        try:
+            tag, sha = data.decode("ascii").split()
+        except (UnicodeDecodeError, ValueError):
+            continue
+        if tag != "ETAP-ES?" or not server.uploads.acquire(blocking=False):
+            continue
+        server.uploads.release()
+        if server.cache.find(sha) is not None:
+            sock.sendto((reply % sha).encode("ascii"), addr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Önbellekteki arka plan resimlerini aynı ağdaki tahtalara sunar.")
+    parser.add_argument("--onbellek-dizini", default=CACHE_DIR)
+    parser.add_argument("--port", type=int, default=PEER_PORT, help="Sorgu (UDP) portu")
+    parser.add_argument("--http-portu", type=int, default=PEER_PORT,
+                        help="İndirme (HTTP) portu; 0 boş bir port seçer")
+    args = parser.parse_args()
+
+    server = http.server.ThreadingHTTPServer(("", args.http_portu), Handler)
+    server.cache = Cache(args.onbellek_dizini)
+    server.uploads = threading.BoundedSemaphore(PEER_MAX_UPLOADS)
+    # Sorgu soketi hazır satırından önce bağlanır: satırı bekleyen (yük testi) ilk soruyu kaçırmaz
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    # Aynı makinede birden fazla eş (yük testi) aynı portu dinleyebilsin
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("", args.port))
+    threading.Thread(target=answer_queries, args=(server, sock), daemon=True).start()
+    print("Eş dağıtımı: UDP %d, HTTP %d" % (args.port, server.server_address[1]), flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
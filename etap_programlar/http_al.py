@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+
+"""
+HTTP aynasından okuyan istemci: bir çalıştırmadaki tüm istekler tek kalıcı (keep-alive)
+bağlantıdan gider. Manifest, takvim ve manifestsiz paylaşımda resmin kendisi
+If-None-Match / If-Modified-Since ile koşullu istenir: değişmeyen dosya için sunucu
+gövdesiz 304 döner. Doğrulayıcılar ve manifest gövdesi durum dosyasında tutulur. Resim
+FETCH_PY gibi parça parça kısmi dosyaya yazılır, kesilen indirme Range ile son
+tamamlanan parçadan sürer.
+
+Önbellek kitaplığına HTTP_PY olarak gömülür.
+Kullanım: python3 -c "$HTTP_PY" yokla <adres> <zaman aşımı>
+            çıkış: 0 sunucu yanıt verdi, 1 vermedi
+          python3 -c "$HTTP_PY" dosya <adres> <zaman aşımı> <ad> <çıktı> <yerel kopya> <durum dosyası>
+            çıkış: 0 alındı, 1 hata, 2 sunucuda yok, 4 değişmedi (304)
+          python3 -c "$HTTP_PY" resim <adres> <zaman aşımı> <ad> <ekran> <önbellek> <resim dizini>
+                                <durum dosyası> <sunucu adı> <parça> <sürdür 0/1> <önce eşler 0/1>
+                                <önce çoklu yayın 0/1>
+            "olay ..." (olay_yaz alanları), "hiz <bayt> <ms>", "yol <önbellek yolu> [<kısmi dosya>]"
+            veya "es <sha256> <boyut> <önbellek yolu>" satırları yazdırır;
+            çıkış: 0 tamam, 1 geçici hata, 2 resim yok, 5 önce yerel kaynaklar (çoklu yayın, eşler) denensin
+"""
+
+import email.utils
+import hashlib
+import http.client
+import json
+import os
+import stat
+import sys
+import time
+import urllib.parse
+
+# Kurulumun doldurduğu ayar: çoklu yayın alıcısının önbellekte beklettiği resimlerin öneki
+RECEIVED_PREFIX = ".coklu-yayin."
+
+
+class Connection:
+    """Aynaya tek kalıcı bağlantı; sunucu boştaki bağlantıyı kapattıysa bir kez yeniden bağlanılır."""
+
+    def __init__(self, base, timeout):
+        self.url = urllib.parse.urlsplit(base)
+        self.timeout = timeout
+        self.conn = None
+
+    def request(self, method, name, headers):
+        for attempt in (0, 1):
+            if self.conn is None:
+                cls = http.client.HTTPSConnection if self.url.scheme == "https" else http.client.HTTPConnection
+                self.conn = cls(self.url.hostname, self.url.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, self.url.path + "/" + name, headers=headers)
+                return self.conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def load_state(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def cached_copy(cache_dir, image_dir, filename):
+    """
+    Resmin güvenilir kopyası: ortak önbellekte root'un (zamanlayıcı), yoksa `image_dir`'de bu
+    kullanıcının yazdığı dosya (kitaplıktaki guvenilir_dosya ile aynı kural); yoksa None.
+    """
+    for directory, owner in ((cache_dir, 0), (image_dir, os.getuid())):
+        path = os.path.join(directory, filename)
+        try:
+            st = os.lstat(path)
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode) and st.st_uid == owner:
+            return path
+    return None
+
+
+def save_state(path, state):
+    tmp = "%s.%d" % (path, os.getpid())
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def conditional(saved):
+    headers = {}
+    if saved.get("etag"):
+        headers["If-None-Match"] = saved["etag"]
+    if saved.get("tarih"):
+        headers["If-Modified-Since"] = saved["tarih"]
+    return headers
+
+
+def validators(response):
+    return {"etag": response.getheader("ETag"), "tarih": response.getheader("Last-Modified")}
+
+
+def event(stage, start, result, **fields):
+    print("olay", stage, round((time.monotonic() - start) * 1000), result,
+          *("%s=%s" % item for item in fields.items() if item[1] is not None), flush=True)
+
+
+def select_variant(entry, resolution):
+    """MANIFEST_PY ile aynı seçim: ekranı kaplayan en küçük varyant, yoksa ana resim."""
+    try:
+        width, height = (int(v) for v in resolution.split("x"))
+        fits = []
+        for variant in entry.get("varyantlar", {}):
+            w, h = (int(v) for v in variant.split("x"))
+            if w >= width and h >= height:
+                fits.append((w * h, variant))
+        if fits:
+            return entry["varyantlar"][min(fits)[1]]
+    except (IndexError, ValueError, AttributeError):
+        pass
+    return entry
+
+
+def download(response, part, offset, size, sha, chunk):
+    """FETCH_PY gibi: parça başına fsync, önceki kısım yerel diskten yeniden özetlenir."""
+    digest = hashlib.sha256()
+    received = 0
+    with open(part, "a+b") as out:
+        out.truncate(offset)
+        out.seek(0)
+        while out.tell() < offset:
+            data = out.read(min(1 << 20, offset - out.tell()))
+            if not data:
+                break
+            digest.update(data)
+        while offset + received < size:
+            try:
+                data = response.read(min(chunk, size - offset - received))
+            except (OSError, http.client.HTTPException):
+                break
+            if not data:
+                break
+            out.write(data)
+            out.flush()
+            os.fsync(out.fileno())
+            digest.update(data)
+            received += len(data)
+    if offset + received < size:
+        return received, 1
+    if sha and digest.hexdigest() != sha:
+        os.remove(part)
+        return received, 3
+    return received, 0
+
+
+def probe(conn):
+    try:
+        response = conn.request("HEAD", "manifest.json", {})
+        response.read()
+    except (OSError, http.client.HTTPException):
+        return 1
+    return 0 if response.status < 500 else 1
+
+
+def fetch_file(conn, base, name, out, local, state_file):
+    state = load_state(state_file)
+    key = base + "/" + name
+    try:
+        response = conn.request("GET", name, conditional(state.get(key, {})) if os.path.exists(local) else {})
+        body = response.read()
+    except (OSError, http.client.HTTPException):
+        return 1
+    if response.status == 304:
+        return 4
+    if response.status == 404:
+        state.pop(key, None)
+        save_state(state_file, state)
+        return 2
+    if response.status != 200:
+        return 1
+    with open(out, "wb") as f:
+        f.write(body)
+    state[key] = validators(response)
+    save_state(state_file, state)
+    return 0
+
+
+def fetch_image(conn, base, name, resolution, cache_dir, image_dir, state_file, server, chunk, resume, peers,
+                multicast):
+    """
+    Resmi önbelleğe alır. Ortak önbellekte (`cache_dir`) root'un kopyası varsa o kullanılır;
+    indirilen resim `image_dir`'e yazılır (root için ikisi aynıdır).
+    """
+    state = load_state(state_file)
+    start = time.monotonic()
+    manifest_key = base + "/manifest.json"
+    saved = state.get(manifest_key, {})
+    try:
+        response = conn.request("GET", "manifest.json", conditional(saved) if "govde" in saved else {})
+        body = response.read()
+    except (OSError, http.client.HTTPException):
+        event("ustveri", start, "hata", sunucu=server, yontem="manifest")
+        return 1
+    status = response.status
+    if status == 200:
+        saved = dict(validators(response), govde=body.decode("utf-8", "replace"))
+        state[manifest_key] = saved
+        save_state(state_file, state)
+    elif status == 404:
+        if state.pop(manifest_key, None) is not None:
+            save_state(state_file, state)
+        saved = None
+    elif status != 304:
+        event("ustveri", start, "hata", sunucu=server, yontem="manifest", http=status)
+        return 1
+
+    cached = part = copy = None
+    if saved is not None:
+        try:
+            entry = json.loads(saved["govde"])["resimler"].get(name)
+        except (ValueError, KeyError, AttributeError, TypeError):
+            event("ustveri", start, "hata", sunucu=server, yontem="manifest", http=status)
+            return 1
+        if not entry:
+            event("ustveri", start, "yok", sunucu=server, yontem="manifest", http=status)
+            return 2
+        entry = select_variant(entry, resolution)
+        image, size, sha = entry["dosya"], int(entry["boyut"]), entry["sha256"]
+        key = sha[:16]
+        event("ustveri", start, "tamam", sunucu=server, yontem="manifest", http=status)
+        copy = cached_copy(cache_dir, image_dir, "%s-%s.jpg" % (name, key))
+        if copy:
+            print("yol", copy, flush=True)
+            return 0
+        cached = os.path.join(image_dir, "%s-%s.jpg" % (name, key))
+        received = os.path.join(cache_dir, "%s%s-%s.jpg" % (RECEIVED_PREFIX, name, key))
+        if peers or (multicast and os.path.exists(received)):
+            print("es", sha, size, cached, flush=True)
+            return 5
+        part = os.path.join(image_dir, ".%s-%s.kismi.%d" % (name, key, os.getuid()))
+        have = os.path.getsize(part) if resume and os.path.exists(part) else 0
+        offset = have - have % chunk
+        headers = {"Range": "bytes=%d-" % offset} if 0 < offset < size else {}
+        start = time.monotonic()
+    else:
+        # Manifest yok: resmin kendisi koşullu istenir, önbellek anahtarı boyut + değişiklik zamanıdır
+        # (bağlama noktasındaki stat yoluyla aynı anahtar)
+        image, sha = name + ".jpg", ""
+        image_key = base + "/" + image
+        saved = state.get(image_key, {})
+        key = saved.get("anahtar")
+        headers = {}
+        if key:
+            copy = cached_copy(cache_dir, image_dir, "%s-%s.jpg" % (name, key))
+            cached = os.path.join(image_dir, "%s-%s.jpg" % (name, key))
+            part = os.path.join(image_dir, ".%s-%s.kismi.%d" % (name, key, os.getuid()))
+            have = os.path.getsize(part) if resume and os.path.exists(part) else 0
+            if copy:
+                headers = conditional(saved)
+            elif have >= chunk and (saved.get("etag") or saved.get("tarih")):
+                headers = {"Range": "bytes=%d-" % (have - have % chunk),
+                           "If-Range": saved.get("etag") or saved.get("tarih")}
+
+    try:
+        response = conn.request("GET", image, headers)
+    except (OSError, http.client.HTTPException):
+        event("kopyalama" if sha else "ustveri", start, "hata", sunucu=server, yontem=None if sha else "http")
+        return 1
+    status = response.status
+    if not sha:
+        # Koşulsuz isteğe gelen 304 (önbellekte resim yokken) hatadır
+        result = {200: "tamam", 206: "tamam", 304: "tamam" if copy else "hata", 404: "yok"}.get(status, "hata")
+        event("ustveri", start, result, sunucu=server, yontem="http", http=status)
+        if status == 304:
+            response.read()
+            if not copy:
+                return 1
+            print("yol", copy, flush=True)
+            return 0
+        if status == 404:
+            response.read()
+            state.pop(image_key, None)
+            save_state(state_file, state)
+            return 2
+    if status == 206:
+        # Sunucu aralığı kabul etti: "bytes <başlangıç>-<son>/<boyut>". Aralık istenmediyse
+        # veya Content-Range okunamıyorsa ("bytes */1234" gibi) diğer hatalar gibi kaydedilir
+        first, _, total = response.getheader("Content-Range", "").partition(" ")[2].partition("/")
+        try:
+            offset = int(first.partition("-")[0])
+            if not sha:
+                size = int(total)
+        except ValueError:
+            offset = size = -1
+        if "Range" not in headers or offset != int(headers["Range"][6:-1]) or size <= 0:
+            conn.close()
+            event("kopyalama", start, "hata", sunucu=server, http=status)
+            return 1
+    elif status == 200:
+        offset = 0
+        if not sha:
+            size = int(response.getheader("Content-Length", "-1"))
+            if size <= 0:
+                conn.close()
+                event("kopyalama", start, "hata", sunucu=server, http=status)
+                return 1
+            modified = response.getheader("Last-Modified")
+            try:
+                mtime = int(email.utils.parsedate_to_datetime(modified).timestamp()) if modified else 0
+            except (TypeError, ValueError):
+                mtime = 0
+            key = "%d-%d" % (size, mtime)
+            cached = os.path.join(image_dir, "%s-%s.jpg" % (name, key))
+            part = os.path.join(image_dir, ".%s-%s.kismi.%d" % (name, key, os.getuid()))
+            state[image_key] = dict(validators(response), anahtar=key)
+            save_state(state_file, state)
+            copy = cached_copy(cache_dir, image_dir, "%s-%s.jpg" % (name, key))
+            if copy:
+                conn.close()
+                print("yol", copy, flush=True)
+                return 0
+            start = time.monotonic()
+    else:
+        conn.close()
+        event("kopyalama", start, "hata", sunucu=server, http=status)
+        return 1
+
+    received, rc = download(response, part, offset, size, sha, chunk)
+    if rc == 0:
+        elapsed = round((time.monotonic() - start) * 1000)
+        event("kopyalama", start, "tamam", sunucu=server, bayt=received, devam=offset, http=status)
+        if received:
+            print("hiz", received, elapsed, flush=True)
+        print("yol", cached, part, flush=True)
+        return 0
+    event("dogrulama" if rc == 3 else "kopyalama", start, "hata", sunucu=server, bayt=received, devam=offset,
+          http=status)
+    return 1
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    mode, base, timeout = argv[0], argv[1].rstrip("/"), float(argv[2])
+    conn = Connection(base, timeout)
+    if mode == "yokla":
+        return probe(conn)
+    if mode == "dosya":
+        return fetch_file(conn, base, *argv[3:7])
+    name, resolution, cache_dir, image_dir, state_file, server = argv[3:9]
+    return fetch_image(conn, base, name, resolution, cache_dir, image_dir, state_file, server,
+                       int(argv[9]), argv[10] == "1", argv[11] == "1", argv[12] == "1")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
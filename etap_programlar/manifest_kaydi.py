@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+"""
+Paylaşımdaki manifest.json'dan bir kaydın "dosya boyut sha256" bilgisini yazdırır
+(etap_manifest_olustur.py üretir). Ekran çözünürlüğü verilirse ekranı kaplayan en küçük
+varyant (etap_varyant_olustur.py üretir), uygun varyant yoksa ana resim seçilir.
+
+Önbellek kitaplığına MANIFEST_PY olarak gömülür.
+Kullanım: python3 -c "$MANIFEST_PY" <manifest> <ad> <ekran GENxYÜK veya boş>
+Çıkış: 0 bulundu, 1 okunamadı, 2 kayıt yok, 3 manifest yok.
+"""
+
+import json
+import sys
+
+
+def select_variant(entry, resolution):
+    """Ekranı (GENxYÜK) kaplayan en küçük varyantın kaydı; yoksa veya ekran bilinmiyorsa ana kayıt."""
+    try:
+        width, height = (int(v) for v in resolution.split("x"))
+        fits = []
+        for name in entry.get("varyantlar", {}):
+            w, h = (int(v) for v in name.split("x"))
+            if w >= width and h >= height:
+                fits.append((w * h, name))
+        if fits:
+            return entry["varyantlar"][min(fits)[1]]
+    except (IndexError, ValueError, AttributeError):
+        pass
+    return entry
+
+
+def main(argv=None):
+    path, name, resolution = (sys.argv[1:] if argv is None else argv)[:3]
+    try:
+        with open(path, "rb") as f:
+            entry = json.load(f)["resimler"].get(name)
+    except FileNotFoundError:
+        return 3
+    except (OSError, ValueError, KeyError, AttributeError):
+        return 1
+    if not entry:
+        return 2
+    entry = select_variant(entry, resolution)
+    print(entry["dosya"], entry["boyut"], entry["sha256"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""
+Paylaşımdan akan resmi (stdin) kısmi dosyaya parça parça ekler. Her parça diske
+yazıldıktan (fsync) sonra sıradaki okunur: kesintide dosya son tamamlanan parçada kalır.
+SHA-256 okuma sırasında hesaplanır; sürdürülürken yalnızca yerel diskteki önceki kısım
+yeniden özetlenir, sunucudan ikinci kez okunmaz. Bu çalıştırmada alınan baytı yazdırır.
+
+Önbellek kitaplığına FETCH_PY olarak gömülür.
+Kullanım: dd ... | python3 -c "$FETCH_PY" <kısmi dosya> <başlangıç> <boyut> <sha256 veya boş> <parça>
+Çıkış: 0 tamam, 1 akış erken bitti (kısmi dosya tutulur), 3 özet tutmadı (kısmi dosya silinir).
+"""
+
+import hashlib
+import os
+import sys
+
+
+def append(stream, part, offset, size, sha, chunk):
+    """
+    Kısmi dosyayı `offset`'e kırpıp `stream`'den `size`'a kadar parça parça ekler.
+    Dönüş: (bu çalıştırmada alınan bayt, çıkış kodu).
+    """
+    digest = hashlib.sha256()
+    received = 0
+    with open(part, "a+b") as out:
+        out.truncate(offset)
+        out.seek(0)
+        while out.tell() < offset:
+            data = out.read(min(1 << 20, offset - out.tell()))
+            if not data:
+                break
+            digest.update(data)
+        while offset + received < size:
+            data = stream.read(min(chunk, size - offset - received))
+            if not data:
+                break
+            out.write(data)
+            out.flush()
+            os.fsync(out.fileno())
+            digest.update(data)
+            received += len(data)
+    if offset + received < size:
+        return received, 1
+    if sha and digest.hexdigest() != sha:
+        os.remove(part)
+        return received, 3
+    return received, 0
+
+
+def main(argv=None):
+    part, offset, size, sha, chunk = (sys.argv[1:] if argv is None else argv)[:5]
+    received, rc = append(sys.stdin.buffer, part, int(offset), int(size), sha, int(chunk))
+    print(received)
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""
+Derlenmiş takvimden bir gün aralığının resim adlarını ilk geçtikleri sırayla, tekrarsız
+yazdırır (etap_takvim_derle.resolve ile aynı arama: katman başına tek dizi erişimi).
+Takvim yoksa veya gün takvim dışındaysa ISO haftasının resmi (weekNN) yazdırılır.
+
+Önbellek kitaplığına SCHEDULE_PY olarak gömülür.
+Kullanım: python3 -c "$SCHEDULE_PY" <takvim> <makine> <okul (JSON)> <ilk gün> <gün sayısı>
+Çıkış: 0, takvim var ama okunamadıysa 1 (adlar yine yazdırılır).
+"""
+
+import datetime
+import json
+import sys
+
+
+def image_names(path, host, school, first, count):
+    """(`first`'ten başlayan `count` günün tekrarsız resim adları, çıkış kodu)."""
+    status = 0
+    start = layers = None
+    try:
+        with open(path, encoding="utf-8") as f:
+            schedule = json.load(f)
+        start = datetime.date.fromisoformat(schedule["baslangic"])
+        layers = [schedule["katmanlar"].get(key) for key in ("", "okul:" + school, "makine:" + host)]
+    except FileNotFoundError:
+        schedule = None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        schedule, status = None, 1
+    names = []
+    for n in range(count):
+        day = first + datetime.timedelta(days=n)
+        name = None
+        try:
+            i = (day - start).days if schedule else -1
+            if 0 <= i < schedule["gun"]:
+                best = None
+                for layer in layers:
+                    if layer and layer["resim"][i] >= 0 and (best is None or layer["oncelik"][i] >= best[0]):
+                        best = (layer["oncelik"][i], layer["resim"][i])
+                name = schedule["resimler"][best[1]] if best else None
+        except (IndexError, KeyError, TypeError):
+            status = 1
+        name = name or "week%02d" % day.isocalendar()[1]
+        if name not in names:
+            names.append(name)
+    return names, status
+
+
+def main(argv=None):
+    path, host, school, first, count = (sys.argv[1:] if argv is None else argv)[:5]
+    names, status = image_names(path, host, json.loads(school), datetime.date.fromisoformat(first), int(count))
+    print("\n".join(names))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
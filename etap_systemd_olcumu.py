@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+systemd ile D-Bus üzerinden ve systemctl süreçleriyle konuşmanın süre karşılaştırması.
+
+Kurulumun kullandığı iki yolu aynı işlemlerle ölçer: birimlerin etkinlik ve
+çalışma durumlarının okunması ve (--yeniden-yukle ile) systemd yapılandırmasının
+yeniden yüklenmesi. D-Bus ölçümleri bağlantı kurmayı da içerir. Kurulumun
+kendisi de komutları uygularken geçen süreyi loglar; aynı kurulum
+--systemd-arayuzu systemctl ile çalıştırılarak karşılaştırılabilir.
+
+root olarak çalıştırılmalıdır (Reload, sistem veriyolu politikasınca root'a açıktır).
+
+Örnek:  sudo python3 etap_systemd_olcumu.py --tekrar 20 --yeniden-yukle
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from etap_arkaplan_kurulum import (
+    PREFETCH_SERVICE_PATH, PREFETCH_TIMER_PATH, DBusError, SystemdBus, systemd_unit_name
+)
+
+UNITS = [
+    systemd_unit_name("/mnt/arka_plan", "mount"),
+    systemd_unit_name("/mnt/arka_plan", "automount"),
+    os.path.basename(PREFETCH_TIMER_PATH),
+    os.path.basename(PREFETCH_SERVICE_PATH),
+]
+
+
+def states_systemctl():
+    subprocess.run(["systemctl", "show", "--property=Id,UnitFileState,ActiveState", *UNITS],
+                   stdout=subprocess.DEVNULL, check=True)
+
+
+def states_dbus():
+    with SystemdBus() as bus:
+        for unit in UNITS:
+            bus.unit_state(unit)
+
+
+def reload_systemctl():
+    subprocess.run(["systemctl", "daemon-reload"], check=True)
+
+
+def reload_dbus():
+    with SystemdBus() as bus:
+        bus.call("Reload")
+
+
+def measure(func, runs):
+    """İşlevi `runs` kez çalıştırır; süreleri (ms) veya hata döner."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        try:
+            func()
+        except (OSError, DBusError, subprocess.CalledProcessError) as e:
+            return None, str(e)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, ""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="systemd ile D-Bus ve systemctl üzerinden konuşmanın sürelerini karşılaştırır."
+    )
+    parser.add_argument("--tekrar", type=int, default=10,
+                        help="Her durum için ölçüm sayısı (varsayılan: 10)")
+    parser.add_argument("--yeniden-yukle", action="store_true",
+                        help="daemon-reload / Reload sürelerini de ölç (systemd yapılandırmasını yeniden yükler)")
+    args = parser.parse_args()
+
+    if os.geteuid() != 0:
+        raise SystemExit("Ölçüm root yetkisi gerektirir (sudo ile çalıştırın).")
+
+    cases = [
+        (f"Birim durumları ({len(UNITS)} birim), systemctl", states_systemctl),
+        (f"Birim durumları ({len(UNITS)} birim), D-Bus", states_dbus),
+    ]
+    if args.yeniden_yukle:
+        cases += [
+            ("daemon-reload, systemctl", reload_systemctl),
+            ("Reload, D-Bus", reload_dbus),
+        ]
+
+    print(f"{'Durum':<36}  {'En az (ms)':>10}  {'Ortanca (ms)':>12}")
+    for name, func in cases:
+        timings, error = measure(func, args.tekrar)
+        if timings is None:
+            print(f"{name:<36}  {'-':>10}  {'-':>12}  ({error})")
+            continue
+        print(f"{name:<36}  {min(timings):>10.1f}  {statistics.median(timings):>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Arka plan takvimini kural dosyasından derleyip paylaşıma takvim.json olarak yazar.
+
+Kural dosyası yoksa tahtalar her gün ISO haftasının resmini (weekNN.jpg) gösterir.
+Tatiller, sınav haftaları, 53. hafta, yarıyıl arası, günlük dönüşüm ve okula ya
+da tahtaya özel resimler kural dosyasında tanımlanır:
+
+    [takvim]
+    baslangic = 2026-09-07
+    bitis = 2027-06-25
+    ; ISO 53. haftada gösterilecek resim (varsayılan: week53)
+    hafta53 = week52
+
+    [yariyil-tatili]
+    tarih = 2027-01-25..2027-02-05
+    resim = tatil
+    oncelik = 10
+
+    [sinav-haftasi]
+    tarih = 2026-W45, 2027-W15
+    gunler = pzt, sal, car, per, cum
+    resim = sinav
+    okullar = lise-a, lise-b
+
+    [sabah-mesajlari]
+    tarih = 2026-10-19..2026-10-30
+    ; birden çok resim verilirse eşleşen günlerde sırayla döner
+    resim = mesaj1, mesaj2, mesaj3
+    makineler = tahta-12
+
+Tarihler YYYY-AA-GG, YYYY-Www (ISO haftasının tamamı) veya A..B aralığıdır.
+Resim adları paylaşımdaki dosyanın uzantısız adıdır (tatil -> tatil.jpg) ve
+küçük harf, rakam ve alt çizgiden oluşur. Aynı güne birden çok kural uyarsa
+önceliği yüksek olan, eşitse dosyada sonra gelen kazanır. okullar
+(kurulumdaki --okul) ve makineler (hostname) kuralı yalnızca o tahtalara
+uygular; aynı öncelikte tahtaya özel kural okula özele, okula özel kural
+genele baskın gelir.
+
+Derleme her gün için resmi önceden çözer: takvim.json'da katman başına günlük
+bir resim ve öncelik dizisi bulunur. Zamanlayıcı dosyayı önbelleğe kopyalar;
+oturum açılışında bugünün resmi paylaşıma gitmeden, (bugün - başlangıç) gün
+sırasıyla tek adımda bulunur. Takvim dışında kalan günlerde ISO haftası
+kullanılır.
+
+Örnekler:
+    python3 etap_takvim_derle.py takvim.ini /srv/paylasim/arka-plan
+    python3 etap_takvim_derle.py takvim.ini /srv/paylasim/arka-plan --goster 2026-12-31 --okul lise-a
+"""
+
+import argparse
+import configparser
+import datetime
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+from etap_manifest_olustur import IMAGE_NAME, load_manifest
+
+SCHEDULE_NAME = "takvim.json"
+SCHEDULE_VERSION = 1
+
+WEEKDAYS = {"pzt": 0, "sal": 1, "car": 2, "per": 3, "cum": 4, "cmt": 5, "paz": 6}
+IMAGE_KEY = re.compile(r"^(\d{4}-\d{2}-\d{2}|[a-z][a-z0-9_]*)$")
+ISO_WEEK = re.compile(r"^(\d{4})-W(\d{2})$")
+RULE_KEYS = {"tarih", "gunler", "resim", "oncelik", "okullar", "makineler"}
+
+# Temel haftalık resmin önceliği; kuralların önceliği 0 veya üstüdür
+BASE_PRIORITY = -1
+# [takvim] bitis verilmezse takvimin süresi (gün): 53 hafta
+DEFAULT_DAYS = 371
+
+
+def split_list(text):
+    return [item for item in re.split(r"[,\s]+", text.strip()) if item]
+
+
+def parse_day(text, last=False):
+    """YYYY-AA-GG veya YYYY-Www; hafta verilirse pazartesi (last=True ise pazar) döner."""
+    match = ISO_WEEK.match(text)
+    if match:
+        return datetime.date.fromisocalendar(int(match.group(1)), int(match.group(2)), 7 if last else 1)
+    return datetime.date.fromisoformat(text)
+
+
+def parse_ranges(text):
+    """"A..B, C, ..." -> [(ilk, son), ...]; her uç bir gün veya bir ISO haftasıdır."""
+    ranges = []
+    for item in split_list(text):
+        first, _, last = item.partition("..")
+        ranges.append((parse_day(first), parse_day(last or first, last=True)))
+    return ranges
+
+
+def load_rules(path):
+    """Kural dosyasını okur. Dönüş: (ilk gün, son gün, 53. hafta resmi, kurallar); hatada SystemExit."""
+    config = configparser.ConfigParser(inline_comment_prefixes=(";", "#"))
+    if not config.read(path, encoding="utf-8"):
+        raise SystemExit(f"Kural dosyası okunamadı: {path}")
+
+    settings = config["takvim"] if config.has_section("takvim") else {}
+    try:
+        today = datetime.date.today()
+        first = parse_day(settings["baslangic"]) if "baslangic" in settings \
+            else today - datetime.timedelta(days=today.weekday())
+        last = parse_day(settings["bitis"], last=True) if "bitis" in settings \
+            else first + datetime.timedelta(days=DEFAULT_DAYS - 1)
+    except ValueError as e:
+        raise SystemExit(f"{path}: [takvim]: {e}")
+    if last < first:
+        raise SystemExit(f"{path}: [takvim]: bitis baslangictan önce")
+    week53 = settings.get("hafta53", "week53")
+    if not IMAGE_KEY.match(week53):
+        raise SystemExit(f"{path}: [takvim]: geçersiz resim adı: {week53}")
+
+    rules = []
+    for name in config.sections():
+        if name == "takvim":
+            continue
+        section = config[name]
+        unknown = set(section) - RULE_KEYS
+        if unknown:
+            raise SystemExit(f"{path}: [{name}]: bilinmeyen anahtar: {', '.join(sorted(unknown))}")
+        try:
+            rule = {
+                "ad": name,
+                "tarihler": parse_ranges(section["tarih"]) if "tarih" in section else [(first, last)],
+                "gunler": {WEEKDAYS[d] for d in split_list(section.get("gunler", ""))} or set(range(7)),
+                "resimler": split_list(section.get("resim", "")),
+                "oncelik": int(section.get("oncelik", "0")),
+                "okullar": split_list(section.get("okullar", "")),
+                "makineler": split_list(section.get("makineler", "")),
+            }
+        except KeyError as e:
+            raise SystemExit(f"{path}: [{name}]: bilinmeyen gün: {e.args[0]} "
+                             f"(geçerli: {', '.join(WEEKDAYS)})")
+        except ValueError as e:
+            raise SystemExit(f"{path}: [{name}]: {e}")
+        if not rule["resimler"]:
+            raise SystemExit(f"{path}: [{name}]: resim verilmemiş")
+        for image in rule["resimler"]:
+            if not IMAGE_KEY.match(image):
+                raise SystemExit(f"{path}: [{name}]: geçersiz resim adı: {image}")
+        if rule["oncelik"] < 0:
+            raise SystemExit(f"{path}: [{name}]: oncelik 0 veya üstü olmalı")
+        rules.append(rule)
+    return first, last, week53, rules
+
+
+def compile_schedule(first, last, week53, rules):
+    """
+    Her katman ("" genel, "okul:<ad>", "makine:<ad>") için günlük resim ve öncelik dizilerini
+    üretir. Genel katman ISO haftasının resmiyle doldurulur; diğerlerinde kural olmayan gün -1'dir.
+    Kuralların eşleştiği gün sayısı rule["gun_sayisi"]'na yazılır.
+    """
+    days = (last - first).days + 1
+    names, ids = [], {}
+
+    def image_id(name):
+        if name not in ids:
+            ids[name] = len(names)
+            names.append(name)
+        return ids[name]
+
+    base = []
+    for i in range(days):
+        week = (first + datetime.timedelta(days=i)).isocalendar()[1]
+        base.append(image_id(week53 if week == 53 else "week%02d" % week))
+    layers = {"": {"resim": base, "oncelik": [BASE_PRIORITY] * days}}
+
+    for rule in rules:
+        targets = ["okul:" + s for s in rule["okullar"]] + ["makine:" + h for h in rule["makineler"]] or [""]
+        matched = []
+        for start, end in rule["tarihler"]:
+            for i in range(max(0, (start - first).days), min(days, (end - first).days + 1)):
+                if (first + datetime.timedelta(days=i)).weekday() in rule["gunler"]:
+                    matched.append(i)
+        matched = sorted(set(matched))
+        rule["gun_sayisi"] = len(matched)
+
+        for k, i in enumerate(matched):
+            image = image_id(rule["resimler"][k % len(rule["resimler"])])
+            for target in targets:
+                layer = layers.setdefault(target, {"resim": [-1] * days, "oncelik": [BASE_PRIORITY] * days})
+                if rule["oncelik"] >= layer["oncelik"][i]:
+                    layer["resim"][i] = image
+                    layer["oncelik"][i] = rule["oncelik"]
+
+    # Kurallarla tamamen örtülen haftalık resimler dizinde yer tutmasın
+    used = sorted({value for layer in layers.values() for value in layer["resim"] if value >= 0})
+    remap = {old: new for new, old in enumerate(used)}
+    for layer in layers.values():
+        layer["resim"] = [remap.get(value, -1) for value in layer["resim"]]
+    names = [names[old] for old in used]
+
+    return {
+        "surum": SCHEDULE_VERSION,
+        "olusturulma": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "baslangic": first.isoformat(),
+        "gun": days,
+        "resimler": names,
+        "katmanlar": layers,
+    }
+
+
+def resolve(schedule, day, host="", school=""):
+    """
+    Günün resim adı; takvim dışındaki günlerde None. Oturum ajanı ve kitaplıktaki
+    takvim araması bununla aynıdır: katman başına tek dizi erişimi, dizin taraması yok.
+    """
+    i = (day - datetime.date.fromisoformat(schedule["baslangic"])).days
+    if not 0 <= i < schedule["gun"]:
+        return None
+    best = None
+    for key in ("", "okul:" + school, "makine:" + host):
+        layer = schedule["katmanlar"].get(key)
+        if layer and layer["resim"][i] >= 0 and (best is None or layer["oncelik"][i] >= best[0]):
+            best = (layer["oncelik"][i], layer["resim"][i])
+    return schedule["resimler"][best[1]] if best else None
+
+
+def write_schedule(directory, schedule):
+    """Takvimi geçici dosyaya yazıp rename ile yerine koyar; tahtalar yarım dosya görmez."""
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{SCHEDULE_NAME}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(schedule, f, separators=(",", ":"), ensure_ascii=False)
+            f.write("\n")
+            os.fchmod(f.fileno(), 0o644)
+        os.replace(tmp_path, os.path.join(directory, SCHEDULE_NAME))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def available_images(directory):
+    """Paylaşımdaki resim anahtarları: manifest kayıtları ve dizindeki ana resimler."""
+    keys = set(load_manifest(directory).get("resimler", {}))
+    for name in os.listdir(directory):
+        match = IMAGE_NAME.match(name)
+        if match and not match.group("variant"):
+            keys.add(match.group("key").lower())
+    return keys
+
+
+def day_spans(days):
+    """Sıralı tarihleri "A..B" aralıklarına toplar."""
+    spans = []
+    for day in days:
+        if spans and (day - spans[-1][1]).days == 1:
+            spans[-1][1] = day
+        else:
+            spans.append([day, day])
+    return ", ".join(a.isoformat() if a == b else f"{a}..{b}" for a, b in spans)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Arka plan takvimini kural dosyasından derleyip paylaşıma takvim.json olarak yazar."
+    )
+    parser.add_argument("kurallar", help="Kural dosyası (INI)")
+    parser.add_argument("dizin", help="Resimlerin bulunduğu (export edilen) dizin")
+    parser.add_argument("--goster", action="append", metavar="TARIH",
+                        help="Bu günün resmini göster, birden fazla verilebilir")
+    parser.add_argument("--okul", default="", help="--goster için okul (kurulumdaki --okul)")
+    parser.add_argument("--makine", default="", help="--goster için tahta adı (hostname)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dizin):
+        raise SystemExit(f"Dizin bulunamadı: {args.dizin}")
+    first, last, week53, rules = load_rules(args.kurallar)
+    schedule = compile_schedule(first, last, week53, rules)
+
+    print(f"Takvim: {first}..{last} ({schedule['gun']} gün), {len(rules)} kural, "
+          f"{len(schedule['resimler'])} resim, {len(schedule['katmanlar'])} katman")
+    for rule in rules:
+        print(f"  [{rule['ad']}] {rule['gun_sayisi']} gün" + ("" if rule["gun_sayisi"] else " (takvim dışında)"))
+    week53_days = [first + datetime.timedelta(days=i) for i in range(schedule["gun"])
+                   if (first + datetime.timedelta(days=i)).isocalendar()[1] == 53]
+    if week53_days:
+        print(f"  ISO 53. hafta: {day_spans(week53_days)} -> {week53}")
+
+    # Takvimde geçen ama paylaşımda olmayan resimler: o günlerde tahtalar son geçerli resmi tutar
+    available = available_images(args.dizin)
+    for image_id, name in enumerate(schedule["resimler"]):
+        if name in available:
+            continue
+        days = sorted({first + datetime.timedelta(days=i) for layer in schedule["katmanlar"].values()
+                       for i, value in enumerate(layer["resim"]) if value == image_id})
+        print(f"UYARI: paylaşımda yok: {name}.jpg ({day_spans(days)})")
+
+    for text in args.goster or []:
+        try:
+            day = parse_day(text)
+        except ValueError as e:
+            raise SystemExit(f"--goster: {e}")
+        image = resolve(schedule, day, args.makine, args.okul)
+        print(f"{day} ({day.strftime('%G-W%V')}): "
+              + (f"{image}.jpg" if image else f"takvim dışında -> week{day.isocalendar()[1]:02d}.jpg"))
+
+    path = os.path.join(args.dizin, SCHEDULE_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+    if {k: v for k, v in previous.items() if k != "olusturulma"} == \
+            {k: v for k, v in schedule.items() if k != "olusturulma"}:
+        print(f"{SCHEDULE_NAME} güncel.")
+        return 0
+    write_schedule(args.dizin, schedule)
+    print(f"{SCHEDULE_NAME} yazıldı ({os.path.getsize(path)} bayt).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tahtaların yazdığı süre olaylarını aşama, okul ve sunucu bazında özetler.
+
+Kurulum (kaynak "kurulum"), zamanlayıcı ve oturumdaki indirmeler (kaynak
+"zamanlayici"/"ajan"), sistem düzeyinde arka plan betiği (kaynak "sistem") ve
+oturum ajanı önbellek dizinindeki .olaylar.<uid>.jsonl dosyalarına her satırı bir
+JSON nesnesi olan olaylar yazar:
+
+    {"zaman": "...", "makine": "...", "okul": "...", "kaynak": "...",
+     "asama": "kopyalama", "sure_ms": 412, "sonuc": "tamam", "sunucu": "10.1.0.5", ...}
+
+Dosyalar filo genelinde `etap_filo_dagitimi.py envanter.ini --topla DIZIN` ile
+toplanır. Bu araç her aşama için adet, hata sayısı ve p50/p95/p99/en çok
+sürelerini; okul ve sunucu kırılımlarını ve en yavaş tahtaları gösterir.
+Bozuk satırlar sayılır ve atlanır.
+
+Örnekler:
+    python3 etap_telemetri_raporu.py
+    python3 etap_telemetri_raporu.py olaylar/ --en-yavas 20 --yavas-asama kopyalama
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+from etap_oturum_olcumleri import percentile
+
+DEFAULT_GLOB = "/var/cache/etap-arka-plan/.olaylar.*.jsonl"
+
+
+def event_files(paths):
+    """Verilen dosyalar ve dizinlerin altındaki tüm *.jsonl dosyaları."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, name) for name in names if name.endswith(".jsonl")]
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def load_events(files):
+    """Dönüş: (olaylar, bozuk satır sayısı); sure_ms'i sayı olmayan satırlar bozuk sayılır."""
+    events = []
+    broken = 0
+    for path in files:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                    event["sure_ms"] = int(event["sure_ms"])
+                    event["asama"] = str(event["asama"])
+                except (ValueError, KeyError, TypeError):
+                    broken += 1
+                    continue
+                events.append(event)
+    return events, broken
+
+
+def print_table(title, events, key):
+    """`key(olay)` ile gruplanan olayların süre dağılımı; grup değeri None olan olaylar atlanır."""
+    groups = {}
+    for event in events:
+        group = key(event)
+        if group is not None:
+            groups.setdefault(group, []).append(event)
+    if not groups:
+        return
+
+    print(title)
+    print(f"{'':<40}  {'Adet':>6}  {'Hata':>5}  {'p50 (ms)':>9}  {'p95 (ms)':>9}  {'p99 (ms)':>9}  {'En çok':>9}")
+    for group, items in sorted(groups.items()):
+        timings = sorted(e["sure_ms"] for e in items)
+        failed = sum(1 for e in items if e.get("sonuc") == "hata")
+        print(f"{' / '.join(group)[:40]:<40}  {len(items):>6}  {failed:>5}  {percentile(timings, 0.50):>9}  "
+              f"{percentile(timings, 0.95):>9}  {percentile(timings, 0.99):>9}  {timings[-1]:>9}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Süre olaylarını aşama, okul ve sunucu bazında özetler."
+    )
+    parser.add_argument("yollar", nargs="*",
+                        help=f"Olay dosyaları veya toplama dizinleri (varsayılan: {DEFAULT_GLOB})")
+    parser.add_argument("--en-yavas", type=int, default=10,
+                        help="Listelenecek en yavaş tahta sayısı (varsayılan: 10)")
+    parser.add_argument("--yavas-asama", default="oturum",
+                        help="En yavaş tahtaların p95'ine göre sıralandığı aşama (varsayılan: oturum)")
+    args = parser.parse_args()
+
+    files = event_files(args.yollar) if args.yollar else sorted(glob.glob(DEFAULT_GLOB))
+    events, broken = load_events(files)
+    if not events:
+        raise SystemExit("Olay bulunamadı.")
+
+    machines = {e.get("makine", "") for e in events}
+    print(f"{len(files)} dosya, {len(machines)} tahta, {len(events)} olay"
+          + (f", {broken} bozuk satır atlandı" if broken else ""))
+    print()
+
+    print_table("Aşama (kaynak / aşama)", events, lambda e: (e.get("kaynak", ""), e["asama"]))
+    print_table("Okul (okul / aşama)", events,
+                lambda e: (e["okul"], e["asama"]) if e.get("okul") else None)
+    print_table("Sunucu (sunucu / aşama)", events,
+                lambda e: (str(e["sunucu"]), e["asama"]) if e.get("sunucu") else None)
+
+    by_machine = {}
+    for event in events:
+        if event["asama"] == args.yavas_asama:
+            by_machine.setdefault((event.get("okul", ""), event.get("makine", "")), []).append(event["sure_ms"])
+    if by_machine and args.en_yavas > 0:
+        ranked = sorted(((percentile(sorted(t), 0.95), key, len(t)) for key, t in by_machine.items()),
+                        reverse=True)[:args.en_yavas]
+        print(f"En yavaş tahtalar ({args.yavas_asama}, p95)")
+        print(f"{'Okul':<24}  {'Tahta':<24}  {'Adet':>6}  {'p95 (ms)':>9}")
+        for p95, (school, machine), count in ranked:
+            print(f"{school[:24]:<24}  {machine[:24]:<24}  {count:>6}  {p95:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
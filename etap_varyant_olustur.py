@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Paylaşımdaki arka plan resimlerinden tahta ekranlarına uygun çözünürlük varyantları üretir.
+
+Öğretmenlerin koyduğu weekNN.jpg (ve YYYY-AA-GG.jpg, takvimdeki tatil.jpg gibi)
+dosyaları çoğu zaman fotoğraf makinesi çıktısıdır: 6000 piksel, 10 MB. Her tahta bu dosyanın
+tamamını indirir ve Cinnamon her oturum açılışında onu çözüp küçültür. Bu araç
+her kaynak resim için, verilen panel çözünürlüklerine sığacak şekilde
+küçültülmüş, EXIF'i silinmiş, aşamalı (progressive) ve boyut sınırlı
+<ad>-GENxYÜK.jpg varyantları üretir ve ardından manifest.json'u günceller.
+Tahtalar manifestten kendi ekranlarına uyan varyantı seçer.
+
+Dönüştürme ImageMagick ile yapılır (magick veya convert komutu); resimler
+--paralel işlem ile aynı anda işlenir. Varyantı kaynaktan yeni olan resimler
+yeniden üretilmez. Kaynaktan büyük olmayan çözünürlükler için varyant üretilmez.
+
+Örnekler:
+    python3 etap_varyant_olustur.py /srv/paylasim/arka-plan
+    python3 etap_varyant_olustur.py /srv/paylasim/arka-plan --varyant 1920x1080:500 --varyant 1366x768:300
+"""
+
+import argparse
+import concurrent.futures
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from etap_manifest_olustur import IMAGE_NAME, jpeg_dimensions, update
+
+# Varsayılan panel çözünürlükleri ve varyant başına en büyük boyut (KB)
+DEFAULT_VARIANTS = ["1920x1080:600", "3840x2160:2000"]
+
+# Çözme süresi ölçümünde her dosyanın kaç kez çözüleceği (en kısa süre alınır)
+DECODE_RUNS = 3
+
+
+def imagemagick():
+    """ImageMagick 7'de "magick", 6'da "convert" komutu kullanılır."""
+    for name in ("magick", "convert"):
+        if shutil.which(name):
+            return name
+    raise SystemExit("ImageMagick bulunamadı (magick veya convert). Kurulum: apt install imagemagick")
+
+
+def parse_variant(text):
+    """"1920x1080:600" -> (1920, 1080, 600); boyut sınırı verilmezse 0 (sınırsız)."""
+    try:
+        size, _, limit = text.partition(":")
+        width, height = (int(v) for v in size.lower().split("x"))
+        return width, height, int(limit or 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"GENxYÜK[:KB] bekleniyordu: {text}")
+
+
+def decode_ms(command, path):
+    """Resmin çözülme süresi (ms); süreç başlatma payı her dosya için aynıdır."""
+    best = None
+    for _ in range(DECODE_RUNS):
+        start = time.monotonic()
+        subprocess.run([command, path, "-limit", "thread", "1", "null:"],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        elapsed = (time.monotonic() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def render_variant(command, source, target, width, height, limit_kb):
+    """
+    Kaynağı GENxYÜK içine sığacak şekilde küçültür (yönü düzeltilir, en-boy oranı korunur),
+    EXIF ve diğer meta verileri siler, aşamalı JPEG olarak yazar. Boyut sınırı verildiyse
+    kalite sınıra sığacak şekilde düşürülür. Geçici dosyaya yazılıp rename ile yerine konur.
+    """
+    directory, name = os.path.split(target)
+    tmp = os.path.join(directory, f".{name}.{os.getpid()}.tmp.jpg")
+    args = [command, source, "-limit", "thread", "1", "-auto-orient", "-strip",
+            "-resize", f"{width}x{height}>", "-sampling-factor", "4:2:0",
+            "-interlace", "Plane", "-quality", "85"]
+    if limit_kb:
+        args += ["-define", f"jpeg:extent={limit_kb}kb"]
+    try:
+        result = subprocess.run(args + [tmp], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, check=False)
+        if result.returncode != 0:
+            raise RuntimeError(result.stdout.strip() or f"{command} {result.returncode} ile çıktı")
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def process_image(command, directory, key, name, variants, force, measure):
+    """
+    Tek bir kaynak resmin varyantlarını üretir.
+    Dönüş: [(varyant adı, durum, kaynak bayt, varyant bayt, kaynak ms, varyant ms)];
+    durum "üretildi", "güncel", "atlandı" veya hata iletisi.
+    """
+    source = os.path.join(directory, name)
+    source_size = os.path.getsize(source)
+    source_mtime = os.path.getmtime(source)
+    src_width, src_height = jpeg_dimensions(source)
+    source_ms = decode_ms(command, source) if measure else None
+
+    results = []
+    for width, height, limit_kb in variants:
+        variant_name = f"{key}-{width}x{height}.jpg"
+        target = os.path.join(directory, variant_name)
+        if src_width and src_width * src_height <= width * height:
+            results.append((variant_name, "atlandı", source_size, None, source_ms, None))
+            continue
+        status = "güncel"
+        if force or not os.path.exists(target) or os.path.getmtime(target) < source_mtime:
+            try:
+                render_variant(command, source, target, width, height, limit_kb)
+                status = "üretildi"
+            except (OSError, RuntimeError) as e:
+                results.append((variant_name, f"HATA: {e}", source_size, None, source_ms, None))
+                continue
+        variant_ms = decode_ms(command, target) if measure else None
+        results.append((variant_name, status, source_size, os.path.getsize(target), source_ms, variant_ms))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Arka plan resimlerinden panel çözünürlüklerine uygun varyantlar üretir."
+    )
+    parser.add_argument("dizin", help="Resimlerin bulunduğu (export edilen) dizin")
+    parser.add_argument("--varyant", action="append", type=parse_variant,
+                        help="GENxYÜK[:KB] biçiminde çözünürlük ve boyut sınırı, birden fazla verilebilir "
+                             f"(varsayılan: {' '.join(DEFAULT_VARIANTS)})")
+    parser.add_argument("--paralel", type=int, default=os.cpu_count() or 1,
+                        help="Aynı anda işlenen en fazla resim (varsayılan: işlemci sayısı)")
+    parser.add_argument("--zorla", action="store_true",
+                        help="Güncel olanlar dahil tüm varyantları yeniden üret")
+    parser.add_argument("--olcmeden", action="store_true",
+                        help="Çözme sürelerini ölçme")
+    parser.add_argument("--manifestsiz", action="store_true",
+                        help="Bittikten sonra manifest.json'u güncelleme")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dizin):
+        raise SystemExit(f"Dizin bulunamadı: {args.dizin}")
+    command = imagemagick()
+    variants = args.varyant or [parse_variant(v) for v in DEFAULT_VARIANTS]
+
+    sources = []
+    for name in sorted(os.listdir(args.dizin)):
+        match = IMAGE_NAME.match(name)
+        if match and not match.group("variant"):
+            sources.append((match.group("key").lower(), name))
+    if not sources:
+        raise SystemExit("Dizinde weekNN.jpg, YYYY-AA-GG.jpg veya takvimdeki adlarla kaynak resim yok.")
+
+    print(f"{len(sources)} kaynak resim, {len(variants)} çözünürlük, en fazla {args.paralel} paralel")
+    started = time.monotonic()
+    rows = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(1, args.paralel)) as executor:
+        futures = {
+            executor.submit(process_image, command, args.dizin, key, name, variants,
+                            args.zorla, not args.olcmeden): name
+            for key, name in sources
+        }
+        for future in concurrent.futures.as_completed(futures):
+            for row in future.result():
+                rows.append(row)
+                print(f"{row[0]}: {row[1]}", flush=True)
+    total = time.monotonic() - started
+
+    print()
+    print(f"{'Varyant':<28}  {'Durum':<9}  {'Kaynak':>9}  {'Varyant':>9}  {'Çözme (ms)':>15}")
+    for name, status, source_size, size, source_ms, variant_ms in sorted(rows):
+        sizes = f"{source_size / 1024:>8.0f}K  " + (f"{size / 1024:>8.0f}K" if size else f"{'-':>9}")
+        decode = f"{source_ms:.0f} -> {variant_ms:.0f}" if variant_ms is not None else "-"
+        print(f"{name:<28}  {status[:9]:<9}  {sizes}  {decode:>15}")
+
+    print()
+    for width, height, _ in variants:
+        done = [r for r in rows if r[0].endswith(f"-{width}x{height}.jpg") and r[3]]
+        if not done:
+            continue
+        saved = sum(r[2] - r[3] for r in done)
+        line = (f"{width}x{height}: {len(done)} resim, tahta başına indirilen "
+                f"{sum(r[2] for r in done) / 1048576:.1f} MB -> {sum(r[3] for r in done) / 1048576:.1f} MB "
+                f"({saved / 1048576:.1f} MB tasarruf)")
+        if not args.olcmeden:
+            line += (f", ortalama çözme {sum(r[4] for r in done) / len(done):.0f} ms -> "
+                     f"{sum(r[5] for r in done) / len(done):.0f} ms")
+        print(line)
+    failed = [r for r in rows if r[1].startswith("HATA")]
+    print(f"Toplam süre {total:.1f} sn, {len(failed)} hata")
+
+    if not args.manifestsiz:
+        update(args.dizin)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
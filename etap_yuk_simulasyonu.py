@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Sunucu yükü simülasyonu.
+
+Kurulum araçlarının ürettiği önbellek betiği, sunucuya gitmeden önce her tahtayı
+/etc/machine-id'den türetilen sabit bir gecikme kadar bekletir ve geçici
+hatalarda üstel geri çekilmeyle tekrar dener. Bu araç aynı kuralları N sanal
+tahta için yerelde çalıştırır ve sunucudaki eş zamanlı okuma sayısının tepe
+değerini gecikmeli / gecikmesiz olarak karşılaştırır.
+
+Örnek:  python3 etap_yuk_simulasyonu.py --istemci 300 --pencere 1800
+"""
+
+import argparse
+import heapq
+import random
+
+# Üretilen betikteki varsayılanlarla aynı değerler
+FETCH_RETRIES = 4
+FETCH_BACKOFF = 5
+
+
+def makine_gecikmesi(machine_id: str, window: int) -> int:
+    """Betikteki makine_gecikmesi() ile aynı hesap: 0x<ilk 8 hane> % pencere."""
+    if window <= 0:
+        return 0
+    return int(machine_id[:8], 16) % window
+
+
+def simulate(machine_ids, window, boot_spread, read_seconds, capacity, seed=0):
+    """
+    Tahtaların açılıştan sonra sunucuya gidişini olay tabanlı olarak simüle eder.
+
+    Sunucu aynı anda en fazla `capacity` okumayı zamanında bitirebilir; daha
+    fazlası başladığında okuma `read_seconds` sonra hata ile biter ve betikteki
+    gibi geri çekilerek tekrar denenir.
+    Sonuç olarak tepe eş zamanlı okuma, başarısız deneme ve resimsiz kalan
+    tahta sayısı ile son tahtanın resmi aldığı zamanı içeren sözlük döner.
+    """
+    rng = random.Random(seed)
+    events = []
+    for mid in machine_ids:
+        boot = rng.uniform(0, boot_spread)
+        start = boot + makine_gecikmesi(mid, window)
+        heapq.heappush(events, (start, 1, mid, 1, FETCH_BACKOFF))
+
+    active = 0
+    peak = 0
+    failed_attempts = 0
+    gave_up = 0
+    last_done = 0.0
+
+    while events:
+        now, kind, mid, attempt, delay = heapq.heappop(events)
+        if kind == 0:
+            # Okuma bitti (0 = bitiş olayları aynı anda başlayanlardan önce işlenir)
+            active -= 1
+            continue
+
+        active += 1
+        peak = max(peak, active)
+        heapq.heappush(events, (now + read_seconds, 0, mid, attempt, delay))
+
+        if active <= capacity:
+            last_done = max(last_done, now + read_seconds)
+            continue
+
+        failed_attempts += 1
+        if attempt >= FETCH_RETRIES:
+            gave_up += 1
+            continue
+        retry_at = now + read_seconds + delay + makine_gecikmesi(mid, delay)
+        heapq.heappush(events, (retry_at, 1, mid, attempt + 1, delay * 2))
+
+    return {
+        "peak": peak,
+        "failed_attempts": failed_attempts,
+        "gave_up": gave_up,
+        "last_done": last_done,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tahtaların sunucuya eş zamanlı erişimini yerelde simüle eder."
+    )
+    parser.add_argument("--istemci", type=int, default=300,
+                        help="Simüle edilecek tahta sayısı (varsayılan: 300)")
+    parser.add_argument("--pencere", type=int, default=1800,
+                        help="Sunucu erişim penceresi, saniye (varsayılan: 1800)")
+    parser.add_argument("--acilis-yayilimi", type=float, default=120.0,
+                        help="Tahtaların açılış zamanlarının yayıldığı süre, saniye (varsayılan: 120)")
+    parser.add_argument("--okuma-suresi", type=float, default=2.0,
+                        help="Tek bir resim okumasının süresi, saniye (varsayılan: 2)")
+    parser.add_argument("--kapasite", type=int, default=20,
+                        help="Sunucunun zamanında bitirebildiği eş zamanlı okuma (varsayılan: 20)")
+    parser.add_argument("--tohum", type=int, default=0,
+                        help="Tekrarlanabilir sonuçlar için rastgelelik tohumu")
+    args = parser.parse_args()
+
+    rng = random.Random(args.tohum)
+    machine_ids = ["%032x" % rng.getrandbits(128) for _ in range(args.istemci)]
+
+    print(f"{args.istemci} tahta, açılış yayılımı {args.acilis_yayilimi:.0f} sn, "
+          f"okuma {args.okuma_suresi:.1f} sn, sunucu kapasitesi {args.kapasite}")
+    print(f"{'Pencere (sn)':>12}  {'Tepe okuma':>10}  {'Başarısız':>9}  {'Resimsiz':>8}  {'Son (sn)':>8}")
+    for window in (0, args.pencere):
+        r = simulate(machine_ids, window, args.acilis_yayilimi,
+                     args.okuma_suresi, args.kapasite, seed=args.tohum)
+        print(f"{window:>12}  {r['peak']:>10}  {r['failed_attempts']:>9}  "
+              f"{r['gave_up']:>8}  {r['last_done']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
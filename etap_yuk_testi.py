@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Önbelleğe alma yolunun simüle edilmiş bir filo ile yük testi.
+
+etap_yuk_simulasyonu.py gecikme ve tekrar deneme kurallarını bir modelle
+hesaplar; bu araç ise kurulumun ürettiği kitaplığı gerçekten çalıştırır.
+
+Yerel bir dizin paylaşım yerine geçer; okumalar bu araçtaki küçük bir sunucudan
+geçer ve sunucu her isteğe --gecikme-ms ekler, gönderilen baytları tüm
+istemcilerin paylaştığı --bant-genisligi ile sınırlar (okul sunucusunun çıkış
+hattı gibi). Her istemci kendi önbellek dizini ve makine kimliğiyle, kurulumun
+ürettiği kitaplığı (tahtada /usr/local/lib/etap-arka-plan/onbellek.sh) oturum
+ajanının yaptığı gibi çalıştırır: oturum --oturum-yayilimi içinde rastgele bir anda açılır, haftanın
+resmi önbellekte yoksa makineye özgü gecikmeden sonra onbellege_al çağrılır.
+--sicak-onbellek oranındaki istemcilerin önbelleği testten önce doldurulur
+(ön indirme zamanlayıcısının çalışmış olduğu tahtalar). --es ile her istemci
+için bir eş dağıtımı hizmeti de başlatılır; eşler birbirini loopback yayın
+adresiyle bulur ve sunucuya yalnızca resmi hiçbir eşte bulamayanlar gider.
+--kesinti ile okumaların bu oranı rastgele bir noktada kesilir (sınıftaki
+kararsız kablosuz bağlantı gibi); kitaplık kesilen kopyalamayı kısmi dosyadan
+sürdürür. --devamsiz aynı kesintilerde her denemenin baştan başlamasıyla
+karşılaştırma sağlar; fark sunucunun gönderdiği toplam baytta görülür.
+
+Kitaplığın paylaşımdan okuyan komutları (dd, cp, stat, python3, mountpoint) PATH'in
+başına konan küçük kabuk betikleriyle sunucuya yönlendirilir; root gerekmez.
+Rapor: sunucunun gönderdiği bayt, okuma ve metadata isteği sayısı, en yüksek eş
+zamanlı okuma ve bağlantı, oturum açılışından haftanın resminin önbellekte
+olmasına kadar geçen sürenin dağılımı ve istemcilerin yazdığı aşama olayları.
+Aynı --tohum ile aynı resimler, oturum anları ve makine kimlikleri üretilir;
+--sonuc ile yazılan JSON özetleri değişikliklerden önce ve sonra karşılaştırılabilir.
+
+Örnekler:
+    python3 etap_yuk_testi.py --istemci 100 --pencere 30 --bant-genisligi 100
+    python3 etap_yuk_testi.py --istemci 100 --sicak-onbellek 0.8 --sonuc sicak.json
+    python3 etap_yuk_testi.py --istemci 40 --pencere 60 --es
+    python3 etap_yuk_testi.py --istemci 20 --kesinti 0.5 --sonuc devam.json
+    python3 etap_yuk_testi.py --istemci 20 --kesinti 0.5 --devamsiz --sonuc bastan.json
+    python3 etap_yuk_testi.py --paylasim /mnt/arka_plan_kopyasi --manifestsiz
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import etap_arkaplan_kurulum
+from etap_manifest_olustur import update
+from etap_oturum_olcumleri import percentile
+from etap_telemetri_raporu import event_files, load_events, print_table
+from etap_yuk_simulasyonu import makine_gecikmesi
+
+# Sunucunun dosyaları gönderirken kullandığı parça boyutu (bayt)
+CHUNK_SIZE = 65536
+
+# Eşlerin loopback üzerinde birbirini bulduğu yayın adresi
+LOOPBACK_BROADCAST = "127.255.255.255"
+
+# Paylaşımdan okuyan komutlar için PATH'e konan yönlendiriciler.
+# Okuma: dosya sunucudan akıtılır; metadata: sunucu gecikmesi beklenir, komut yerelde çalışır.
+READ_SHIM = """#!/bin/bash
+if [ "$#" -eq 2 ] && [[ "$1" == "$ETAP_YUK_PAYLASIM"/* ]]; then
+    exec 3<>"/dev/tcp/127.0.0.1/$ETAP_YUK_PORT" || exit 1
+    printf 'READ 0 %s\\n' "$1" >&3
+    cat <&3 > "$2"
+    exit
+fi
+exec {real} "$@"
+"""
+
+# Kısmi dosyadan sürdürülen kopyalama: dd if=<yol> skip=<bayt> iflag=skip_bytes, çıktı stdout'a
+RANGE_SHIM = """#!/bin/bash
+src="" offset=0
+for arg in "$@"; do
+    case "$arg" in
+        if=*) src="${arg#if=}" ;;
+        skip=*) offset="${arg#skip=}" ;;
+    esac
+done
+if [[ "$src" == "$ETAP_YUK_PAYLASIM"/* ]]; then
+    exec 3<>"/dev/tcp/127.0.0.1/$ETAP_YUK_PORT" || exit 1
+    printf 'READ %s %s\\n' "$offset" "$src" >&3
+    cat <&3
+    exit
+fi
+exec {real} "$@"
+"""
+
+META_SHIM = """#!/bin/bash
+for arg in "$@"; do
+    if [[ "$arg" == "$ETAP_YUK_PAYLASIM"/* || "$arg" == "$ETAP_YUK_PAYLASIM" ]]; then
+        exec 3<>"/dev/tcp/127.0.0.1/$ETAP_YUK_PORT" || exit 1
+        printf 'META %s\\n' "$arg" >&3
+        read -r _ <&3
+        exec 3<&-
+        break
+    fi
+done
+exec {real} "$@"
+"""
+
+# Paylaşım yerine geçen dizin bağlama noktası değildir; yoklamada bağlı sayılır
+MOUNTPOINT_SHIM = """#!/bin/bash
+[[ "${@: -1}" == "$ETAP_YUK_PAYLASIM" ]] && exit 0
+exec {real} "$@"
+"""
+
+# Oturum ajanının indirmeyi başlatma şekli; makine gecikmesi simüle edilen kimlikten hesaplanır,
+# --devamsiz kısmi dosyadan sürdürmeyi kapatır
+CLIENT_COMMAND = (
+    '. "$1" || exit 1; '
+    'FETCH_RESUME="${ETAP_YUK_DEVAM:-1}"; '
+    'makine_gecikmesi() { [ "$1" -gt 0 ] 2>/dev/null || { echo 0; return; }; '
+    'echo $(( 0x${ETAP_YUK_MID:0:8} % $1 )); }; '
+    'onbellege_al "$2" >/dev/null'
+)
+
+
+class Share:
+    """Paylaşım sunucusunun gecikme, ortak bant genişliği ve sayaçları."""
+
+    def __init__(self, root, latency_ms, bandwidth_mbit, interrupt=0.0, seed=1):
+        self.root = os.path.realpath(root)
+        self.latency = latency_ms / 1000
+        self.rate = bandwidth_mbit * 1000000 / 8
+        self.interrupt = interrupt
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.link_free = 0.0
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.bytes_sent = 0
+            self.reads = 0
+            self.metas = 0
+            self.cuts = 0
+            self.active_reads = 0
+            self.active_connections = 0
+            self.peak_reads = 0
+            self.peak_connections = 0
+
+    def transmit(self, size):
+        """Baytları ortak hattan sırayla geçirir: hat boşalana kadar beklenir."""
+        if self.rate <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.link_free = max(self.link_free, now) + size / self.rate
+            wait = self.link_free - now
+        time.sleep(wait)
+
+    def cut_point(self, size):
+        """Bu okumanın kesileceği bayt; kesilmeyecekse None."""
+        with self.lock:
+            if size > 0 and self.rng.random() < self.interrupt:
+                self.cuts += 1
+                return self.rng.randrange(size)
+        return None
+
+    def count(self, name, delta):
+        with self.lock:
+            value = getattr(self, name) + delta
+            setattr(self, name, value)
+            peak = "peak_" + name[len("active_"):]
+            if value > getattr(self, peak):
+                setattr(self, peak, value)
+
+
+class ShareHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        share = self.server.share
+        share.count("active_connections", 1)
+        try:
+            command, _, argument = self.rfile.readline().decode("utf-8", "replace").rstrip("\n").partition(" ")
+            time.sleep(share.latency)
+            if command == "META":
+                with share.lock:
+                    share.metas += 1
+                self.wfile.write(b"OK\n")
+            elif command == "READ":
+                offset, _, path = argument.partition(" ")
+                path = os.path.realpath(path)
+                if not path.startswith(share.root + os.sep):
+                    return
+                share.count("active_reads", 1)
+                try:
+                    with open(path, "rb") as f:
+                        f.seek(int(offset))
+                        # Kesilen okumada bağlantı yarıda kapanır; istemci kısa bir akış görür
+                        remaining = share.cut_point(os.fstat(f.fileno()).st_size - int(offset))
+                        while remaining is None or remaining > 0:
+                            chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                            if not chunk:
+                                break
+                            if remaining is not None:
+                                remaining -= len(chunk)
+                            share.transmit(len(chunk))
+                            self.wfile.write(chunk)
+                            with share.lock:
+                                share.bytes_sent += len(chunk)
+                    with share.lock:
+                        share.reads += 1
+                except (OSError, ValueError):
+                    pass
+                finally:
+                    share.count("active_reads", -1)
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            share.count("active_connections", -1)
+
+
+class ShareServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+    def __init__(self, share):
+        self.share = share
+        super().__init__(("127.0.0.1", 0), ShareHandler)
+
+
+def write_shims(directory):
+    """Yönlendiricileri yazar; her biri gerçek komutun tam yolunu çağırır."""
+    os.makedirs(directory)
+    shims = {"cp": READ_SHIM, "dd": RANGE_SHIM, "stat": META_SHIM, "python3": META_SHIM,
+             "mountpoint": MOUNTPOINT_SHIM}
+    for name, template in shims.items():
+        real = shutil.which(name)
+        if real is None:
+            raise SystemExit(f"{name} komutu bulunamadı.")
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(template.replace("{real}", real))
+        os.chmod(path, 0o755)
+
+
+def run_client(lib_path, name, env, timeout):
+    """Tek bir istemcinin indirmesi; dönüş: (çıkış kodu, süre sn)."""
+    start = time.monotonic()
+    try:
+        code = subprocess.run(["bash", "-c", CLIENT_COMMAND, "_", lib_path, name], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              timeout=timeout).returncode
+    except subprocess.TimeoutExpired:
+        code = -1
+    return code, time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Önbelleğe alma yolunu simüle edilmiş bir tahta filosuyla yük testinden geçirir."
+    )
+    parser.add_argument("--istemci", type=int, default=50,
+                        help="Simüle edilen tahta sayısı (varsayılan: 50)")
+    parser.add_argument("--oturum-yayilimi", type=float, default=10,
+                        help="Oturumların açıldığı süre, saniye (varsayılan: 10)")
+    parser.add_argument("--pencere", type=int, default=etap_arkaplan_kurulum.LOGIN_FETCH_WINDOW,
+                        help="Oturumda sunucuya gitmeden önceki makine gecikmesi penceresi, saniye "
+                             f"(varsayılan: {etap_arkaplan_kurulum.LOGIN_FETCH_WINDOW})")
+    parser.add_argument("--sicak-onbellek", type=float, default=0.0,
+                        help="Önbelleği testten önce doldurulan istemci oranı, 0-1 (varsayılan: 0)")
+    parser.add_argument("--gecikme-ms", type=float, default=2.0,
+                        help="Sunucuya her isteğe eklenen gecikme, ms (varsayılan: 2)")
+    parser.add_argument("--bant-genisligi", type=float, default=100.0,
+                        help="Sunucunun tüm istemcilerle paylaşılan çıkış hattı, Mbit/sn; 0 sınırsız (varsayılan: 100)")
+    parser.add_argument("--boyut", type=int, default=1500,
+                        help="Üretilen resmin boyutu, KB (varsayılan: 1500)")
+    parser.add_argument("--paylasim",
+                        help="Resim üretmek yerine bu dizindeki dosyaları sun (örn. paylaşımın bir kopyası)")
+    parser.add_argument("--manifestsiz", action="store_true",
+                        help="Üretilen paylaşıma manifest.json yazma (metadata yolu stat ile ölçülür)")
+    parser.add_argument("--es", action="store_true",
+                        help="Eş dağıtımını aç: her istemci önbelleğini diğerlerine sunar (manifest gerekir)")
+    parser.add_argument("--kesinti", type=float, default=0.0,
+                        help="Sunucu okumalarının rastgele bir noktada kesilme olasılığı, 0-1 (varsayılan: 0)")
+    parser.add_argument("--devamsiz", action="store_true",
+                        help="Kesilen kopyalamayı kısmi dosyadan sürdürme, her denemede baştan al")
+    parser.add_argument("--tohum", type=int, default=1,
+                        help="Resim içeriği, oturum anları ve makine kimlikleri için tohum (varsayılan: 1)")
+    parser.add_argument("--sonuc", metavar="DOSYA",
+                        help="Özeti JSON olarak bu dosyaya da yaz")
+    args = parser.parse_args()
+    if args.es and args.manifestsiz:
+        parser.error("--es manifest özetleri gerektirir; --manifestsiz ile kullanılamaz")
+
+    rng = random.Random(args.tohum)
+    name = "week%02d" % datetime.date.today().isocalendar()[1]
+    workdir = tempfile.mkdtemp(prefix="etap-yuk-testi-")
+    peers = []
+    try:
+        share_dir = args.paylasim or os.path.join(workdir, "paylasim")
+        if not args.paylasim:
+            os.makedirs(share_dir)
+            with open(os.path.join(share_dir, f"{name}.jpg"), "wb") as f:
+                f.write(b"\xff\xd8" + rng.randbytes(args.boyut * 1024) + b"\xff\xd9")
+            if not args.manifestsiz:
+                update(share_dir)
+        elif not os.path.isdir(share_dir):
+            raise SystemExit(f"Dizin bulunamadı: {share_dir}")
+        share_dir = os.path.realpath(share_dir)
+
+        shim_dir = os.path.join(workdir, "bin")
+        write_shims(shim_dir)
+
+        share = Share(share_dir, args.gecikme_ms, args.bant_genisligi, args.kesinti, args.tohum)
+        server = ShareServer(share)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        installer = etap_arkaplan_kurulum.NFSInstaller([], peer_enabled=args.es,
+                                                        peer_broadcast=LOOPBACK_BROADCAST)
+        if args.es:
+            peer_path = os.path.join(workdir, "etap-arka-plan-es")
+            with open(peer_path, "w", encoding="utf-8") as f:
+                f.write(installer.render_peer())
+
+        clients = []
+        for i in range(args.istemci):
+            # Tahtanın önbelleği aynı zamanda oturumun resim dizinidir (XDG_CACHE_HOME/etap-arka-plan):
+            # root olmadan çalıştırıldığında da istemciler birbirinin önbelleğini paylaşmaz
+            cache_dir = os.path.join(workdir, "tahta", str(i), "etap-arka-plan")
+            os.makedirs(cache_dir)
+            env = dict(os.environ,
+                       XDG_CACHE_HOME=os.path.dirname(cache_dir),
+                       PATH=shim_dir + os.pathsep + os.environ.get("PATH", ""),
+                       ETAP_YUK_PAYLASIM=share_dir,
+                       ETAP_YUK_PORT=str(server.server_address[1]),
+                       ETAP_YUK_MID="%032x" % rng.getrandbits(128),
+                       ETAP_YUK_DEVAM="0" if args.devamsiz else "1",
+                       EVENT_SOURCE="ajan")
+            lib = os.path.join(cache_dir, "ortak.sh")
+            with open(lib, "w", encoding="utf-8") as f:
+                f.write(installer.render_lib([share_dir], cache_dir=cache_dir))
+            clients.append({"cache_dir": cache_dir, "lib": lib, "env": env,
+                            "warm": rng.random() < args.sicak_onbellek,
+                            "arrival": rng.uniform(0, args.oturum_yayilimi),
+                            "delay": makine_gecikmesi(env["ETAP_YUK_MID"], args.pencere)})
+
+        # Sıcak önbellekli istemciler için ön indirme; sayaçlar ölçümden önce sıfırlanır
+        warm = [c for c in clients if c["warm"]]
+        for client in warm:
+            run_client(client["lib"], name, client["env"], etap_arkaplan_kurulum.LOGIN_REFRESH_TIMEOUT)
+        for client in warm:
+            for path in event_files([client["cache_dir"]]):
+                os.remove(path)
+        share.reset()
+
+        # Her istemcinin eş hizmeti kendi önbelleğini boş bir HTTP portundan sunar
+        if args.es:
+            for client in clients:
+                peers.append(subprocess.Popen(
+                    [sys.executable, peer_path, "--onbellek-dizini", client["cache_dir"], "--http-portu", "0"],
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True))
+            for peer in peers:
+                peer.stdout.readline()
+
+        bandwidth = f"{args.bant_genisligi:g} Mbit/sn" if args.bant_genisligi > 0 else "sınırsız"
+        print(f"{len(clients)} istemci ({len(warm)} sıcak önbellek), oturumlar {args.oturum_yayilimi:.0f} sn, "
+              f"pencere {args.pencere} sn, gecikme {args.gecikme_ms:g} ms, bant {bandwidth}", flush=True)
+
+        results = []
+        results_lock = threading.Lock()
+        started = time.monotonic()
+
+        def session(client):
+            time.sleep(client["arrival"])
+            login = time.monotonic()
+            cached = any(f.startswith(f"{name}-") for f in os.listdir(client["cache_dir"]))
+            code = 0
+            if not cached:
+                time.sleep(client["delay"])
+                code, _ = run_client(client["lib"], name, client["env"],
+                                     etap_arkaplan_kurulum.LOGIN_REFRESH_TIMEOUT)
+            with results_lock:
+                results.append((code, (time.monotonic() - login) * 1000, cached))
+
+        threads = [threading.Thread(target=session, args=(c,)) for c in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total = time.monotonic() - started
+        server.shutdown()
+
+        latencies = sorted(ms for code, ms, _ in results if code == 0)
+        failed = sum(1 for code, _, _ in results if code != 0)
+        summary = {
+            "istemci": len(clients),
+            "sicak_onbellek": len(warm),
+            "sure_sn": round(total, 1),
+            "sunucu_bayt": share.bytes_sent,
+            "okuma": share.reads,
+            "kesilen_okuma": share.cuts,
+            "metadata": share.metas,
+            "en_yuksek_es_zamanli_okuma": share.peak_reads,
+            "en_yuksek_baglanti": share.peak_connections,
+            "hata": failed,
+        }
+        if latencies:
+            summary.update({f"p{int(q * 100)}_ms": round(percentile(latencies, q)) for q in (0.50, 0.95, 0.99)})
+            summary["en_cok_ms"] = round(latencies[-1])
+
+        print()
+        print(f"Sunucu: {share.bytes_sent / 1048576:.1f} MB gönderildi, {share.reads} okuma "
+              f"({share.cuts} kesildi), {share.metas} metadata isteği; en yüksek eş zamanlı okuma {share.peak_reads}, "
+              f"bağlantı {share.peak_connections}")
+        if latencies:
+            print(f"Oturumdan haftanın resmine (ms): p50 {summary['p50_ms']}, p95 {summary['p95_ms']}, "
+                  f"p99 {summary['p99_ms']}, en çok {summary['en_cok_ms']}")
+        print(f"Toplam süre {total:.1f} sn, {failed} hata")
+        print()
+
+        events, _ = load_events(event_files([os.path.join(workdir, "tahta")]))
+        print_table("İstemci aşamaları (kaynak / aşama)", events, lambda e: (e.get("kaynak", ""), e["asama"]))
+
+        if args.sonuc:
+            with open(args.sonuc, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+                f.write("\n")
+    finally:
+        for peer in peers:
+            peer.terminate()
+            peer.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+etap_arkaplan_kurulum.py için sınamalar: istenen durum (desired_state), diskle
+karşılaştırma (plan), değişikliklerin gerektirdiği komutlar (actions) ve üretilen
+dosyalar (kitaplığın bash sözdizimi, gömülü ve kurulan programlar, doldurulan ayarlar)
+ve systemd ile konuşan D-Bus istemcisinin tel biçimi. Hiçbiri sisteme dosya yazmaz veya
+systemd'ye bağlanmaz; D-Bus istemcisi geçici bir sokette sahte veriyoluyla denenir. Eş
+dağıtımı, loopback yayın adresinde çalışan eş hizmetleri ve sınama aynasıyla denenir. Ortak önbelleği iki kullanıcıyla
+deneyen sınamalar yalnızca root olarak çalışır.
+
+Çalıştırma:  python3 -m unittest test_etap_arkaplan_kurulum   (veya python3 -m pytest)
+"""
+
+import hashlib
+import http.server
+import json
+import os
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import etap_arkaplan_kurulum as kurulum
+import test_etap_programlar
+from etap_arkaplan_kurulum import (
+    AGENT_PATH, AUTOSTART_PATH, DCONF_BACKGROUND_PATH, LIB_PATH, MULTICAST_RECEIVER_PATH, PEER_PATH,
+    PEER_SERVICE_PATH, PREFETCH_PATH, PREFETCH_SERVICE_PATH, PREFETCH_TIMER_PATH, SCRIPT_PATH, SYSTEMD_DIR,
+    SYSTEM_WALLPAPER_PATH, CIFSInstaller, HTTPInstaller, NFSInstaller, SystemdBus, dbus_marshal, dbus_message,
+    dbus_unmarshal, program_source, systemd_unit_name,
+)
+from etap_programlar import es_istemci
+
+MIRRORS = ["10.1.0.5:/srv/arka_plan", "10.1.0.6:/srv/arka_plan"]
+LOOPBACK_BROADCAST = "127.255.255.255"
+EMBEDDED = {"MANIFEST_PY": "manifest_kaydi", "PEER_PY": "es_istemci", "FETCH_PY": "parcali_kopya",
+            "HTTP_PY": "http_al", "SCHEDULE_PY": "takvim_ara"}
+
+
+def installer(cls=NFSInstaller, **kwargs):
+    """Çıktısı sessiz bir kurulum nesnesi."""
+    if cls is CIFSInstaller:
+        return cls(["//10.1.0.5/arka_plan"], "etapshare", "parola", log=lambda line: None, **kwargs)
+    if cls is HTTPInstaller:
+        return cls(["http://10.1.0.5/arka-plan"], log=lambda line: None, **kwargs)
+    return cls(MIRRORS, log=lambda line: None, **kwargs)
+
+
+class DesiredStateTest(unittest.TestCase):
+    def test_mount_units_per_mirror(self):
+        files, remove = installer().desired_state(existing_only=False)
+        for mount_point in ("/mnt/arka_plan", "/mnt/arka_plan_2"):
+            self.assertIn(f"{SYSTEMD_DIR}/{systemd_unit_name(mount_point, 'mount')}", files)
+            self.assertIn(f"{SYSTEMD_DIR}/{systemd_unit_name(mount_point, 'automount')}", files)
+        self.assertEqual(files[LIB_PATH][1], 0o644)
+        self.assertEqual(files[AGENT_PATH][1], 0o755)
+        self.assertEqual(files[PREFETCH_PATH][1], 0o755)
+        self.assertIn(SCRIPT_PATH, remove)
+
+    def test_optional_services(self):
+        files, remove = installer().desired_state(existing_only=False)
+        self.assertNotIn(PEER_PATH, files)
+        self.assertIn(PEER_PATH, remove)
+        self.assertIn(MULTICAST_RECEIVER_PATH, remove)
+        files, remove = installer(peer_enabled=True, multicast_enabled=True).desired_state(existing_only=False)
+        self.assertEqual(files[PEER_PATH][1], 0o755)
+        self.assertIn(PEER_SERVICE_PATH, files)
+        self.assertIn(MULTICAST_RECEIVER_PATH, files)
+        self.assertNotIn(PEER_PATH, remove)
+
+    def test_system_wallpaper_replaces_agent(self):
+        files, remove = installer(system_wallpaper=True).desired_state(existing_only=False)
+        self.assertIn(SYSTEM_WALLPAPER_PATH, files)
+        self.assertNotIn(AGENT_PATH, files)
+        self.assertIn(AGENT_PATH, remove)
+        self.assertIn(AUTOSTART_PATH, remove)
+
+    def test_http_has_no_mount_units(self):
+        files, _ = installer(HTTPInstaller).desired_state(existing_only=False)
+        self.assertFalse([path for path in files if path.endswith((".mount", ".automount"))])
+        self.assertIn(LIB_PATH, files)
+
+
+class PlanTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def path(self, name, content=None, mode=0o644):
+        path = os.path.join(self.directory, name)
+        if content is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.chmod(path, mode)
+        return path
+
+    def test_only_differences(self):
+        same = self.path("ayni", "a\n")
+        content = self.path("icerik", "eski\n")
+        mode = self.path("kip", "b\n", 0o644)
+        new = self.path("yeni")
+        old = self.path("eski", "silinecek\n")
+        desired = ({same: ("a\n", 0o644), content: ("yeni\n", 0o644), mode: ("b\n", 0o755),
+                    new: ("c\n", 0o644)}, [old])
+        target = installer()
+        with mock.patch.object(target, "desired_state", return_value=desired):
+            changes = target.plan()
+        self.assertEqual(sorted(changes, key=lambda change: change[0]), sorted([
+            (content, "eski\n", "yeni\n", 0o644),
+            (mode, "b\n", "b\n", 0o755),
+            (new, None, "c\n", 0o644),
+            (old, "silinecek\n", None, None),
+        ], key=lambda change: change[0]))
+
+
+class ActionsTest(unittest.TestCase):
+    def actions(self, changed, running=True, **kwargs):
+        """
+        Birimler `running` ise etkin ve çalışıyor (automount'ta mount birimleri etkin değil,
+        istek üzerine bağlı); `changed` yollar değişmiş sayılır.
+        """
+        target = installer(**kwargs)
+
+        def unit_states(units):
+            if not running:
+                return {unit: ("disabled", "inactive") for unit in units}
+            return {unit: ("disabled" if unit.endswith(".mount") and target.automount_enabled else "enabled",
+                           "active") for unit in units}
+
+        with mock.patch.object(target, "unit_states", side_effect=unit_states):
+            return target.actions([(path, None, "", 0o644) for path in changed])
+
+    def test_nothing_to_do(self):
+        self.assertEqual(self.actions([]), [])
+
+    def test_fresh_install_enables_units(self):
+        commands = self.actions([LIB_PATH, PREFETCH_TIMER_PATH], running=False, automount_enabled=False)
+        for mount_point in ("/mnt/arka_plan", "/mnt/arka_plan_2"):
+            self.assertIn(["systemctl", "enable", "--now", systemd_unit_name(mount_point, "mount")], commands)
+        self.assertIn(["systemctl", "daemon-reload"], commands)
+        self.assertIn(["systemctl", "enable", "--now", os.path.basename(PREFETCH_TIMER_PATH)], commands)
+        self.assertEqual(commands[-1], ["systemctl", "start", "--no-block", os.path.basename(PREFETCH_SERVICE_PATH)])
+
+    def test_changed_unit_restarts_only_that_unit(self):
+        unit = systemd_unit_name("/mnt/arka_plan_2", "automount")
+        commands = self.actions([f"{SYSTEMD_DIR}/{unit}"])
+        self.assertEqual(commands, [["systemctl", "daemon-reload"], ["systemctl", "try-restart", unit]])
+
+    def test_changed_program_restarts_its_service(self):
+        commands = self.actions([PEER_PATH], peer_enabled=True)
+        self.assertEqual(commands, [["systemctl", "restart", os.path.basename(PEER_SERVICE_PATH)]])
+        # Eş dağıtımı kapalıyken eski programın değişmesi hizmeti başlatmaz
+        self.assertEqual(self.actions([PEER_PATH]), [])
+
+    def test_dconf_update(self):
+        self.assertEqual(self.actions([DCONF_BACKGROUND_PATH]), [["dconf", "update"]])
+
+
+class RenderedArtifactsTest(unittest.TestCase):
+    @unittest.skipUnless(shutil.which("bash"), "bash yok")
+    def test_lib_syntax_and_embedded_programs(self):
+        for cls in (NFSInstaller, CIFSInstaller, HTTPInstaller):
+            target = installer(cls)
+            with tempfile.NamedTemporaryFile("w", suffix=".sh", encoding="utf-8") as f:
+                f.write(target.render_lib(target.remote_dirs()))
+                f.flush()
+                subprocess.run(["bash", "-n", f.name], check=True)
+                # Kitaplığa gömülen her yardımcı etap_programlar/ altındaki kaynağıyla aynı olmalı
+                for variable, name in EMBEDDED.items():
+                    embedded = subprocess.run(["bash", "-c", f'source "$1" >/dev/null 2>&1; printf %s "${variable}"',
+                                               "bash", f.name], capture_output=True, text=True).stdout
+                    expected = program_source(name, **({"RECEIVED_PREFIX": kurulum.MULTICAST_RECEIVED_PREFIX}
+                                                        if name == "http_al" else {}))
+                    self.assertEqual(embedded, expected, (cls.__name__, variable))
+
+    def test_installed_programs_compile(self):
+        target = installer(peer_enabled=True, multicast_enabled=True)
+        for name, source in (("ajan", target.render_agent()), ("es_sunucu", target.render_peer()),
+                             ("coklu_yayin_alici", target.render_multicast_receiver())):
+            compile(source, name, "exec")
+            self.assertTrue(source.startswith("#!/usr/bin/python3\n"), name)
+
+    def test_settings_filled_in(self):
+        target = installer(school="Fatih Ortaokulu", journald_enabled=True, multicast_enabled=True)
+        agent = target.render_agent()
+        self.assertIn("EVENT_SCHOOL = 'Fatih Ortaokulu'\n", agent)
+        self.assertIn("EVENTS_JOURNALD = True\n", agent)
+        receiver = target.render_multicast_receiver()
+        self.assertIn("SHARES = ['/mnt/arka_plan', '/mnt/arka_plan_2']\n", receiver)
+        self.assertIn("SERVERS = ['10.1.0.5', '10.1.0.6']\n", receiver)
+        self.assertIn(f"MAGIC = {kurulum.MULTICAST_MAGIC!r}\n", receiver)
+
+    def test_unknown_setting_is_rejected(self):
+        with self.assertRaises(ValueError):
+            program_source("es_sunucu", YOK=1)
+
+    def test_units_point_at_programs(self):
+        target = installer(peer_enabled=True)
+        self.assertIn(f"ExecStart={PEER_PATH}", target.render_peer_service())
+        self.assertIn(f"Exec={AGENT_PATH}", target.render_autostart())
+        self.assertIn(f"ExecStart={PREFETCH_PATH}", target.render_prefetch_service(target.boot_units()))
+
+
+
+@unittest.skipUnless(hasattr(os, "geteuid") and os.geteuid() == 0 and shutil.which("bash"),
+                     "kullanıcı değiştirmek için root ve bash gerekli")
+class DBusWireTest(unittest.TestCase):
+    # Tel biçimi örnekleri elle, D-Bus belirtimindeki hizalama kurallarıyla yazılmıştır
+    HELLO = (b"l\x01\x00\x01" b"\x00\x00\x00\x00" b"\x01\x00\x00\x00" b"\x6d\x00\x00\x00"
+             b"\x01\x01o\x00" b"\x15\x00\x00\x00/org/freedesktop/DBus\x00" b"\x00\x00"
+             b"\x02\x01s\x00" b"\x14\x00\x00\x00org.freedesktop.DBus\x00" b"\x00\x00\x00"
+             b"\x03\x01s\x00" b"\x05\x00\x00\x00Hello\x00" b"\x00\x00"
+             b"\x06\x01s\x00" b"\x14\x00\x00\x00org.freedesktop.DBus\x00")
+    PROPERTIES = (b"\x1f\x00\x00\x00" b"\x00\x00\x00\x00"
+                  b"\x0b\x00\x00\x00ActiveState\x00" b"\x01s\x00" b"\x00" b"\x06\x00\x00\x00active\x00")
+
+    def marshal(self, signature, value, prefix=b""):
+        buf = bytearray(prefix)
+        dbus_marshal(buf, signature, value)
+        return bytes(buf)
+
+    def test_basic_types_are_aligned(self):
+        self.assertEqual(self.marshal("u", 0x12345678, b"\x01"), b"\x01\x00\x00\x00\x78\x56\x34\x12")
+        self.assertEqual(self.marshal("b", True), b"\x01\x00\x00\x00")
+        self.assertEqual(self.marshal("t", 1, b"\x01"), b"\x01" + b"\x00" * 7 + b"\x01" + b"\x00" * 7)
+        self.assertEqual(self.marshal("s", "abc"), b"\x03\x00\x00\x00abc\x00")
+        self.assertEqual(self.marshal("g", "ss"), b"\x02ss\x00")
+        self.assertEqual(self.marshal("as", ["a", "bc"]),
+                         b"\x0f\x00\x00\x00" b"\x01\x00\x00\x00a\x00" b"\x00\x00" b"\x02\x00\x00\x00bc\x00")
+
+    def test_dict_of_variants(self):
+        self.assertEqual(self.marshal("a{sv}", {"ActiveState": ("s", "active")}), self.PROPERTIES)
+        self.assertEqual(dbus_unmarshal(self.PROPERTIES, 0, "a{sv}"), ({"ActiveState": "active"}, 39))
+
+    def test_hello_message(self):
+        self.assertEqual(dbus_message(1, "/org/freedesktop/DBus", "org.freedesktop.DBus", "Hello",
+                                      "org.freedesktop.DBus"), self.HELLO + b"\x00\x00\x00")
+        fields, offset = dbus_unmarshal(self.HELLO, 12, "a(yv)")
+        self.assertEqual(offset, len(self.HELLO))
+        self.assertEqual(dict(fields), {1: "/org/freedesktop/DBus", 2: "org.freedesktop.DBus", 3: "Hello",
+                                        6: "org.freedesktop.DBus"})
+
+    def test_unmarshal_body(self):
+        # JobRemoved gövdesi (uoss), 4 baytlık hizalamayla
+        body = (b"\x07\x00\x00\x00" b"\x1f\x00\x00\x00/org/freedesktop/systemd1/job/7\x00"
+                b"\x0b\x00\x00\x00a-b.service\x00" b"\x04\x00\x00\x00done\x00")
+        values, offset = [], 0
+        for inner in "uoss":
+            value, offset = dbus_unmarshal(body, offset, inner)
+            values.append(value)
+        self.assertEqual(values, [7, "/org/freedesktop/systemd1/job/7", "a-b.service", "done"])
+        self.assertEqual(offset, len(body))
+
+    def test_client_says_hello_and_addresses_systemd(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "system_bus_socket")
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen(1)
+        self.addCleanup(listener.close)
+        calls = []
+
+        def reply(conn, serial, signature, *values):
+            body = bytearray()
+            for inner, value in zip(signature, values):
+                dbus_marshal(body, inner, value)
+            message = bytearray(struct.pack("<cBBBII", b"l", 2, 0, 1, len(body), serial))
+            dbus_marshal(message, "a(yv)", [(5, ("u", serial)), (8, ("g", signature))])
+            message.extend(b"\0" * (-len(message) % 8))
+            conn.sendall(bytes(message + body))
+
+        def fake_bus():
+            conn, _ = listener.accept()
+            with conn:
+                data = b""
+                while not data.endswith(b"\r\n"):
+                    data += conn.recv(256)
+                conn.sendall(b"OK 0123456789abcdef0123456789abcdef\r\n")
+                data = b""
+                while not data.endswith(b"BEGIN\r\n"):
+                    data += conn.recv(256)
+                for answer in (":1.42", "enabled"):
+                    fixed = kurulum.recv_exact(conn, 16)
+                    body_length, fields_length = struct.unpack_from("<I4xI", fixed, 4)
+                    header_length = 16 + fields_length + (-(16 + fields_length) % 8)
+                    message = fixed + kurulum.recv_exact(conn, header_length - 16 + body_length)
+                    fields = dict(dbus_unmarshal(message, 12, "a(yv)")[0])
+                    calls.append((fields[3], fields[6]))
+                    reply(conn, struct.unpack_from("<I", fixed, 8)[0], "s", answer)
+
+        thread = threading.Thread(target=fake_bus, daemon=True)
+        thread.start()
+        with mock.patch.object(SystemdBus, "SOCKET_PATH", path), SystemdBus() as bus:
+            self.assertEqual(bus.unique_name, ":1.42")
+            self.assertEqual(bus.call("GetUnitFileState", "s", "a-b.service"), ["enabled"])
+        thread.join(5)
+        self.assertEqual(calls, [("Hello", "org.freedesktop.DBus"), ("GetUnitFileState", "org.freedesktop.systemd1")])
+
+
+class TamperedPeer(http.server.BaseHTTPRequestHandler):
+    """Her özet sorusuna yanıt veren ve resmin yerine aynı boyutta bozuk içerik gönderen eş."""
+
+    def do_GET(self):
+        body = self.server.body
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PeerLoopbackTest(unittest.TestCase):
+    """
+    Eş dağıtımı: kurulan eş hizmeti (render_peer) ayrı süreçler olarak, kitaplık da eşleri
+    loopback yayın adresiyle sorarak çalışır. Aynanın aldığı istekler sunucuya gidilip
+    gidilmediğini gösterir.
+    """
+
+    IMAGE = test_etap_programlar.IMAGE
+    SHA = test_etap_programlar.SHA
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), test_etap_programlar.MirrorHandler)
+        self.server.manifest = {"resimler": {"week42": {"dosya": "resim.jpg", "boyut": len(self.IMAGE),
+                                                        "sha256": self.SHA}}}
+        self.server.body = self.IMAGE
+        self.server.range_mode = "dogru"
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        mirror = "http://127.0.0.1:%d/arka" % self.server.server_address[1]
+        peer_installer = installer(HTTPInstaller, peer_enabled=True, peer_broadcast=LOOPBACK_BROADCAST)
+        self.peer_program = os.path.join(self.base, "etap-arka-plan-es")
+        with open(self.peer_program, "w", encoding="utf-8") as f:
+            f.write(peer_installer.render_peer())
+        self.cache = os.path.join(self.base, "istemci")
+        os.mkdir(self.cache)
+        self.lib = os.path.join(self.base, "onbellek.sh")
+        with open(self.lib, "w", encoding="utf-8") as f:
+            f.write(peer_installer.render_lib([mirror], cache_dir=self.cache))
+
+    def start_peer(self, files):
+        """{ad: içerik} önbellekli bir eş hizmeti başlatır."""
+        cache = tempfile.mkdtemp(dir=self.base)
+        for name, data in files.items():
+            with open(os.path.join(cache, name), "wb") as f:
+                f.write(data)
+        peer = subprocess.Popen([sys.executable, self.peer_program, "--onbellek-dizini", cache,
+                                 "--port", str(self.port), "--http-portu", "0"], stdout=subprocess.PIPE, text=True)
+        self.addCleanup(peer.wait)
+        self.addCleanup(peer.terminate)
+        peer.stdout.readline()
+        peer.stdout.close()
+
+    def start_tampered_peer(self):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), TamperedPeer)
+        server.body = self.IMAGE[::-1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("", self.port))
+        self.addCleanup(sock.close)
+
+        def answer():
+            try:
+                while True:
+                    data, addr = sock.recvfrom(512)
+                    sha = data.decode("ascii").split()[1]
+                    sock.sendto(("ETAP-ES! %s %d" % (sha, server.server_address[1])).encode("ascii"), addr)
+            except OSError:
+                pass
+
+        threading.Thread(target=answer, daemon=True).start()
+
+    def fetch(self):
+        """onbellege_al week42; (çıkış kodu, önbellekteki yol, olaylar)."""
+        result = subprocess.run(["bash", "-c", '. "$1" && PEER_PORT="$2" && onbellege_al week42', "_",
+                                 self.lib, str(self.port)],
+                                env={"PATH": os.environ["PATH"], "HOME": self.base},
+                                capture_output=True, text=True, timeout=120)
+        with open(os.path.join(self.cache, ".olaylar.%d.jsonl" % os.getuid()), encoding="utf-8") as f:
+            events = [json.loads(line) for line in f]
+        return result.returncode, result.stdout.strip(), events
+
+    def image_requests(self):
+        return [path for path, _ in self.server.requests if path == "/arka/resim.jpg"]
+
+    def assert_cached(self, path):
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), self.IMAGE)
+
+    def test_peer_hit_skips_server(self):
+        self.start_peer({})
+        self.start_peer({"week42-%s.jpg" % self.SHA[:16]: self.IMAGE})
+        rc, path, events = self.fetch()
+        self.assertEqual(rc, 0)
+        self.assert_cached(path)
+        self.assertEqual(self.image_requests(), [])
+        copies = [e for e in events if e["asama"] == "kopyalama"]
+        self.assertEqual([(e["sonuc"], e["yontem"], e["sunucu"]) for e in copies], [("tamam", "es", "127.0.0.1")])
+
+    def test_peer_miss_falls_back_to_server(self):
+        self.start_peer({})
+        self.start_peer({"week42-%s.jpg" % self.SHA[:16]: b"baska resim"})
+        rc, path, events = self.fetch()
+        self.assertEqual(rc, 0)
+        self.assert_cached(path)
+        self.assertEqual(self.image_requests(), ["/arka/resim.jpg"])
+        self.assertIn(("es-sorgusu", "yok"), [(e["asama"], e["sonuc"]) for e in events])
+
+    def test_peer_with_mismatched_digest_does_not_answer(self):
+        # Adı özetin ilk 16 hanesiyle tutan ama içeriği farklı dosya sunulmaz, soruya yanıt da verilmez
+        tampered = self.IMAGE[:-1] + b"\0"
+        self.start_peer({"week42-%s.jpg" % self.SHA[:16]: tampered})
+        self.start_peer({"week42-%s.jpg" % hashlib.sha256(tampered).hexdigest()[:16]: tampered})
+        self.assertEqual(es_istemci.query(self.SHA, self.port, LOOPBACK_BROADCAST, 0.5), [])
+        self.start_peer({"week42-%s.jpg" % self.SHA[:16]: self.IMAGE})
+        self.assertEqual(len(es_istemci.query(self.SHA, self.port, LOOPBACK_BROADCAST, 0.5)), 1)
+
+    def test_tampered_download_is_rejected(self):
+        self.start_tampered_peer()
+        rc, path, events = self.fetch()
+        self.assertEqual(rc, 0)
+        self.assert_cached(path)
+        self.assertEqual(self.image_requests(), ["/arka/resim.jpg"])
+        self.assertIn(("es-sorgusu", "hata"), [(e["asama"], e["sonuc"]) for e in events])
+        self.assertNotIn("es", [e.get("yontem") for e in events if e["asama"] == "kopyalama"])
+
+
+class SharedCacheTest(unittest.TestCase):
+    """Yapışkan (1777) ortak önbellek: oturumlar birbirinin dosyasıyla engellenmemeli."""
+
+    USERS = (61001, 61002)
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+        os.chmod(self.base, 0o755)
+        self.cache = os.path.join(self.base, "onbellek")
+        os.mkdir(self.cache)
+        os.chmod(self.cache, 0o1777)
+        share = os.path.join(self.base, "paylasim")
+        os.mkdir(share)
+        self.data = os.urandom(50000)
+        sha = hashlib.sha256(self.data).hexdigest()
+        with open(os.path.join(share, "week42.jpg"), "wb") as f:
+            f.write(self.data)
+        with open(os.path.join(share, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({"resimler": {"week42": {"dosya": "week42.jpg", "boyut": len(self.data), "sha256": sha}}}, f)
+        self.shared = os.path.join(self.cache, "week42-%s.jpg" % sha[:16])
+        self.lib = os.path.join(self.base, "onbellek.sh")
+        with open(self.lib, "w", encoding="utf-8") as f:
+            f.write(installer().render_lib([share], cache_dir=self.cache))
+
+    def home(self, uid):
+        home = os.path.join(self.base, "ev-%d" % uid)
+        os.makedirs(home, exist_ok=True)
+        os.chown(home, uid, uid)
+        return home
+
+    def fetch(self, uid):
+        """`uid` olarak onbellege_al; (çıkış kodu, yazdırılan yol)."""
+        result = subprocess.run(["bash", "-c", '. "$1" && onbellege_al "$2"', "_", self.lib, "week42"],
+                                user=uid, group=uid, env={"PATH": os.environ["PATH"], "HOME": self.home(uid)},
+                                capture_output=True, text=True, timeout=120)
+        return result.returncode, result.stdout.strip()
+
+    def assert_image(self, path, uid):
+        self.assertEqual(os.stat(path).st_uid, uid)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_sessions_do_not_block_each_other(self):
+        first, second = self.USERS
+        rc, path = self.fetch(first)
+        self.assertEqual(rc, 0)
+        self.assertTrue(path.startswith(self.home(first) + "/"), path)
+        self.assert_image(path, first)
+        # Ortak önbellekte önceden açılan ad başka oturumu engellemez ve kullanılmaz
+        with open(self.shared, "wb") as f:
+            f.write(b"bozuk")
+        os.chown(self.shared, first, first)
+        rc, path = self.fetch(second)
+        self.assertEqual(rc, 0)
+        self.assertTrue(path.startswith(self.home(second) + "/"), path)
+        self.assert_image(path, second)
+        with open(os.path.join(self.cache, ".olaylar.%d.jsonl" % second), encoding="utf-8") as f:
+            events = [json.loads(line) for line in f]
+        self.assertEqual([(e["sonuc"], e["deneme"]) for e in events if e["asama"] == "onbellege-alma"],
+                         [("tamam", 1)])
+
+    def test_scheduler_copy_is_shared(self):
+        first, second = self.USERS
+        with open(self.shared, "wb") as f:
+            f.write(b"bozuk")
+        os.chown(self.shared, first, first)
+        rc, path = self.fetch(0)
+        self.assertEqual((rc, path), (0, self.shared))
+        self.assert_image(self.shared, 0)
+        # Oturum zamanlayıcının kopyasını kullanır, kendi dizinine indirmez
+        rc, path = self.fetch(second)
+        self.assertEqual((rc, path), (0, self.shared))
+        self.assertFalse([name for name in os.listdir(os.path.join(self.home(second), ".cache", "etap-arka-plan"))
+                          if name.endswith(".jpg")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+etap_programlar/ altındaki tahta programları için sınamalar: HTTP istemcisinin aralıklı
+(206) yanıtları ve özet doğrulaması, manifest varyant seçiminin iki kopyasının
+tutarlılığı, kitaplıktaki takvim aramasının etap_takvim_derle.resolve ile aynılığı ve
+parça parça kopyalamanın sürdürülmesi.
+
+Çalıştırma:  python3 -m unittest test_etap_programlar   (veya python3 -m pytest)
+"""
+
+import contextlib
+import datetime
+import hashlib
+import http.server
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import test_etap_takvim_derle
+from etap_programlar import http_al, manifest_kaydi, parcali_kopya, takvim_ara
+from etap_takvim_derle import resolve
+
+D = datetime.date
+
+IMAGE = bytes(range(256)) * 40
+SHA = hashlib.sha256(IMAGE).hexdigest()
+CHUNK = 1024
+
+
+class MirrorHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Sınama aynası: /arka/manifest.json ve /arka/resim.jpg. Resim yanıtı sunucunun
+    `range_mode` ayarına göre verilir: "dogru" Range'e uyar, "istenmeyen" her isteğe
+    206 döner, "okunamaz" 206'yı "bytes */<boyut>" ile döner.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("Range")))
+        if self.path == "/arka/manifest.json":
+            self.reply(200, json.dumps(self.server.manifest).encode("utf-8"))
+            return
+        if self.path != "/arka/resim.jpg":
+            self.reply(404, b"")
+            return
+        body = self.server.body
+        mode = self.server.range_mode
+        requested = self.headers.get("Range")
+        if mode == "dogru" and requested is None:
+            self.reply(200, body)
+            return
+        start = int(requested[6:-1]) if requested else 0
+        content_range = "bytes %d-%d/%d" % (start, len(body) - 1, len(body))
+        if mode == "okunamaz":
+            content_range = "bytes */%d" % len(body)
+        self.reply(206, body[start:], {"Content-Range": content_range})
+
+    def reply(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HttpFetchTest(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), MirrorHandler)
+        self.server.manifest = {"resimler": {"week42": {"dosya": "resim.jpg", "boyut": len(IMAGE), "sha256": SHA}}}
+        self.server.body = IMAGE
+        self.server.range_mode = "dogru"
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = "http://127.0.0.1:%d/arka" % self.server.server_address[1]
+        self.cache = tempfile.mkdtemp()
+        self.state = os.path.join(self.cache, ".http-durumu.json")
+        self.part = os.path.join(self.cache, ".week42-%s.kismi.%d" % (SHA[:16], os.getuid()))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache)
+
+    def fetch(self):
+        """HTTP_PY resim kipi; (çıkış kodu, yazdırılan satırlar)."""
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            rc = http_al.main(["resim", self.base, "5", "week42", "", self.cache, self.cache, self.state, "ayna",
+                               str(CHUNK), "1", "0", "0"])
+        return rc, out.getvalue().splitlines()
+
+    def events(self, lines):
+        return [line.split()[1:4:2] for line in lines if line.startswith("olay ")]
+
+    def test_full_download(self):
+        rc, lines = self.fetch()
+        self.assertEqual(rc, 0)
+        self.assertIn(["kopyalama", "tamam"], self.events(lines))
+        with open(self.part, "rb") as f:
+            self.assertEqual(f.read(), IMAGE)
+
+    def test_resume_from_last_chunk(self):
+        with open(self.part, "wb") as f:
+            f.write(IMAGE[:CHUNK + 100])
+        rc, lines = self.fetch()
+        self.assertEqual(rc, 0)
+        self.assertEqual(self.server.requests[-1], ("/arka/resim.jpg", "bytes=%d-" % CHUNK))
+        self.assertIn("devam=%d" % CHUNK, next(line for line in lines if line.startswith("olay kopyalama")))
+        with open(self.part, "rb") as f:
+            self.assertEqual(f.read(), IMAGE)
+
+    def test_unrequested_partial_response_is_an_error(self):
+        self.server.range_mode = "istenmeyen"
+        rc, lines = self.fetch()
+        self.assertEqual(rc, 1)
+        self.assertIn(["kopyalama", "hata"], self.events(lines))
+        self.assertFalse(os.path.exists(self.part))
+
+    def test_unparseable_content_range_is_an_error(self):
+        with open(self.part, "wb") as f:
+            f.write(IMAGE[:CHUNK])
+        self.server.range_mode = "okunamaz"
+        rc, lines = self.fetch()
+        self.assertEqual(rc, 1)
+        self.assertIn(["kopyalama", "hata"], self.events(lines))
+
+    def test_digest_mismatch_discards_download(self):
+        self.server.body = IMAGE[::-1]
+        rc, lines = self.fetch()
+        self.assertEqual(rc, 1)
+        self.assertIn(["dogrulama", "hata"], self.events(lines))
+        self.assertFalse(os.path.exists(self.part))
+
+
+class VariantSelectionTest(unittest.TestCase):
+    ENTRY = {
+        "dosya": "week42.jpg", "boyut": 900, "sha256": "a" * 64,
+        "varyantlar": {
+            "1920x1080": {"dosya": "week42-1920x1080.jpg", "boyut": 500, "sha256": "b" * 64},
+            "3840x2160": {"dosya": "week42-3840x2160.jpg", "boyut": 800, "sha256": "c" * 64},
+            "1366x768": {"dosya": "week42-1366x768.jpg", "boyut": 300, "sha256": "d" * 64},
+        },
+    }
+
+    def test_smallest_covering_variant(self):
+        cases = {"1920x1080": "b", "1600x900": "b", "1366x768": "d", "2560x1440": "c",
+                 "5120x2880": "a", "": "a", "bozuk": "a"}
+        for resolution, expected in cases.items():
+            self.assertEqual(manifest_kaydi.select_variant(self.ENTRY, resolution)["sha256"][0], expected,
+                             resolution)
+            # Paylaşımdan (MANIFEST_PY) ve HTTP'den (HTTP_PY) okuyan yollar aynı resmi seçmeli
+            self.assertEqual(http_al.select_variant(self.ENTRY, resolution),
+                             manifest_kaydi.select_variant(self.ENTRY, resolution), resolution)
+
+    def test_exit_codes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "manifest.json")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(manifest_kaydi.main([path, "week42", ""]), 3)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("{")
+            self.assertEqual(manifest_kaydi.main([path, "week42", ""]), 1)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"resimler": {"week42": self.ENTRY}}, f)
+            self.assertEqual(manifest_kaydi.main([path, "week43", ""]), 2)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                self.assertEqual(manifest_kaydi.main([path, "week42", "1920x1080"]), 0)
+        self.assertEqual(out.getvalue().split(), ["week42-1920x1080.jpg", "500", "b" * 64])
+
+
+class ScheduleLookupTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, "takvim.json")
+        cls.schedule = test_etap_takvim_derle.compile_text(test_etap_takvim_derle.OverrideTest.RULES)
+        with open(cls.path, "w", encoding="utf-8") as f:
+            json.dump(cls.schedule, f)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def test_matches_resolve(self):
+        first = D(2026, 10, 12)
+        for host, school in (("", ""), ("tahta-12", "lise-a"), ("tahta-13", "lise-a"), ("tahta-13", "lise-b")):
+            for n in range(42):
+                day = first + datetime.timedelta(days=n)
+                names, status = takvim_ara.image_names(self.path, host, school, day, 1)
+                expected = resolve(self.schedule, day, host=host, school=school)
+                self.assertEqual(status, 0)
+                self.assertEqual(names, [expected or "week%02d" % day.isocalendar()[1]], (day, host, school))
+
+    def test_names_in_first_seen_order(self):
+        names, _ = takvim_ara.image_names(self.path, "", "", D(2026, 10, 19), 8)
+        self.assertEqual(names, ["mesaj1", "mesaj2", "mesaj3", "week43"])
+
+    def test_missing_and_broken_schedule(self):
+        names, status = takvim_ara.image_names(os.path.join(self.directory, "yok.json"), "", "", D(2026, 10, 19), 1)
+        self.assertEqual((names, status), (["week43"], 0))
+        broken = os.path.join(self.directory, "bozuk.json")
+        with open(broken, "w", encoding="utf-8") as f:
+            f.write("[]")
+        names, status = takvim_ara.image_names(broken, "", "", D(2026, 10, 19), 1)
+        self.assertEqual((names, status), (["week43"], 1))
+
+
+class ChunkedCopyTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.part = os.path.join(directory, "kismi")
+
+    def test_resume_rehashes_local_prefix(self):
+        with open(self.part, "wb") as f:
+            f.write(IMAGE[:CHUNK + 10])
+        # Parçanın sonrasındaki yarım bayt atılır, yalnızca kalan kısım akıştan okunur
+        received, rc = parcali_kopya.append(io.BytesIO(IMAGE[CHUNK:]), self.part, CHUNK, len(IMAGE), SHA, CHUNK)
+        self.assertEqual((received, rc), (len(IMAGE) - CHUNK, 0))
+        with open(self.part, "rb") as f:
+            self.assertEqual(f.read(), IMAGE)
+
+    def test_short_stream_keeps_part(self):
+        received, rc = parcali_kopya.append(io.BytesIO(IMAGE[:3000]), self.part, 0, len(IMAGE), SHA, CHUNK)
+        self.assertEqual((received, rc), (3000, 1))
+        self.assertEqual(os.path.getsize(self.part), 3000)
+
+    def test_digest_mismatch_removes_part(self):
+        received, rc = parcali_kopya.append(io.BytesIO(IMAGE[::-1]), self.part, 0, len(IMAGE), SHA, CHUNK)
+        self.assertEqual((received, rc), (len(IMAGE), 3))
+        self.assertFalse(os.path.exists(self.part))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+etap_takvim_derle.py için sınamalar: ISO haftası (53. hafta ve yıl dönümü, date +%V
+ile karşılaştırma) ve kuralların baskınlık sırası (tahta > okul > genel; tatil ve
+sınav > günlük dönüşüm).
+
+Çalıştırma:  python3 -m unittest test_etap_takvim_derle   (veya python3 -m pytest)
+"""
+
+import datetime
+import os
+import shutil
+import subprocess
+import tempfile
+import textwrap
+import unittest
+
+from etap_takvim_derle import compile_schedule, load_rules, resolve
+
+D = datetime.date
+
+
+def compile_text(text):
+    """Kural dosyası metnini geçici dosyadan okuyup derler."""
+    fd, path = tempfile.mkstemp(suffix=".ini")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(textwrap.dedent(text))
+        first, last, week53, rules = load_rules(path)
+    finally:
+        os.remove(path)
+    return compile_schedule(first, last, week53, rules)
+
+
+def days(first, last):
+    return [first + datetime.timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+class IsoWeekTest(unittest.TestCase):
+    def test_week53(self):
+        # 2026 perşembe başlar: 28 Aralık 2026 - 3 Ocak 2027 ISO 53. haftadır
+        schedule = compile_schedule(D(2026, 12, 21), D(2027, 1, 10), "week53", [])
+        self.assertEqual(resolve(schedule, D(2026, 12, 27)), "week52")
+        for day in days(D(2026, 12, 28), D(2027, 1, 3)):
+            self.assertEqual(resolve(schedule, day), "week53", day)
+        self.assertEqual(resolve(schedule, D(2027, 1, 4)), "week01")
+
+    def test_week53_image_from_rules(self):
+        schedule = compile_text("""
+            [takvim]
+            baslangic = 2026-12-21
+            bitis = 2027-01-10
+            hafta53 = week52
+        """)
+        self.assertEqual(resolve(schedule, D(2026, 12, 31)), "week52")
+        self.assertEqual(resolve(schedule, D(2027, 1, 5)), "week01")
+
+    def test_year_boundary(self):
+        # 29 Aralık - 4 Ocak: 53 haftalı yılda da (2026) 52 haftalı yılda da (2025) hafta değişimi
+        # yılbaşında değil pazartesi olur
+        expected = {
+            D(2025, 12, 28): "week52", D(2025, 12, 29): "week01", D(2026, 1, 1): "week01",
+            D(2026, 1, 4): "week01", D(2026, 1, 5): "week02",
+            D(2026, 12, 29): "week53", D(2027, 1, 1): "week53", D(2027, 1, 3): "week53",
+            D(2027, 1, 4): "week01",
+        }
+        schedule = compile_schedule(D(2025, 12, 1), D(2027, 1, 31), "week53", [])
+        for day, image in expected.items():
+            self.assertEqual(resolve(schedule, day), image, day)
+
+    @unittest.skipUnless(shutil.which("date"), "date komutu yok")
+    def test_matches_date_command(self):
+        # Kitaplık ve zamanlayıcı takvim dışında haftayı date +%V ile bulur; derleme aynı olmalı
+        first, last = D(2020, 12, 20), D(2021, 1, 10)
+        checked = days(first, last) + days(D(2026, 12, 20), D(2027, 1, 10))
+        schedule = compile_schedule(first, D(2027, 1, 10), "week53", [])
+        for day in checked:
+            week = subprocess.run(["date", "-d", day.isoformat(), "+%V"], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+            self.assertEqual(resolve(schedule, day), "week" + week, day)
+
+    def test_outside_schedule(self):
+        schedule = compile_schedule(D(2026, 9, 7), D(2026, 9, 13), "week53", [])
+        self.assertIsNone(resolve(schedule, D(2026, 9, 6)))
+        self.assertIsNone(resolve(schedule, D(2026, 9, 14)))
+
+
+class OverrideTest(unittest.TestCase):
+    RULES = """
+        [takvim]
+        baslangic = 2026-10-19
+        bitis = 2026-11-15
+
+        [sabah-mesajlari]
+        tarih = 2026-10-19..2026-11-15
+        gunler = pzt, sal, car, per, cum
+        resim = mesaj1, mesaj2, mesaj3
+
+        [sinav-haftasi]
+        tarih = 2026-W45
+        gunler = pzt, sal, car, per, cum
+        resim = sinav
+        oncelik = 5
+
+        [ara-tatil]
+        tarih = 2026-11-11..2026-11-13
+        resim = tatil
+        oncelik = 10
+
+        [okul-gunu]
+        tarih = 2026-10-21
+        resim = okul_gunu
+        okullar = lise-a
+
+        [tahta-mesaji]
+        tarih = 2026-10-21
+        resim = tahta
+        makineler = tahta-12
+
+        [okul-sinavi]
+        tarih = 2026-11-04
+        resim = okul_sinavi
+        oncelik = 5
+        okullar = lise-a
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.schedule = compile_text(cls.RULES)
+
+    def test_rotation(self):
+        # Eşleşen günlerde sırayla döner; hafta sonu kurala uymaz, haftanın resmi kalır
+        self.assertEqual([resolve(self.schedule, day) for day in days(D(2026, 10, 19), D(2026, 10, 26))],
+                         ["mesaj1", "mesaj2", "mesaj3", "mesaj1", "mesaj2", "week43", "week43", "mesaj3"])
+
+    def test_host_over_school_over_general(self):
+        day = D(2026, 10, 21)
+        self.assertEqual(resolve(self.schedule, day), "mesaj3")
+        self.assertEqual(resolve(self.schedule, day, school="lise-a"), "okul_gunu")
+        self.assertEqual(resolve(self.schedule, day, host="tahta-12"), "tahta")
+        self.assertEqual(resolve(self.schedule, day, host="tahta-12", school="lise-a"), "tahta")
+        self.assertEqual(resolve(self.schedule, day, host="tahta-13", school="lise-b"), "mesaj3")
+
+    def test_exam_and_holiday_over_rotation(self):
+        self.assertEqual(resolve(self.schedule, D(2026, 11, 2)), "sinav")
+        self.assertEqual(resolve(self.schedule, D(2026, 11, 6)), "sinav")
+        # Dönüşüm sınav günlerini de sayar: 9 Kasım eşleşen 16. gündür (mesaj1)
+        self.assertEqual(resolve(self.schedule, D(2026, 11, 9)), "mesaj1")
+        self.assertEqual(resolve(self.schedule, D(2026, 11, 10)), "mesaj2")
+        # Tatil sınavdan da önceliklidir; tahtaya ve okula özel öncelikli olmayan kurallar tatili ezmez
+        self.assertEqual(resolve(self.schedule, D(2026, 11, 12)), "tatil")
+        self.assertEqual(resolve(self.schedule, D(2026, 11, 12), host="tahta-12", school="lise-a"), "tatil")
+        # Hafta sonu: dönüşüm ve sınav uymaz, tatil yalnızca verilen günlerdedir
+        self.assertEqual(resolve(self.schedule, D(2026, 11, 8)), "week45")
+
+    def test_priority_before_layer(self):
+        # Aynı öncelikte okul kuralı genel sınavı ezer; öncelikli genel kural öncelik 0 okul kuralını ezer
+        self.assertEqual(resolve(self.schedule, D(2026, 11, 4), school="lise-a"), "okul_sinavi")
+        self.assertEqual(resolve(self.schedule, D(2026, 11, 4), school="lise-b"), "sinav")
+        self.assertEqual(resolve(self.schedule, D(2026, 10, 21), school="lise-a"), "okul_gunu")
+
+
+if __name__ == "__main__":
+    unittest.main()